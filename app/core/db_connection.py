@@ -1,7 +1,7 @@
 # app/core/db_connection.py
 import boto3
 from botocore.exceptions import ClientError
-from app.core.config import DYNAMODB_ENDPOINT_URL, AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY
+from app.core.config import DYNAMODB_ENDPOINT_URL, DYNAMODB_STREAMS_ENDPOINT_URL, AWS_REGION, AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, STORAGE_BACKEND, SQLITE_PATH
 
 class DynamoDBConnection:
     _instance = None
@@ -15,6 +15,13 @@ class DynamoDBConnection:
     def initialize(self):
         if not self._is_initialized:
             try:
+                if STORAGE_BACKEND == 'sqlite':
+                    # Embedded backend exposing the same resource/Table interface, no DynamoDB needed
+                    from app.storage.sqlite_backend import SQLiteResource
+                    self.dynamodb_resource = SQLiteResource(SQLITE_PATH)
+                    self._is_initialized = True
+                    print(f"SQLite storage backend initialized ({SQLITE_PATH}).")
+                    return
                 # Use boto3.resource for higher-level operations (put_item, get_item, query)
                 self.dynamodb_resource = boto3.resource(
                     'dynamodb',
@@ -29,5 +36,17 @@ class DynamoDBConnection:
                 print(f"Failed to initialize DynamoDB connection: {e}")
                 raise
 
+    def streams_client(self):
+        """Low-level DynamoDB Streams client (DynamoDB backend only), created on first use."""
+        if getattr(self, '_streams_client', None) is None:
+            self._streams_client = boto3.client(
+                'dynamodbstreams',
+                region_name=AWS_REGION,
+                endpoint_url=DYNAMODB_STREAMS_ENDPOINT_URL,
+                aws_access_key_id=AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+            )
+        return self._streams_client
+
 # Instantiate the connection once. This will be imported by repositories.
 db_connection = DynamoDBConnection()
\ No newline at end of file
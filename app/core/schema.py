@@ -0,0 +1,105 @@
+# app/core/schema.py
+"""
+Declarative DynamoDB schema: every table with its keys, GSIs, stream and TTL.
+The migration runner (app.jobs.migrate) creates what is missing and never drops
+or recreates a table; changes to an existing table go through a new migration.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    USERS_TABLE_NAME, EVENTS_TABLE_NAME, USER_EVENT_RELATIONS_TABLE_NAME, EMAIL_LOGS_TABLE_NAME,
+    SUGGESTIONS_TABLE_NAME, SCHEMA_MIGRATIONS_TABLE_NAME, SINGLE_TABLE_NAME, CAMPAIGNS_TABLE_NAME
+)
+from app.repositories.user_event_repository import ROLE_INDEX_NAME, ROLE_SHARD_ATTRIBUTE
+from app.repositories.single_table_repository import GSI1_INDEX_NAME
+
+def gsi(index_name: str, hash_key: str, range_key: Optional[str] = None) -> Dict[str, Any]:
+    key_schema = [{'AttributeName': hash_key, 'KeyType': 'HASH'}]
+    if range_key:
+        key_schema.append({'AttributeName': range_key, 'KeyType': 'RANGE'})
+    return {'IndexName': index_name, 'KeySchema': key_schema, 'Projection': {'ProjectionType': 'ALL'}}
+
+class TableSpec:
+    """One table. All key attributes are strings; tables are on-demand (PAY_PER_REQUEST)."""
+    def __init__(self, name: str, hash_key: str, range_key: Optional[str] = None,
+                 indexes: Tuple[Dict[str, Any], ...] = (), stream_view_type: Optional[str] = None,
+                 ttl_attribute: Optional[str] = None):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = {index['IndexName']: index for index in indexes}
+        self.stream_view_type = stream_view_type
+        self.ttl_attribute = ttl_attribute
+
+    @property
+    def key_schema(self) -> List[Dict[str, str]]:
+        return gsi("", self.hash_key, self.range_key)['KeySchema']
+
+    def attribute_definitions(self, index_names: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """Definitions for the table keys plus the keys of the given indexes (all indexes by default)."""
+        names = [key['AttributeName'] for key in self.key_schema]
+        for index_name in self.indexes if index_names is None else index_names:
+            names += [key['AttributeName'] for key in self.indexes[index_name]['KeySchema']]
+        return [{'AttributeName': name, 'AttributeType': 'S'} for name in dict.fromkeys(names)]
+
+    def create_params(self, index_names: List[str]) -> Dict[str, Any]:
+        params = {
+            'TableName': self.name,
+            'KeySchema': self.key_schema,
+            'AttributeDefinitions': self.attribute_definitions(index_names),
+            'BillingMode': 'PAY_PER_REQUEST',
+        }
+        if index_names:
+            params['GlobalSecondaryIndexes'] = [self.indexes[index_name] for index_name in index_names]
+        if self.stream_view_type:
+            params['StreamSpecification'] = {'StreamEnabled': True, 'StreamViewType': self.stream_view_type}
+        return params
+
+TABLES = [
+    TableSpec(
+        USERS_TABLE_NAME, 'user_id',
+        # Used by the filter planner for exact-match/prefix filters on low-cardinality fields
+        indexes=(
+            gsi('company-job_title-index', 'company', 'job_title'),
+            gsi('city-last_name-index', 'city', 'last_name'),
+            gsi('state-city-index', 'state', 'city'),
+            gsi('gender-last_name-index', 'gender', 'last_name'),
+        )
+    ),
+    TableSpec(
+        EVENTS_TABLE_NAME, 'event_id',
+        # Change feeds for the in-memory event catalog: the stream on DynamoDB, the version index elsewhere
+        indexes=(gsi('updated_day-updated_at-index', 'updated_day', 'updated_at'),),
+        stream_view_type='NEW_IMAGE'
+    ),
+    TableSpec(
+        EMAIL_LOGS_TABLE_NAME, 'email_id',
+        # Time-ordered access: latest by status, by recipient, and per-day for unfiltered listings
+        indexes=(
+            gsi('status-sent_at-index', 'status', 'sent_at'),
+            gsi('recipient_email-sent_at-index', 'recipient_email', 'sent_at'),
+            gsi('log_day-sent_at-index', 'log_day', 'sent_at'),
+        ),
+        ttl_attribute='expires_at'
+    ),
+    TableSpec(
+        USER_EVENT_RELATIONS_TABLE_NAME, 'PK', 'SK',
+        indexes=(
+            gsi('GSI1_PK-GSI1_SK-index', 'GSI1_PK', 'GSI1_SK'),
+            # Keyed on role#0..role#N-1 so one role's relations spread over N partitions
+            gsi(ROLE_INDEX_NAME, ROLE_SHARD_ATTRIBUTE, 'user_event_id'),
+        )
+    ),
+    # Written by app.jobs.suggestions, read by GET /users/{user_id}/suggestions
+    TableSpec(SUGGESTIONS_TABLE_NAME, 'user_id'),
+]
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+# Single-table layout (SINGLE_TABLE_MODE): entities next to their relations, events above their users in GSI1
+SINGLE_TABLE = TableSpec(SINGLE_TABLE_NAME, 'PK', 'SK', indexes=(gsi(GSI1_INDEX_NAME, 'GSI1_PK', 'GSI1_SK'),))
+
+# Email campaign progress and cancel requests, shared by every server worker
+CAMPAIGNS_TABLE = TableSpec(CAMPAIGNS_TABLE_NAME, 'campaign_id', ttl_attribute='expires_at')
+
+# Applied schema version, the migration lease and backfill checkpoints
+MIGRATIONS_TABLE = TableSpec(SCHEMA_MIGRATIONS_TABLE_NAME, 'id')
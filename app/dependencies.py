@@ -1,23 +1,150 @@
 # app/dependencies.py
 
+import logging
+import threading
+from typing import Optional
+from app.core.config import (
+    SINGLE_TABLE_MODE, SCAN_TOTAL_SEGMENTS, EVENT_CATALOG_ENABLED, EVENT_CATALOG_CHANGE_FEED,
+    EVENT_CATALOG_REFRESH_SECONDS, EVENT_CATALOG_MAX_STALENESS_SECONDS, EVENT_CATALOG_RESYNC_SECONDS,
+    SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_MAX_WORKERS, ADMISSION_INITIAL_LIMIT, ADMISSION_MIN_LIMIT,
+    ADMISSION_MAX_LIMIT, ADMISSION_TARGET_LATENCY_MS, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS,
+    ADMISSION_BULK_MAX_CONCURRENCY, ADMISSION_BULK_QUEUE_SIZE, ADMISSION_BULK_QUEUE_TIMEOUT_MS,
+    ANALYTICS_STATS_PATH, ANALYTICS_RELOAD_SECONDS, EVENT_SEARCH_INDEX_PATH, EVENT_SEARCH_REFRESH_SECONDS,
+    EVENT_SEARCH_RESYNC_SECONDS
+)
 from app.repositories.users_repository import UserRepository
 from app.repositories.events_repository import EventRepository
 from app.repositories.user_event_repository import UserEventRelationsRepository
 from app.repositories.email_logs_repository import EmailLogsRepository
+from app.repositories.single_table_repository import SingleTableRepository
+from app.repositories.event_catalog import EventCatalog
+from app.repositories.suggestions_repository import SuggestionsRepository
+from app.repositories.campaigns_repository import CampaignsRepository
+from app.search.event_index import EventSearchIndex, EventSearchRefresher
+from app.jobs.email_campaign import CampaignRegistry
+from app.jobs.analytics import StatsStore
+from app.utils.single_flight import SingleFlight
+from app.utils.admission import AdmissionController, PriorityClass
 
-# Instantiate repositories here. FastAPI's Depends will provide these instances.
-user_repo_instance = UserRepository()
-event_repo_instance = EventRepository()
-user_event_relations_repo_instance = UserEventRelationsRepository()
+# Repositories are created on first use (or by warmup() at worker startup) rather than at
+# import time, so the app can be imported once in a pre-forking master without sharing
+# boto3 connections between worker processes. FastAPI's Depends will provide these instances.
+logger = logging.getLogger('uvicorn.error')
+
+_repositories = {}
+_repositories_lock = threading.RLock()
+
+event_search_index_instance = EventSearchIndex()
+stats_store_instance = StatsStore(ANALYTICS_STATS_PATH, ANALYTICS_RELOAD_SECONDS)
+single_flight_instance = SingleFlight(SINGLE_FLIGHT_MAX_WORKERS, enabled=SINGLE_FLIGHT_ENABLED)
+admission_controller_instance = AdmissionController(
+    [
+        PriorityClass("interactive", 0, ADMISSION_MAX_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS / 1000),
+        PriorityClass("write", 1, ADMISSION_MAX_LIMIT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_MS / 1000),
+        # Bulk latency says little about backend health, so it does not move the shared limit
+        PriorityClass("bulk", 2, ADMISSION_BULK_MAX_CONCURRENCY, ADMISSION_BULK_QUEUE_SIZE,
+                      ADMISSION_BULK_QUEUE_TIMEOUT_MS / 1000, adaptive=False),
+    ],
+    initial_limit=ADMISSION_INITIAL_LIMIT,
+    min_limit=ADMISSION_MIN_LIMIT,
+    max_limit=ADMISSION_MAX_LIMIT,
+    target_latency_seconds=ADMISSION_TARGET_LATENCY_MS / 1000,
+)
+
+def _repository(name: str, factory):
+    repo = _repositories.get(name)
+    if repo is None:
+        with _repositories_lock:
+            repo = _repositories.get(name)
+            if repo is None:
+                repo = _repositories[name] = factory()
+    return repo
+
+def _with_mirror(factory):
+    # In 'dual' and 'on' single-table modes, entity writes are mirrored into the single table
+    def create():
+        repo = factory()
+        if SINGLE_TABLE_MODE in ("dual", "on"):
+            repo.mirror = get_single_table_repo()
+        return repo
+    return create
 
 def get_user_repo() -> UserRepository:
-    return user_repo_instance
+    return _repository("users", _with_mirror(UserRepository))
 
 def get_event_repo() -> EventRepository:
-    return event_repo_instance
+    return _repository("events", _with_mirror(EventRepository))
 
 def get_user_event_relations_repo() -> UserEventRelationsRepository:
-    return user_event_relations_repo_instance
+    return _repository("user_event_relations", _with_mirror(UserEventRelationsRepository))
+
+def get_single_table_repo() -> SingleTableRepository:
+    return _repository("single_table", SingleTableRepository)
+
+def get_suggestions_repo() -> SuggestionsRepository:
+    return _repository("suggestions", SuggestionsRepository)
+
+def _create_event_catalog() -> EventCatalog:
+    event_repo = get_event_repo()
+    catalog = EventCatalog(
+        event_repo,
+        refresh_seconds=EVENT_CATALOG_REFRESH_SECONDS,
+        max_staleness_seconds=EVENT_CATALOG_MAX_STALENESS_SECONDS,
+        resync_seconds=EVENT_CATALOG_RESYNC_SECONDS,
+        change_feed=EVENT_CATALOG_CHANGE_FEED,
+        total_segments=SCAN_TOTAL_SEGMENTS
+    )
+    try:
+        catalog.load()
+    except Exception as e:
+        # Reads fall back to DynamoDB until the background refresher manages a load
+        logger.warning(f"Event catalog initial load failed: {e}")
+    event_repo.catalog = catalog
+    catalog.start()
+    return catalog
+
+def get_event_catalog() -> Optional[EventCatalog]:
+    if not EVENT_CATALOG_ENABLED:
+        return None
+    return _repository("event_catalog", _create_event_catalog)
+
+def get_event_search_index() -> EventSearchIndex:
+    return event_search_index_instance
+
+def get_event_search_refresher() -> EventSearchRefresher:
+    return _repository("event_search_refresher", lambda: EventSearchRefresher(
+        event_search_index_instance,
+        get_event_repo(),
+        refresh_seconds=EVENT_SEARCH_REFRESH_SECONDS,
+        resync_seconds=EVENT_SEARCH_RESYNC_SECONDS,
+        snapshot_path=EVENT_SEARCH_INDEX_PATH
+    ))
+
+def get_single_flight() -> SingleFlight:
+    return single_flight_instance
+
+def get_admission_controller() -> AdmissionController:
+    return admission_controller_instance
+
+def get_stats_store() -> StatsStore:
+    return stats_store_instance
+
+def get_campaigns_repo() -> CampaignsRepository:
+    return _repository("campaigns", CampaignsRepository)
+
+def get_campaign_registry() -> CampaignRegistry:
+    return _repository("campaign_registry", lambda: CampaignRegistry(get_campaigns_repo()))
 
 def get_email_logs_repo() -> EmailLogsRepository:
-    return EmailLogsRepository()  # Assuming you have an EmailLogsRepository defined similarly
\ No newline at end of file
+    return _repository("email_logs", EmailLogsRepository)
+
+def warmup() -> None:
+    """Creates the DynamoDB connection and every repository (loading table metadata) up front."""
+    get_user_repo()
+    get_event_repo()
+    get_user_event_relations_repo()
+    get_email_logs_repo()
+    get_campaigns_repo()
+    if SINGLE_TABLE_MODE in ("dual", "on"):
+        get_single_table_repo()
+    get_event_catalog()
\ No newline at end of file
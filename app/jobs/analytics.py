@@ -0,0 +1,273 @@
+# app/jobs/analytics.py
+"""
+Aggregates user and event attendance statistics for `GET /stats/`.
+
+A full run scans Users and UserEventRelations with parallel segments, reading only
+the attributes it aggregates, and writes the result to ANALYTICS_STATS_PATH:
+
+    python -m app.jobs.analytics [--segments 8]
+
+Attendance of individual events can then be brought up to date without a scan
+(a few Select=COUNT queries per event), e.g. after a roster import:
+
+    python -m app.jobs.analytics --events e1,e2
+
+The API reloads the file when it changes, so neither run needs a restart.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import ANALYTICS_STATS_PATH, SCAN_TOTAL_SEGMENTS
+from app.repositories.users_repository import UserRepository
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository
+
+logger = logging.getLogger('uvicorn.error')
+
+USER_DIMENSIONS = ("company", "city", "job_title")
+ROLES = ("owner", "host", "attendee")
+
+class ValueCounts:
+    """
+    Dictionary-encoded counts for one column: each distinct value gets an integer
+    code and its count lives in an unsigned 64-bit array slot, so aggregating
+    millions of rows allocates nothing per row once a value has been seen.
+    """
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+        self.counts = array('Q')
+
+    def code(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.counts.append(0)
+        return code
+
+    def add(self, value: Any, count: int = 1) -> None:
+        self.counts[self.code(value)] += count
+
+    def merge(self, other: "ValueCounts") -> None:
+        for value, count in zip(other.values, other.counts):
+            self.add(value, count)
+
+    def top(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        order = sorted(range(len(self.values)), key=lambda code: (-self.counts[code], str(self.values[code])))
+        return [{"value": self.values[code], "count": self.counts[code]} for code in order[:limit]]
+
+class UserBreakdown:
+    """User counts per company, city and job title."""
+    def __init__(self):
+        self.total = 0
+        self.columns = {dimension: ValueCounts() for dimension in USER_DIMENSIONS}
+
+    def add(self, item: Dict[str, Any]) -> None:
+        self.total += 1
+        for dimension, column in self.columns.items():
+            column.add(item.get(dimension))
+
+    def merge(self, other: "UserBreakdown") -> None:
+        self.total += other.total
+        for dimension, column in self.columns.items():
+            column.merge(other.columns[dimension])
+
+class EventRoleCounts:
+    """Relation counts per event: one event dictionary, plus one count array per role indexed by event code."""
+    def __init__(self):
+        self.events = ValueCounts()  # counts hold all relations of the event
+        self.by_role = {role: array('Q') for role in ROLES}
+
+    def _code(self, event_id: str) -> int:
+        code = self.events.code(event_id)
+        if code == len(self.by_role[ROLES[0]]):
+            for column in self.by_role.values():
+                column.append(0)
+        return code
+
+    def add(self, item: Dict[str, Any], count: int = 1) -> None:
+        code = self._code(item.get('event_id'))
+        self.events.counts[code] += count
+        column = self.by_role.get(item.get('role'))
+        if column is not None:
+            column[code] += count
+
+    def merge(self, other: "EventRoleCounts") -> None:
+        for other_code, event_id in enumerate(other.events.values):
+            code = self._code(event_id)
+            self.events.counts[code] += other.events.counts[other_code]
+            for role, column in self.by_role.items():
+                column[code] += other.by_role[role][other_code]
+
+    def row(self, event_id: str) -> Dict[str, int]:
+        code = self.events.codes.get(event_id)
+        if code is None:
+            return dict({"relations": 0}, **{f"{role}s": 0 for role in ROLES})
+        return dict({"relations": self.events.counts[code]}, **{f"{role}s": self.by_role[role][code] for role in ROLES})
+
+def scan_aggregate(repo, make: Callable[[], Any], fields: List[str], total_segments: int) -> tuple:
+    """
+    Parallel scan where every segment thread fills its own aggregate (no locking
+    per row); the partial aggregates are merged at the end. Returns (aggregate, items_scanned).
+    """
+    local = threading.local()
+    partials = []
+    partials_lock = threading.Lock()
+
+    def handle_page(page: List[Dict[str, Any]]) -> None:
+        aggregate = getattr(local, "aggregate", None)
+        if aggregate is None:
+            aggregate = local.aggregate = make()
+            with partials_lock:
+                partials.append(aggregate)
+        for item in page:
+            aggregate.add(item)
+
+    scanned = repo.parallel_scan(handle_page, total_segments, fields=fields)
+    result = make()
+    for partial in partials:
+        result.merge(partial)
+    return result, scanned
+
+def attendance_row(event: Dict[str, Any], counts: Dict[str, int]) -> Dict[str, Any]:
+    max_capacity = int(event['max_capacity']) if event.get('max_capacity') is not None else None
+    return dict(
+        {"event_id": event['event_id'], "title": event.get('title'), "max_capacity": max_capacity},
+        **counts,
+        attendance_rate=round(counts["attendees"] / max_capacity, 4) if max_capacity else None
+    )
+
+def compute(total_segments: int = SCAN_TOTAL_SEGMENTS, user_repo: Optional[UserRepository] = None,
+            event_repo: Optional[EventRepository] = None,
+            relations_repo: Optional[UserEventRelationsRepository] = None) -> Dict[str, Any]:
+    user_repo = user_repo or UserRepository()
+    event_repo = event_repo or EventRepository()
+    relations_repo = relations_repo or UserEventRelationsRepository()
+
+    started = time.monotonic()
+    users, users_scanned = scan_aggregate(user_repo, UserBreakdown, list(USER_DIMENSIONS), total_segments)
+    users_seconds = time.monotonic() - started
+    started = time.monotonic()
+    relations, relations_scanned = scan_aggregate(relations_repo, EventRoleCounts, ['event_id', 'role'], total_segments)
+    relations_seconds = time.monotonic() - started
+    logger.info(f"Aggregated {users_scanned} users in {users_seconds:.1f}s and {relations_scanned} relations in {relations_seconds:.1f}s.")
+
+    attendance = [
+        attendance_row(event, relations.row(event['event_id']))
+        for event in event_repo.iter_all_events(fields=['event_id', 'title', 'max_capacity'])
+    ]
+    attendance.sort(key=lambda row: (-row["attendees"], row["event_id"]))
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "updated_at": None,
+        "users": dict(
+            {"total": users.total},
+            **{f"by_{dimension}": column.top() for dimension, column in users.columns.items()}
+        ),
+        "events": {
+            "total": len(attendance),
+            "relations": relations_scanned,
+            "attendance": attendance,
+        },
+        "timings": {
+            "users_seconds": round(users_seconds, 3),
+            "relations_seconds": round(relations_seconds, 3),
+            "relations_per_second": round(relations_scanned / relations_seconds) if relations_seconds else None,
+        },
+    }
+
+def refresh_events(stats: Dict[str, Any], event_ids: List[str], event_repo: Optional[EventRepository] = None,
+                   relations_repo: Optional[UserEventRelationsRepository] = None) -> Dict[str, Any]:
+    """Recounts the attendance of `event_ids` with COUNT queries and updates those rows in place."""
+    event_repo = event_repo or EventRepository()
+    relations_repo = relations_repo or UserEventRelationsRepository()
+    rows = {row["event_id"]: row for row in stats["events"]["attendance"]}
+    for event_id in event_ids:
+        previous = rows.pop(event_id, None)
+        if previous is not None:
+            stats["events"]["relations"] -= previous["relations"]
+        event = event_repo.get_event_by_id(event_id, fields=['event_id', 'title', 'max_capacity'])
+        if not event:
+            continue  # Deleted events drop out of the report
+        counts = {"relations": relations_repo.count_users_for_event(event_id, use_cache=False)}
+        for role in ROLES:
+            counts[f"{role}s"] = relations_repo.count_users_for_event(event_id, role=role, use_cache=False)
+        rows[event_id] = attendance_row(event, counts)
+        stats["events"]["relations"] += counts["relations"]
+    stats["events"]["attendance"] = sorted(rows.values(), key=lambda row: (-row["attendees"], row["event_id"]))
+    stats["events"]["total"] = len(rows)
+    stats["updated_at"] = datetime.now(timezone.utc).isoformat()
+    return stats
+
+def save(stats: Dict[str, Any], path: str = ANALYTICS_STATS_PATH) -> None:
+    """Writes the statistics to a gzip-compressed JSON file (atomically)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(stats, f, default=str)
+    os.replace(tmp_path, path)
+
+def load(path: str = ANALYTICS_STATS_PATH) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+class StatsStore:
+    """
+    Serves the statistics file from memory. The file's mtime is checked at most
+    every `check_seconds`, and the file is only re-read when a job has replaced it.
+    """
+    def __init__(self, path: str, check_seconds: float):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._stats: Optional[Dict[str, Any]] = None
+        self._mtime: Optional[tuple] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is not None and now - self._checked_at < self.check_seconds:
+                return self._stats
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+                mtime = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                self._stats, self._mtime = None, None
+                return None
+            if mtime != self._mtime:
+                self._stats, self._mtime = load(self.path), mtime
+                logger.info(f"Loaded analytics statistics generated at {self._stats.get('generated_at')}.")
+            return self._stats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Aggregate user and attendance statistics.")
+    parser.add_argument("--segments", type=int, default=SCAN_TOTAL_SEGMENTS, help="Parallel scan segments")
+    parser.add_argument("--events", help="Comma-separated event IDs to recount instead of a full run")
+    parser.add_argument("--path", default=ANALYTICS_STATS_PATH, help="Statistics file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.events:
+        if not os.path.exists(args.path):
+            parser.error(f"{args.path} does not exist yet; run a full aggregation first.")
+        event_ids = [event_id.strip() for event_id in args.events.split(",") if event_id.strip()]
+        stats = refresh_events(load(args.path), event_ids)
+    else:
+        stats = compute(args.segments)
+    save(stats, args.path)
+    logger.info(f"Wrote statistics to {args.path}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# app/jobs/archive_email_logs.py
+"""
+Archives EmailLogs entries to compressed local files before DynamoDB TTL expires them.
+
+Each complete UTC day still inside the retention window is written once to
+`<EMAIL_LOG_ARCHIVE_DIR>/email_logs-YYYY-MM-DD.jsonl.gz`; days that already have an
+archive file are skipped, so the job can run daily (e.g. from cron):
+
+    python -m app.jobs.archive_email_logs
+"""
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.core.config import EMAIL_LOG_ARCHIVE_DIR, EMAIL_LOG_TTL_DAYS
+from app.repositories.email_logs_repository import EmailLogsRepository
+
+logger = logging.getLogger('uvicorn.error')
+
+def archive_path(day: str, archive_dir: str = EMAIL_LOG_ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, f"email_logs-{day}.jsonl.gz")
+
+def archive_day(repo: EmailLogsRepository, day: str, archive_dir: str = EMAIL_LOG_ARCHIVE_DIR) -> int:
+    """Writes one day of logs to its archive file (atomically). Returns the number of entries."""
+    path = archive_path(day, archive_dir)
+    tmp_path = f"{path}.tmp"
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for item in repo.iter_logs_for_day(day):
+            f.write(json.dumps(item, default=str) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+def run(repo: Optional[EmailLogsRepository] = None, archive_dir: str = EMAIL_LOG_ARCHIVE_DIR) -> List[str]:
+    """Archives every complete, not yet archived day within the TTL window. Returns the archived days."""
+    repo = repo or EmailLogsRepository()
+    os.makedirs(archive_dir, exist_ok=True)
+    today = datetime.now(timezone.utc).date()
+    archived = []
+    # Oldest first: those days are the closest to expiry
+    for offset in range(EMAIL_LOG_TTL_DAYS, 0, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        if os.path.exists(archive_path(day, archive_dir)):
+            continue
+        count = archive_day(repo, day, archive_dir)
+        logger.info(f"Archived {count} email log entries for {day}.")
+        archived.append(day)
+    return archived
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run()
@@ -0,0 +1,224 @@
+"""
+Segment-driven email campaigns.
+
+Recipients are streamed page by page from the repositories (a user filter segment
+or an event/role selector), each message is rendered from `string.Template`
+placeholders such as `$first_name`, and sent through one SMTP session at a
+bounded rate. A campaign runs on a background thread of the worker that started
+it. Its progress is saved to the Campaigns table every CAMPAIGN_CHECK_EVERY
+recipients (or CAMPAIGN_CHECK_SECONDS), and the same write reads back
+`cancel_requested`, so any worker can report on or cancel any campaign.
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from string import Template
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import CAMPAIGN_RATE_PER_SECOND, CAMPAIGN_CHECK_EVERY, CAMPAIGN_CHECK_SECONDS, CAMPAIGN_RETENTION_DAYS
+from app.models.campaigns import CampaignRequest
+from app.utils.email import EmailSender
+
+logger = logging.getLogger('uvicorn.error')
+
+RECIPIENT_FIELDS = ["user_id", "email", "first_name", "last_name", "job_title", "company", "city", "state"]
+EVENT_RECIPIENT_FIELDS = RECIPIENT_FIELDS + ["role", "event_id", "event_title", "event_date"]
+STATUS_FIELDS = ["campaign_id", "state", "matched", "sent", "failed", "skipped", "started_at", "finished_at",
+                 "throughput_per_second", "error", "cancel_requested"]
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+def expires_at() -> int:
+    return int(time.time()) + CAMPAIGN_RETENTION_DAYS * 86400
+
+def render(template: str, recipient: Dict[str, Any]) -> str:
+    """Fills `$field` placeholders from the recipient; unknown placeholders are left as-is."""
+    return Template(template).safe_substitute({k: v for k, v in recipient.items() if v is not None})
+
+def stream_recipients(request: CampaignRequest, user_repo, relations_repo) -> Iterator[Dict[str, Any]]:
+    if request.event_id:
+        return relations_repo.iter_users_for_event(request.event_id, role=request.role, fields=EVENT_RECIPIENT_FIELDS)
+    return user_repo.iter_users_by_filter(request.segment, fields=RECIPIENT_FIELDS)
+
+class Campaign:
+    def __init__(self, campaign_id: str, request: CampaignRequest, store):
+        self.campaign_id = campaign_id
+        self.request = request
+        self.store = store  # CampaignsRepository
+        self.state = "pending"
+        self.matched = 0
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.error: Optional[str] = None
+        self._started = None
+        self._finished = None
+        self._saved_at = None
+        self._cancelled = threading.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.state in ("completed", "cancelled", "failed")
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def status(self) -> Dict[str, Any]:
+        elapsed = ((self._finished or time.monotonic()) - self._started) if self._started else 0.0
+        return {
+            "campaign_id": self.campaign_id,
+            "state": self.state,
+            "matched": self.matched,
+            "sent": self.sent,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "throughput_per_second": round(self.sent / elapsed, 2) if elapsed > 0 else 0.0,
+            "error": self.error,
+            "cancel_requested": self._cancelled.is_set(),
+        }
+
+    def item(self) -> Dict[str, Any]:
+        """The Campaigns table item for a new campaign."""
+        status = self.status()
+        status["throughput_per_second"] = Decimal(str(status["throughput_per_second"]))
+        return dict(
+            {name: value for name, value in status.items() if value is not None},
+            created_at=datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            event_id=self.request.event_id,
+            role=self.request.role,
+            subject=self.request.subject,
+            expires_at=expires_at(),
+        )
+
+    def save(self) -> None:
+        """Saves progress; a cancel requested through any worker is picked up from the same write."""
+        self._saved_at = time.monotonic()
+        status = self.status()
+        progress = {name: status[name] for name in ("state", "matched", "sent", "failed", "skipped", "started_at",
+                                                    "finished_at", "error") if status[name] is not None}
+        progress["throughput_per_second"] = Decimal(str(status["throughput_per_second"]))
+        if self.is_finished:
+            progress["expires_at"] = expires_at()
+        try:
+            if self.store.save_progress(self.campaign_id, progress):
+                self._cancelled.set()
+        except Exception as e:
+            # Sending goes on; progress is saved again at the next check
+            logger.warning(f"Campaign {self.campaign_id}: could not save progress: {e}")
+
+    def _check_due(self) -> bool:
+        return self.matched % CAMPAIGN_CHECK_EVERY == 0 or time.monotonic() - self._saved_at >= CAMPAIGN_CHECK_SECONDS
+
+    def run(self, recipients: Iterator[Dict[str, Any]], sender_factory: Callable[[], EmailSender] = EmailSender) -> None:
+        rate = self.request.rate_per_second or CAMPAIGN_RATE_PER_SECOND
+        interval = 1.0 / rate
+        self.state = "running"
+        self.started_at = utc_now()
+        self._started = time.monotonic()
+        self.save()
+        next_send = self._started
+        # A user related to an event in several roles is streamed once per role; send to each person once
+        seen_users, seen_emails = set(), set()
+        try:
+            with sender_factory() as sender:
+                for recipient in recipients:
+                    if self._cancelled.is_set():
+                        self.state = "cancelled"
+                        break
+                    self.matched += 1
+                    email = recipient.get("email")
+                    user_id = recipient.get("user_id")
+                    address = email.strip().lower() if email else None
+                    if not address or address in seen_emails or (user_id is not None and user_id in seen_users):
+                        self.skipped += 1
+                    else:
+                        seen_emails.add(address)
+                        if user_id is not None:
+                            seen_users.add(user_id)
+                        now = time.monotonic()
+                        if next_send > now:
+                            time.sleep(next_send - now)
+                        next_send = max(next_send, now) + interval
+                        try:
+                            sender.send(email, render(self.request.subject, recipient), render(self.request.body, recipient))
+                            self.sent += 1
+                        except Exception as e:
+                            self.failed += 1
+                            logger.warning(f"Campaign {self.campaign_id}: failed to send to {email}: {e}")
+                    if self._check_due():
+                        self.save()
+            if self.state == "running":
+                self.state = "completed"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Campaign {self.campaign_id} failed: {e}")
+        finally:
+            self._finished = time.monotonic()
+            self.finished_at = utc_now()
+            self.save()
+            logger.info(f"Campaign {self.campaign_id} {self.state}: {self.status()}")
+
+def stored_status(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: item.get(name) for name in STATUS_FIELDS}
+
+class CampaignRegistry:
+    """
+    Starts campaigns on background threads of this worker. Progress is read from the
+    Campaigns table, or live for campaigns this worker is sending; cancel requests
+    are written there for the sending worker to pick up.
+    """
+    def __init__(self, store):
+        self.store = store  # CampaignsRepository
+        self._running: Dict[str, Campaign] = {}
+        self._lock = threading.Lock()
+
+    def start(self, request: CampaignRequest, user_repo, relations_repo,
+              sender_factory: Callable[[], EmailSender] = EmailSender) -> Dict[str, Any]:
+        campaign = Campaign(str(uuid.uuid4()), request, self.store)
+        self.store.create_campaign(campaign.item())
+        recipients = stream_recipients(request, user_repo, relations_repo)
+        with self._lock:
+            self._running[campaign.campaign_id] = campaign
+
+        def run() -> None:
+            try:
+                campaign.run(recipients, sender_factory)
+            finally:
+                with self._lock:
+                    self._running.pop(campaign.campaign_id, None)
+        threading.Thread(target=run, name=f"campaign-{campaign.campaign_id}", daemon=True).start()
+        return campaign.status()
+
+    def get(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            campaign = self._running.get(campaign_id)
+        if campaign is not None:
+            return campaign.status()
+        item = self.store.get_campaign(campaign_id)
+        return stored_status(item) if item else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            running = {campaign_id: campaign.status() for campaign_id, campaign in self._running.items()}
+        return [running.get(item['campaign_id']) or stored_status(item) for item in self.store.list_campaigns()]
+
+    def cancel(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Requests a stop after the message being sent; the sending worker sees it at its next check."""
+        item = self.store.request_cancel(campaign_id)
+        if item is None:
+            return None
+        with self._lock:
+            campaign = self._running.get(campaign_id)
+        if campaign is not None:
+            campaign.cancel()  # Sent from this worker: stop at once
+            return campaign.status()
+        return stored_status(item)
@@ -0,0 +1,402 @@
+# app/jobs/migrate.py
+"""
+Versioned, idempotent schema migrations.
+
+    python -m app.jobs.migrate [up] [--segments 8]
+    python -m app.jobs.migrate status
+
+The applied schema version is recorded in SCHEMA_MIGRATIONS_TABLE_NAME. When it
+is current, a run costs one GetItem, so the runner can go in front of every API
+start. Otherwise one runner at a time (holding a lease item in the same table)
+applies the pending migrations in order and records each one as it completes:
+
+  - tables, GSIs, streams and TTL declared in app.core.schema are applied only
+    when missing, the tables concurrently; nothing is ever dropped and recreated,
+  - attributes a new index is keyed on are backfilled with a parallel scan that
+    checkpoints every segment's position, so an interrupted backfill resumes
+    where it stopped instead of starting over.
+
+A migration that was interrupted before it was recorded runs again from the top,
+so every step must be safe to repeat. To change the schema, declare the table or
+index in app/core/schema.py and append a Migration that ensures it (and backfills
+the attributes it is keyed on first).
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from app.core.config import SCAN_TOTAL_SEGMENTS, MIGRATION_LOCK_SECONDS, USER_EVENT_RELATIONS_TABLE_NAME
+from app.core.db_connection import db_connection
+from app.core.schema import TABLES, TABLES_BY_NAME, MIGRATIONS_TABLE, SINGLE_TABLE, CAMPAIGNS_TABLE, TableSpec
+from app.jobs.shard_role_index import BACKFILL_FIELDS, shard_items
+from app.repositories.base_repository import MAX_READ_WORKERS
+from app.repositories.user_event_repository import UserEventRelationsRepository, ROLE_INDEX_NAME, LEGACY_ROLE_INDEX_NAME
+
+logger = logging.getLogger('uvicorn.error')
+
+STATE_ID = "schema"
+POLL_SECONDS = 2
+INDEX_POLL_SECONDS = 5
+
+class Migration:
+    def __init__(self, version: int, description: str, apply: Callable[["MigrationRunner"], None]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+class LeaseLost(RuntimeError):
+    """Another runner took over the migration lease (this one stalled for longer than MIGRATION_LOCK_SECONDS)."""
+
+class SchemaNotApplied(RuntimeError):
+    """A schema change was requested but DynamoDB does not show it; the migration must not be recorded."""
+
+class MigrationRunner:
+    def __init__(self, migrations: List[Migration], total_segments: int = SCAN_TOTAL_SEGMENTS,
+                 lock_seconds: int = MIGRATION_LOCK_SECONDS):
+        db_connection.initialize()
+        self.resource = db_connection.dynamodb_resource
+        self.client = self.resource.meta.client
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+        self.total_segments = max(1, total_segments)
+        self.lock_seconds = lock_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.state = self.resource.Table(MIGRATIONS_TABLE.name)
+        self._renewed_at = 0.0
+        self._renew_lock = threading.Lock()
+
+    @property
+    def latest_version(self) -> int:
+        return self.migrations[-1].version if self.migrations else 0
+
+    def current_version(self) -> Optional[int]:
+        """The applied version; None when the migrations table does not exist yet."""
+        try:
+            item = self.state.get_item(Key={'id': STATE_ID}, ConsistentRead=True).get('Item')
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return None
+            raise
+        return int(item.get('version', 0)) if item else 0
+
+    def run(self) -> int:
+        """Applies the pending migrations; returns the schema version afterwards."""
+        current = self.current_version()
+        if current is not None and current >= self.latest_version:
+            logger.info(f"Schema is current (version {current}).")
+            return current
+        if current is None:
+            self.ensure_tables([MIGRATIONS_TABLE])
+        self._acquire()
+        try:
+            current = self.current_version()  # Another runner may have applied some meanwhile
+            for migration in self.migrations:
+                if migration.version <= current:
+                    continue
+                logger.info(f"Applying migration {migration.version}: {migration.description}")
+                started = time.monotonic()
+                migration.apply(self)
+                self._record(migration, time.monotonic() - started)
+                current = migration.version
+        finally:
+            self._release()
+        logger.info(f"Schema is at version {current}.")
+        return current
+
+    def status(self) -> Dict[str, Any]:
+        current = self.current_version() or 0
+        return {
+            "current_version": current,
+            "latest_version": self.latest_version,
+            "pending": [f"{m.version}: {m.description}" for m in self.migrations if m.version > current],
+        }
+
+    # --- Lease: one runner applies migrations at a time ---
+    def _acquire(self) -> None:
+        while True:
+            now = int(time.time())
+            try:
+                self.state.update_item(
+                    Key={'id': STATE_ID},
+                    UpdateExpression="SET lock_owner = :owner, lock_expires = :expires",
+                    ConditionExpression=Attr('lock_owner').not_exists() | Attr('lock_expires').lt(now) |
+                                        Attr('lock_owner').eq(self.owner),
+                    ExpressionAttributeValues={":owner": self.owner, ":expires": now + self.lock_seconds}
+                )
+                self._renewed_at = time.monotonic()
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+            logger.info("Another runner holds the migration lease, waiting...")
+            time.sleep(POLL_SECONDS)
+
+    def renew(self) -> None:
+        """Extends the lease; cheap to call often, it only writes once a third of the lease has passed."""
+        with self._renew_lock:
+            if time.monotonic() - self._renewed_at < self.lock_seconds / 3:
+                return
+            try:
+                self.state.update_item(
+                    Key={'id': STATE_ID},
+                    UpdateExpression="SET lock_expires = :expires",
+                    ConditionExpression=Attr('lock_owner').eq(self.owner),
+                    ExpressionAttributeValues={":expires": int(time.time()) + self.lock_seconds}
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                    raise LeaseLost("The migration lease was taken over by another runner.")
+                raise
+            self._renewed_at = time.monotonic()
+
+    def _release(self) -> None:
+        try:
+            self.state.update_item(
+                Key={'id': STATE_ID},
+                UpdateExpression="REMOVE lock_owner, lock_expires",
+                ConditionExpression=Attr('lock_owner').eq(self.owner)
+            )
+        except ClientError as e:
+            logger.warning(f"Could not release the migration lease: {e}")
+
+    def _record(self, migration: Migration, seconds: float) -> None:
+        self.renew()
+        self.state.put_item(Item={
+            'id': f"migration#{migration.version:04d}",
+            'description': migration.description,
+            'applied_at': datetime.now(timezone.utc).isoformat(),
+            'seconds': Decimal(str(round(seconds, 3))),
+            'applied_by': self.owner,
+        })
+        self.state.update_item(
+            Key={'id': STATE_ID},
+            UpdateExpression="SET version = :version",
+            ConditionExpression=Attr('lock_owner').eq(self.owner),
+            ExpressionAttributeValues={":version": migration.version}
+        )
+        logger.info(f"Migration {migration.version} applied in {seconds:.1f}s.")
+
+    # --- Idempotent schema steps ---
+    def _describe(self, table_name: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.client.describe_table(TableName=table_name)['Table']
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                return None
+            raise
+
+    @staticmethod
+    def _index_names(description: Dict[str, Any]) -> set:
+        return {index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])}
+
+    def _wait_until_active(self, table_name: str, index_name: Optional[str] = None) -> None:
+        while True:
+            description = self._describe(table_name)
+            statuses = [description['TableStatus']]
+            statuses += [index.get('IndexStatus', 'ACTIVE') for index in description.get('GlobalSecondaryIndexes', [])
+                         if index_name is None or index['IndexName'] == index_name]
+            if all(status == 'ACTIVE' for status in statuses):
+                return
+            logger.info(f"Waiting for '{table_name}'{f' index {index_name}' if index_name else ''} ({statuses})...")
+            self.renew()
+            time.sleep(INDEX_POLL_SECONDS)
+
+    def ensure_tables(self, specs: List[TableSpec], exclude_indexes: tuple = ()) -> None:
+        """Creates missing tables, GSIs, streams and TTL settings, with the tables handled concurrently."""
+        def ensure(spec: TableSpec) -> None:
+            index_names = [name for name in spec.indexes if name not in exclude_indexes]
+            description = self._describe(spec.name)
+            if description is None:
+                try:
+                    self.client.create_table(**spec.create_params(index_names))
+                    logger.info(f"Creating table '{spec.name}'.")
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ResourceInUseException':
+                        raise
+                self.client.get_waiter('table_exists').wait(TableName=spec.name)
+                description = self._describe(spec.name)
+            existing = self._index_names(description)
+            for index_name in index_names:
+                if index_name not in existing:
+                    self.ensure_index(spec, index_name)
+            if spec.stream_view_type:
+                self.ensure_stream(spec, description)
+            if spec.ttl_attribute:
+                self.ensure_ttl(spec)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(specs))) as executor:
+            list(executor.map(ensure, specs))
+
+    def ensure_stream(self, spec: TableSpec, description: Dict[str, Any]) -> None:
+        """Enables the table's stream when it has none; a stream with another view type is left alone."""
+        stream = description.get('StreamSpecification') or {}
+        if stream.get('StreamEnabled'):
+            if stream.get('StreamViewType') != spec.stream_view_type:
+                logger.warning(f"'{spec.name}' streams {stream.get('StreamViewType')}, not {spec.stream_view_type}; "
+                               "change it by hand (a stream must be disabled before its view type changes).")
+            return
+        self._wait_until_active(spec.name)  # UpdateTable is rejected while an index is being built
+        try:
+            self.client.update_table(
+                TableName=spec.name,
+                StreamSpecification={'StreamEnabled': True, 'StreamViewType': spec.stream_view_type}
+            )
+            logger.info(f"Enabling the {spec.stream_view_type} stream on '{spec.name}'.")
+        except ClientError as e:
+            # Also raised when a concurrent runner enabled the stream first; checked below
+            if e.response['Error']['Code'] not in ('ValidationException', 'ResourceInUseException'):
+                raise
+            logger.info(f"Stream on '{spec.name}' not enabled: {e.response['Error']['Message']}")
+        self._wait_until_active(spec.name)
+        if not (self._describe(spec.name).get('StreamSpecification') or {}).get('StreamEnabled'):
+            raise SchemaNotApplied(f"'{spec.name}' has no stream enabled.")
+
+    def ensure_ttl(self, spec: TableSpec) -> None:
+        """Enables TTL on `spec.ttl_attribute` unless DynamoDB already reports it for that attribute."""
+        ttl = self.client.describe_time_to_live(TableName=spec.name)['TimeToLiveDescription']
+        status, attribute = ttl.get('TimeToLiveStatus'), ttl.get('AttributeName')
+        if status in ('ENABLED', 'ENABLING') and attribute == spec.ttl_attribute:
+            return
+        if status in ('ENABLED', 'ENABLING'):
+            raise SchemaNotApplied(f"TTL on '{spec.name}' uses '{attribute}', not '{spec.ttl_attribute}'; disable it first.")
+        # DISABLING cannot be interrupted; UpdateTimeToLive fails (and the migration is retried) until it ends
+        self.client.update_time_to_live(
+            TableName=spec.name,
+            TimeToLiveSpecification={'Enabled': True, 'AttributeName': spec.ttl_attribute}
+        )
+        logger.info(f"Enabling TTL on '{spec.name}.{spec.ttl_attribute}'.")
+
+    def ensure_index(self, spec: TableSpec, index_name: str) -> None:
+        """Creates one GSI if it is missing and waits until DynamoDB has built it."""
+        description = self._describe(spec.name)
+        error = None
+        if index_name not in self._index_names(description):
+            self._wait_until_active(spec.name)  # A table builds one index change at a time
+            try:
+                self.client.update_table(
+                    TableName=spec.name,
+                    AttributeDefinitions=spec.attribute_definitions([index_name]),
+                    GlobalSecondaryIndexUpdates=[{'Create': spec.indexes[index_name]}]
+                )
+                logger.info(f"Creating index '{index_name}' on '{spec.name}'.")
+            except ClientError as e:
+                # Also raised when a concurrent runner created the index first; checked below
+                if e.response['Error']['Code'] not in ('ValidationException', 'ResourceInUseException'):
+                    raise
+                error = e.response['Error']['Message']
+                logger.info(f"Index '{index_name}' not created: {error}")
+        self._wait_until_active(spec.name, index_name)
+        if index_name not in self._index_names(self._describe(spec.name)):
+            raise SchemaNotApplied(f"Index '{index_name}' does not exist on '{spec.name}'" + (f": {error}" if error else "."))
+
+    def drop_index(self, table_name: str, index_name: str) -> None:
+        if index_name not in self._index_names(self._describe(table_name)):
+            return
+        self._wait_until_active(table_name)
+        self.client.update_table(TableName=table_name, GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': index_name}}])
+        logger.info(f"Deleting index '{index_name}' from '{table_name}'.")
+
+    def backfill(self, name: str, table_name: str, handle_page: Callable[[List[Dict[str, Any]]], None],
+                 fields: Optional[List[str]] = None) -> int:
+        """
+        Scans `table_name` with parallel segments, calling `handle_page` (which must be
+        idempotent and thread-safe) with each page. Every segment's position is saved
+        after each page under `checkpoint#{name}#{segment}`; a re-run skips finished
+        segments and resumes the others. Returns the items scanned by this run.
+        """
+        table = self.resource.Table(table_name)
+        # The segment count is fixed by the first attempt so saved positions stay valid
+        meta_id = f"checkpoint#{name}"
+        meta = self.state.get_item(Key={'id': meta_id}, ConsistentRead=True).get('Item')
+        total_segments = int(meta['total_segments']) if meta else self.total_segments
+        if not meta:
+            self.state.put_item(Item={'id': meta_id, 'total_segments': total_segments})
+        scan_kwargs: Dict[str, Any] = {}
+        if fields:
+            placeholders = {f"#p{i}": field for i, field in enumerate(fields)}
+            scan_kwargs.update(ProjectionExpression=", ".join(placeholders), ExpressionAttributeNames=placeholders)
+
+        def scan_segment(segment: int) -> int:
+            checkpoint_id = f"{meta_id}#{segment}"
+            checkpoint = self.state.get_item(Key={'id': checkpoint_id}, ConsistentRead=True).get('Item') or {}
+            if checkpoint.get('done'):
+                return 0
+            segment_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+            if checkpoint.get('position'):
+                segment_kwargs["ExclusiveStartKey"] = checkpoint['position']
+            scanned = 0
+            while True:
+                response = table.scan(**segment_kwargs)
+                items = response.get('Items', [])
+                handle_page(items)
+                scanned += len(items)
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                checkpoint = {'id': checkpoint_id, 'done': not last_evaluated_key}
+                if last_evaluated_key:
+                    checkpoint['position'] = last_evaluated_key
+                self.state.put_item(Item=checkpoint)
+                self.renew()
+                if not last_evaluated_key:
+                    return scanned
+                segment_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        with ThreadPoolExecutor(max_workers=min(total_segments, MAX_READ_WORKERS)) as executor:
+            scanned = sum(executor.map(scan_segment, range(total_segments)))
+        logger.info(f"Backfill '{name}' scanned {scanned} items of '{table_name}'.")
+        return scanned
+
+# --- Migrations (append only; never edit one that has shipped) ---
+def create_tables(runner: MigrationRunner) -> None:
+    # The sharded role index is added by migration 2, once its key attribute is backfilled
+    runner.ensure_tables(TABLES + [MIGRATIONS_TABLE], exclude_indexes=(ROLE_INDEX_NAME,))
+
+def shard_role_index(runner: MigrationRunner) -> None:
+    repo = UserEventRelationsRepository()
+    runner.backfill("0002-role_shard", repo.table_name, lambda items: shard_items(repo, items), fields=BACKFILL_FIELDS)
+    runner.ensure_index(TABLES_BY_NAME[USER_EVENT_RELATIONS_TABLE_NAME], ROLE_INDEX_NAME)
+    runner.drop_index(repo.table_name, LEGACY_ROLE_INDEX_NAME)
+
+def create_single_table(runner: MigrationRunner) -> None:
+    runner.ensure_tables([SINGLE_TABLE])
+
+def create_campaigns_table(runner: MigrationRunner) -> None:
+    runner.ensure_tables([CAMPAIGNS_TABLE])
+
+def apply_table_settings(runner: MigrationRunner) -> None:
+    # Tables created before the migrations existed may lack the Events stream or TTL
+    runner.ensure_tables(TABLES + [CAMPAIGNS_TABLE])
+
+MIGRATIONS = [
+    Migration(1, "Create tables, GSIs and TTL", create_tables),
+    Migration(2, "Write-shard the role index of UserEventRelations", shard_role_index),
+    Migration(3, "Create the single-table layout table", create_single_table),
+    Migration(4, "Create the campaigns table", create_campaigns_table),
+    Migration(5, "Enable the Events stream and TTL on existing tables", apply_table_settings),
+]
+
+def migrate(total_segments: int = SCAN_TOTAL_SEGMENTS) -> int:
+    return MigrationRunner(MIGRATIONS, total_segments).run()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("command", nargs="?", default="up", choices=["up", "status"])
+    parser.add_argument("--segments", type=int, default=SCAN_TOTAL_SEGMENTS, help="Parallel scan segments for backfills")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "status":
+        print(MigrationRunner(MIGRATIONS, args.segments).status())
+    else:
+        migrate(args.segments)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# app/jobs/migrate_single_table.py
+"""
+Online migration from the per-entity tables to the single-table layout.
+
+    python -m app.jobs.migrate_single_table create
+    python -m app.jobs.migrate_single_table backfill [--segments 8]
+    python -m app.jobs.migrate_single_table verify [--segments 8]
+
+Cutover:
+  1. `create` the single table (applies the schema migrations, see app.jobs.migrate).
+  2. Deploy with SINGLE_TABLE_MODE=dual so every API write also lands in the single table.
+  3. `backfill` copies existing rows with a parallel scan. Writes are conditional on the
+     item being absent, so rows dual-written in the meantime are never overwritten.
+  4. `verify` compares both layouts in both directions; re-run backfill if needed. Dual writes
+     that failed are not retried by the API; workers count them on GET /metrics/ (single_table_mirror).
+  5. Deploy with SINGLE_TABLE_MODE=on to serve reads from the single table.
+"""
+import argparse
+import logging
+import threading
+from typing import Any, Callable, Dict, List
+
+from app.core.config import SINGLE_TABLE_NAME, SCAN_TOTAL_SEGMENTS
+from app.jobs.migrate import migrate
+from app.repositories.users_repository import UserRepository
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository
+from app.repositories.single_table_repository import (
+    SingleTableRepository, user_item, event_item, relation_item
+)
+
+logger = logging.getLogger('uvicorn.error')
+MAX_REPORTED_KEYS = 20
+
+def create_table() -> None:
+    """The table is declared in app.core.schema (SINGLE_TABLE); applying the schema migrations creates it."""
+    migrate()
+
+def _sources() -> List[tuple]:
+    """(name, source repository, source row -> single-table item) for every entity table."""
+    return [
+        ("Users", UserRepository(), user_item),
+        ("Events", EventRepository(), event_item),
+        ("UserEventRelations", UserEventRelationsRepository(), relation_item),
+    ]
+
+class _Counter:
+    def __init__(self):
+        self.values: Dict[str, int] = {}
+        self.samples: List[Any] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1, sample: Any = None) -> None:
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+            if sample is not None and len(self.samples) < MAX_REPORTED_KEYS:
+                self.samples.append(sample)
+
+def backfill(total_segments: int = SCAN_TOTAL_SEGMENTS) -> Dict[str, Dict[str, int]]:
+    target = SingleTableRepository()
+    report = {}
+    for name, source, transform in _sources():
+        counter = _Counter()
+
+        def copy_page(items: List[Dict[str, Any]], transform: Callable = transform, counter: _Counter = counter) -> None:
+            for item in items:
+                counter.add("written" if target.put_if_absent(transform(item)) else "already_present")
+
+        scanned = source.parallel_scan(copy_page, total_segments)
+        report[name] = dict(counter.values, scanned=scanned)
+        logger.info(f"Backfilled {name}: {report[name]}")
+    return report
+
+def verify(total_segments: int = SCAN_TOTAL_SEGMENTS) -> Dict[str, Any]:
+    """Checks that every source row exists unchanged in the single table, and that nothing extra does."""
+    target = SingleTableRepository()
+    sources = _sources()
+    report: Dict[str, Any] = {}
+    for name, source, transform in sources:
+        counter = _Counter()
+
+        def check_page(items: List[Dict[str, Any]], transform: Callable = transform, counter: _Counter = counter) -> None:
+            expected = [transform(item) for item in items]
+            actual = target.get_items([{'PK': item['PK'], 'SK': item['SK']} for item in expected])
+            for want, got in zip(expected, actual):
+                if got is None:
+                    counter.add("missing", sample=(want['PK'], want['SK']))
+                elif got != want:
+                    counter.add("mismatched", sample=(want['PK'], want['SK']))
+                else:
+                    counter.add("matched")
+
+        source.parallel_scan(check_page, total_segments)
+        report[name] = dict(counter.values, sample_keys=counter.samples)
+
+    # Reverse direction: single-table rows whose source row no longer exists (e.g. deleted mid-backfill)
+    users_repo, events_repo, relations_repo = (source for _, source, _ in sources)
+    orphans = _Counter()
+
+    def check_orphans(items: List[Dict[str, Any]]) -> None:
+        by_entity: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            by_entity.setdefault(item.get('entity'), []).append(item)
+        users = by_entity.get("User", [])
+        events = by_entity.get("Event", [])
+        relations = by_entity.get("UserEventRelation", [])
+        existing_users = {u['user_id'] for u in users_repo.get_users_by_ids([u['user_id'] for u in users], fields=['user_id'])} if users else set()
+        existing_events = {e['event_id'] for e in events_repo.get_events_by_ids([e['event_id'] for e in events], fields=['event_id'])} if events else set()
+        relation_rows = relations_repo.get_relations_by_keys([{'PK': r['PK'], 'SK': r['SK']} for r in relations])
+        found = [u['user_id'] in existing_users for u in users] + [e['event_id'] in existing_events for e in events]
+        found += [row is not None for row in relation_rows]
+        for row, exists in zip(users + events + relations, found):
+            if exists:
+                orphans.add("checked")
+            else:
+                orphans.add("orphaned", sample=(row['PK'], row['SK']))
+
+    target.parallel_scan(check_orphans, total_segments)
+    report[SINGLE_TABLE_NAME] = dict(orphans.values, sample_keys=orphans.samples)
+    return report
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate to the single-table layout.")
+    parser.add_argument("command", choices=["create", "backfill", "verify"])
+    parser.add_argument("--segments", type=int, default=SCAN_TOTAL_SEGMENTS, help="Parallel scan segments")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "create":
+        create_table()
+    elif args.command == "backfill":
+        print(backfill(args.segments))
+    else:
+        print(verify(args.segments))
+
+if __name__ == "__main__":
+    main()
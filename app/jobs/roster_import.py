@@ -0,0 +1,144 @@
+# app/jobs/roster_import.py
+"""
+Bulk event roster import for `POST /events/{event_id}/roster`.
+
+The request body is a list of (user_id or email, role) rows, either NDJSON
+(`{"user_id": "u1", "role": "host"}` per line) or CSV with a header naming
+`user_id` and/or `email`, and `role`. `RosterParser` turns lines into rows as the
+body streams in. `import_roster` then:
+
+  1. maps email rows to user ids (one parallel scan, only when a row uses an email),
+  2. reads the users with batched BatchGetItem calls,
+  3. reads the event's current relations once, to skip users already related to it,
+  4. builds the relation items and writes them with parallel BatchWriteItem calls,
+
+and reports a status per row: created, exists, duplicate, user_not_found, invalid or failed.
+"""
+import csv
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.repositories.user_event_repository import RELATION_TYPES, RELATION_USER_FIELDS, build_relation
+
+logger = logging.getLogger('uvicorn.error')
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+STATUSES = ("created", "exists", "duplicate", "user_not_found", "invalid", "failed")
+
+class RosterFormatError(ValueError):
+    """The body as a whole cannot be read (e.g. a CSV header without the required columns)."""
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Splits a streamed body into lines without waiting for the whole body."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+def parse_row(number: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    user_id = str(record.get("user_id") or "").strip() or None
+    email = str(record.get("email") or "").strip() or None
+    role = str(record.get("role") or "").strip().lower() or None
+    row = {"row": number, "user_id": user_id, "email": email, "role": role}
+    if not user_id and not email:
+        row.update(status="invalid", detail="Either user_id or email is required.")
+    elif role not in RELATION_TYPES:
+        row.update(status="invalid", detail=f"Role must be one of {', '.join(RELATION_TYPES)}.")
+    return row
+
+class RosterParser:
+    """Collects rows from NDJSON or CSV lines; malformed rows are kept as 'invalid' rows."""
+    def __init__(self, content_type: Optional[str]):
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        self.is_csv = media_type in CSV_MEDIA_TYPES
+        self.header: Optional[List[str]] = None
+        self.rows: List[Dict[str, Any]] = []
+
+    def feed(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        number = len(self.rows) + 1
+        if self.is_csv:
+            try:
+                values = [value.strip() for value in next(csv.reader([line]))]
+            except csv.Error as e:
+                self.rows.append({"row": number, "status": "invalid", "detail": f"Malformed CSV row: {e}"})
+                return
+            if self.header is None:
+                self.header = [value.lower() for value in values]
+                if "role" not in self.header or not {"user_id", "email"} & set(self.header):
+                    raise RosterFormatError("The CSV header must name a 'role' column and a 'user_id' or 'email' column.")
+                return
+            self.rows.append(parse_row(number, dict(zip(self.header, values))))
+            return
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            self.rows.append({"row": number, "status": "invalid", "detail": f"Malformed JSON: {e}"})
+            return
+        if not isinstance(record, dict):
+            self.rows.append({"row": number, "status": "invalid", "detail": "Each line must be a JSON object."})
+            return
+        self.rows.append(parse_row(number, record))
+
+def import_roster(event: Dict[str, Any], rows: List[Dict[str, Any]], user_repo, relations_repo) -> Dict[str, Any]:
+    """Resolves, deduplicates and writes the rows; sets `status`/`detail` on each row and returns the report."""
+    started = time.monotonic()
+    event_id = event['event_id']
+    pending = [row for row in rows if "status" not in row]
+
+    emails = [row["email"] for row in pending if not row["user_id"]]
+    if emails:
+        user_ids_by_email = user_repo.get_user_ids_by_emails(emails)
+        for row in pending:
+            if not row["user_id"]:
+                row["user_id"] = user_ids_by_email.get(row["email"].lower())
+    user_ids = list(dict.fromkeys(row["user_id"] for row in pending if row["user_id"]))
+    users = {user['user_id']: user for user in user_repo.get_users_by_ids(user_ids, fields=['user_id'] + RELATION_USER_FIELDS)}
+    existing_roles = {
+        item['user_id']: item.get('role')
+        for item in relations_repo.iter_users_for_event(event_id, fields=['user_id', 'role'])
+    }
+
+    relations, rows_by_key, first_rows = [], {}, {}
+    for row in pending:
+        user = users.get(row["user_id"])
+        if user is None:
+            row.update(status="user_not_found", detail="No user with this user_id or email.")
+        elif user['user_id'] in existing_roles:
+            row.update(status="exists", detail=f"Already {existing_roles[user['user_id']]} of the event.")
+        elif user['user_id'] in first_rows:
+            row.update(status="duplicate", detail=f"Same user as row {first_rows[user['user_id']]}.")
+        else:
+            first_rows[user['user_id']] = row["row"]
+            relation = build_relation(user, event, row["role"])
+            relations.append(relation)
+            rows_by_key[(relation['PK'], relation['SK'])] = row
+            row["status"] = "created"
+    write_started = time.monotonic()
+    failed = relations_repo.put_relations(relations) if relations else []
+    for item, reason in failed:
+        rows_by_key[(item['PK'], item['SK'])].update(status="failed", detail=reason)
+
+    seconds = time.monotonic() - started
+    counts = {status: 0 for status in STATUSES}
+    for row in rows:
+        counts[row["status"]] += 1
+    logger.info(f"Roster import for event {event_id}: {counts} in {seconds:.2f}s "
+                f"({len(relations)} writes in {time.monotonic() - write_started:.2f}s).")
+    return {
+        "event_id": event_id,
+        "summary": dict(
+            {"rows": len(rows)}, **counts,
+            seconds=round(seconds, 3),
+            rows_per_second=round(len(rows) / seconds, 1) if seconds else None
+        ),
+        "rows": rows,
+    }
@@ -0,0 +1,142 @@
+# app/jobs/shard_role_index.py
+"""
+Online move of UserEventRelations from `role-user_event-index`, keyed on `role`
+alone (two hot partitions take every relation write), to
+`role_shard-user_event_id-index`, keyed on `role#0`..`role#N-1`
+(N = ROLE_INDEX_SHARDS).
+
+    python -m app.jobs.shard_role_index backfill [--segments 8]
+    python -m app.jobs.shard_role_index create
+    python -m app.jobs.shard_role_index drop-legacy
+
+Migration 2 of app.jobs.migrate performs these steps on startup. The commands
+are for running them by hand, e.g. after changing ROLE_INDEX_SHARDS.
+
+Rollout:
+  1. Deploy; relations written by the API now carry `role_shard`.
+  2. `backfill` sets `role_shard` on existing relations with a parallel scan. Only
+     items whose shard is missing or different are written, so it can be re-run.
+  3. `create` adds the sharded index and waits until DynamoDB has built it. The API
+     reads the legacy index until then and picks up the sharded one within
+     ROLE_INDEX_RECHECK_SECONDS of it turning ACTIVE; no restart is needed.
+  4. Wait ROLE_INDEX_RECHECK_SECONDS, then `drop-legacy` deletes the old index,
+     which otherwise keeps taking writes.
+
+To change ROLE_INDEX_SHARDS later, run `backfill` with the new value, deploy it,
+and run `backfill` once more for relations written in between.
+"""
+import argparse
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+from botocore.exceptions import ClientError
+
+from app.core.config import SCAN_TOTAL_SEGMENTS, ROLE_INDEX_SHARDS
+from app.core.db_connection import db_connection
+from app.repositories.user_event_repository import (
+    UserEventRelationsRepository, ROLE_INDEX_NAME, LEGACY_ROLE_INDEX_NAME, ROLE_SHARD_ATTRIBUTE, role_shard
+)
+
+logger = logging.getLogger('uvicorn.error')
+INDEX_POLL_SECONDS = 5
+BACKFILL_FIELDS = ['PK', 'SK', 'role', 'user_event_id', ROLE_SHARD_ATTRIBUTE]
+
+def _index_status(repo: UserEventRelationsRepository, index_name: str) -> str:
+    repo.table.reload()
+    for index in repo.table.global_secondary_indexes or []:
+        if index['IndexName'] == index_name:
+            return index.get('IndexStatus', 'ACTIVE')
+    return "MISSING"
+
+def shard_items(repo: UserEventRelationsRepository, items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Writes the role_shard of relations (read with BACKFILL_FIELDS) where it is missing or stale."""
+    counts = {"written": 0, "up_to_date": 0, "skipped": 0, "deleted": 0}
+    for item in items:
+        if not item.get('role') or not item.get('user_event_id'):
+            counts["skipped"] += 1  # Nothing to index on
+            continue
+        shard = role_shard(item['role'], item['user_event_id'])
+        if item.get(ROLE_SHARD_ATTRIBUTE) == shard:
+            counts["up_to_date"] += 1
+        elif repo.set_role_shard({'PK': item['PK'], 'SK': item['SK']}, shard):
+            counts["written"] += 1
+        else:
+            counts["deleted"] += 1
+    return counts
+
+def backfill(total_segments: int = SCAN_TOTAL_SEGMENTS) -> Dict[str, int]:
+    repo = UserEventRelationsRepository()
+    counts: Dict[str, int] = {}
+    counts_lock = threading.Lock()
+
+    def shard_page(items: List[Dict[str, Any]]) -> None:
+        page = shard_items(repo, items)
+        with counts_lock:
+            for name, value in page.items():
+                counts[name] = counts.get(name, 0) + value
+
+    scanned = repo.parallel_scan(shard_page, total_segments, fields=BACKFILL_FIELDS)
+    report = dict(counts, scanned=scanned, shards=ROLE_INDEX_SHARDS)
+    logger.info(f"Backfilled {ROLE_SHARD_ATTRIBUTE}: {report}")
+    return report
+
+def create_index() -> None:
+    repo = UserEventRelationsRepository()
+    client = db_connection.dynamodb_resource.meta.client
+    try:
+        client.update_table(
+            TableName=repo.table_name,
+            AttributeDefinitions=[
+                {'AttributeName': ROLE_SHARD_ATTRIBUTE, 'AttributeType': 'S'},
+                {'AttributeName': 'user_event_id', 'AttributeType': 'S'}
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': {
+                'IndexName': ROLE_INDEX_NAME,
+                'KeySchema': [
+                    {'AttributeName': ROLE_SHARD_ATTRIBUTE, 'KeyType': 'HASH'},
+                    {'AttributeName': 'user_event_id', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }}]
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('ValidationException', 'ResourceInUseException'):
+            raise
+        logger.info(f"Index '{ROLE_INDEX_NAME}' not created: {e.response['Error']['Message']}")
+    status = _index_status(repo, ROLE_INDEX_NAME)
+    while status not in ("ACTIVE", "MISSING"):
+        logger.info(f"Index '{ROLE_INDEX_NAME}' is {status}, waiting...")
+        time.sleep(INDEX_POLL_SECONDS)
+        status = _index_status(repo, ROLE_INDEX_NAME)
+    logger.info(f"Index '{ROLE_INDEX_NAME}' is {status}.")
+
+def drop_legacy_index() -> None:
+    repo = UserEventRelationsRepository()
+    if _index_status(repo, ROLE_INDEX_NAME) != "ACTIVE":
+        raise SystemExit(f"'{ROLE_INDEX_NAME}' is not ACTIVE yet; run `create` first.")
+    if _index_status(repo, LEGACY_ROLE_INDEX_NAME) == "MISSING":
+        logger.info(f"Index '{LEGACY_ROLE_INDEX_NAME}' is already gone.")
+        return
+    db_connection.dynamodb_resource.meta.client.update_table(
+        TableName=repo.table_name,
+        GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': LEGACY_ROLE_INDEX_NAME}}]
+    )
+    logger.info(f"Deleting index '{LEGACY_ROLE_INDEX_NAME}'.")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move relations to the write-sharded role index.")
+    parser.add_argument("command", choices=["backfill", "create", "drop-legacy"])
+    parser.add_argument("--segments", type=int, default=SCAN_TOTAL_SEGMENTS, help="Parallel scan segments")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "backfill":
+        print(backfill(args.segments))
+    elif args.command == "create":
+        create_index()
+    else:
+        drop_legacy_index()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# app/jobs/suggestions.py
+"""
+Precomputes "people you may know" suggestions from event co-attendance.
+
+A full run scans UserEventRelations into a sparse user x event incidence matrix A
+(CSR arrays over dense integer ids, with the transpose kept alongside), computes
+each user's row of A·Aᵀ (how many events they share with every other user), and
+stores the top SUGGESTIONS_TOP_K neighbours per user in the UserSuggestions table:
+
+    python -m app.jobs.suggestions [--segments 8]
+
+The matrix is saved to SUGGESTIONS_GRAPH_PATH. After relations of some events have
+changed (e.g. a roster import), only those events are re-read and only the users
+in them, before or after the change, are recomputed:
+
+    python -m app.jobs.suggestions --events e1,e2
+"""
+import argparse
+import gzip
+import heapq
+import logging
+import os
+import pickle
+import threading
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import SCAN_TOTAL_SEGMENTS, SUGGESTIONS_GRAPH_PATH, SUGGESTIONS_TOP_K, SUGGESTIONS_MAX_EVENT_SIZE
+from app.repositories.user_event_repository import UserEventRelationsRepository
+from app.repositories.suggestions_repository import SuggestionsRepository
+
+logger = logging.getLogger('uvicorn.error')
+
+def _compress(rows: array, cols: array, n_rows: int) -> Tuple[array, array]:
+    """COO -> CSR with a counting sort: returns (indptr, indices) where row r is indices[indptr[r]:indptr[r + 1]]."""
+    indptr = array('q', [0]) * (n_rows + 1)
+    for row in rows:
+        indptr[row + 1] += 1
+    for row in range(n_rows):
+        indptr[row + 1] += indptr[row]
+    indices = array('i', [0]) * len(rows)
+    fill = indptr[:-1]
+    for row, col in zip(rows, cols):
+        indices[fill[row]] = col
+        fill[row] += 1
+    return indptr, indices
+
+class IncidenceMatrix:
+    """
+    Sparse user x event incidence matrix. User and event ids are mapped to dense
+    integer codes; the matrix is stored in CSR form (user -> events) together with
+    its transpose (event -> users), both as flat `array` buffers.
+    """
+    def __init__(self, user_ids: List[str], event_ids: List[str], rows: array, cols: array):
+        self.user_ids = user_ids
+        self.event_ids = event_ids
+        self.user_codes = {user_id: code for code, user_id in enumerate(user_ids)}
+        self.event_codes = {event_id: code for code, event_id in enumerate(event_ids)}
+        self.user_indptr, self.user_indices = _compress(rows, cols, len(user_ids))
+        self.event_indptr, self.event_indices = _compress(cols, rows, len(event_ids))
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, str]]) -> "IncidenceMatrix":
+        builder = MatrixBuilder()
+        builder.add(pairs)
+        return builder.build()
+
+    @property
+    def nnz(self) -> int:
+        return len(self.user_indices)
+
+    def pairs(self) -> Iterator[Tuple[str, str]]:
+        for code, user_id in enumerate(self.user_ids):
+            for event in self.user_indices[self.user_indptr[code]:self.user_indptr[code + 1]]:
+                yield user_id, self.event_ids[event]
+
+    def members(self, event_id: str) -> List[str]:
+        code = self.event_codes.get(event_id)
+        if code is None:
+            return []
+        return [self.user_ids[user] for user in self.event_indices[self.event_indptr[code]:self.event_indptr[code + 1]]]
+
+    def with_members(self, members: Dict[str, List[str]]) -> "IncidenceMatrix":
+        """A copy where the listed events have exactly the given users."""
+        pairs = ((user_id, event_id) for user_id, event_id in self.pairs() if event_id not in members)
+        builder = MatrixBuilder()
+        builder.add(pairs)
+        builder.add((user_id, event_id) for event_id, user_ids in members.items() for user_id in user_ids)
+        return builder.build()
+
+    def top_neighbours(self, k: int, max_event_size: int,
+                       users: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, List[Tuple[int, int]]]]:
+        """
+        Yields (user, [(neighbour, shared_events), ...]) with up to `k` neighbours per
+        user, most shared events first. Rows of A·Aᵀ are computed one at a time
+        (Gustavson's algorithm) with a dense accumulator that is reset after each row.
+        Events with more than `max_event_size` users are skipped: they make the
+        product quadratic and sharing one says little about two people.
+        """
+        scores = array('I', [0]) * len(self.user_ids)
+        for user in (range(len(self.user_ids)) if users is None else users):
+            touched = []
+            for event in self.user_indices[self.user_indptr[user]:self.user_indptr[user + 1]]:
+                start, end = self.event_indptr[event], self.event_indptr[event + 1]
+                if end - start > max_event_size:
+                    continue
+                for other in self.event_indices[start:end]:
+                    if scores[other] == 0:
+                        touched.append(other)
+                    scores[other] += 1
+            neighbours = heapq.nsmallest(
+                k, (other for other in touched if other != user),
+                key=lambda other: (-scores[other], self.user_ids[other])
+            )
+            yield user, [(other, scores[other]) for other in neighbours]
+            for other in touched:
+                scores[other] = 0
+
+    def save(self, path: str) -> None:
+        """Writes the matrix (ids and COO arrays) to a gzip-compressed pickle (atomically)."""
+        rows = array('i')
+        for code in range(len(self.user_ids)):
+            rows.extend([code] * (self.user_indptr[code + 1] - self.user_indptr[code]))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wb", compresslevel=1) as f:
+            pickle.dump({"user_ids": self.user_ids, "event_ids": self.event_ids,
+                         "rows": rows, "cols": self.user_indices}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IncidenceMatrix":
+        with gzip.open(path, "rb") as f:
+            payload = pickle.load(f)
+        return cls(payload["user_ids"], payload["event_ids"], payload["rows"], payload["cols"])
+
+class MatrixBuilder:
+    """
+    Accumulates (user_id, event_id) pairs as integer COO arrays; thread-safe per call
+    to `add`. Repeated pairs are dropped: a user holding several roles in one event
+    has one relation item per role, but attends the event once.
+    """
+    def __init__(self):
+        self.user_codes: Dict[str, int] = {}
+        self.event_codes: Dict[str, int] = {}
+        self.rows = array('i')
+        self.cols = array('i')
+        self._seen = set()  # user code << 32 | event code of every pair added
+        self._lock = threading.Lock()
+
+    def add(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for user_id, event_id in pairs:
+                user = self.user_codes.setdefault(user_id, len(self.user_codes))
+                event = self.event_codes.setdefault(event_id, len(self.event_codes))
+                pair = user << 32 | event
+                if pair in self._seen:
+                    continue
+                self._seen.add(pair)
+                self.rows.append(user)
+                self.cols.append(event)
+
+    def build(self) -> IncidenceMatrix:
+        return IncidenceMatrix(list(self.user_codes), list(self.event_codes), self.rows, self.cols)
+
+def scan_matrix(relations_repo: UserEventRelationsRepository, total_segments: int) -> IncidenceMatrix:
+    builder = MatrixBuilder()
+
+    def handle_page(page):
+        builder.add((item['user_id'], item['event_id']) for item in page if 'user_id' in item and 'event_id' in item)
+
+    relations_repo.parallel_scan(handle_page, total_segments, fields=['user_id', 'event_id'])
+    return builder.build()
+
+def suggestion_items(matrix: IncidenceMatrix, users: Optional[Iterable[int]] = None) -> Iterator[dict]:
+    updated_at = datetime.now(timezone.utc).isoformat()
+    for user, neighbours in matrix.top_neighbours(SUGGESTIONS_TOP_K, SUGGESTIONS_MAX_EVENT_SIZE, users):
+        yield {
+            "user_id": matrix.user_ids[user],
+            "suggestions": [{"user_id": matrix.user_ids[other], "shared_events": shared} for other, shared in neighbours],
+            "updated_at": updated_at,
+        }
+
+def run_full(total_segments: int = SCAN_TOTAL_SEGMENTS, path: str = SUGGESTIONS_GRAPH_PATH,
+             relations_repo: Optional[UserEventRelationsRepository] = None,
+             suggestions_repo: Optional[SuggestionsRepository] = None) -> int:
+    """Rebuilds the matrix and every user's suggestions. Returns the number of users written."""
+    relations_repo = relations_repo or UserEventRelationsRepository()
+    suggestions_repo = suggestions_repo or SuggestionsRepository()
+    matrix = scan_matrix(relations_repo, total_segments)
+    logger.info(f"Built a {len(matrix.user_ids)} x {len(matrix.event_ids)} incidence matrix with {matrix.nnz} relations.")
+    written = suggestions_repo.put_suggestions(suggestion_items(matrix))
+    # Users without any relation left keep no stale suggestions
+    stale, stale_lock = [], threading.Lock()
+
+    def collect_stale(page):
+        with stale_lock:
+            stale.extend(item['user_id'] for item in page if item['user_id'] not in matrix.user_codes)
+
+    suggestions_repo.parallel_scan(collect_stale, total_segments, fields=['user_id'])
+    suggestions_repo.delete_suggestions(stale)
+    matrix.save(path)
+    return written
+
+def run_incremental(event_ids: List[str], path: str = SUGGESTIONS_GRAPH_PATH,
+                    relations_repo: Optional[UserEventRelationsRepository] = None,
+                    suggestions_repo: Optional[SuggestionsRepository] = None) -> int:
+    """
+    Re-reads the users of `event_ids` and recomputes the suggestions of every user
+    who was or now is in one of them; no other row of A·Aᵀ can change.
+    Returns the number of users written.
+    """
+    relations_repo = relations_repo or UserEventRelationsRepository()
+    suggestions_repo = suggestions_repo or SuggestionsRepository()
+    matrix = IncidenceMatrix.load(path)
+    members = {
+        event_id: [item['user_id'] for item in relations_repo.iter_users_for_event(event_id, fields=['user_id'])]
+        for event_id in event_ids
+    }
+    affected = {user_id for event_id in event_ids for user_id in matrix.members(event_id)}
+    affected.update(user_id for user_ids in members.values() for user_id in user_ids)
+    matrix = matrix.with_members(members)
+    users = sorted(matrix.user_codes[user_id] for user_id in affected if user_id in matrix.user_codes)
+    written = suggestions_repo.put_suggestions(suggestion_items(matrix, users))
+    suggestions_repo.delete_suggestions([user_id for user_id in affected if user_id not in matrix.user_codes])
+    matrix.save(path)
+    return written
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute contact suggestions from event co-attendance.")
+    parser.add_argument("--segments", type=int, default=SCAN_TOTAL_SEGMENTS, help="Parallel scan segments")
+    parser.add_argument("--events", help="Comma-separated event IDs whose relations changed, instead of a full run")
+    parser.add_argument("--path", default=SUGGESTIONS_GRAPH_PATH, help="Saved incidence matrix")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.events:
+        if not os.path.exists(args.path):
+            parser.error(f"{args.path} does not exist yet; run a full build first.")
+        event_ids = [event_id.strip() for event_id in args.events.split(",") if event_id.strip()]
+        written = run_incremental(event_ids, args.path)
+    else:
+        written = run_full(args.segments, args.path)
+    logger.info(f"Wrote suggestions for {written} users.")
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,82 @@
 # app/main.py
 
 from fastapi import FastAPI
-from app.core.config import API_TITLE, API_DESCRIPTION, API_VERSION
-from app.routers import event_router, user_router, email_logs_router # Import routers
-
-# --- FastAPI App Initialization ---
-app = FastAPI(
-    title=API_TITLE,
-    description=API_DESCRIPTION,
-    version=API_VERSION
+from app.core.config import (
+    API_TITLE, API_DESCRIPTION, API_VERSION, EVENT_SEARCH_INDEX_PATH, ADMISSION_CONTROL_ENABLED,
+    PROFILING_ENABLED, PROFILING_TOKEN, PROFILING_DIR, PROFILING_MODE, PROFILING_SAMPLE_INTERVAL_MS,
+    COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
 )
+from app.routers import event_router, user_router, email_logs_router, campaign_router, metrics_router, stats_router # Import routers
+from app.dependencies import get_event_search_index, get_event_search_refresher, get_event_catalog, get_admission_controller, warmup
+from app.utils.admission import AdmissionMiddleware
+from app.utils.compression import CompressionMiddleware
+from app.utils.profiling import ProfilingMiddleware, instrument
 
-# --- Include Routers ---
-app.include_router(user_router.router)
-app.include_router(event_router.router)
-app.include_router(email_logs_router.router)  # Assuming you have an email router
+def create_app() -> FastAPI:
+    """
+    App factory. Each server worker builds its own app, and the startup hooks
+    below run once per worker, after any fork.
+    """
+    # --- FastAPI App Initialization ---
+    app = FastAPI(
+        title=API_TITLE,
+        description=API_DESCRIPTION,
+        version=API_VERSION
+    )
 
-# --- Root Endpoint ---
-@app.get("/")
-async def root():
-    return {"message": "Welcome to the User and Event Management API!"}
\ No newline at end of file
+    # --- Middleware (the last added runs first) ---
+    if COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY
+        )
+    if PROFILING_ENABLED and PROFILING_TOKEN:
+        # Inside admission control, so queueing time is not profiled
+        instrument()
+        app.add_middleware(
+            ProfilingMiddleware, token=PROFILING_TOKEN, directory=PROFILING_DIR, default_mode=PROFILING_MODE,
+            sample_interval_seconds=PROFILING_SAMPLE_INTERVAL_MS / 1000
+        )
+    if ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionMiddleware, controller=get_admission_controller())
+
+    # --- Include Routers ---
+    app.include_router(user_router.router)
+    app.include_router(event_router.router)
+    app.include_router(email_logs_router.router)  # Assuming you have an email router
+    app.include_router(campaign_router.router)
+    app.include_router(metrics_router.router)
+    app.include_router(stats_router.router)
+
+    # --- Lifecycle ---
+    @app.on_event("startup")
+    async def warm_repositories():
+        # Open the DynamoDB connection and load table metadata before the first request
+        warmup()
+
+    @app.on_event("startup")
+    async def start_event_search_index():
+        # Built in the background so the API accepts requests while the Events table is scanned,
+        # then refreshed with the event writes served by other workers
+        get_event_search_refresher().start()
+
+    @app.on_event("shutdown")
+    async def save_event_search_index():
+        get_event_search_refresher().stop()
+        if EVENT_SEARCH_INDEX_PATH:
+            get_event_search_index().save(EVENT_SEARCH_INDEX_PATH)
+
+    @app.on_event("shutdown")
+    async def stop_event_catalog():
+        catalog = get_event_catalog()
+        if catalog is not None:
+            catalog.stop()
+
+    # --- Root Endpoint ---
+    @app.get("/")
+    async def root():
+        return {"message": "Welcome to the User and Event Management API!"}
+
+    return app
+
+# Module-level app for `uvicorn app.main:app` during development
+app = create_app()
\ No newline at end of file
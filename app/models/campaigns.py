@@ -0,0 +1,34 @@
+# app/models/campaigns.py
+
+from pydantic import BaseModel, Field, root_validator
+from typing import Optional, List
+from app.utils.filter_request import FilterQueryRequest
+
+class CampaignRequest(BaseModel):
+    segment: Optional[List[FilterQueryRequest.Filter]] = Field(None, description="User filters selecting the recipients (same format as POST /users/).")
+    event_id: Optional[str] = Field(None, example="e1", description="Select the users related to this event instead of a filter segment.")
+    role: Optional[str] = Field(None, example="host", description="With event_id, only users with this role.")
+    subject: str = Field(..., example="See you at $event_title, $first_name!", description="Subject template; $field placeholders are filled per recipient.")
+    body: str = Field(..., example="Dear $first_name $last_name,\n\n...", description="Plain-text body template; $field placeholders are filled per recipient.")
+    rate_per_second: Optional[float] = Field(None, gt=0, le=100, description="Maximum send rate; defaults to CAMPAIGN_RATE_PER_SECOND.")
+
+    @root_validator(skip_on_failure=True)
+    def check_selector(cls, values):
+        if (values.get("segment") is None) == (values.get("event_id") is None):
+            raise ValueError("Provide exactly one of 'segment' or 'event_id'")
+        if values.get("role") and not values.get("event_id"):
+            raise ValueError("'role' can only be used together with 'event_id'")
+        return values
+
+class CampaignStatus(BaseModel):
+    campaign_id: str = Field(..., example="3f1c...", description="Campaign identifier.")
+    state: str = Field(..., example="running", description="pending, running, completed, cancelled or failed.")
+    matched: int = Field(0, description="Recipients streamed from the segment so far.")
+    sent: int = Field(0, description="Emails sent successfully.")
+    failed: int = Field(0, description="Emails that could not be sent.")
+    skipped: int = Field(0, description="Recipients without an email address, or duplicates.")
+    started_at: Optional[str] = Field(None, description="ISO 8601 start time (UTC).")
+    finished_at: Optional[str] = Field(None, description="ISO 8601 end time (UTC).")
+    throughput_per_second: float = Field(0.0, description="Emails sent per second since the campaign started.")
+    error: Optional[str] = Field(None, description="Reason the campaign stopped, if it failed.")
+    cancel_requested: bool = Field(False, description="A cancel was requested; the sending worker stops at its next progress check.")
\ No newline at end of file
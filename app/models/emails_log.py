@@ -1,6 +1,14 @@
 from pydantic import BaseModel, Field
+from typing import Optional, List
 
 class EmailLog(BaseModel):
     email_id: str = Field(..., example="email_1", description="Unique identifier for the email log entry.")
     recipient_email: str = Field(..., example="email@example.com", description="Email address of the recipient.")
-    status: str = Field(..., example="sent", description="Status of the email (e.g., sent, failed).")
\ No newline at end of file
+    status: str = Field(..., example="sent", description="Status of the email (e.g., sent, failed).")
+    sent_at: Optional[str] = Field(None, example="2025-08-01T10:00:00.000Z", description="When the send was attempted (ISO 8601, UTC).")
+    error: Optional[str] = Field(None, example="SMTP authentication failed", description="Failure reason for failed emails.")
+
+class EmailLogPage(BaseModel):
+    items: List[EmailLog]
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page; absent on the last page.")
+    limit: int
\ No newline at end of file
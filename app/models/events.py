@@ -12,6 +12,8 @@ class Event(BaseModel):
     end_at: str = Field(..., example="2025-08-01T12:00:00Z", description="End date and time of the event (ISO 8601 format).")
     venue: str = Field(..., example="Online via Zoom", description="Location or platform where the event takes place.")
     max_capacity: Optional[int] = Field(None, example=100, description="Maximum number of attendees for the event.")
+    updated_at: Optional[str] = Field(None, example="2025-07-01T09:30:00.000Z", description="Time of the last write (ISO 8601, UTC).")
+    version: Optional[int] = Field(None, example=3, description="Incremented by every update; used for optimistic concurrency.")
 
     # class Config:
     #     populate_by_name = True
@@ -22,4 +24,31 @@ class EventRequest(BaseModel):
     start_at: str = Field(..., example="2025-08-01T10:00:00Z", description="Start date and time of the event (ISO 8601 format).")
     end_at: str = Field(..., example="2025-08-01T12:00:00Z", description="End date and time of the event (ISO 8601 format).")
     venue: str = Field(..., example="Online via Zoom", description="Location or platform where the event takes place.")
-    max_capacity: Optional[int] = Field(None, example=100, description="Maximum number of attendees for the event.")
\ No newline at end of file
+    max_capacity: Optional[int] = Field(None, example=100, description="Maximum number of attendees for the event.")
+
+class EventPatch(BaseModel):
+    """Partial update: only the attributes sent are changed; null removes an optional attribute."""
+    slug: Optional[str] = Field(None, example="fastapi-basics-workshop", description="URL-friendly identifier for the event.")
+    title: Optional[str] = Field(None, example="FastAPI Basics Workshop", description="Title of the event.")
+    description: Optional[str] = Field(None, example="An introductory workshop on FastAPI.", description="Detailed description of the event.")
+    start_at: Optional[str] = Field(None, example="2025-08-01T10:00:00Z", description="Start date and time of the event (ISO 8601 format).")
+    end_at: Optional[str] = Field(None, example="2025-08-01T12:00:00Z", description="End date and time of the event (ISO 8601 format).")
+    venue: Optional[str] = Field(None, example="Online via Zoom", description="Location or platform where the event takes place.")
+    max_capacity: Optional[int] = Field(None, example=100, description="Maximum number of attendees for the event.")
+
+    class Config:
+        extra = "forbid"
+
+class EventPatchResult(EventPatch):
+    """The attributes written by a PATCH (UPDATED_NEW), with the new version."""
+    event_id: str = Field(..., example="e1", description="Unique identifier for the event.")
+    updated_at: Optional[str] = Field(None, example="2025-07-01T09:30:00.000Z", description="Time of the last write (ISO 8601, UTC).")
+    version: int = Field(..., example=4, description="Version after the update.")
+
+class EventSearchResult(BaseModel):
+    event_id: str = Field(..., example="e1", description="Unique identifier for the event.")
+    score: float = Field(..., example=7.42, description="BM25 relevance score; higher is better.")
+    title: Optional[str] = Field(None, example="FastAPI Basics Workshop", description="Title of the event.")
+    slug: Optional[str] = Field(None, example="fastapi-basics-workshop", description="URL-friendly identifier for the event.")
+    start_at: Optional[str] = Field(None, example="2025-08-01T10:00:00Z", description="Start date and time of the event (ISO 8601 format).")
+    venue: Optional[str] = Field(None, example="Online via Zoom", description="Location or platform where the event takes place.")
\ No newline at end of file
@@ -1,7 +1,9 @@
 # app/models/relation.py
 
 from pydantic import BaseModel, Field
-from typing import Optional, List 
+from typing import Optional, List, Dict
+from app.models.events import Event
+from app.models.users import User
 class UserEventRelation(BaseModel):
     PK: str
     SK: str
@@ -36,6 +38,9 @@ class UserEventListItem(BaseModel):
     # class Config:
     #     populate_by_name = True
 
+class UserEventExpandedListItem(UserEventListItem):
+    event: Optional[Event] = Field(None, description="Full event details, present when requested with expand=event.")
+
 class EventUserListItem(BaseModel):
     user_id: str = Field(..., example="u1")
     first_name: Optional[str] = Field(None) 
@@ -49,4 +54,49 @@ class EventUserListItem(BaseModel):
     state: Optional[str] = Field(None)
 
     # class Config:
-    #     populate_by_name = True
\ No newline at end of file
+    #     populate_by_name = True
+
+class UserProfile(BaseModel):
+    user: User
+    events: Optional[List[UserEventListItem]] = Field(None, description="Null when the events could not be read in time.")
+    partial: bool = Field(False, description="True when some parts are missing; see `errors`.")
+    errors: Dict[str, str] = Field({}, description="Reason per missing part, e.g. {'events': 'timeout'}.")
+
+class EventDetail(BaseModel):
+    event: Event
+    users: Optional[List[EventUserListItem]] = Field(None, description="Null when the users could not be read in time.")
+    partial: bool = Field(False, description="True when some parts are missing; see `errors`.")
+    errors: Dict[str, str] = Field({}, description="Reason per missing part, e.g. {'users': 'timeout'}.")
+
+class SuggestedContact(BaseModel):
+    user_id: str = Field(..., example="u2")
+    shared_events: int = Field(..., example=3, description="Events both users are related to.")
+
+class UserSuggestions(BaseModel):
+    user_id: str
+    suggestions: List[SuggestedContact]
+    updated_at: Optional[str] = Field(None, description="When the suggestions were computed.")
+
+class RosterRowResult(BaseModel):
+    row: int = Field(..., example=1, description="1-based position of the row in the request body (CSV header excluded).")
+    user_id: Optional[str] = Field(None, example="u1", description="Given or resolved from `email`.")
+    email: Optional[str] = None
+    role: Optional[str] = Field(None, example="host")
+    status: str = Field(..., example="created", description="created, exists, duplicate, user_not_found, invalid or failed.")
+    detail: Optional[str] = None
+
+class RosterImportSummary(BaseModel):
+    rows: int
+    created: int
+    exists: int
+    duplicate: int
+    user_not_found: int
+    invalid: int
+    failed: int
+    seconds: float
+    rows_per_second: Optional[float] = None
+
+class RosterImportReport(BaseModel):
+    event_id: str
+    summary: RosterImportSummary
+    rows: List[RosterRowResult]
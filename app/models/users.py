@@ -15,6 +15,7 @@ class User(BaseModel):
     company: Optional[str] = Field(None, example="Tech Solutions Inc.", description="User's company.")
     city: Optional[str] = Field(None, example="Ho Chi Minh City", description="User's current city.")
     state: Optional[str] = Field(None, example="Ho Chi Minh", description="User's current state/province.")
+    version: Optional[int] = Field(None, example=3, description="Incremented by every update; used for optimistic concurrency.")
 
     # class Config:
     #     populate_by_name = True # Might be used to work with alias later
@@ -29,3 +30,24 @@ class UserRequest(BaseModel):
     company: Optional[str] = Field(None, example="Tech Solutions Inc.", description="User's company.")
     city: Optional[str] = Field(None, example="Ho Chi Minh City", description="User's current city.")
     state: Optional[str] = Field(None, example="Ho Chi Minh", description="User's current state/province.")
+
+class UserPatch(BaseModel):
+    """Partial update: only the attributes sent are changed; null removes an optional attribute."""
+    first_name: Optional[str] = Field(None, example="Alice", description="User's first name.")
+    last_name: Optional[str] = Field(None, example="Smith", description="User's last name.")
+    phone_number: Optional[str] = Field(None, example="+84123456789", description="User's phone number.")
+    email: Optional[str] = Field(None, example="alice@example.com", description="User's email address (unique).")
+    avatar: Optional[str] = Field(None, example="http://example.com/avatars/u1.jpg", description="URL to the user's avatar image.")
+    gender: Optional[str] = Field(None, example="Female", description="User's gender.")
+    job_title: Optional[str] = Field(None, example="Senior Developer", description="User's job title.")
+    company: Optional[str] = Field(None, example="Tech Solutions Inc.", description="User's company.")
+    city: Optional[str] = Field(None, example="Ho Chi Minh City", description="User's current city.")
+    state: Optional[str] = Field(None, example="Ho Chi Minh", description="User's current state/province.")
+
+    class Config:
+        extra = "forbid"
+
+class UserPatchResult(UserPatch):
+    """The attributes written by a PATCH (UPDATED_NEW), with the new version."""
+    user_id: str = Field(..., example="u1", description="Unique identifier for the user.")
+    version: int = Field(..., example=4, description="Version after the update.")
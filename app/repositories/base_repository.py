@@ -1,12 +1,43 @@
 # app/repositories/base_repository.py
 from app.core.db_connection import db_connection
+from app.core.config import BATCH_GET_MAX_WORKERS, BATCH_MAX_RETRIES, BATCH_WRITE_MAX_WORKERS
 from botocore.exceptions import ClientError
-from typing import Dict, Any, Optional
+from boto3.dynamodb.conditions import Attr
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Set, Callable, Tuple
+import logging
+import time
+
+logger = logging.getLogger('uvicorn.error')
+
+STREAM_DONE = "done"  # Cursor position of a fully read query partition or scan segment
+MAX_READ_WORKERS = 16
+VERSION_ATTRIBUTE = "version"  # Incremented by every update; items written before versioning count as version 0
+
+def drop_empty_attributes(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Removes None and "" attributes in place and returns the item. GSI key attributes
+    cannot be NULL or empty, and an absent attribute simply keeps the item out of the index.
+    """
+    for name in [name for name, value in item.items() if value is None or value == ""]:
+        del item[name]
+    return item
+
+class ItemNotFound(Exception):
+    """Raised by conditional updates when the item does not exist (nothing is upserted)."""
+
+class VersionConflict(Exception):
+    """Raised by conditional updates when the item's version is not the expected one."""
+    def __init__(self, current_version: int):
+        super().__init__(f"Item is at version {current_version}.")
+        self.current_version = current_version
 
 class BaseRepository:
     def __init__(self, table_name: str):
         db_connection.initialize() # Ensure DB connection is ready
+        self.table_name = table_name
         self.table = db_connection.dynamodb_resource.Table(table_name)
+        self.mirror = None # Optional SingleTableRepository that receives dual writes
         try:
             self.table.load() # Verifies table existence and loads metadata
         except ClientError as e:
@@ -15,4 +46,279 @@ class BaseRepository:
             raise # Re-raise for higher-level handling
         except Exception as e:
             print(f"Error initializing repository for table '{table_name}': {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def _mirrored(self, operation: str, key: Any, write: Callable[[], Any]) -> None:
+        """
+        Applies a dual write to the single-table mirror. The primary write has already
+        succeeded, so a failed mirror write does not fail the request: it is logged and
+        counted by the mirror, and `migrate_single_table verify` reports the row.
+        """
+        try:
+            write()
+        except Exception as e:
+            self.mirror.record_failure(operation, key, e)
+
+    def _index_projection(self, index_name: str) -> Optional[Set[str]]:
+        """
+        Returns the attribute names projected into a GSI, or None when the index
+        projects ALL attributes (or is unknown), so any field can be requested.
+        """
+        for index in self.table.global_secondary_indexes or []:
+            if index['IndexName'] != index_name:
+                continue
+            projection = index.get('Projection', {})
+            if projection.get('ProjectionType', 'ALL') == 'ALL':
+                return None
+            attributes = {key['AttributeName'] for key in index['KeySchema']}
+            attributes.update(key['AttributeName'] for key in self.table.key_schema)
+            attributes.update(projection.get('NonKeyAttributes', []))
+            return attributes
+        return None
+
+    def _projection_kwargs(self, fields: Optional[List[str]], index_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Builds ProjectionExpression/ExpressionAttributeNames for get_item, query and scan.
+        Every attribute goes through a '#pN' placeholder, so reserved words like 'state'
+        or 'role' are safe. For GSI reads only the attributes the index actually projects
+        are requested, so the read is served by the index alone.
+        """
+        if not fields:
+            return {}
+        names = list(dict.fromkeys(fields))
+        if index_name:
+            projected = self._index_projection(index_name)
+            if projected is not None:
+                dropped = [name for name in names if name not in projected]
+                if dropped:
+                    logger.debug(f"Fields {dropped} are not projected into '{index_name}', skipping them.")
+                names = [name for name in names if name in projected]
+        if not names:
+            return {}
+        placeholders = {f"#p{i}": name for i, name in enumerate(names)}
+        return {
+            "ProjectionExpression": ", ".join(placeholders),
+            "ExpressionAttributeNames": placeholders
+        }
+
+    def _query_all(self, **query_kwargs) -> List[Dict[str, Any]]:
+        """Runs a Query to the end, following LastEvaluatedKey past the 1 MB page limit."""
+        items = []
+        while True:
+            response = self.table.query(**query_kwargs)
+            items.extend(response.get('Items', []))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return items
+            query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    def _count_query(self, **query_kwargs) -> int:
+        """Counts the items matched by a Query across all pages without transferring them."""
+        query_kwargs["Select"] = "COUNT"
+        total = 0
+        while True:
+            response = self.table.query(**query_kwargs)
+            total += response.get('Count', 0)
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                return total
+            query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+    def _count_scan(self, total_segments: int, **scan_kwargs) -> int:
+        """Counts the items matched by a Scan, running `total_segments` segments in parallel."""
+        def count_segment(segment: int) -> int:
+            segment_kwargs = dict(scan_kwargs, Select="COUNT", Segment=segment, TotalSegments=total_segments)
+            total = 0
+            while True:
+                response = self.table.scan(**segment_kwargs)
+                total += response.get('Count', 0)
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    return total
+                segment_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        total_segments = max(1, total_segments)
+        if total_segments == 1:
+            return count_segment(0)
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            return sum(executor.map(count_segment, range(total_segments)))
+
+    def _batch_get(self, keys: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Fetches many items by primary key with BatchGetItem. Keys are deduplicated,
+        split into 100-key chunks dispatched concurrently, and unprocessed keys are
+        retried with exponential backoff. Returns one entry per input key, in input
+        order, with None for keys that do not exist.
+        """
+        if not keys:
+            return []
+        key_names = [key['AttributeName'] for key in self.table.key_schema]
+
+        def key_of(item: Dict[str, Any]) -> tuple:
+            return tuple(item.get(name) for name in key_names)
+
+        unique_keys = list({key_of(key): key for key in keys}.values())
+        request_template = {}
+        if fields:
+            # Key attributes are always read so results can be matched back to the input
+            request_template.update(self._projection_kwargs(list(dict.fromkeys(key_names + fields))))
+
+        def fetch_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            items = []
+            request_items = {self.table_name: dict(request_template, Keys=chunk)}
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                response = db_connection.dynamodb_resource.batch_get_item(RequestItems=request_items)
+                items.extend(response.get('Responses', {}).get(self.table_name, []))
+                request_items = response.get('UnprocessedKeys') or {}
+                if not request_items:
+                    return items
+                time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            raise RuntimeError(f"BatchGetItem on '{self.table_name}' left keys unprocessed after {BATCH_MAX_RETRIES} retries.")
+
+        chunks = [unique_keys[i:i + 100] for i in range(0, len(unique_keys), 100)]
+        found: Dict[tuple, Dict[str, Any]] = {}
+        if len(chunks) == 1:
+            results = [fetch_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(BATCH_GET_MAX_WORKERS, len(chunks)))) as executor:
+                results = list(executor.map(fetch_chunk, chunks))
+        for items in results:
+            for item in items:
+                found[key_of(item)] = item
+        return [found.get(key_of(key)) for key in keys]
+
+    def _batch_write(self, items: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Puts many items with BatchWriteItem. Items are split into 25-item chunks
+        dispatched concurrently, and unprocessed items are retried with exponential
+        backoff. Keys must be unique within `items`. Returns (item, reason) for every
+        item that could not be written; all others were written.
+        """
+        def write_chunk(chunk: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+            pending = [{"PutRequest": {"Item": item}} for item in chunk]
+            try:
+                for attempt in range(BATCH_MAX_RETRIES + 1):
+                    response = db_connection.dynamodb_resource.batch_write_item(RequestItems={self.table_name: pending})
+                    pending = (response.get('UnprocessedItems') or {}).get(self.table_name, [])
+                    if not pending:
+                        return []
+                    time.sleep(min(0.05 * (2 ** attempt), 1.0))
+            except ClientError as e:
+                return [(request["PutRequest"]["Item"], e.response['Error']['Message']) for request in pending]
+            reason = f"Unprocessed after {BATCH_MAX_RETRIES} retries"
+            return [(request["PutRequest"]["Item"], reason) for request in pending]
+
+        chunks = [items[i:i + 25] for i in range(0, len(items), 25)]
+        if len(chunks) <= 1:
+            return write_chunk(chunks[0]) if chunks else []
+        with ThreadPoolExecutor(max_workers=max(1, min(BATCH_WRITE_MAX_WORKERS, len(chunks)))) as executor:
+            return [failure for failures in executor.map(write_chunk, chunks) for failure in failures]
+
+    def _patch_item(self, key: Dict[str, Any], changes: Dict[str, Any], expected_version: Optional[int],
+                    return_values: str) -> Dict[str, Any]:
+        """
+        Partial update of an existing item in one UpdateItem: attributes in `changes`
+        are SET (or REMOVEd when None or "") and `version` is incremented. The write is
+        conditioned on the item existing and, with `expected_version`, on its version,
+        so it never upserts or overwrites a concurrent change; ItemNotFound or
+        VersionConflict is raised instead. Returns the Attributes asked for by `return_values`.
+        """
+        names = {"#version": VERSION_ATTRIBUTE}
+        values = {":version_increment": 1}
+        set_parts, remove_parts = [], []
+        for i, (name, value) in enumerate(changes.items()):
+            names[f"#a{i}"] = name
+            if value is None or value == "":
+                remove_parts.append(f"#a{i}")
+            else:
+                values[f":a{i}"] = value
+                set_parts.append(f"#a{i} = :a{i}")
+        update_expression = "ADD #version :version_increment"
+        if remove_parts:
+            update_expression = f"REMOVE {', '.join(remove_parts)} {update_expression}"
+        if set_parts:
+            update_expression = f"SET {', '.join(set_parts)} {update_expression}"
+
+        hash_key = next(k['AttributeName'] for k in self.table.key_schema if k['KeyType'] == 'HASH')
+        condition = Attr(hash_key).exists()
+        if expected_version is not None:
+            version = Attr(VERSION_ATTRIBUTE)
+            condition = condition & (version.eq(expected_version) if expected_version > 0 else version.not_exists())
+        try:
+            response = self.table.update_item(
+                Key=key,
+                UpdateExpression=update_expression,
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues=return_values
+            )
+            return response.get('Attributes', {})
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+        current = self.table.get_item(Key=key, **self._projection_kwargs(list(key) + [VERSION_ATTRIBUTE])).get('Item')
+        if not current:
+            raise ItemNotFound()
+        raise VersionConflict(int(current.get(VERSION_ATTRIBUTE, 0)))
+
+    def _paginate_streams(
+            self,
+            operation: str,
+            streams: List[Dict[str, Any]],
+            limit: int,
+            positions: Optional[list]
+        ) -> tuple:
+        """
+        Reads up to `limit` items from independent query partitions or scan segments.
+        `positions` holds each stream's resume key, None (not started) or STREAM_DONE.
+        Streams are read one at a time, in order, and each request asks only for the
+        items still missing (Limit=limit-len(items)), so the page ends exactly at the
+        stream's LastEvaluatedKey: nothing is read that is not returned, or read again
+        by the next page. The next stream is started only once the current one is done.
+        Returns (items, next_positions); next_positions is None once every stream is done.
+        """
+        read = getattr(self.table, operation)
+        positions = list(positions) if positions else [None] * len(streams)
+        if len(positions) != len(streams):
+            raise ValueError("Pagination cursor does not match the query plan.")
+        items: List[Dict[str, Any]] = []
+        for i, stream in enumerate(streams):
+            while len(items) < limit and positions[i] != STREAM_DONE:
+                kwargs = dict(stream, Limit=limit - len(items))
+                if positions[i] is not None:
+                    kwargs["ExclusiveStartKey"] = positions[i]
+                response = read(**kwargs)
+                items.extend(response.get('Items', []))
+                positions[i] = response.get('LastEvaluatedKey') or STREAM_DONE
+            if len(items) >= limit:
+                break
+        if all(position == STREAM_DONE for position in positions):
+            return items, None
+        return items, positions
+
+    def parallel_scan(self, handle_page: Callable[[List[Dict[str, Any]]], None], total_segments: int,
+                      fields: Optional[List[str]] = None, **scan_kwargs) -> int:
+        """
+        Scans the whole table with `total_segments` concurrent segments, calling
+        `handle_page` with each page of items (from several threads, so it must be
+        thread-safe). Only `fields` are read when given. Returns the number of items scanned.
+        """
+        scan_kwargs.update(self._projection_kwargs(fields))
+
+        def scan_segment(segment: int) -> int:
+            segment_kwargs = dict(scan_kwargs, Segment=segment, TotalSegments=total_segments)
+            scanned = 0
+            while True:
+                response = self.table.scan(**segment_kwargs)
+                items = response.get('Items', [])
+                scanned += len(items)
+                handle_page(items)
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    return scanned
+                segment_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        total_segments = max(1, total_segments)
+        with ThreadPoolExecutor(max_workers=min(total_segments, MAX_READ_WORKERS)) as executor:
+            return sum(executor.map(scan_segment, range(total_segments)))
\ No newline at end of file
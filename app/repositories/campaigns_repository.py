@@ -0,0 +1,84 @@
+# app/repositories/campaigns_repository.py
+from app.repositories.base_repository import BaseRepository
+from app.core.config import CAMPAIGNS_TABLE_NAME
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from typing import Dict, Any, Optional, List
+import logging
+
+logger = logging.getLogger('uvicorn.error')
+
+class CampaignsRepository(BaseRepository):
+    """
+    One item per email campaign: its progress, written by the worker sending it, and
+    `cancel_requested`, set by whichever worker receives the cancel request.
+    """
+    def __init__(self):
+        super().__init__(CAMPAIGNS_TABLE_NAME) # Uses the table name defined in config
+
+    def create_campaign(self, item: Dict[str, Any]) -> None:
+        try:
+            self.table.put_item(Item=item, ConditionExpression=Attr('campaign_id').not_exists())
+        except ClientError as e:
+            print(f"DynamoDB ClientError in CampaignsRepository.create_campaign for {item.get('campaign_id')}: {e}")
+            raise
+
+    def get_campaign(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.table.get_item(Key={'campaign_id': campaign_id}, ConsistentRead=True).get('Item')
+        except ClientError as e:
+            print(f"DynamoDB ClientError in CampaignsRepository.get_campaign for {campaign_id}: {e}")
+            raise
+
+    def list_campaigns(self) -> List[Dict[str, Any]]:
+        """Every retained campaign, oldest first (the table only holds CAMPAIGN_RETENTION_DAYS of them)."""
+        items, scan_kwargs = [], {}
+        try:
+            while True:
+                response = self.table.scan(**scan_kwargs)
+                items.extend(response.get('Items', []))
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+        except ClientError as e:
+            print(f"DynamoDB ClientError in CampaignsRepository.list_campaigns: {e}")
+            raise
+        return sorted(items, key=lambda item: (item.get('created_at', ''), item['campaign_id']))
+
+    def save_progress(self, campaign_id: str, progress: Dict[str, Any]) -> bool:
+        """
+        Writes the given status attributes, leaving `cancel_requested` alone, and
+        returns whether a cancel has been requested meanwhile.
+        """
+        names = {f"#p{i}": name for i, name in enumerate(progress)}
+        values = {f":p{i}": value for i, value in enumerate(progress.values())}
+        try:
+            response = self.table.update_item(
+                Key={'campaign_id': campaign_id},
+                UpdateExpression="SET " + ", ".join(f"{name} = :p{i}" for i, name in enumerate(names)),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW"
+            )
+            return bool(response.get('Attributes', {}).get('cancel_requested'))
+        except ClientError as e:
+            print(f"DynamoDB ClientError in CampaignsRepository.save_progress for {campaign_id}: {e}")
+            raise
+
+    def request_cancel(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        """Flags the campaign for cancellation; returns the campaign, or None if it does not exist."""
+        try:
+            response = self.table.update_item(
+                Key={'campaign_id': campaign_id},
+                UpdateExpression="SET cancel_requested = :true",
+                ConditionExpression=Attr('campaign_id').exists(),
+                ExpressionAttributeValues={":true": True},
+                ReturnValues="ALL_NEW"
+            )
+            return response.get('Attributes')
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return None
+            print(f"DynamoDB ClientError in CampaignsRepository.request_cancel for {campaign_id}: {e}")
+            raise
@@ -1,43 +1,152 @@
-# app/repositories/event_repository.py
+# app/repositories/email_logs_repository.py
 from app.repositories.base_repository import BaseRepository
-from app.core.config import EMAIL_LOGS_TABLE_NAME
-from typing import Dict, Any, Optional
+from app.core.config import EMAIL_LOGS_TABLE_NAME, EMAIL_LOG_TTL_DAYS
+from typing import Dict, Any, Optional, Iterator
 from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Attr, Key
+from datetime import datetime, timedelta, timezone
 import logging
 
 logger = logging.getLogger('uvicorn.error')
 logger.setLevel(logging.DEBUG)
 
+STATUS_INDEX = 'status-sent_at-index'
+RECIPIENT_INDEX = 'recipient_email-sent_at-index'
+DAY_INDEX = 'log_day-sent_at-index'
+
 class EmailLogsRepository(BaseRepository):
     def __init__(self):
         super().__init__(EMAIL_LOGS_TABLE_NAME) # Uses the table name defined in config
 
-    def log_email_status(self, email_id: str, recipient_email: str, status: str):
-        """Store the status of a sent email in the EmailLogs table."""
+    def log_email_status(self, email_id: str, recipient_email: str, status: str, error: Optional[str] = None):
+        """
+        Store the status of a sent email in the EmailLogs table. Entries are timestamped
+        for the time-ordered indexes and expire after EMAIL_LOG_TTL_DAYS via `expires_at`.
+        """
+        now = datetime.now(timezone.utc)
+        item = {
+            "email_id": email_id,
+            "recipient_email": recipient_email,
+            "status": status,
+            "sent_at": now.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "log_day": now.strftime("%Y-%m-%d"),
+            "expires_at": int((now + timedelta(days=EMAIL_LOG_TTL_DAYS)).timestamp())
+        }
+        if error:
+            item["error"] = error
         try:
-            self.table.put_item(Item={
-                "email_id": email_id,
-                "recipient_email": recipient_email,
-                "status": status
-            })
+            self.table.put_item(Item=item)
         except ClientError as e:
             logger.error(f"Failed to log email status for {recipient_email}: {e}")
             raise
-    
-    def get_email_logs(self, limit: int = 10, exclusive_start_key: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Retrieve email logs with pagination."""
-        scan_kwargs = {"Limit": limit}
+
+    def _query_page(self, index_name: str, key_condition, limit: int, ascending: bool,
+                    exclusive_start_key: Optional[Dict[str, Any]], filter_expression=None) -> Dict[str, Any]:
+        query_kwargs = {
+            "IndexName": index_name,
+            "KeyConditionExpression": key_condition,
+            "ScanIndexForward": ascending,
+            "Limit": limit
+        }
+        if filter_expression is not None:
+            query_kwargs["FilterExpression"] = filter_expression
         if exclusive_start_key:
-            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
-        
+            query_kwargs["ExclusiveStartKey"] = exclusive_start_key
+        return self.table.query(**query_kwargs)
+
+    def get_email_logs(
+            self,
+            limit: int = 10,
+            cursor: Optional[Dict[str, Any]] = None,
+            status: Optional[str] = None,
+            recipient_email: Optional[str] = None,
+            since: Optional[str] = None,
+            until: Optional[str] = None,
+            ascending: bool = False
+        ) -> Dict[str, Any]:
+        """
+        Retrieve email logs ordered by `sent_at` (newest first unless `ascending`), optionally
+        for one status and/or one recipient and within [since, until]; a date-only `until`
+        includes that whole day. Unfiltered listings walk the per-day partitions of the log_day
+        index. Returns the items and a cursor for the next page.
+        """
+        cursor = cursor or {}
+        if until and len(until) == 10:
+            until = f"{until}T23:59:59.999Z"
+        sent_at_range = Key('sent_at').between(since or "0", until or "9999")
         try:
-            response = self.table.scan(**scan_kwargs)
-            logger.debug(f"Raw DynamoDB scan response: {response}")
-            return {
-                "items": response.get('Items', []),
-                "last_evaluated_key": response.get('LastEvaluatedKey')
-            }
+            if recipient_email:
+                # One recipient's partition is small; its status is filtered server-side
+                filter_expression = Attr('status').eq(status) if status else None
+                key_condition = Key('recipient_email').eq(recipient_email) & sent_at_range
+                items, last_evaluated_key = [], cursor.get("key")
+                while True:
+                    # Limit counts items read before the filter, so keep reading until the page is full
+                    response = self._query_page(
+                        RECIPIENT_INDEX, key_condition, limit - len(items), ascending, last_evaluated_key, filter_expression
+                    )
+                    items.extend(response.get('Items', []))
+                    last_evaluated_key = response.get('LastEvaluatedKey')
+                    if not last_evaluated_key or len(items) >= limit:
+                        break
+                return {
+                    "items": items,
+                    "cursor": {"key": last_evaluated_key} if last_evaluated_key else None
+                }
+            if status:
+                response = self._query_page(STATUS_INDEX, Key('status').eq(status) & sent_at_range, limit, ascending, cursor.get("key"))
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                return {
+                    "items": response.get('Items', []),
+                    "cursor": {"key": last_evaluated_key} if last_evaluated_key else None
+                }
+
+            # Walk day partitions in time order; days older than the TTL window are already gone
+            today = datetime.now(timezone.utc).date()
+            oldest = today - timedelta(days=EMAIL_LOG_TTL_DAYS)
+            if since:
+                oldest = max(oldest, datetime.fromisoformat(since[:10]).date())
+            newest = min(today, datetime.fromisoformat(until[:10]).date()) if until else today
+            day = datetime.fromisoformat(cursor["day"]).date() if cursor.get("day") else (oldest if ascending else newest)
+            step = timedelta(days=1 if ascending else -1)
+            exclusive_start_key = cursor.get("key")
+            items = []
+            while oldest <= day <= newest and len(items) < limit:
+                response = self._query_page(
+                    DAY_INDEX,
+                    Key('log_day').eq(day.isoformat()) & sent_at_range,
+                    limit - len(items),
+                    ascending,
+                    exclusive_start_key
+                )
+                items.extend(response.get('Items', []))
+                exclusive_start_key = response.get('LastEvaluatedKey')
+                if not exclusive_start_key:
+                    day += step
+            next_cursor = None
+            if oldest <= day <= newest:
+                next_cursor = {"day": day.isoformat(), "key": exclusive_start_key}
+            return {"items": items, "cursor": next_cursor}
         except ClientError as e:
             logger.error(f"Failed to retrieve email logs: {e}")
             raise
 
+    def iter_logs_for_day(self, day: str) -> Iterator[Dict[str, Any]]:
+        """Yields every log entry of one UTC day (YYYY-MM-DD) in `sent_at` order."""
+        exclusive_start_key = None
+        try:
+            while True:
+                query_kwargs = {
+                    "IndexName": DAY_INDEX,
+                    "KeyConditionExpression": Key('log_day').eq(day)
+                }
+                if exclusive_start_key:
+                    query_kwargs["ExclusiveStartKey"] = exclusive_start_key
+                response = self.table.query(**query_kwargs)
+                yield from response.get('Items', [])
+                exclusive_start_key = response.get('LastEvaluatedKey')
+                if not exclusive_start_key:
+                    return
+        except ClientError as e:
+            logger.error(f"Failed to read email logs for {day}: {e}")
+            raise
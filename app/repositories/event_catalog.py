@@ -0,0 +1,281 @@
+# app/repositories/event_catalog.py
+from app.core.db_connection import db_connection
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger('uvicorn.error')
+
+VERSION_INDEX = 'updated_day-updated_at-index'
+VERSION_OVERLAP_SECONDS = 5  # Each refresh re-reads this much history; GSI reads are eventually consistent
+CHANGE_FEEDS = ("auto", "streams", "version_index", "rescan")
+
+def version_stamp() -> Dict[str, str]:
+    """updated_at/updated_day attributes stamped on every Events write; they key the version index."""
+    now = datetime.now(timezone.utc)
+    return {
+        "updated_at": now.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "updated_day": now.strftime("%Y-%m-%d"),
+    }
+
+def _deep_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, set, tuple)):
+        size += sum(_deep_size(v) for v in value)
+    return size
+
+class EventCatalog:
+    """
+    Per-worker in-memory replica of the whole Events table. It is loaded with a
+    parallel scan and kept current from a change feed:
+
+      streams        DynamoDB Streams on the Events table (NEW_IMAGE or richer)
+      version_index  the updated_day-updated_at GSI, for backends without streams
+      rescan         a full reload on every refresh, when neither is available
+
+    Reads are served from memory only while the last successful sync is at most
+    `max_staleness_seconds` old; otherwise callers fall back to DynamoDB. A full
+    reload every `resync_seconds` also picks up deletes made by other workers.
+    The version index cannot see deletes, so on that feed the last full load
+    counts as the last sync, and reloads run often enough to stay within the bound.
+    """
+    def __init__(self, repo, refresh_seconds: float, max_staleness_seconds: float,
+                 resync_seconds: float, change_feed: str = "auto", total_segments: int = 1):
+        if change_feed not in CHANGE_FEEDS:
+            raise ValueError(f"Unknown change feed '{change_feed}', expected one of {CHANGE_FEEDS}.")
+        self.repo = repo
+        self.refresh_seconds = refresh_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.resync_seconds = resync_seconds
+        self.total_segments = total_segments
+        self.change_feed = self._choose_feed(change_feed)
+        if self.change_feed == "version_index":
+            resync_limit = max(refresh_seconds, max_staleness_seconds - refresh_seconds)
+            if resync_seconds <= 0 or resync_seconds > resync_limit:
+                logger.warning(
+                    f"Event catalog: the version index feed only sees deletes on a full reload; "
+                    f"resyncing every {resync_limit:g}s instead of {resync_seconds:g}s to keep "
+                    f"EVENT_CATALOG_MAX_STALENESS_SECONDS={max_staleness_seconds:g}."
+                )
+                self.resync_seconds = resync_limit
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._synced_at: Optional[float] = None  # monotonic time the replica was last known current
+        self._loaded_at: Optional[float] = None
+        self._watermark: Optional[datetime] = None  # version_index feed position
+        self._stream_arn: Optional[str] = None
+        self._shard_iterators: Dict[str, str] = {}
+        self._finished_shards = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"hits": 0, "misses": 0, "stale_reads": 0, "full_loads": 0,
+                      "refreshes": 0, "refresh_errors": 0, "changes_applied": 0}
+
+    def _choose_feed(self, change_feed: str) -> str:
+        has_stream = bool(getattr(self.repo.table, 'latest_stream_arn', None))
+        has_version_index = self.repo.has_version_index()
+        if change_feed == "auto":
+            return "streams" if has_stream else ("version_index" if has_version_index else "rescan")
+        if change_feed == "streams" and not has_stream:
+            raise ValueError("The Events table has no stream enabled.")
+        if change_feed == "version_index" and not has_version_index:
+            raise ValueError(f"The Events table has no '{VERSION_INDEX}' index.")
+        return change_feed
+
+    # --- Reads ---
+    def is_fresh(self) -> bool:
+        synced_at = self._synced_at
+        if self.change_feed == "version_index" and self._loaded_at is not None and synced_at is not None:
+            synced_at = min(synced_at, self._loaded_at)  # Deletes are only current as of the last full load
+        return synced_at is not None and time.monotonic() - synced_at <= self.max_staleness_seconds
+
+    def get(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the cached event, or None if it is not cached or the replica is too stale to serve."""
+        if not self.is_fresh():
+            self.stats["stale_reads"] += 1
+            return None
+        item = self._items.get(event_id)
+        if item is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return dict(item)
+
+    def snapshot(self) -> Optional[List[Dict[str, Any]]]:
+        """Copies of every cached event, or None if the replica is too stale to serve."""
+        if not self.is_fresh():
+            self.stats["stale_reads"] += 1
+            return None
+        return [dict(item) for item in list(self._items.values())]
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "change_feed": self.change_feed,
+            "items": len(self._items),
+            "approx_bytes": sum(self._sizes.values()),
+            "fresh": self.is_fresh(),
+            "staleness_seconds": round(now - self._synced_at, 3) if self._synced_at is not None else None,
+            "max_staleness_seconds": self.max_staleness_seconds,
+            "last_full_load_age_seconds": round(now - self._loaded_at, 3) if self._loaded_at is not None else None,
+            **self.stats,
+        }
+
+    # --- Local writes (this worker's own changes are visible immediately) ---
+    def apply_put(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            current = self._items.get(item['event_id'])
+            # Never replace a newer version with an older one replayed from a feed
+            if current and current.get('updated_at') and item.get('updated_at') and item['updated_at'] < current['updated_at']:
+                return
+            self._items[item['event_id']] = item
+            self._sizes[item['event_id']] = _deep_size(item)
+
+    def apply_delete(self, event_id: str) -> None:
+        with self._lock:
+            self._items.pop(event_id, None)
+            self._sizes.pop(event_id, None)
+
+    # --- Loading and refreshing ---
+    def load(self) -> None:
+        """Replaces the replica with a parallel scan of the Events table."""
+        if self.change_feed == "streams":
+            self._open_stream()  # Before the scan, so changes made during it are replayed afterwards
+        started, started_wall = time.monotonic(), datetime.now(timezone.utc)
+        items: Dict[str, Dict[str, Any]] = {}
+        collect_lock = threading.Lock()
+
+        def collect(page: List[Dict[str, Any]]) -> None:
+            with collect_lock:
+                for item in page:
+                    items[item['event_id']] = item
+
+        self.repo.parallel_scan(collect, self.total_segments)
+        sizes = {event_id: _deep_size(item) for event_id, item in items.items()}
+        with self._lock:
+            self._items, self._sizes = items, sizes
+        self._watermark = started_wall
+        self._loaded_at = self._synced_at = started
+        self.stats["full_loads"] += 1
+        logger.info(f"Event catalog loaded {len(items)} events ({self.change_feed} feed).")
+
+    def refresh(self) -> None:
+        """Applies changes from the feed; on failure the replica ages until a later refresh succeeds."""
+        started = time.monotonic()
+        try:
+            if self.change_feed == "streams":
+                self._refresh_from_stream()
+            elif self.change_feed == "version_index":
+                self._refresh_from_version_index()
+            else:
+                self.load()
+                return
+            self._synced_at = started
+            self.stats["refreshes"] += 1
+        except ClientError as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Event catalog refresh failed: {e}")
+            if e.response['Error']['Code'] in ("ExpiredIteratorException", "TrimmedDataAccessException", "ResourceNotFoundException"):
+                self._loaded_at = None  # Lost our place in the stream; the next cycle reloads
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.warning(f"Event catalog refresh failed: {e}")
+
+    def _refresh_from_version_index(self) -> None:
+        now = datetime.now(timezone.utc)
+        for item in self.repo.iter_events_updated_since(self._watermark - timedelta(seconds=VERSION_OVERLAP_SECONDS), now):
+            self.apply_put(item)
+            self.stats["changes_applied"] += 1
+        self._watermark = now
+
+    def _describe_shards(self) -> List[Dict[str, Any]]:
+        client = db_connection.streams_client()
+        shards, kwargs = [], {"StreamArn": self._stream_arn}
+        while True:
+            description = client.describe_stream(**kwargs)['StreamDescription']
+            shards.extend(description.get('Shards', []))
+            last_shard_id = description.get('LastEvaluatedShardId')
+            if not last_shard_id:
+                return shards
+            kwargs["ExclusiveStartShardId"] = last_shard_id
+
+    def _open_stream(self) -> None:
+        self.repo.table.reload()
+        self._stream_arn = self.repo.table.latest_stream_arn
+        client = db_connection.streams_client()
+        self._shard_iterators, self._finished_shards = {}, set()
+        for shard in self._describe_shards():
+            if 'EndingSequenceNumber' in shard.get('SequenceNumberRange', {}):
+                self._finished_shards.add(shard['ShardId'])  # Closed shards hold history the scan already reflects
+                continue
+            self._shard_iterators[shard['ShardId']] = client.get_shard_iterator(
+                StreamArn=self._stream_arn, ShardId=shard['ShardId'], ShardIteratorType='LATEST'
+            )['ShardIterator']
+
+    def _refresh_from_stream(self) -> None:
+        client = db_connection.streams_client()
+        # Shards created since the last refresh (splits, rotation) are read from their start
+        for shard in self._describe_shards():
+            shard_id = shard['ShardId']
+            if shard_id not in self._shard_iterators and shard_id not in self._finished_shards:
+                self._shard_iterators[shard_id] = client.get_shard_iterator(
+                    StreamArn=self._stream_arn, ShardId=shard_id, ShardIteratorType='TRIM_HORIZON'
+                )['ShardIterator']
+        for shard_id, iterator in list(self._shard_iterators.items()):
+            while iterator:
+                response = client.get_records(ShardIterator=iterator, Limit=1000)
+                for record in response.get('Records', []):
+                    self._apply_record(record)
+                iterator = response.get('NextShardIterator')
+                if not response.get('Records'):
+                    break
+            if iterator:
+                self._shard_iterators[shard_id] = iterator
+            else:
+                del self._shard_iterators[shard_id]
+                self._finished_shards.add(shard_id)
+
+    def _apply_record(self, record: Dict[str, Any]) -> None:
+        change = record['dynamodb']
+        keys = TypeDeserializer().deserialize({'M': change['Keys']})
+        if record['eventName'] == 'REMOVE':
+            self.apply_delete(keys['event_id'])
+        elif 'NewImage' in change:
+            self.apply_put(TypeDeserializer().deserialize({'M': change['NewImage']}))
+        else:
+            # KEYS_ONLY streams carry no image; read the current item instead
+            item = self.repo.table.get_item(Key=keys).get('Item')
+            if item:
+                self.apply_put(item)
+            else:
+                self.apply_delete(keys['event_id'])
+        self.stats["changes_applied"] += 1
+
+    # --- Background refresher ---
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="event-catalog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            resync_due = self.resync_seconds > 0 and self._loaded_at is not None and \
+                time.monotonic() - self._loaded_at >= self.resync_seconds
+            if self._loaded_at is None or resync_due:
+                try:
+                    self.load()
+                except Exception as e:
+                    self.stats["refresh_errors"] += 1
+                    logger.warning(f"Event catalog load failed: {e}")
+            else:
+                self.refresh()
@@ -1,6 +1,10 @@
 # app/repositories/event_repository.py
-from app.repositories.base_repository import BaseRepository
-from typing import Dict, Any, Optional
+from app.repositories.base_repository import BaseRepository, VERSION_ATTRIBUTE
+from app.repositories.event_catalog import version_stamp, VERSION_INDEX
+from app.utils.projection import project_item
+from typing import Dict, Any, Optional, List, Iterator
+from boto3.dynamodb.conditions import Key
+from datetime import datetime, timedelta
 from botocore.exceptions import ClientError
 import logging
 
@@ -10,11 +14,16 @@ logger.setLevel(logging.DEBUG)
 class EventRepository(BaseRepository):
     def __init__(self):
         super().__init__("Events") # Uses the table name defined in config
+        self.catalog = None # Optional EventCatalog serving reads from an in-memory replica
 
-    def get_event_by_id(self, event_id: str) -> Optional[Dict[str, Any]]:
+    def get_event_by_id(self, event_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """Retrieves an event's details by ID. Returns None if not found."""
+        if self.catalog is not None:
+            cached = self.catalog.get(event_id)
+            if cached is not None:
+                return project_item(cached, fields) if fields else cached
         try:
-            response = self.table.get_item(Key={'event_id': event_id})
+            response = self.table.get_item(Key={'event_id': event_id}, **self._projection_kwargs(fields))
             logger.debug(f"Retrieved event data for ID {event_id}: {response}")
             # item = response.get('Item')
             if 'Item' not in response:
@@ -24,10 +33,85 @@ class EventRepository(BaseRepository):
             print(f"DynamoDB ClientError in EventRepository.get_event_by_id for {event_id}: {e}")
             raise
 
+    def get_events_by_ids(self, event_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Retrieves many events with batched reads. Preserves the order of `event_ids` and skips unknown ids."""
+        found: Dict[str, Dict[str, Any]] = {}
+        if self.catalog is not None:
+            for event_id in event_ids:
+                cached = self.catalog.get(event_id)
+                if cached is not None:
+                    found[event_id] = project_item(cached, fields) if fields else cached
+        missing = [event_id for event_id in event_ids if event_id not in found]
+        try:
+            if missing:
+                items = self._batch_get([{'event_id': event_id} for event_id in missing], fields=fields)
+                found.update((event_id, item) for event_id, item in zip(missing, items) if item is not None)
+            return [found[event_id] for event_id in event_ids if event_id in found]
+        except ClientError as e:
+            print(f"DynamoDB ClientError in EventRepository.get_events_by_ids: {e}")
+            raise
+
+    def iter_all_events(self, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yields every event in the table, following scan pagination."""
+        snapshot = self.catalog.snapshot() if self.catalog is not None else None
+        if snapshot is not None:
+            yield from (project_item(item, fields) if fields else item for item in snapshot)
+            return
+        scan_kwargs = self._projection_kwargs(fields)
+        try:
+            while True:
+                response = self.table.scan(**scan_kwargs)
+                yield from response.get('Items', [])
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    return
+                scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+        except ClientError as e:
+            print(f"DynamoDB ClientError in EventRepository.iter_all_events: {e}")
+            raise
+
+    def has_version_index(self) -> bool:
+        return any(index['IndexName'] == VERSION_INDEX for index in self.table.global_secondary_indexes or [])
+
+    def iter_events_updated_since(self, since: datetime, until: datetime,
+                                  fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the events written at or after `since` (UTC), read from the version index
+        one `updated_day` partition at a time up to `until`'s day. Deleted events leave
+        no trace in the index and are not reported.
+        """
+        since_key = since.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        projection = self._projection_kwargs(fields, index_name=VERSION_INDEX)
+        day = since.date()
+        try:
+            while day <= until.date():
+                query_kwargs = {
+                    "IndexName": VERSION_INDEX,
+                    "KeyConditionExpression": Key('updated_day').eq(day.isoformat()) & Key('updated_at').gte(since_key),
+                    **projection
+                }
+                while True:
+                    response = self.table.query(**query_kwargs)
+                    yield from response.get('Items', [])
+                    last_evaluated_key = response.get('LastEvaluatedKey')
+                    if not last_evaluated_key:
+                        break
+                    query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+                day += timedelta(days=1)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in EventRepository.iter_events_updated_since: {e}")
+            raise
+
     def create_event(self, event_data: dict) -> None:
         """Creates a new event in the Events table."""
         try:
+            event_data.update(version_stamp())
+            event_data[VERSION_ATTRIBUTE] = 1
             self.table.put_item(Item=event_data)
+            if self.mirror:
+                self._mirrored("put_event", event_data["event_id"], lambda: self.mirror.put_event(event_data))
+            if self.catalog is not None:
+                self.catalog.apply_put(event_data)
         except ClientError as e:
             print(f"DynamoDB ClientError in EventRepository.create_event: {e}")
             raise
@@ -37,29 +121,65 @@ class EventRepository(BaseRepository):
         try:
             update_expr_parts = []
             expr_attr_values = {}
-            for k, v in event_data.items():
+            for k, v in dict(event_data, **version_stamp()).items():
                 if k != "event_id":
                     placeholder = f":{k}"
                     update_expr_parts.append(f"{k} = {placeholder}")
                     expr_attr_values[placeholder] = v
-            update_expr = "SET " + ", ".join(update_expr_parts)
+            update_expr = "SET " + ", ".join(update_expr_parts) + " ADD #version :version_increment"
+            expr_attr_values[":version_increment"] = 1
             logger.debug(f"Updating event with ID: {event_id} with query {update_expr}")
             response = self.table.update_item(
                 Key={"event_id": event_id},
                 UpdateExpression=update_expr,
+                ExpressionAttributeNames={"#version": VERSION_ATTRIBUTE},
                 ExpressionAttributeValues=expr_attr_values,
                 ReturnValues="ALL_NEW"
             )
             logger.debug(f"Event updated successfully: {response}")
+            if self.mirror and response.get("Attributes"):
+                self._mirrored("put_event", event_id, lambda: self.mirror.put_event(response["Attributes"]))
+            if self.catalog is not None and response.get("Attributes"):
+                self.catalog.apply_put(response["Attributes"])
             return response.get("Attributes")
         except ClientError as e:
             print(f"DynamoDB ClientError in EventRepository.update_event: {e}")
             raise
 
+    def patch_event(self, event_id: str, changes: dict, expected_version: Optional[int] = None,
+                    return_values: str = "UPDATED_NEW") -> Dict[str, Any]:
+        """
+        Changes only the given attributes of an existing event (None removes one),
+        stamps the write and increments its version. See BaseRepository._patch_item
+        for the conditions. Returns the attributes asked for by return_values
+        ("UPDATED_NEW", "ALL_NEW" or "NONE", which returns {}).
+        """
+        try:
+            changes = dict(changes, **version_stamp())
+            # The mirror and the catalog store whole items, so they need the full new image
+            full_image = self.mirror is not None or self.catalog is not None
+            attributes = self._patch_item(
+                {"event_id": event_id}, changes, expected_version, "ALL_NEW" if full_image else return_values
+            )
+            if self.mirror:
+                self._mirrored("put_event", event_id, lambda: self.mirror.put_event(attributes))
+            if self.catalog is not None:
+                self.catalog.apply_put(attributes)
+            if full_image and return_values == "UPDATED_NEW":
+                attributes = {name: attributes[name] for name in [*changes, VERSION_ATTRIBUTE] if name in attributes}
+            return attributes if return_values != "NONE" else {}
+        except ClientError as e:
+            print(f"DynamoDB ClientError in EventRepository.patch_event: {e}")
+            raise
+
     def delete_event(self, event_id: str) -> None:
         """Deletes an event from the Events table."""
         try:
             self.table.delete_item(Key={"event_id": event_id})
+            if self.mirror:
+                self._mirrored("delete_event", event_id, lambda: self.mirror.delete_event(event_id))
+            if self.catalog is not None:
+                self.catalog.apply_delete(event_id)
         except ClientError as e:
             print(f"DynamoDB ClientError in EventRepository.delete_event: {e}")
             raise
\ No newline at end of file
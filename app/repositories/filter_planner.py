@@ -0,0 +1,157 @@
+# app/repositories/filter_planner.py
+from boto3.dynamodb.conditions import Attr, Key
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Rough selectivity guesses used to rank access paths; DynamoDB keeps no column statistics
+EQ_SELECTIVITY = 0.1
+PREFIX_SELECTIVITY = 0.2
+RANGE_SELECTIVITY = 0.3
+RANGE_OPS = ("between", "gt", "gte", "lt", "lte")
+# Table size assumed while DescribeTable still reports ItemCount 0 (new tables), so an index still beats a Scan
+UNKNOWN_TABLE_ITEMS = 10000
+
+def attr_condition(f):
+    """Builds the FilterExpression condition for one request filter."""
+    attr = Attr(f.field)
+    if f.op == "in":
+        return attr.is_in(f.value)
+    if f.op == "between":
+        return attr.between(*f.value)
+    return getattr(attr, f.op)(f.value)
+
+def key_condition(f):
+    """Builds the KeyConditionExpression part for a filter on a key attribute ('in' is expanded by the caller)."""
+    key = Key(f.field)
+    if f.op == "between":
+        return key.between(*f.value)
+    return getattr(key, f.op)(f.value)
+
+def and_all(conditions: list):
+    combined = None
+    for condition in conditions:
+        combined = condition if combined is None else combined & condition
+    return combined
+
+class FilterPlan:
+    """
+    An access path for a list of filters: either Query on the table or one of its
+    GSIs (one key condition per partition, several for 'in'), or a parallel Scan.
+    Remaining filters are applied as a FilterExpression.
+
+    `estimated_items` is a ranking heuristic, not a measurement: it scales the
+    table's ItemCount, which DynamoDB refreshes only about every six hours, by
+    fixed selectivity guesses. `table_item_count` is that ItemCount, or None when
+    it was not known yet and UNKNOWN_TABLE_ITEMS was assumed instead.
+    """
+    def __init__(self, index_name: Optional[str], key_conditions: Optional[list], key_filters: list,
+                 residual_filters: list, estimated_items: float, total_segments: int = 1,
+                 table_item_count: Optional[int] = None):
+        self.index_name = index_name
+        self.key_conditions = key_conditions
+        self.key_filters = key_filters
+        self.residual_filters = residual_filters
+        self.estimated_items = estimated_items
+        self.total_segments = total_segments
+        self.table_item_count = table_item_count
+
+    @property
+    def is_scan(self) -> bool:
+        return self.key_conditions is None
+
+    @property
+    def filter_expression(self):
+        return and_all([attr_condition(f) for f in self.residual_filters])
+
+    def stream_kwargs(self) -> List[Dict[str, Any]]:
+        """Request arguments for each independent stream (scan segment or query partition)."""
+        base = {}
+        filter_expression = self.filter_expression
+        if filter_expression is not None:
+            base["FilterExpression"] = filter_expression
+        if self.is_scan:
+            if self.total_segments == 1:
+                return [base]
+            return [dict(base, Segment=i, TotalSegments=self.total_segments) for i in range(self.total_segments)]
+        if self.index_name:
+            base["IndexName"] = self.index_name
+        return [dict(base, KeyConditionExpression=condition) for condition in self.key_conditions]
+
+    def explain(self) -> Dict[str, Any]:
+        describe = lambda filters: [{"field": f.field, "op": f.op, "value": f.value} for f in filters]
+        return {
+            "operation": "Scan" if self.is_scan else "Query",
+            "index": self.index_name or ("table" if not self.is_scan else None),
+            "key_conditions": describe(self.key_filters),
+            "filter_expression": describe(self.residual_filters),
+            "partitions": None if self.is_scan else len(self.key_conditions),
+            "segments": self.total_segments if self.is_scan else None,
+            # Estimates only; None until DynamoDB reports an item count for the table
+            "estimated_items_read": round(self.estimated_items) if self.table_item_count else None,
+            "table_item_count": self.table_item_count,
+        }
+
+class FilterPlanner:
+    """
+    Chooses the cheapest access path for a list of request filters. Every key
+    schema (the table's and each GSI's) is a candidate when its partition key has
+    an 'eq' or 'in' filter; a range-key filter ('eq', 'begins_with' or a range)
+    narrows it further. Indexes that do not project the needed attributes are
+    skipped. Without a usable key the planner falls back to a parallel Scan.
+    """
+    def __init__(self, table, total_segments: int, index_projection: Callable[[str], Optional[Set[str]]]):
+        self.table = table
+        self.total_segments = total_segments
+        self.index_projection = index_projection
+
+    def _key_schemas(self) -> List[tuple]:
+        schemas = [(None, self.table.key_schema)]
+        for index in self.table.global_secondary_indexes or []:
+            if index.get('IndexStatus', 'ACTIVE') == 'ACTIVE':
+                schemas.append((index['IndexName'], index['KeySchema']))
+        return schemas
+
+    def plan(self, filters: list, required_fields: Optional[List[str]] = None) -> FilterPlan:
+        table_item_count = self.table.item_count or None
+        total_items = table_item_count or UNKNOWN_TABLE_ITEMS
+        table_hash_key = next(k['AttributeName'] for k in self.table.key_schema if k['KeyType'] == 'HASH')
+        needed = {f.field for f in filters} | set(required_fields or [])
+        best = FilterPlan(None, None, [], list(filters), total_items, self.total_segments, table_item_count)
+
+        for index_name, key_schema in self._key_schemas():
+            projected = self.index_projection(index_name) if index_name else None
+            # Skip indexes that would need a fetch from the base table to answer the request
+            if projected is not None and (required_fields is None or not needed <= projected):
+                continue
+            hash_key = next(k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH')
+            range_key = next((k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE'), None)
+            hash_filter = next((f for f in filters if f.field == hash_key and f.op in ("eq", "in")), None)
+            if hash_filter is None:
+                continue
+            range_filter = next(
+                (f for f in filters if range_key and f.field == range_key and f.op in ("eq", "begins_with") + RANGE_OPS),
+                None
+            )
+            hash_values = hash_filter.value if hash_filter.op == "in" else [hash_filter.value]
+            hash_values = list(dict.fromkeys(hash_values))
+            key_conditions = []
+            for value in hash_values:
+                condition = Key(hash_key).eq(value)
+                if range_filter is not None:
+                    condition = condition & key_condition(range_filter)
+                key_conditions.append(condition)
+
+            # Lookups by the table's own partition key hit at most one item per value
+            selectivity = 1 / total_items if index_name is None and hash_key == table_hash_key else EQ_SELECTIVITY
+            if range_filter is not None:
+                selectivity *= {"eq": EQ_SELECTIVITY, "begins_with": PREFIX_SELECTIVITY}.get(range_filter.op, RANGE_SELECTIVITY)
+            estimated_items = max(total_items * selectivity, 1) * len(hash_values)
+            key_filters = [hash_filter] + ([range_filter] if range_filter is not None else [])
+            residual = [f for f in filters if all(f is not k for k in key_filters)]
+            if any(f.field in (hash_key, range_key) for f in residual):
+                continue  # FilterExpression may not reference the key attributes of a Query
+            if estimated_items < best.estimated_items or (
+                estimated_items == best.estimated_items and len(key_filters) > len(best.key_filters)
+            ):
+                best = FilterPlan(index_name, key_conditions, key_filters, residual, estimated_items,
+                                  table_item_count=table_item_count)
+        return best
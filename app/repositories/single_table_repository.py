@@ -0,0 +1,165 @@
+# app/repositories/single_table_repository.py
+from app.repositories.base_repository import BaseRepository
+from app.core.config import SINGLE_TABLE_NAME
+from typing import Dict, Any, Optional, List, Tuple
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import Key
+import logging
+import threading
+
+logger = logging.getLogger('uvicorn.error')
+logger.setLevel(logging.DEBUG)
+
+# Sort keys of the entity items; '#' sorts before 'EVENT#'/'USER#' so the entity comes first in its partition
+USER_PROFILE_SK = '#PROFILE'
+EVENT_METADATA_SK = '#METADATA'
+GSI1_INDEX_NAME = 'GSI1_PK-GSI1_SK-index'
+LAYOUT_ATTRIBUTES = ('PK', 'SK', 'GSI1_PK', 'GSI1_SK', 'entity')
+MAX_FAILED_KEYS = 20
+
+def user_item(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Users row -> single-table profile item in the USER#{id} partition."""
+    return dict(user, PK=f"USER#{user['user_id']}", SK=USER_PROFILE_SK, entity="User")
+
+def event_item(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Events row -> single-table item; also heads the EVENT#{id} partition of GSI1 above its users."""
+    event_key = f"EVENT#{event['event_id']}"
+    return dict(event, PK=event_key, SK=EVENT_METADATA_SK, GSI1_PK=event_key, GSI1_SK=EVENT_METADATA_SK, entity="Event")
+
+def relation_item(relation: Dict[str, Any]) -> Dict[str, Any]:
+    """UserEventRelations rows already use the USER#/EVENT# keys; they only gain the entity tag."""
+    return dict(relation, entity="UserEventRelation")
+
+def strip_layout(item: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Removes the single-table key attributes so the item matches the original table's shape."""
+    if item is None:
+        return None
+    # Relation items keep their PK/SK/GSI1 keys, which are part of the original schema
+    dropped = ('entity',) if item.get('entity') == 'UserEventRelation' else LAYOUT_ATTRIBUTES
+    return {k: v for k, v in item.items() if k not in dropped}
+
+class SingleTableRepository(BaseRepository):
+    """
+    Optional single-table layout: a user's profile and its EVENT# relation items share
+    the USER#{id} partition, and an event's metadata item shares the EVENT#{id} GSI1
+    partition with its USER# relation items, so each page is one Query.
+    """
+    def __init__(self):
+        super().__init__(SINGLE_TABLE_NAME) # Uses the table name defined in config
+        # Dual writes that failed after the primary write succeeded (see BaseRepository._mirrored)
+        self._failures: Dict[str, int] = {}
+        self._failed_keys: List[Any] = []
+        self._failures_lock = threading.Lock()
+
+    # --- Reads ---
+    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.table.get_item(Key={'PK': f'USER#{user_id}', 'SK': USER_PROFILE_SK})
+            return strip_layout(response.get('Item'))
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.get_user_by_id for {user_id}: {e}")
+            raise
+
+    def get_event_by_id(self, event_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.table.get_item(Key={'PK': f'EVENT#{event_id}', 'SK': EVENT_METADATA_SK})
+            return strip_layout(response.get('Item'))
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.get_event_by_id for {event_id}: {e}")
+            raise
+
+    def get_user_with_events(self, user_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Returns (profile or None, relation items) for a user from one Query on its partition."""
+        try:
+            items = self._query_all(KeyConditionExpression=Key('PK').eq(f'USER#{user_id}'))
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.get_user_with_events for {user_id}: {e}")
+            raise
+        profile = next((item for item in items if item.get('SK') == USER_PROFILE_SK), None)
+        relations = [strip_layout(item) for item in items if item.get('SK', '').startswith('EVENT#')]
+        return strip_layout(profile), relations
+
+    def get_event_with_users(self, event_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Returns (event or None, relation items) for an event from one Query on GSI1."""
+        try:
+            items = self._query_all(
+                IndexName=GSI1_INDEX_NAME,
+                KeyConditionExpression=Key('GSI1_PK').eq(f'EVENT#{event_id}')
+            )
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.get_event_with_users for {event_id}: {e}")
+            raise
+        event = next((item for item in items if item.get('GSI1_SK') == EVENT_METADATA_SK), None)
+        relations = [strip_layout(item) for item in items if item.get('GSI1_SK', '').startswith('USER#')]
+        return strip_layout(event), relations
+
+    def get_items(self, keys: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Raw single-table items by {'PK', 'SK'} with batched reads; None for missing keys, in input order."""
+        try:
+            return self._batch_get(keys)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.get_items: {e}")
+            raise
+
+    # --- Writes (dual-write targets) ---
+    def put_user(self, user: Dict[str, Any]) -> None:
+        self._put(user_item(user))
+
+    def put_event(self, event: Dict[str, Any]) -> None:
+        self._put(event_item(event))
+
+    def put_relation(self, relation: Dict[str, Any]) -> None:
+        self._put(relation_item(relation))
+
+    def put_relations(self, relations: List[Dict[str, Any]]) -> None:
+        failed = self._batch_write([relation_item(relation) for relation in relations])
+        for item, reason in failed:
+            self.record_failure("put_relations", (item.get('PK'), item.get('SK')), reason)
+
+    # --- Dual-write failures ---
+    def record_failure(self, operation: str, key: Any, error: Any) -> None:
+        logger.error(f"Single-table mirror {operation} failed for {key}: {error}")
+        with self._failures_lock:
+            self._failures[operation] = self._failures.get(operation, 0) + 1
+            if len(self._failed_keys) < MAX_FAILED_KEYS:
+                self._failed_keys.append(key)
+
+    def failure_metrics(self) -> Dict[str, Any]:
+        """Failed dual writes since this worker started; non-zero means `verify` will find differences."""
+        with self._failures_lock:
+            return {
+                "failures": sum(self._failures.values()),
+                "by_operation": dict(self._failures),
+                "sample_keys": list(self._failed_keys),
+            }
+
+    def delete_user(self, user_id: str) -> None:
+        self._delete({'PK': f'USER#{user_id}', 'SK': USER_PROFILE_SK})
+
+    def delete_event(self, event_id: str) -> None:
+        self._delete({'PK': f'EVENT#{event_id}', 'SK': EVENT_METADATA_SK})
+
+    def _put(self, item: Dict[str, Any]) -> None:
+        try:
+            self.table.put_item(Item=item)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.put for {item.get('PK')}/{item.get('SK')}: {e}")
+            raise
+
+    def put_if_absent(self, item: Dict[str, Any]) -> bool:
+        """Backfill write: never overwrites an item dual-written after the scan read it. Returns True if written."""
+        try:
+            self.table.put_item(Item=item, ConditionExpression='attribute_not_exists(PK)')
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            print(f"DynamoDB ClientError in SingleTableRepository.put_if_absent for {item.get('PK')}/{item.get('SK')}: {e}")
+            raise
+
+    def _delete(self, key: Dict[str, Any]) -> None:
+        try:
+            self.table.delete_item(Key=key)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SingleTableRepository.delete for {key}: {e}")
+            raise
\ No newline at end of file
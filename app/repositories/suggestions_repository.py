@@ -0,0 +1,43 @@
+# app/repositories/suggestions_repository.py
+from app.repositories.base_repository import BaseRepository
+from app.core.config import SUGGESTIONS_TABLE_NAME
+from typing import Dict, Any, Optional, Iterable, List
+from botocore.exceptions import ClientError
+import logging
+
+logger = logging.getLogger('uvicorn.error')
+
+class SuggestionsRepository(BaseRepository):
+    """Precomputed contact suggestions, one item per user, written by app.jobs.suggestions."""
+    def __init__(self):
+        super().__init__(SUGGESTIONS_TABLE_NAME) # Uses the table name defined in config
+
+    def get_suggestions(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.table.get_item(Key={'user_id': user_id})
+            return response.get('Item')
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SuggestionsRepository.get_suggestions for {user_id}: {e}")
+            raise
+
+    def put_suggestions(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Writes suggestion items with batched writes. Returns the number written."""
+        written = 0
+        try:
+            with self.table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+                    written += 1
+            return written
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SuggestionsRepository.put_suggestions: {e}")
+            raise
+
+    def delete_suggestions(self, user_ids: List[str]) -> None:
+        try:
+            with self.table.batch_writer() as batch:
+                for user_id in user_ids:
+                    batch.delete_item(Key={'user_id': user_id})
+        except ClientError as e:
+            print(f"DynamoDB ClientError in SuggestionsRepository.delete_suggestions: {e}")
+            raise
@@ -1,56 +1,286 @@
 # app/repositories/user_event_relations_repository.py
 
-from app.repositories.base_repository import BaseRepository
+from app.repositories.base_repository import BaseRepository, MAX_READ_WORKERS
 from app.models.users import User
 from app.models.user_event import EventUserListItem  # Import EventUserListItem
 
 import boto3
 from botocore.exceptions import ClientError, ValidationError, ParamValidationError
 from boto3.dynamodb.conditions import Attr
-from typing import Dict, Any, List 
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 import logging
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import threading
+import time
+import zlib
+from app.core.config import COUNT_CACHE_TTL_SECONDS, ROLE_INDEX_SHARDS, ROLE_INDEX_RECHECK_SECONDS
+from app.utils.cache import TTLCache
 
 logger = logging.getLogger('uvicorn.error')
 logger.setLevel(logging.DEBUG)
 
+ROLE_SHARD_ATTRIBUTE = 'role_shard'
+ROLE_INDEX_NAME = 'role_shard-user_event_id-index'
+LEGACY_ROLE_INDEX_NAME = 'role-user_event-index'  # Keyed on `role` alone: every write lands on a couple of partitions
+
+def role_shard(role: str, user_event_id: str) -> str:
+    """Sharded role index key, e.g. 'host#3'. Stable per relation, so rewrites and backfills keep the same shard."""
+    return f"{role}#{zlib.crc32(user_event_id.encode('utf-8')) % ROLE_INDEX_SHARDS}"
+
+RELATION_TYPES = {'owner': 'EventOwnership', 'host': 'EventHosting', 'attendee': 'EventAttendance'}
+RELATION_USER_FIELDS = ['first_name', 'last_name', 'phone_number', 'email', 'job_title', 'company', 'city', 'state']
+
+def build_relation(user: Dict[str, Any], event: Dict[str, Any], role: str) -> Dict[str, Any]:
+    """A UserEventRelations item with its keys and the denormalized user and event attributes."""
+    user_id, event_id = user['user_id'], event['event_id']
+    relation = {
+        'PK': f"USER#{user_id}",
+        'SK': f"EVENT#{event_id}#{role.upper()}",
+        'GSI1_PK': f"EVENT#{event_id}",
+        'GSI1_SK': f"USER#{user_id}#{role.upper()}",
+        'type': RELATION_TYPES[role],
+        'user_id': user_id,
+        'role': role,
+        'user_event_id': f"{user_id}#{event_id}",
+        ROLE_SHARD_ATTRIBUTE: role_shard(role, f"{user_id}#{event_id}"),
+        'event_id': event_id,
+        'event_title': event.get('title'),
+        'event_date': event.get('start_at'),
+    }
+    relation.update({name: user.get(name) for name in RELATION_USER_FIELDS})
+    return {name: value for name, value in relation.items() if value is not None}
+
 class UserEventRelationsRepository(BaseRepository):
     def __init__(self):
         super().__init__("UserEventRelations") # Uses the table name defined in config
         self.gsi_index_name = 'GSI1_PK-GSI1_SK-index'
+        self._count_cache = TTLCache(COUNT_CACHE_TTL_SECONDS)
+        self._role_index_checked_at = time.monotonic()  # The table description is loaded lazily from here on
+        self._role_index_lock = threading.Lock()
 
-    def get_events_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_events_for_user(self, user_id: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retrieves all events (owned/hosted/etc.) for a given user
-        using the main table's PK.
+        using the main table's PK, across every Query page. Only `fields` are read when given.
         """
         try:
             logger.debug(f"Querying UserEventRelations for user_id: {user_id}")
-            response = self.table.query(
+            return self._query_all(
                 KeyConditionExpression=boto3.dynamodb.conditions.Key('PK').eq(f'USER#{user_id}') &
-                                     boto3.dynamodb.conditions.Key('SK').begins_with('EVENT#')
+                                     boto3.dynamodb.conditions.Key('SK').begins_with('EVENT#'),
+                **self._projection_kwargs(fields)
             )
-            return response.get('Items', [])
         except ClientError as e:
             print(f"DynamoDB ClientError in UserEventRelationsRepository.get_events_for_user for {user_id}: {e}")
             raise
 
-    def get_users_for_event(self, event_id: str) -> List[Dict[str, Any]]:
+    def get_users_for_event(self, event_id: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retrieves all users (owner/hosts/etc.) for a given event
-        using the GSI.
+        using the GSI, across every Query page. Only `fields` projected into the GSI are read when given.
         """
         try:
-            response = self.table.query(
+            return self._query_all(
                 IndexName=self.gsi_index_name,
                 KeyConditionExpression=boto3.dynamodb.conditions.Key('GSI1_PK').eq(f'EVENT#{event_id}') &
-                                     boto3.dynamodb.conditions.Key('GSI1_SK').begins_with('USER#')
+                                     boto3.dynamodb.conditions.Key('GSI1_SK').begins_with('USER#'),
+                **self._projection_kwargs(fields, index_name=self.gsi_index_name)
             )
-            return response.get('Items', [])
         except ClientError as e:
             print(f"DynamoDB ClientError in UserEventRelationsRepository.get_users_for_event for {event_id}: {e}")
             raise
     
+    def iter_users_for_event(self, event_id: str, role: Optional[str] = None, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streams the relation items of an event (optionally for one role) page by page.
+        Relation items carry the denormalized user contact fields, so no user lookups are needed.
+        """
+        query_kwargs = {
+            "IndexName": self.gsi_index_name,
+            "KeyConditionExpression": boto3.dynamodb.conditions.Key('GSI1_PK').eq(f'EVENT#{event_id}') &
+                                      boto3.dynamodb.conditions.Key('GSI1_SK').begins_with('USER#'),
+            **self._projection_kwargs(fields, index_name=self.gsi_index_name)
+        }
+        if role:
+            query_kwargs["FilterExpression"] = Attr('role').eq(role)
+        try:
+            while True:
+                response = self.table.query(**query_kwargs)
+                yield from response.get('Items', [])
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    return
+                query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.iter_users_for_event for {event_id}: {e}")
+            raise
+
+    def get_relations_by_keys(self, keys: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Retrieves relation items by {'PK', 'SK'} with batched reads; None for missing keys, in input order."""
+        try:
+            return self._batch_get(keys)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.get_relations_by_keys: {e}")
+            raise
+
+    def put_relations(self, relations: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Writes relation items with parallel BatchWriteItem calls (and to the single-table
+        mirror). Returns (relation, reason) for the items that could not be written.
+        """
+        try:
+            failed = self._batch_write(relations)
+            if self.mirror:
+                failed_keys = {(item['PK'], item['SK']) for item, _ in failed}
+                written = [item for item in relations if (item['PK'], item['SK']) not in failed_keys]
+                self._mirrored("put_relations", f"{len(written)} relations", lambda: self.mirror.put_relations(written))
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.put_relations: {e}")
+            raise
+        # Cached counts of the touched users and events are now wrong
+        self._count_cache.invalidate()
+        return failed
+
+    def count_events_for_user(self, user_id: str, role: Optional[str] = None, use_cache: bool = True) -> int:
+        """
+        Counts the events a user is related to (optionally with one role) using
+        Select=COUNT on the main table, without transferring the relation items.
+        """
+        cache_key = ("user", user_id, role)
+        if use_cache:
+            cached = self._count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        query_kwargs = {
+            "KeyConditionExpression": boto3.dynamodb.conditions.Key('PK').eq(f'USER#{user_id}') &
+                                      boto3.dynamodb.conditions.Key('SK').begins_with('EVENT#')
+        }
+        if role:
+            query_kwargs["FilterExpression"] = Attr('role').eq(role)
+        try:
+            count = self._count_query(**query_kwargs)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.count_events_for_user for {user_id}: {e}")
+            raise
+        self._count_cache.set(cache_key, count)
+        return count
+
+    def count_users_for_event(self, event_id: str, role: Optional[str] = None, use_cache: bool = True) -> int:
+        """
+        Counts the users related to an event (optionally with one role) using
+        Select=COUNT on the GSI, without transferring the relation items.
+        """
+        cache_key = ("event", event_id, role)
+        if use_cache:
+            cached = self._count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        query_kwargs = {
+            "IndexName": self.gsi_index_name,
+            "KeyConditionExpression": boto3.dynamodb.conditions.Key('GSI1_PK').eq(f'EVENT#{event_id}') &
+                                      boto3.dynamodb.conditions.Key('GSI1_SK').begins_with('USER#')
+        }
+        if role:
+            query_kwargs["FilterExpression"] = Attr('role').eq(role)
+        try:
+            count = self._count_query(**query_kwargs)
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.count_users_for_event for {event_id}: {e}")
+            raise
+        self._count_cache.set(cache_key, count)
+        return count
+
+    def _sharded_role_index_active(self) -> bool:
+        for index in self.table.global_secondary_indexes or []:
+            if index['IndexName'] == ROLE_INDEX_NAME and index.get('IndexStatus', 'ACTIVE') == 'ACTIVE':
+                return True
+        return False
+
+    def _active_role_index(self) -> str:
+        """
+        The sharded role index once it exists and is ACTIVE; the legacy index until
+        then. boto3 caches the table description, so while it still says legacy the
+        table is re-described at most every ROLE_INDEX_RECHECK_SECONDS, and a
+        running API switches over once a migration finishes, without a restart.
+        """
+        if self._sharded_role_index_active():
+            return ROLE_INDEX_NAME
+        with self._role_index_lock:
+            if time.monotonic() - self._role_index_checked_at < ROLE_INDEX_RECHECK_SECONDS:
+                return LEGACY_ROLE_INDEX_NAME
+            self._role_index_checked_at = time.monotonic()
+        try:
+            self.table.reload()
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserEventRelationsRepository._active_role_index: {e}")
+            return LEGACY_ROLE_INDEX_NAME
+        return ROLE_INDEX_NAME if self._sharded_role_index_active() else LEGACY_ROLE_INDEX_NAME
+
+    def get_relations_by_role(self, role: str, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieves every relation with the given role, ordered by user_event_id. The
+        role index is keyed on `role#0`..`role#N-1`, so all shards are queried
+        concurrently, each paginated to the end, and their sorted results are merged.
+        """
+        index_name = self._active_role_index()
+        try:
+            return self._query_role_index(index_name, role, fields)
+        except ClientError as e:
+            if index_name == LEGACY_ROLE_INDEX_NAME:
+                # Migration 2 drops the legacy index as soon as the sharded one is ACTIVE,
+                # which can be before the throttled re-check has noticed
+                with self._role_index_lock:
+                    self._role_index_checked_at = float('-inf')
+                if self._active_role_index() == ROLE_INDEX_NAME:
+                    return self._query_role_index(ROLE_INDEX_NAME, role, fields)
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.get_relations_by_role for {role}: {e}")
+            raise
+
+    def _query_role_index(self, index_name: str, role: str, fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+        if index_name == ROLE_INDEX_NAME:
+            key_conditions = [boto3.dynamodb.conditions.Key(ROLE_SHARD_ATTRIBUTE).eq(f"{role}#{shard}")
+                              for shard in range(ROLE_INDEX_SHARDS)]
+        else:
+            key_conditions = [boto3.dynamodb.conditions.Key('role').eq(role)]
+        projection = self._projection_kwargs(['user_event_id'] + fields if fields else None, index_name=index_name)
+
+        def query_shard(key_condition) -> List[Dict[str, Any]]:
+            query_kwargs = {"IndexName": index_name, "KeyConditionExpression": key_condition, **projection}
+            items = []
+            while True:
+                response = self.table.query(**query_kwargs)
+                items.extend(response.get('Items', []))
+                last_evaluated_key = response.get('LastEvaluatedKey')
+                if not last_evaluated_key:
+                    return items
+                query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        if len(key_conditions) == 1:
+            results = [query_shard(key_conditions[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(key_conditions), MAX_READ_WORKERS)) as executor:
+                results = list(executor.map(query_shard, key_conditions))
+        return list(heapq.merge(*results, key=lambda item: item.get('user_event_id', '')))
+
+    def set_role_shard(self, key: Dict[str, Any], shard: str) -> bool:
+        """Backfill write of the role index key; False if the relation was deleted meanwhile."""
+        try:
+            self.table.update_item(
+                Key=key,
+                UpdateExpression="SET #shard = :shard",
+                ConditionExpression=Attr('PK').exists(),
+                ExpressionAttributeNames={"#shard": ROLE_SHARD_ATTRIBUTE},
+                ExpressionAttributeValues={":shard": shard}
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            print(f"DynamoDB ClientError in UserEventRelationsRepository.set_role_shard for {key}: {e}")
+            raise
+
     def get_event_users_by_role_and_min_events(
             self,
             role: str,
@@ -58,15 +288,11 @@ class UserEventRelationsRepository(BaseRepository):
         ) -> List[Dict[str, Any]]:
         """
         Returns EventUserListItem objects for users with the given role who have hosted at least min_events events.
-        Uses query on the new GSI (role-user_event-index).
+        Reads every shard of the role index (see get_relations_by_role).
         """
         logger.debug(f"Querying UserEventRelations for role '{role}' and min_events {min_events} using GSI")
         try:
-            response = self.table.query(
-                IndexName='role-user_event-index',
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('role').eq(role)
-            )
-            relations = response.get('Items', [])
+            relations = self.get_relations_by_role(role)
             user_event_counts = Counter(rel.get('user_id') for rel in relations if 'user_id' in rel)
             filtered_user_ids = [user_id for user_id, count in user_event_counts.items() if count >= min_events]
             if len(filtered_user_ids) == 0:
@@ -1,10 +1,13 @@
 # app/repositories/user_repository.py
-from app.repositories.base_repository import BaseRepository
-from typing import Dict, Any, Optional, List
+from app.repositories.base_repository import BaseRepository, VERSION_ATTRIBUTE, drop_empty_attributes
+from typing import Dict, Any, Optional, List, Iterator
 from botocore.exceptions import ClientError
 import boto3
-from boto3.dynamodb.conditions import Attr
+from app.core.config import SCAN_TOTAL_SEGMENTS, COUNT_CACHE_TTL_SECONDS, FILTER_PAGE_SIZE
+from app.repositories.filter_planner import FilterPlan, FilterPlanner
+from app.utils.cache import TTLCache
 import logging
+import threading
 
 logger = logging.getLogger('uvicorn.error')
 logger.setLevel(logging.DEBUG)
@@ -12,56 +15,121 @@ logger.setLevel(logging.DEBUG)
 class UserRepository(BaseRepository):
     def __init__(self):
         super().__init__("Users") # Uses the table name defined in config
+        self._count_cache = TTLCache(COUNT_CACHE_TTL_SECONDS)
+        self._planner = FilterPlanner(self.table, SCAN_TOTAL_SEGMENTS, self._index_projection)
 
-    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieves a user's profile by ID."""
+    def get_user_by_id(self, user_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Retrieves a user's profile by ID. Only `fields` are read when given."""
         try:
-            response = self.table.get_item(Key={'user_id': user_id})
+            response = self.table.get_item(Key={'user_id': user_id}, **self._projection_kwargs(fields))
             return response.get('Item')
         except ClientError as e:
             # Log the error, but re-raise for consistent error handling in router
             print(f"DynamoDB ClientError in UserRepository.get_user_by_id for {user_id}: {e}")
             raise
     
-    def get_all_users(self) -> List[Dict[str, Any]]:
+    def get_users_by_ids(self, user_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Retrieves many users with batched reads. Preserves the order of `user_ids` and skips unknown ids."""
+        try:
+            items = self._batch_get([{'user_id': user_id} for user_id in user_ids], fields=fields)
+            return [item for item in items if item is not None]
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserRepository.get_users_by_ids: {e}")
+            raise
+
+    def get_user_ids_by_emails(self, emails: List[str]) -> Dict[str, str]:
+        """
+        Maps emails (case-insensitive, keyed lowercase) to user ids. Users have no
+        email index, so this is one parallel scan reading only user_id and email.
+        """
+        wanted = {email.strip().lower() for email in emails}
+        found: Dict[str, str] = {}
+        found_lock = threading.Lock()
+
+        def handle_page(page: List[Dict[str, Any]]) -> None:
+            with found_lock:
+                for item in page:
+                    email = (item.get('email') or '').lower()
+                    if email in wanted:
+                        found.setdefault(email, item['user_id'])
+
+        if not wanted:
+            return found
+        try:
+            self.parallel_scan(handle_page, SCAN_TOTAL_SEGMENTS, fields=['user_id', 'email'])
+            return found
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserRepository.get_user_ids_by_emails: {e}")
+            raise
+
+    def get_all_users(self, fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Retrieves all users from the Users table."""
         try:
-            response = self.table.scan()
+            response = self.table.scan(**self._projection_kwargs(fields))
             return response.get('Items', [])
         except ClientError as e:
             print(f"DynamoDB ClientError in UserRepository.get_all_users: {e}")
             raise
     
-    def get_users_by_filter(self, filter_list: list, limit: int = 10, exclusive_start_key: dict = None, sort_by: str = None, sort_order: str = "asc") -> dict:
-        """Generic filter, pagination, and sorting for Users table. Returns up to `limit` items after filtering."""
-        scan_batch_size = 10
-        scan_kwargs = {"Limit": scan_batch_size}
-        # Build filter expression
-        if filter_list:
-            filter_expr = None
-            for f in filter_list:
-                key = f.field
-                value = f.value
-                if key and value is not None:
-                    expr = Attr(key).contains(value)
-                    filter_expr = expr if filter_expr is None else filter_expr & expr
-            if filter_expr is not None:
-                scan_kwargs["FilterExpression"] = filter_expr
+    def plan_filter(self, filter_list: list, fields: Optional[List[str]] = None) -> FilterPlan:
+        """Chooses a Query on the table or a GSI, or a parallel Scan, for the given filters."""
+        return self._planner.plan(filter_list or [], required_fields=fields)
+
+    def _plan_key_names(self, plan: FilterPlan) -> List[str]:
+        """Key attributes of the plan's table/index; needed to resume from any returned item."""
+        key_names = [key['AttributeName'] for key in self.table.key_schema]
+        for index in self.table.global_secondary_indexes or []:
+            if index['IndexName'] == plan.index_name:
+                key_names += [key['AttributeName'] for key in index['KeySchema'] if key['AttributeName'] not in key_names]
+        return key_names
+
+    def count_users_by_filter(self, filter_list: list, use_cache: bool = True) -> int:
+        """
+        Counts the users matching the filters with Select=COUNT on the planned access
+        path (Query per partition or parallel Scan), so no items are transferred.
+        Results are cached for COUNT_CACHE_TTL_SECONDS.
+        """
+        cache_key = tuple(sorted((f.field, f.op, str(f.value)) for f in filter_list or []))
+        if use_cache:
+            cached = self._count_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        plan = self.plan_filter(filter_list)
+        try:
+            if plan.is_scan:
+                scan_kwargs = {}
+                if plan.filter_expression is not None:
+                    scan_kwargs["FilterExpression"] = plan.filter_expression
+                count = self._count_scan(plan.total_segments, **scan_kwargs)
+            else:
+                count = sum(self._count_query(**stream) for stream in plan.stream_kwargs())
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserRepository.count_users_by_filter: {e}")
+            raise
+        self._count_cache.set(cache_key, count)
+        return count
+
+    def get_users_by_filter(self, filter_list: list, limit: int = 10, exclusive_start_key: dict = None, sort_by: str = None, sort_order: str = "asc", fields: Optional[List[str]] = None) -> dict:
+        """
+        Generic filter, pagination, and sorting for Users table. Returns up to `limit` items after filtering.
+        The planner routes indexed 'eq'/'in' (and range-key prefix/range) filters to a Query and
+        falls back to a parallel Scan; `last_evaluated_key` is an opaque cursor for the next page.
+        """
+        plan = self.plan_filter(filter_list, fields=fields)
+        key_names = self._plan_key_names(plan)
+        streams = plan.stream_kwargs()
+        if fields:
+            # Sort and key attributes have to be read even if the caller did not ask for them
+            projection = list(dict.fromkeys(fields + ([sort_by] if sort_by else []) + key_names))
+            projection_kwargs = self._projection_kwargs(projection, index_name=plan.index_name)
+            streams = [dict(stream, **projection_kwargs) for stream in streams]
+        positions = None
         if exclusive_start_key:
-            scan_kwargs["ExclusiveStartKey"] = exclusive_start_key
-        items = []
-        last_evaluated_key = None
+            # Plain DynamoDB keys from earlier clients resume single-stream plans
+            positions = exclusive_start_key.get("positions") if "positions" in exclusive_start_key else [exclusive_start_key]
         try:
-            while len(items) < limit:
-                response = self.table.scan(**scan_kwargs)
-                logger.debug(f"Raw DynamoDB scan response: {response}")
-                batch = response.get('Items', [])
-                items.extend(batch)
-                last_evaluated_key = response.get('LastEvaluatedKey')
-                if not last_evaluated_key:
-                    break
-                scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
-            # Only return up to `limit` items
+            logger.debug(f"Filter plan for Users: {plan.explain()}")
+            items, next_positions = self._paginate_streams("scan" if plan.is_scan else "query", streams, limit, positions)
             # --- Sorting logic ---
             if sort_by:
                 items = sorted(
@@ -70,17 +138,34 @@ class UserRepository(BaseRepository):
                     reverse=(sort_order == "desc")
                 )
             return {
-                "items": items[:limit],
-                "last_evaluated_key": last_evaluated_key if len(items) >= limit else None
+                "items": items,
+                "last_evaluated_key": {"positions": next_positions} if next_positions else None
             }
         except ClientError as e:
             print(f"DynamoDB ClientError in UserRepository.get_users_by_filter: {e}")
             raise
 
+    def iter_users_by_filter(self, filter_list: list, fields: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Streams every user matching the filters, one planned page at a time,
+        without materializing the whole result set.
+        """
+        cursor = None
+        while True:
+            page = self.get_users_by_filter(filter_list, limit=FILTER_PAGE_SIZE, exclusive_start_key=cursor, fields=fields)
+            yield from page["items"]
+            cursor = page["last_evaluated_key"]
+            if not cursor:
+                return
+
     def create_user(self, user_data: dict) -> None:
         """Creates a new user in the Users table."""
         try:
+            drop_empty_attributes(user_data)  # Optional fields are GSI keys (company, city, ...)
+            user_data[VERSION_ATTRIBUTE] = 1
             self.table.put_item(Item=user_data)
+            if self.mirror:
+                self._mirrored("put_user", user_data["user_id"], lambda: self.mirror.put_user(user_data))
         except ClientError as e:
             print(f"DynamoDB ClientError in UserRepository.create_user: {e}")
             raise
@@ -89,17 +174,28 @@ class UserRepository(BaseRepository):
         """Updates an existing user in the Users table, handling reserved keywords."""
         try:
             update_expr_parts = []
+            remove_parts = []
             expr_attr_values = {}
             expr_attr_names = {}
             for k, v in user_data.items():
                 if k != "user_id":
                     placeholder = f":{k}"
                     name_placeholder = f"#{k}" if k in ["state"] else k
-                    update_expr_parts.append(f"{name_placeholder} = {placeholder}")
-                    expr_attr_values[placeholder] = v
                     if k in ["state"]:
                         expr_attr_names[name_placeholder] = k
-            update_expr = "SET " + ", ".join(update_expr_parts)
+                    if v is None or v == "":
+                        # GSI key attributes cannot be NULL or empty; a missing optional field is removed
+                        remove_parts.append(name_placeholder)
+                        continue
+                    update_expr_parts.append(f"{name_placeholder} = {placeholder}")
+                    expr_attr_values[placeholder] = v
+            update_expr = "ADD #version :version_increment"
+            if remove_parts:
+                update_expr = "REMOVE " + ", ".join(remove_parts) + " " + update_expr
+            if update_expr_parts:
+                update_expr = "SET " + ", ".join(update_expr_parts) + " " + update_expr
+            expr_attr_names["#version"] = VERSION_ATTRIBUTE
+            expr_attr_values[":version_increment"] = 1
             response = self.table.update_item(
                 Key={"user_id": user_id},
                 UpdateExpression=update_expr,
@@ -107,15 +203,39 @@ class UserRepository(BaseRepository):
                 ExpressionAttributeNames=expr_attr_names if expr_attr_names else None,
                 ReturnValues="ALL_NEW"
             )
+            if self.mirror and response.get("Attributes"):
+                self._mirrored("put_user", user_id, lambda: self.mirror.put_user(response["Attributes"]))
             return response.get("Attributes")
         except ClientError as e:
             print(f"DynamoDB ClientError in UserRepository.update_user: {e}")
             raise
 
+    def patch_user(self, user_id: str, changes: dict, expected_version: Optional[int] = None,
+                   return_values: str = "UPDATED_NEW") -> Dict[str, Any]:
+        """
+        Changes only the given attributes of an existing user (None removes one) and
+        increments its version. See BaseRepository._patch_item for the conditions.
+        Returns the updated attributes, or {} with return_values="NONE".
+        """
+        try:
+            # The single-table mirror stores whole items, so it needs the full new image
+            attributes = self._patch_item(
+                {"user_id": user_id}, changes, expected_version, "ALL_NEW" if self.mirror else return_values
+            )
+            if self.mirror:
+                self._mirrored("put_user", user_id, lambda: self.mirror.put_user(attributes))
+                attributes = {name: attributes[name] for name in [*changes, VERSION_ATTRIBUTE] if name in attributes}
+            return attributes if return_values != "NONE" else {}
+        except ClientError as e:
+            print(f"DynamoDB ClientError in UserRepository.patch_user: {e}")
+            raise
+
     def delete_user(self, user_id: str) -> None:
         """Deletes a user from the Users table."""
         try:
             self.table.delete_item(Key={"user_id": user_id})
+            if self.mirror:
+                self._mirrored("delete_user", user_id, lambda: self.mirror.delete_user(user_id))
         except ClientError as e:
             print(f"DynamoDB ClientError in UserRepository.delete_user: {e}")
             raise
\ No newline at end of file
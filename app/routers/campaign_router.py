@@ -0,0 +1,100 @@
+# app/routers/campaign_router.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from botocore.exceptions import ClientError
+from typing import List
+from app.models.campaigns import CampaignRequest, CampaignStatus
+from app.repositories.users_repository import UserRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository
+from app.dependencies import get_user_repo, get_user_event_relations_repo, get_campaign_registry
+from app.jobs.email_campaign import CampaignRegistry
+from app.core.config import CAMPAIGN_RETENTION_DAYS, CAMPAIGN_CHECK_EVERY, CAMPAIGN_CHECK_SECONDS
+
+router = APIRouter(
+    prefix="/campaigns",
+    tags=["Campaigns"]
+)
+
+@router.post(
+    "/",
+    status_code=202,
+    response_model=CampaignStatus,
+    summary="Start an email campaign",
+    description=(
+        "Sends a templated email to every user in a filter segment, or to the users of an event (optionally one role). "
+        "Recipients are streamed from DynamoDB page by page and sent at a throttled rate in the background "
+        "of the worker that receives the request."
+    )
+)
+async def start_campaign(
+    request: CampaignRequest,
+    registry: CampaignRegistry = Depends(get_campaign_registry),
+    user_repo: UserRepository = Depends(get_user_repo),
+    relations_repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+):
+    try:
+        return CampaignStatus(**registry.start(request, user_repo, relations_repo))
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/",
+    response_model=List[CampaignStatus],
+    summary="List campaigns",
+    description=f"Lists the campaigns of the last {CAMPAIGN_RETENTION_DAYS} days with their progress, oldest first."
+)
+async def list_campaigns(registry: CampaignRegistry = Depends(get_campaign_registry)):
+    try:
+        return [CampaignStatus(**status) for status in registry.list()]
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{campaign_id}",
+    response_model=CampaignStatus,
+    summary="Get campaign progress",
+    description=(
+        "Returns the progress and throughput of a campaign. Any worker can answer: progress is saved to the "
+        f"Campaigns table every {CAMPAIGN_CHECK_EVERY} recipients or {CAMPAIGN_CHECK_SECONDS:g} seconds."
+    )
+)
+async def get_campaign(campaign_id: str, registry: CampaignRegistry = Depends(get_campaign_registry)):
+    try:
+        status = registry.get(campaign_id)
+        if not status:
+            raise HTTPException(status_code=404, detail=f"Campaign with ID '{campaign_id}' not found.")
+        return CampaignStatus(**status)
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.delete(
+    "/{campaign_id}",
+    response_model=CampaignStatus,
+    summary="Cancel a campaign",
+    description=(
+        "Requests that a running campaign stop. Any worker can take the request: it sets `cancel_requested`, "
+        "and the sending worker stops at its next progress check (at once if it took the request itself)."
+    )
+)
+async def cancel_campaign(campaign_id: str, registry: CampaignRegistry = Depends(get_campaign_registry)):
+    try:
+        status = registry.cancel(campaign_id)
+        if not status:
+            raise HTTPException(status_code=404, detail=f"Campaign with ID '{campaign_id}' not found.")
+        return CampaignStatus(**status)
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
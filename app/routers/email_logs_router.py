@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from typing import List
+from typing import Optional
 
-from app.models.emails_log import EmailLog
+from app.models.emails_log import EmailLog, EmailLogPage
 
 from app.repositories.email_logs_repository import EmailLogsRepository 
 
 from app.dependencies import get_email_logs_repo
 
+from app.utils.pagination import encode_cursor, decode_cursor
+
 router = APIRouter(
     prefix="/email_logs",
     tags=["Email Logs"]
@@ -15,25 +17,44 @@ router = APIRouter(
 @router.get(
     "/",
     summary="Get Email Logs",
-    response_model=List[EmailLog],
-    description="Retrieves email logs from the EmailLogs table."
+    response_model=EmailLogPage,
+    description=(
+        "Retrieves email logs from the EmailLogs table ordered by send time (newest first by default), "
+        "optionally for one status or recipient and within a time range."
+    )
 )  
 async def get_email_logs(
     limit: int = Query(10, ge=1, le=100, description="Maximum number of email logs to retrieve"),
-    exclusive_start_key: str = Query(None, description="Exclusive start key for pagination")
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    status: Optional[str] = Query(None, description="Only logs with this status, e.g. 'failed'"),
+    recipient_email: Optional[str] = Query(None, description="Only logs sent to this address"),
+    since: Optional[str] = Query(None, description="Only logs sent at or after this ISO 8601 time"),
+    until: Optional[str] = Query(None, description="Only logs sent at or before this ISO 8601 time; a date includes the whole day"),
+    order: str = Query("desc", regex="^(asc|desc)$", description="Sort order by send time")
 ):
     """
-    Retrieves email logs with pagination.
+    Retrieves email logs with time-ordered cursor pagination.
     """
     email_logs_repo = get_email_logs_repo()
     
     try:
-        exclusive_start_key_obj = None
-        if exclusive_start_key:
-            exclusive_start_key_obj = {"email_id": exclusive_start_key}
-        response = email_logs_repo.get_email_logs(limit=limit, exclusive_start_key=exclusive_start_key_obj)
-        return [EmailLog(**item) for item in response.get('items', [])]
+        response = email_logs_repo.get_email_logs(
+            limit=limit,
+            cursor=decode_cursor(cursor),
+            status=status,
+            recipient_email=recipient_email,
+            since=since,
+            until=until,
+            ascending=(order == "asc")
+        )
+        return EmailLogPage(
+            items=[EmailLog(**item) for item in response.get('items', [])],
+            next_cursor=encode_cursor(response.get('cursor')),
+            limit=limit
+        )
     except HTTPException as e:
         raise e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
\ No newline at end of file
@@ -1,12 +1,23 @@
 # app/routers/events_router.py
 
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List 
-from app.models.events import Event, EventRequest
-from app.models.user_event import EventUserListItem
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.models.events import Event, EventRequest, EventSearchResult, EventPatch, EventPatchResult
+from app.models.user_event import EventUserListItem, EventDetail, RosterImportReport
+from app.repositories.base_repository import ItemNotFound, VersionConflict, VERSION_ATTRIBUTE
 from app.repositories.events_repository import EventRepository
+from app.repositories.users_repository import UserRepository
 from app.repositories.user_event_repository import UserEventRelationsRepository
-from app.dependencies import get_event_repo, get_user_event_relations_repo
+from app.dependencies import get_event_repo, get_user_repo, get_user_event_relations_repo, get_event_search_index, get_single_table_repo, get_single_flight
+from app.core.config import SINGLE_TABLE_MODE, COMPOSITE_PART_TIMEOUT_SECONDS, ROSTER_MAX_ROWS
+from app.search.event_index import EventSearchIndex, FIELD_WEIGHTS, STORED_FIELDS
+from app.utils.projection import parse_fields, parse_ids, project_item, projected_response
+from app.utils.composite import gather_parts, describe_part_error, raise_for_part
+from app.utils.single_flight import SingleFlight
+from app.utils.patch import patch_changes, patch_result
+from app.utils.etag import make_etag, if_none_match, not_modified, with_etag
+from app.jobs.roster_import import RosterFormatError, RosterParser, import_roster, iter_lines
 from botocore.exceptions import ClientError
 import uuid
 import logging
@@ -19,20 +30,95 @@ router = APIRouter(
     tags=["Events"]
 )
 
+@router.get(
+    "/",
+    response_model=List[Event],
+    summary="Get Multiple Events by ID",
+    description="Retrieves several events in one call using batched reads. Results follow the order of `ids`; unknown ids are skipped.",
+)
+async def get_events(
+    ids: str = Query(..., description="Comma-separated list of event IDs"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    repo: EventRepository = Depends(get_event_repo)
+):
+    """
+    Retrieves many events from the Events table with BatchGetItem.
+    """
+    try:
+        projection = parse_fields(fields, Event)
+        # BatchGetItem blocks; keep it off the event loop
+        events_data = await run_in_threadpool(repo.get_events_by_ids, parse_ids(ids), fields=projection)
+        if projection:
+            return projected_response([project_item(item, projection) for item in events_data])
+        return [Event(**item) for item in events_data]
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/search",
+    response_model=List[EventSearchResult],
+    summary="Search Events",
+    description="Full-text search over event title, slug, venue and description, ranked with BM25.",
+)
+async def search_events(
+    q: str = Query(..., min_length=1, description="Search terms"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results"),
+    index: EventSearchIndex = Depends(get_event_search_index)
+):
+    """
+    Searches the in-memory event index. No DynamoDB call is made.
+    """
+    try:
+        return [
+            EventSearchResult(event_id=event_id, score=score, **stored)
+            for event_id, score, stored in index.search(q, limit=limit)
+        ]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
 @router.get(
     "/{event_id}",
     response_model=Event,
     summary="Get Event Details by ID",
-    description="Retrieves an event's details from the 'Events' table.",
+    description=(
+        "Retrieves an event's details from the 'Events' table. The ETag follows the event's `version`; "
+        "send it back in `If-None-Match` to get `304 Not Modified` while the event is unchanged."
+    ),
 )
-async def get_event(event_id: str, repo: EventRepository = Depends(get_event_repo)):
+async def get_event(
+    event_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    repo: EventRepository = Depends(get_event_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
+):
     """
     Retrieves an event's details from the Events table.
     """
     try:
-        event_data = repo.get_event_by_id(event_id)
+        projection = parse_fields(fields, Event)
+        # The ETag needs the version even when it is not among the requested fields
+        read_fields = projection + [VERSION_ATTRIBUTE] if projection and VERSION_ATTRIBUTE not in projection else projection
+        event_data = await single_flight.run(
+            SingleFlight.key("get_event_by_id", event_id, read_fields),
+            lambda: repo.get_event_by_id(event_id, fields=read_fields)
+        )
         logger.debug(f"Retrieved event data for ID {event_id}: {event_data is None}")
-        return Event(**event_data)
+        if not event_data:
+            raise HTTPException(status_code=404, detail=f"Event with ID '{event_id}' not found.")
+        etag = make_etag("event", event_id, event_data.get(VERSION_ATTRIBUTE, 0), projection)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        if projection:
+            return with_etag(projected_response(project_item(event_data, projection)), response, etag)
+        return with_etag(Event(**event_data), response, etag)
     except HTTPException as e:
         raise e
     except ClientError as e:
@@ -44,18 +130,123 @@ async def get_event(event_id: str, repo: EventRepository = Depends(get_event_rep
     "/{event_id}/users",
     response_model=List[EventUserListItem], # Use typing.List
     summary="Get Users for an Event",
-    description="Retrieves all users (owner, hosts) associated with a specific event from the 'UserEventRelations' table via GSI.",
+    description=(
+        "Retrieves all users (owner, hosts) associated with a specific event from the 'UserEventRelations' table via GSI. "
+        "The ETag is a hash of the relations; send it back in `If-None-Match` to get `304 Not Modified` while they are unchanged."
+    ),
 )
 async def get_event_associated_users(
     event_id: str, 
-    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
 ):
     """
     Retrieves users associated with an event using the UserEventRelations GSI.
     """
     try:
-        users_data = repo.get_users_for_event(event_id)
-        return [EventUserListItem(**item) for item in users_data]
+        projection = parse_fields(fields, EventUserListItem)
+        # Relation items carry denormalized event columns; never read more than the list item needs
+        read_fields = projection or list(EventUserListItem.__fields__)
+        users_data = await single_flight.run(
+            SingleFlight.key("get_users_for_event", event_id, read_fields),
+            lambda: repo.get_users_for_event(event_id, fields=read_fields)
+        )
+        etag = make_etag("event_users", event_id, projection, users_data)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        if projection:
+            return with_etag(projected_response(users_data), response, etag)
+        return with_etag([EventUserListItem(**item) for item in users_data], response, etag)
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{event_id}/detail",
+    response_model=EventDetail,
+    summary="Get Event Details with Users",
+    description=(
+        "Retrieves an event together with its associated users. The event and its users "
+        "are read concurrently, each with its own timeout; if the users cannot be read in "
+        "time the event is still returned with `partial` set. "
+        "With the single-table layout enabled this is a single DynamoDB Query."
+    ),
+)
+async def get_event_detail(
+    event_id: str,
+    timeout_ms: Optional[int] = Query(None, ge=1, le=30000, description="Per-part timeout (default COMPOSITE_PART_TIMEOUT_SECONDS)"),
+    repo: EventRepository = Depends(get_event_repo),
+    relations_repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
+):
+    """
+    Retrieves an event and its users in one response.
+    """
+    timeout = timeout_ms / 1000 if timeout_ms else COMPOSITE_PART_TIMEOUT_SECONDS
+    try:
+        if SINGLE_TABLE_MODE == "on":
+            single_table_repo = get_single_table_repo()
+            results, errors = await gather_parts({"event": lambda: single_flight.call(
+                SingleFlight.key("get_event_with_users", event_id),
+                lambda: single_table_repo.get_event_with_users(event_id)
+            )}, timeout)
+            if "event" in results:
+                results["event"], results["users"] = results["event"]
+        else:
+            results, errors = await gather_parts({
+                "event": lambda: single_flight.call(
+                    SingleFlight.key("get_event_by_id", event_id, None),
+                    lambda: repo.get_event_by_id(event_id)
+                ),
+                "users": lambda: single_flight.call(
+                    SingleFlight.key("get_users_for_event", event_id, list(EventUserListItem.__fields__)),
+                    lambda: relations_repo.get_users_for_event(event_id, fields=list(EventUserListItem.__fields__))
+                ),
+            }, timeout)
+        if "event" in errors:
+            raise_for_part("event", errors["event"])
+        if not results["event"]:
+            raise HTTPException(status_code=404, detail=f"Event with ID '{event_id}' not found.")
+        if errors:
+            logger.warning(f"Partial detail for event {event_id}: {errors}")
+        users_data = results.get("users")
+        return EventDetail(
+            event=Event(**results["event"]),
+            users=[EventUserListItem(**item) for item in users_data] if users_data is not None else None,
+            partial=bool(errors),
+            errors={name: describe_part_error(error) for name, error in errors.items()}
+        )
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{event_id}/users/count",
+    response_model=dict,
+    summary="Count Users for an Event",
+    description="Counts the users associated with an event with Select=COUNT on the GSI, without returning the relation items.",
+)
+async def count_event_associated_users(
+    event_id: str,
+    role: Optional[str] = Query(None, description="Only count users with this role, e.g. 'attendee'"),
+    use_cache: bool = Query(True, description="Serve a recently computed count if available"),
+    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+):
+    """
+    Counts users associated with an event using the UserEventRelations GSI.
+    """
+    try:
+        count = repo.count_users_for_event(event_id, role=role, use_cache=use_cache)
+        return {"event_id": event_id, "role": role, "count": count}
     except HTTPException as e:
         raise e
     except ClientError as e:
@@ -69,11 +260,16 @@ async def get_event_associated_users(
     summary="Create a new event",
     description="Creates a new event in the Events table."
 )
-async def create_event(event: EventRequest, repo: EventRepository = Depends(get_event_repo)):
+async def create_event(
+    event: EventRequest,
+    repo: EventRepository = Depends(get_event_repo),
+    index: EventSearchIndex = Depends(get_event_search_index)
+):
     try:
         event_data = event.dict()
         event_data["event_id"] = str(uuid.uuid4())
         repo.create_event(event_data)
+        index.add(event_data)
         return Event(**event_data)
     except HTTPException as e:
         raise e
@@ -82,18 +278,63 @@ async def create_event(event: EventRequest, repo: EventRepository = Depends(get_
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
 
+@router.post(
+    "/{event_id}/roster",
+    response_model=RosterImportReport,
+    summary="Import an event roster",
+    description=(
+        "Relates many users to the event at once. The body is NDJSON (`{\"user_id\": \"u1\", \"role\": \"host\"}` "
+        "per line) or CSV (`Content-Type: text/csv`) with a header naming `user_id` and/or `email`, and `role` "
+        "(owner, host or attendee). Users already related to the event and repeated rows are skipped. "
+        "Returns a status per row and a throughput summary."
+    ),
+    responses={404: {"description": "Event not found"}, 413: {"description": "Too many rows"}},
+)
+async def import_event_roster(
+    event_id: str,
+    request: Request,
+    repo: EventRepository = Depends(get_event_repo),
+    user_repo: UserRepository = Depends(get_user_repo),
+    relations_repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+):
+    try:
+        event = repo.get_event_by_id(event_id, fields=['event_id', 'title', 'start_at'])
+        if not event:
+            raise HTTPException(status_code=404, detail=f"Event with ID '{event_id}' not found.")
+        parser = RosterParser(request.headers.get("content-type"))
+        async for line in iter_lines(request.stream()):
+            parser.feed(line)
+            if len(parser.rows) > ROSTER_MAX_ROWS:
+                raise HTTPException(status_code=413, detail=f"A roster import takes at most {ROSTER_MAX_ROWS} rows.")
+        # Batched reads and writes block for a while; keep them off the event loop
+        return await run_in_threadpool(import_roster, event, parser.rows, user_repo, relations_repo)
+    except HTTPException as e:
+        raise e
+    except RosterFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
 @router.put(
     "/{event_id}",
     response_model=Event,
     summary="Update an event",
     description="Updates an existing event in the Events table."
 )
-async def update_event(event_id: str, event: EventRequest, repo: EventRepository = Depends(get_event_repo)):
+async def update_event(
+    event_id: str,
+    event: EventRequest,
+    repo: EventRepository = Depends(get_event_repo),
+    index: EventSearchIndex = Depends(get_event_search_index)
+):
     try:
         logger.debug(f"Updating event with ID: {event_id} with data: {event.dict()}")
         updated_event = repo.update_event(event_id, event.dict())
         if not updated_event:
             raise HTTPException(status_code=404, detail=f"Event with ID '{event_id}' not found.")
+        index.add(updated_event)
         return Event(**updated_event)
     except HTTPException as e:
         raise e
@@ -102,14 +343,62 @@ async def update_event(event_id: str, event: EventRequest, repo: EventRepository
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
 
+@router.patch(
+    "/{event_id}",
+    response_model=EventPatchResult,
+    response_model_exclude_unset=True,
+    summary="Partially update an event",
+    description=(
+        "Changes only the attributes sent (null removes an optional one) and increments the event's `version`. "
+        "Unknown events get 404 instead of being created. With `expected_version` the update only applies if "
+        "nobody changed the event since that version, otherwise 409. `return_values=none` answers 204 without a body."
+    ),
+    responses={204: {"description": "Updated (return_values=none)"}, 404: {"description": "Event not found"},
+               409: {"description": "Version conflict"}},
+)
+async def patch_event(
+    event_id: str,
+    patch: EventPatch,
+    expected_version: Optional[int] = Query(None, ge=0, description="Apply only at this version (0 for events never updated since versioning)"),
+    return_values: str = Query("updated_new", regex="^(updated_new|none)$", description="'updated_new' returns the written attributes, 'none' nothing"),
+    repo: EventRepository = Depends(get_event_repo),
+    index: EventSearchIndex = Depends(get_event_search_index)
+):
+    try:
+        changes = patch_changes(patch, Event)
+        # The search index re-tokenizes whole documents, so searchable changes need the full new image
+        reindex = any(name in FIELD_WEIGHTS or name in STORED_FIELDS for name in changes)
+        attributes = repo.patch_event(event_id, changes, expected_version, "ALL_NEW" if reindex else return_values.upper())
+        if reindex:
+            index.add(attributes)
+            attributes = {name: attributes[name] for name in [*changes, "updated_at", VERSION_ATTRIBUTE] if name in attributes}
+        if return_values == "none":
+            return Response(status_code=204)
+        return EventPatchResult(**patch_result(attributes, EventPatchResult), event_id=event_id)
+    except HTTPException as e:
+        raise e
+    except ItemNotFound:
+        raise HTTPException(status_code=404, detail=f"Event with ID '{event_id}' not found.")
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=f"Event '{event_id}' is at version {e.current_version}, not {expected_version}.")
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
 @router.delete(
     "/{event_id}",
     summary="Delete an event",
     description="Deletes an event from the Events table."
 )
-async def delete_event(event_id: str, repo: EventRepository = Depends(get_event_repo)):
+async def delete_event(
+    event_id: str,
+    repo: EventRepository = Depends(get_event_repo),
+    index: EventSearchIndex = Depends(get_event_search_index)
+):
     try:
         repo.delete_event(event_id)
+        index.remove(event_id)
         return {"message": f"Event with ID '{event_id}' deleted successfully."}
     except HTTPException as e:
         raise e
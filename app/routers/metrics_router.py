@@ -0,0 +1,33 @@
+# app/routers/metrics_router.py
+
+from fastapi import APIRouter
+from app.core.config import ADMISSION_CONTROL_ENABLED, SINGLE_TABLE_MODE
+from app.dependencies import (
+    get_event_catalog, get_event_search_refresher, get_single_flight, get_admission_controller, get_single_table_repo
+)
+import os
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"]
+)
+
+@router.get(
+    "/",
+    response_model=dict,
+    summary="Get Worker Metrics",
+    description=(
+        "Metrics of the in-process caches and replicas of the worker that served the request. "
+        "Under gunicorn each worker keeps its own; `worker_pid` tells them apart."
+    ),
+)
+async def get_metrics():
+    catalog = get_event_catalog()
+    return {
+        "worker_pid": os.getpid(),
+        "event_catalog": catalog.metrics() if catalog is not None else None,
+        "event_search": get_event_search_refresher().metrics(),
+        "single_flight": get_single_flight().metrics(),
+        "admission": get_admission_controller().metrics() if ADMISSION_CONTROL_ENABLED else None,
+        "single_table_mirror": get_single_table_repo().failure_metrics() if SINGLE_TABLE_MODE in ("dual", "on") else None,
+    }
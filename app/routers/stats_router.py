@@ -0,0 +1,34 @@
+# app/routers/stats_router.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.dependencies import get_stats_store
+from app.jobs.analytics import StatsStore
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Stats"]
+)
+
+@router.get(
+    "/",
+    response_model=dict,
+    summary="Get User and Attendance Statistics",
+    description=(
+        "Users per company, city and job title, and relation counts and attendance rate "
+        "(attendees / max_capacity) per event, as of the last run of `python -m app.jobs.analytics`. "
+        "Served from memory; no table is read."
+    ),
+)
+async def get_stats(
+    limit: int = Query(20, ge=1, le=1000, description="Maximum entries per breakdown and attendance list"),
+    store: StatsStore = Depends(get_stats_store)
+):
+    """
+    Returns the precomputed statistics, truncated to `limit` entries per list.
+    """
+    stats = store.get()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Statistics have not been generated yet. Run `python -m app.jobs.analytics`.")
+    users = {name: value[:limit] if isinstance(value, list) else value for name, value in stats["users"].items()}
+    events = dict(stats["events"], attendance=stats["events"]["attendance"][:limit])
+    return dict(stats, users=users, events=events)
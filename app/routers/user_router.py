@@ -1,16 +1,29 @@
 # app/routers/users_router.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
 from fastapi.logger import logger
-from typing import List
-from app.models.users import User, UserRequest
-from app.models.user_event import EventUserListItem, UserEventListItem
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.models.users import User, UserRequest, UserPatch, UserPatchResult
+from app.models.events import Event
+from app.models.user_event import EventUserListItem, UserEventListItem, UserEventExpandedListItem, UserProfile, UserSuggestions
+from app.repositories.base_repository import ItemNotFound, VersionConflict
 from app.repositories.users_repository import UserRepository
+from app.repositories.events_repository import EventRepository
 from app.repositories.user_event_repository import UserEventRelationsRepository
-from app.dependencies import get_user_repo, get_user_event_relations_repo
+from app.repositories.suggestions_repository import SuggestionsRepository
+from app.dependencies import (
+    get_user_repo, get_event_repo, get_user_event_relations_repo, get_single_table_repo, get_single_flight, get_suggestions_repo
+)
+from app.core.config import SINGLE_TABLE_MODE, COMPOSITE_PART_TIMEOUT_SECONDS
 from app.utils.pagination import paginate_dynamodb_response
 from botocore.exceptions import ClientError, ParamValidationError
 from app.utils.filter_request import FilterQueryRequest
+from app.utils.projection import parse_fields, parse_ids, project_item, projected_response
+from app.utils.composite import gather_parts, describe_part_error, raise_for_part
+from app.utils.single_flight import SingleFlight
+from app.utils.patch import patch_changes, patch_result
+from app.utils.etag import make_etag, if_none_match, not_modified, with_etag
 from app.utils.email import send_email
 import logging
 import uuid
@@ -31,7 +44,10 @@ router = APIRouter(
     "/",
     summary="Get Users by Filter",
     response_model=dict,
-    description="Retrieves users from the 'Users' table using a generic filter and pagination.",
+    description=(
+        "Retrieves users from the 'Users' table using a generic filter and pagination. "
+        "Indexed equality/prefix filters are served by a Query on the matching GSI; set `explain` to see the plan."
+    ),
 )
 async def get_users_by_filter(
     query: FilterQueryRequest,
@@ -41,14 +57,44 @@ async def get_users_by_filter(
     Retrieves users using a generic filter and DynamoDB pagination.
     """
     try:
+        fields = parse_fields(query.fields, User)
+        if query.explain:
+            return {"plan": repo.plan_filter(query.filter, fields=fields).explain()}
         response = repo.get_users_by_filter(
             query.filter,
             limit=query.limit,
             exclusive_start_key=query.exclusive_start_key,
             sort_by=query.sort_by,
-            sort_order=query.sort_order
+            sort_order=query.sort_order,
+            fields=fields
         )
-        return paginate_dynamodb_response(response, User, query.limit)
+        return paginate_dynamodb_response(response, User, query.limit, fields=fields)
+    except HTTPException as e:
+        raise e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.post(
+    "/count",
+    summary="Count Users by Filter",
+    response_model=dict,
+    description="Counts users matching a generic filter with a parallel Select=COUNT scan, without returning the items.",
+)
+async def count_users_by_filter(
+    query: FilterQueryRequest,
+    use_cache: bool = Query(True, description="Serve a recently computed count if available"),
+    repo: UserRepository = Depends(get_user_repo)
+):
+    """
+    Counts users matching the filter. Pagination, sorting and field options are ignored.
+    """
+    try:
+        count = repo.count_users_by_filter(query.filter, use_cache=use_cache)
+        return {"count": count}
     except HTTPException as e:
         raise e
     except ClientError as e:
@@ -88,20 +134,59 @@ async def get_users_by_role_event_count(
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
 
 
+@router.get(
+    "/",
+    response_model=List[User],
+    summary="Get Multiple Users by ID",
+    description="Retrieves several user profiles in one call using batched reads. Results follow the order of `ids`; unknown ids are skipped.",
+)
+async def get_users(
+    ids: str = Query(..., description="Comma-separated list of user IDs"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    repo: UserRepository = Depends(get_user_repo)
+):
+    """
+    Retrieves many users from the Users table with BatchGetItem.
+    """
+    try:
+        projection = parse_fields(fields, User)
+        # BatchGetItem blocks; keep it off the event loop
+        users_data = await run_in_threadpool(repo.get_users_by_ids, parse_ids(ids), fields=projection)
+        if projection:
+            return projected_response([project_item(item, projection) for item in users_data])
+        return [User(**item) for item in users_data]
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
 @router.get(
     "/{user_id}",
     response_model=User,
     summary="Get User Profile by ID",
     description="Retrieves a user's full profile details from the 'Users' table.",
 )
-async def get_user(user_id: str, repo: UserRepository = Depends(get_user_repo)):
+async def get_user(
+    user_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    repo: UserRepository = Depends(get_user_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
+):
     """
     Retrieves a user's profile from the Users table.
     """
     try:
-        user_data = repo.get_user_by_id(user_id)
+        projection = parse_fields(fields, User)
+        user_data = await single_flight.run(
+            SingleFlight.key("get_user_by_id", user_id, projection),
+            lambda: repo.get_user_by_id(user_id, fields=projection)
+        )
         if not user_data:
             raise HTTPException(status_code=404, detail=f"User with ID '{user_id}' not found.")
+        if projection:
+            return projected_response(user_data)
         return User(**user_data)
     except HTTPException as e:
         raise e
@@ -114,18 +199,175 @@ async def get_user(user_id: str, repo: UserRepository = Depends(get_user_repo)):
     "/{user_id}/events",
     response_model=List[UserEventListItem], # Use typing.List
     summary="Get Events for a User",
-    description="Retrieves all events (owned, hosted) associated with a specific user from the 'UserEventRelations' table.",
+    description=(
+        "Retrieves all events (owned, hosted) associated with a specific user from the 'UserEventRelations' table. "
+        "With `expand=event` each item also embeds the full event, fetched with one batched read. "
+        "The ETag is a hash of the relations (and embedded events); send it back in `If-None-Match` "
+        "to get `304 Not Modified` while they are unchanged."
+    ),
 )
 async def get_user_associated_events(
     user_id: str, 
-    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    expand: Optional[str] = Query(None, description="Set to 'event' to embed full event details in each item"),
+    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo),
+    event_repo: EventRepository = Depends(get_event_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
 ):
     """
     Retrieves events associated with a user using the UserEventRelations table.
     """
     try:
-        events_data = repo.get_events_for_user(user_id)
-        return [UserEventListItem(**item) for item in events_data]
+        if expand not in (None, "event"):
+            raise HTTPException(status_code=400, detail=f"Unsupported expand value '{expand}'. Only 'event' is supported.")
+        projection = parse_fields(fields, UserEventListItem)
+        read_fields = projection or list(UserEventListItem.__fields__)
+        if expand and "event_id" not in read_fields:
+            read_fields = read_fields + ["event_id"]
+        # Relation items carry denormalized user columns; never read more than the list item needs
+        events_data = await single_flight.run(
+            SingleFlight.key("get_events_for_user", user_id, read_fields),
+            lambda: repo.get_events_for_user(user_id, fields=read_fields)
+        )
+        events = await run_in_threadpool(event_repo.get_events_by_ids, [item["event_id"] for item in events_data]) if expand else None
+        etag = make_etag("user_events", user_id, projection, events_data, events)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        if expand:
+            events_by_id = {event["event_id"]: Event(**event) for event in events}
+            if projection:
+                return with_etag(projected_response([
+                    dict(project_item(item, projection), event=events_by_id.get(item["event_id"]))
+                    for item in events_data
+                ]), response, etag)
+            return with_etag(projected_response([
+                UserEventExpandedListItem(**item, event=events_by_id.get(item["event_id"]))
+                for item in events_data
+            ]), response, etag)
+        if projection:
+            return with_etag(projected_response(events_data), response, etag)
+        return with_etag([UserEventListItem(**item) for item in events_data], response, etag)
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{user_id}/profile",
+    response_model=UserProfile,
+    summary="Get User Profile with Events",
+    description=(
+        "Retrieves a user's profile together with its associated events. The profile and "
+        "events are read concurrently, each with its own timeout; if the events cannot be "
+        "read in time the profile is still returned with `partial` set. "
+        "With the single-table layout enabled this is a single DynamoDB Query."
+    ),
+)
+async def get_user_profile(
+    user_id: str,
+    timeout_ms: Optional[int] = Query(None, ge=1, le=30000, description="Per-part timeout (default COMPOSITE_PART_TIMEOUT_SECONDS)"),
+    repo: UserRepository = Depends(get_user_repo),
+    relations_repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo),
+    single_flight: SingleFlight = Depends(get_single_flight)
+):
+    """
+    Retrieves a user's profile and events in one response.
+    """
+    timeout = timeout_ms / 1000 if timeout_ms else COMPOSITE_PART_TIMEOUT_SECONDS
+    try:
+        if SINGLE_TABLE_MODE == "on":
+            single_table_repo = get_single_table_repo()
+            results, errors = await gather_parts({"user": lambda: single_flight.call(
+                SingleFlight.key("get_user_with_events", user_id),
+                lambda: single_table_repo.get_user_with_events(user_id)
+            )}, timeout)
+            if "user" in results:
+                results["user"], results["events"] = results["user"]
+        else:
+            results, errors = await gather_parts({
+                "user": lambda: single_flight.call(
+                    SingleFlight.key("get_user_by_id", user_id, None),
+                    lambda: repo.get_user_by_id(user_id)
+                ),
+                "events": lambda: single_flight.call(
+                    SingleFlight.key("get_events_for_user", user_id, list(UserEventListItem.__fields__)),
+                    lambda: relations_repo.get_events_for_user(user_id, fields=list(UserEventListItem.__fields__))
+                ),
+            }, timeout)
+        if "user" in errors:
+            raise_for_part("user", errors["user"])
+        if not results["user"]:
+            raise HTTPException(status_code=404, detail=f"User with ID '{user_id}' not found.")
+        if errors:
+            logger.warning(f"Partial profile for user {user_id}: {errors}")
+        events_data = results.get("events")
+        return UserProfile(
+            user=User(**results["user"]),
+            events=[UserEventListItem(**item) for item in events_data] if events_data is not None else None,
+            partial=bool(errors),
+            errors={name: describe_part_error(error) for name, error in errors.items()}
+        )
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{user_id}/suggestions",
+    response_model=UserSuggestions,
+    summary="Get Contact Suggestions for a User",
+    description=(
+        "Users who attended the most events in common with this user, precomputed by "
+        "`python -m app.jobs.suggestions` and served with a single read."
+    ),
+)
+async def get_user_suggestions(
+    user_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Maximum number of suggestions to return"),
+    repo: SuggestionsRepository = Depends(get_suggestions_repo)
+):
+    """
+    Retrieves a user's precomputed co-attendance suggestions.
+    """
+    try:
+        item = repo.get_suggestions(user_id)
+        if not item:
+            raise HTTPException(status_code=404, detail=f"No suggestions computed for user '{user_id}'.")
+        suggestions = UserSuggestions(**item)
+        if limit:
+            suggestions.suggestions = suggestions.suggestions[:limit]
+        return suggestions
+    except HTTPException as e:
+        raise e
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
+@router.get(
+    "/{user_id}/events/count",
+    response_model=dict,
+    summary="Count Events for a User",
+    description="Counts the events associated with a user with Select=COUNT, without returning the relation items.",
+)
+async def count_user_associated_events(
+    user_id: str,
+    role: Optional[str] = Query(None, description="Only count events where the user has this role"),
+    use_cache: bool = Query(True, description="Serve a recently computed count if available"),
+    repo: UserEventRelationsRepository = Depends(get_user_event_relations_repo)
+):
+    """
+    Counts events associated with a user using the UserEventRelations table.
+    """
+    try:
+        count = repo.count_events_for_user(user_id, role=role, use_cache=use_cache)
+        return {"user_id": user_id, "role": role, "count": count}
     except HTTPException as e:
         raise e
     except ClientError as e:
@@ -206,6 +448,43 @@ async def update_user(user_id: str, user: UserRequest, repo: UserRepository = De
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
 
+@router.patch(
+    "/{user_id}",
+    response_model=UserPatchResult,
+    response_model_exclude_unset=True,
+    summary="Partially update a user",
+    description=(
+        "Changes only the attributes sent (null removes an optional one) and increments the user's `version`. "
+        "Unknown users get 404 instead of being created. With `expected_version` the update only applies if "
+        "nobody changed the user since that version, otherwise 409. `return_values=none` answers 204 without a body."
+    ),
+    responses={204: {"description": "Updated (return_values=none)"}, 404: {"description": "User not found"},
+               409: {"description": "Version conflict"}},
+)
+async def patch_user(
+    user_id: str,
+    patch: UserPatch,
+    expected_version: Optional[int] = Query(None, ge=0, description="Apply only at this version (0 for users never updated since versioning)"),
+    return_values: str = Query("updated_new", regex="^(updated_new|none)$", description="'updated_new' returns the written attributes, 'none' nothing"),
+    repo: UserRepository = Depends(get_user_repo)
+):
+    try:
+        changes = patch_changes(patch, User)
+        attributes = repo.patch_user(user_id, changes, expected_version, return_values.upper())
+        if return_values == "none":
+            return Response(status_code=204)
+        return UserPatchResult(**patch_result(attributes, UserPatchResult), user_id=user_id)
+    except HTTPException as e:
+        raise e
+    except ItemNotFound:
+        raise HTTPException(status_code=404, detail=f"User with ID '{user_id}' not found.")
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=f"User '{user_id}' is at version {e.current_version}, not {expected_version}.")
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e.response['Error']['Message']}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
+
 @router.delete(
     "/{user_id}",
     summary="Delete a user",
@@ -0,0 +1,351 @@
+# app/search/event_index.py
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.repositories.event_catalog import VERSION_OVERLAP_SECONDS, version_stamp
+
+# Per-field weights: a hit in the title counts more than one in the description
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "slug": 2.0,
+    "venue": 1.5,
+    "description": 1.0,
+}
+# Attributes kept in the index so results can be rendered without a table read
+STORED_FIELDS = ("title", "slug", "start_at", "venue")
+# Attributes read from the Events table to index an event; updated_at orders writes from different workers
+INDEXED_ATTRIBUTES = ["event_id", *FIELD_WEIGHTS, *STORED_FIELDS, "updated_at"]
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into",
+    "is", "it", "of", "on", "or", "the", "to", "with",
+})
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+logger = logging.getLogger('uvicorn.error')
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercases and splits text into word tokens, dropping stop words."""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+class EventSearchIndex:
+    """
+    In-memory inverted index over event title, slug, venue and description,
+    ranked with BM25 using field-weighted term frequencies.
+
+    The index keeps a forward map (event -> weighted term frequencies) next to the
+    postings so single events can be replaced or removed incrementally. Queries
+    use a MaxScore-style cut-off: terms are visited from rarest to most common and
+    the scan stops once no unseen event can beat the current top results. Queries
+    made only of very common words are additionally capped at `max_candidates`
+    scored events, trading exactness for bounded latency.
+
+    Each event's `updated_at` is remembered, also for removed events until the
+    next rebuild, so a write replayed from a change feed never undoes a newer one.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_candidates: int = 5000):
+        self.k1 = k1
+        self.b = b
+        self.max_candidates = max_candidates
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._stored: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, str] = {}  # event_id -> updated_at of the last add or remove
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+        # While a replacement index is being built, writes are also recorded here and replayed onto it
+        self._journal: Optional[List[Tuple[str, Optional[Dict[str, float]], Optional[Dict[str, Any]], Optional[str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # --- Indexing ---
+    def _weighted_terms(self, event: Dict[str, Any]) -> Dict[str, float]:
+        terms: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(event.get(field)):
+                terms[token] += weight
+        return dict(terms)
+
+    def _insert(self, event_id: str, terms: Dict[str, float], stored: Dict[str, Any]) -> None:
+        for term, frequency in terms.items():
+            self._postings[term][event_id] = frequency
+        length = sum(terms.values())
+        self._doc_terms[event_id] = terms
+        self._doc_lengths[event_id] = length
+        self._stored[event_id] = stored
+        self._total_length += length
+
+    def _delete(self, event_id: str) -> None:
+        terms = self._doc_terms.pop(event_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(event_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(event_id, 0.0)
+        self._stored.pop(event_id, None)
+
+    def _is_outdated(self, event_id: str, version: Optional[str]) -> bool:
+        known = self._versions.get(event_id)
+        return bool(version and known and version < known)
+
+    def _set_version(self, event_id: str, version: Optional[str]) -> None:
+        if version:
+            self._versions[event_id] = version
+
+    def add(self, event: Dict[str, Any]) -> None:
+        """Adds or replaces a single event, unless the index already reflects a newer write to it."""
+        event_id = event["event_id"]
+        version = event.get("updated_at")
+        terms = self._weighted_terms(event)
+        stored = {field: event.get(field) for field in STORED_FIELDS}
+        with self._lock:
+            if self._is_outdated(event_id, version):
+                return
+            self._delete(event_id)
+            self._insert(event_id, terms, stored)
+            self._set_version(event_id, version)
+            if self._journal is not None:
+                self._journal.append((event_id, terms, stored, version))
+
+    def remove(self, event_id: str) -> None:
+        """Removes an event; unknown ids are ignored. Older versions of it are not re-added."""
+        version = version_stamp()["updated_at"]
+        with self._lock:
+            self._delete(event_id)
+            self._set_version(event_id, version)
+            if self._journal is not None:
+                self._journal.append((event_id, None, None, version))
+
+    def rebuild(self, events: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replaces the whole index with `events`. The index keeps serving while they
+        are read; writes made meanwhile are replayed onto the new index, since
+        `events` may have been read before them.
+        """
+        def build() -> "EventSearchIndex":
+            fresh = EventSearchIndex(self.k1, self.b, self.max_candidates)
+            for event in events:
+                fresh.add(event)
+            return fresh
+        self._replace_with(build)
+
+    def restore(self, path: str) -> None:
+        """Replaces the whole index with a snapshot written by `save`, keeping writes made while it loads."""
+        self._replace_with(lambda: EventSearchIndex.load(path))
+
+    def _replace_with(self, build: Callable[[], "EventSearchIndex"]) -> None:
+        with self._lock:
+            self._journal = []
+        try:
+            fresh = build()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+        with self._lock:
+            for event_id, terms, stored, version in self._journal:
+                if fresh._is_outdated(event_id, version):
+                    continue
+                fresh._delete(event_id)
+                if terms is not None:
+                    fresh._insert(event_id, terms, stored)
+                fresh._set_version(event_id, version)
+            self._journal = None
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._doc_lengths = fresh._doc_lengths
+            self._stored = fresh._stored
+            self._versions = fresh._versions
+            self._total_length = fresh._total_length
+
+    # --- Querying ---
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Returns up to `limit` (event_id, score, stored fields) tuples, best match first."""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms or limit <= 0:
+            return []
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if doc_count == 0:
+                return []
+            average_length = self._total_length / doc_count
+            k1, b = self.k1, self.b
+
+            terms = []
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if postings:
+                    df = len(postings)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    terms.append((df, term, idf, postings))
+            terms.sort()
+            # Upper bound of what terms[i:] can still add to an event none of terms[:i] matched
+            remaining_bound = [0.0] * (len(terms) + 1)
+            for i in range(len(terms) - 1, -1, -1):
+                remaining_bound[i] = remaining_bound[i + 1] + terms[i][2] * (k1 + 1)
+
+            doc_lengths = self._doc_lengths
+            heap: List[Tuple[float, str]] = []
+            seen = set()
+            for i, (_, _, _, postings) in enumerate(terms):
+                if len(heap) >= limit and remaining_bound[i] <= heap[0][0]:
+                    break
+                if len(heap) >= limit and len(seen) >= self.max_candidates:
+                    break
+                for event_id in postings:
+                    if event_id in seen:
+                        continue
+                    if len(heap) >= limit and len(seen) >= self.max_candidates:
+                        break
+                    seen.add(event_id)
+                    norm = k1 * (1 - b + b * doc_lengths[event_id] / average_length)
+                    score = 0.0
+                    for _, _, idf, term_postings in terms:
+                        tf = term_postings.get(event_id)
+                        if tf:
+                            score += idf * tf * (k1 + 1) / (tf + norm)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, (score, event_id))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, event_id))
+            ranked = sorted(heap, key=lambda hit: (-hit[0], hit[1]))
+            return [(event_id, score, dict(self._stored[event_id])) for score, event_id in ranked]
+
+    # --- Persistence ---
+    def save(self, path: str) -> None:
+        """Writes the forward index to a gzip-compressed JSON file (atomically)."""
+        with self._lock:
+            payload = {
+                "k1": self.k1,
+                "b": self.b,
+                "documents": {
+                    event_id: {"terms": terms, "stored": self._stored[event_id], "updated_at": self._versions.get(event_id)}
+                    for event_id, terms in self._doc_terms.items()
+                },
+            }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"  # Every worker saves on shutdown; never share a tmp file
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "EventSearchIndex":
+        """Reads an index written by `save`; postings are rebuilt from the forward index."""
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        index = cls(payload.get("k1", 1.2), payload.get("b", 0.75))
+        for event_id, document in payload["documents"].items():
+            index._insert(event_id, document["terms"], document["stored"])
+            index._set_version(event_id, document.get("updated_at"))
+        return index
+
+
+class EventSearchRefresher:
+    """
+    Fills a worker's search index at startup and keeps it in step with event writes
+    served by other workers. Every `refresh_seconds` the events written since the
+    last pass are read from the Events version index, the feed the event catalog
+    also uses, and added. Deletes leave no trace in that index, so the whole index
+    is also rebuilt from the table every `resync_seconds`; an event deleted through
+    another worker can be returned until then. Without a version index every
+    refresh is a rebuild.
+    """
+    def __init__(self, index: EventSearchIndex, event_repo, refresh_seconds: float,
+                 resync_seconds: float, snapshot_path: str = ""):
+        self.index = index
+        self.repo = event_repo
+        self.refresh_seconds = refresh_seconds
+        self.resync_seconds = resync_seconds
+        self.snapshot_path = snapshot_path
+        self._watermark: Optional[datetime] = None  # Version index position
+        self._loaded_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"rebuilds": 0, "refreshes": 0, "refresh_errors": 0, "changes_applied": 0}
+
+    def warm(self) -> None:
+        """
+        A snapshot file, when present, makes search available immediately; the Events
+        table is then scanned to pick up changes made since. Event writes served
+        meanwhile are kept across both replacements.
+        """
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                self.index.restore(self.snapshot_path)
+                logger.info(f"Loaded {len(self.index)} events into the search index from {self.snapshot_path}.")
+            except Exception as e:
+                logger.error(f"Failed to load event search snapshot {self.snapshot_path}: {e}")
+        try:
+            self.rebuild()
+            logger.info(f"Indexed {len(self.index)} events for search.")
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.error(f"Failed to build the event search index: {e}")
+
+    def rebuild(self) -> None:
+        started, started_wall = time.monotonic(), datetime.now(timezone.utc)
+        self.index.rebuild(self.repo.iter_all_events(fields=INDEXED_ATTRIBUTES))
+        self._watermark = started_wall
+        self._loaded_at = started
+        self.stats["rebuilds"] += 1
+
+    def refresh(self) -> None:
+        """Adds the events written since the last pass (with some overlap, as GSI reads are eventually consistent)."""
+        now = datetime.now(timezone.utc)
+        since = self._watermark - timedelta(seconds=VERSION_OVERLAP_SECONDS)
+        for event in self.repo.iter_events_updated_since(since, now, fields=INDEXED_ATTRIBUTES):
+            self.index.add(event)
+            self.stats["changes_applied"] += 1
+        self._watermark = now
+        self.stats["refreshes"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "events": len(self.index),
+            "last_rebuild_age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None,
+            **self.stats,
+        }
+
+    # --- Background refresher ---
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="event-search", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        self.warm()
+        has_version_index = self.repo.has_version_index()
+        if not has_version_index:
+            logger.warning("Event search: the Events table has no version index; every refresh rebuilds the index.")
+        while not self._stop.wait(self.refresh_seconds):
+            resync_due = self.resync_seconds > 0 and self._loaded_at is not None and \
+                time.monotonic() - self._loaded_at >= self.resync_seconds
+            try:
+                if self._loaded_at is None or resync_due or not has_version_index:
+                    self.rebuild()
+                else:
+                    self.refresh()
+            except Exception as e:
+                self.stats["refresh_errors"] += 1
+                logger.warning(f"Event search index refresh failed: {e}")
@@ -0,0 +1,474 @@
+# app/storage/expressions.py
+"""
+DynamoDB expression support for the embedded storage backend.
+
+Condition, key-condition and filter expressions may arrive either as boto3
+condition builders (Key/Attr, as the repositories pass them) or as strings with
+#name/:value placeholders. Strings are parsed into the same builder objects, so
+a single evaluator serves both. Update and projection expressions are parsed
+into paths and actions.
+"""
+import re
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from boto3.dynamodb.conditions import Attr, AttributeBase, ConditionBase, Size
+from boto3.dynamodb.types import Binary
+
+Path = List[Union[str, int]]
+
+class ExpressionError(ValueError):
+    """Raised for malformed or unsupported expressions (surfaced as ValidationException)."""
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<name>#[A-Za-z0-9_]+)|(?P<value>:[A-Za-z0-9_]+)|(?P<op><>|<=|>=|=|<|>)"
+    r"|(?P<punct>[(),+\-\[\]\.])|(?P<number>\d+)|(?P<word>[A-Za-z_][A-Za-z0-9_]*))"
+)
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "REMOVE", "ADD", "DELETE"}
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match or match.end() == position:
+            raise ExpressionError(f"Invalid expression near: {expression[position:position + 20]!r}")
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == "word" and text.upper() in _KEYWORDS:
+            kind, text = "keyword", text.upper()
+        tokens.append((kind, text))
+        position = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, expression: str, names: Optional[Dict[str, str]], values: Optional[Dict[str, Any]]):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self, kind: Optional[str] = None, text: Optional[str] = None) -> str:
+        token_kind, token_text = self.peek()
+        if token_kind is None or (kind and token_kind != kind) or (text and token_text != text):
+            raise ExpressionError(f"Expected {text or kind}, found {token_text!r}")
+        self.position += 1
+        return token_text
+
+    def accept(self, kind: str, text: Optional[str] = None) -> bool:
+        token_kind, token_text = self.peek()
+        if token_kind == kind and (text is None or token_text == text):
+            self.position += 1
+            return True
+        return False
+
+    def done(self) -> bool:
+        return self.position >= len(self.tokens)
+
+    # --- Paths and operands ---
+    def path(self) -> Path:
+        parts: Path = [self._element()]
+        while True:
+            if self.accept("punct", "."):
+                parts.append(self._element())
+            elif self.accept("punct", "["):
+                parts.append(int(self.take("number")))
+                self.take("punct", "]")
+            else:
+                return parts
+
+    def _element(self) -> str:
+        kind, text = self.peek()
+        if kind == "name":
+            self.position += 1
+            if text not in self.names:
+                raise ExpressionError(f"Undefined attribute name placeholder {text}")
+            return self.names[text]
+        if kind in ("word", "keyword"):
+            self.position += 1
+            return text
+        raise ExpressionError(f"Expected an attribute name, found {text!r}")
+
+    def value(self) -> Any:
+        text = self.take("value")
+        if text not in self.values:
+            raise ExpressionError(f"Undefined attribute value placeholder {text}")
+        return self.values[text]
+
+    # --- Conditions (parsed into boto3 builders) ---
+    def condition(self) -> ConditionBase:
+        result = self._and()
+        while self.accept("keyword", "OR"):
+            result = result | self._and()
+        return result
+
+    def _and(self) -> ConditionBase:
+        result = self._not()
+        while self.accept("keyword", "AND"):
+            result = result & self._not()
+        return result
+
+    def _not(self) -> ConditionBase:
+        if self.accept("keyword", "NOT"):
+            return ~self._not()
+        return self._primary()
+
+    def _primary(self) -> ConditionBase:
+        if self.peek() == ("punct", "("):
+            self.position += 1
+            result = self.condition()
+            self.take("punct", ")")
+            return result
+        kind, text = self.peek()
+        if kind == "word" and self.peek(1) == ("punct", "(") and text != "size":
+            return self._function(text)
+        left = self._operand()
+        if self.accept("keyword", "BETWEEN"):
+            low = self._operand()
+            self.take("keyword", "AND")
+            return _attribute(left, "between")(low, self._operand())
+        if self.accept("keyword", "IN"):
+            self.take("punct", "(")
+            options = [self._operand()]
+            while self.accept("punct", ","):
+                options.append(self._operand())
+            self.take("punct", ")")
+            return _attribute(left, "is_in")(options)
+        operator = self.take("op")
+        right = self._operand()
+        if not isinstance(left, AttributeBase) and isinstance(right, AttributeBase):
+            left, right, operator = right, left, _SWAPPED[operator]
+        return _attribute(left, _COMPARISONS[operator])(right)
+
+    def _function(self, function: str) -> ConditionBase:
+        self.take("word")
+        self.take("punct", "(")
+        attribute = Attr(_path_name(self.path()))
+        if function == "attribute_exists":
+            result = attribute.exists()
+        elif function == "attribute_not_exists":
+            result = attribute.not_exists()
+        elif function in ("begins_with", "contains", "attribute_type"):
+            self.take("punct", ",")
+            argument = self._operand()
+            result = getattr(attribute, function)(argument)
+        else:
+            raise ExpressionError(f"Unsupported function {function}")
+        self.take("punct", ")")
+        return result
+
+    def _operand(self) -> Any:
+        kind, text = self.peek()
+        if kind == "value":
+            return self.value()
+        if kind == "word" and text == "size" and self.peek(1) == ("punct", "("):
+            self.position += 2
+            attribute = Attr(_path_name(self.path())).size()
+            self.take("punct", ")")
+            return attribute
+        return Attr(_path_name(self.path()))
+
+    # --- Update expressions ---
+    def update_actions(self) -> List[tuple]:
+        actions = []
+        while not self.done():
+            clause = self.take("keyword")
+            while True:
+                if clause == "SET":
+                    target = self.path()
+                    self.take("op", "=")
+                    actions.append(("SET", target, self._set_value()))
+                elif clause == "REMOVE":
+                    actions.append(("REMOVE", self.path(), None))
+                elif clause in ("ADD", "DELETE"):
+                    target = self.path()
+                    actions.append((clause, target, self.value()))
+                else:
+                    raise ExpressionError(f"Unexpected {clause} in update expression")
+                if not self.accept("punct", ","):
+                    break
+        return actions
+
+    def _set_value(self) -> tuple:
+        left = self._set_operand()
+        for sign in ("+", "-"):
+            if self.accept("punct", sign):
+                return (sign, left, self._set_operand())
+        return left
+
+    def _set_operand(self) -> tuple:
+        kind, text = self.peek()
+        if kind == "value":
+            return ("value", self.value())
+        if kind == "word" and self.peek(1) == ("punct", "(") and text in ("if_not_exists", "list_append"):
+            self.position += 2
+            first = self._set_operand() if text == "list_append" else ("path", self.path())
+            self.take("punct", ",")
+            second = self._set_operand()
+            self.take("punct", ")")
+            return (text, first, second)
+        return ("path", self.path())
+
+_COMPARISONS = {"=": "eq", "<>": "ne", "<": "lt", "<=": "lte", ">": "gt", ">=": "gte"}
+_SWAPPED = {"=": "=", "<>": "<>", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+def _path_name(path: Path) -> str:
+    name = ""
+    for part in path:
+        name += f"[{part}]" if isinstance(part, int) else (f".{part}" if name else part)
+    return name
+
+def _attribute(operand: Any, method: str):
+    if not isinstance(operand, AttributeBase):
+        raise ExpressionError("The left side of a comparison must be an attribute")
+    return getattr(operand, method)
+
+def parse_condition(expression: Union[str, ConditionBase, None], names: Optional[Dict[str, str]] = None,
+                    values: Optional[Dict[str, Any]] = None) -> Optional[ConditionBase]:
+    """Returns a boto3 condition builder for a condition given as a builder or a string expression."""
+    if expression is None or isinstance(expression, ConditionBase):
+        return expression
+    parser = _Parser(expression, names, values)
+    condition = parser.condition()
+    if not parser.done():
+        raise ExpressionError(f"Unexpected {parser.peek()[1]!r} in condition expression")
+    return condition
+
+def parse_update(expression: str, names: Optional[Dict[str, str]] = None, values: Optional[Dict[str, Any]] = None) -> List[tuple]:
+    """Parses an update expression into (action, path, operand) tuples."""
+    return _Parser(expression, names, values).update_actions()
+
+def parse_projection(expression: Optional[str], names: Optional[Dict[str, str]] = None) -> Optional[List[Path]]:
+    if not expression:
+        return None
+    parser = _Parser(expression, names, None)
+    paths = [parser.path()]
+    while parser.accept("punct", ","):
+        paths.append(parser.path())
+    if not parser.done():
+        raise ExpressionError("Invalid projection expression")
+    return paths
+
+# --- Evaluation ---
+_MISSING = object()
+
+def split_path(name: str) -> Path:
+    """Attr('a.b[0]') -> ['a', 'b', 0], matching how boto3 serializes builder attribute names."""
+    parts: Path = []
+    for element in name.split("."):
+        match = re.match(r"^([^\[]*)((?:\[\d+\])*)$", element)
+        if not match:
+            parts.append(element)
+            continue
+        parts.append(match.group(1))
+        parts.extend(int(index) for index in re.findall(r"\[(\d+)\]", match.group(2)))
+    return parts
+
+def get_path(item: Any, path: Path) -> Any:
+    current = item
+    for part in path:
+        if isinstance(part, int):
+            if not isinstance(current, list) or part >= len(current):
+                return _MISSING
+            current = current[part]
+        else:
+            if not isinstance(current, dict) or part not in current:
+                return _MISSING
+            current = current[part]
+    return current
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+def _comparable(left: Any, right: Any) -> bool:
+    if _is_number(left) and _is_number(right):
+        return True
+    return type(left) is type(right) and isinstance(left, (str, bytes, Binary))
+
+def _equal(left: Any, right: Any) -> bool:
+    if _is_number(left) and _is_number(right):
+        return left == right
+    return type(left) is type(right) and left == right
+
+def _type_code(value: Any) -> str:
+    if isinstance(value, bool):
+        return "BOOL"
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "S"
+    if _is_number(value):
+        return "N"
+    if isinstance(value, (bytes, Binary)):
+        return "B"
+    if isinstance(value, list):
+        return "L"
+    if isinstance(value, dict):
+        return "M"
+    if isinstance(value, set):
+        sample = next(iter(value), "")
+        return "SS" if isinstance(sample, str) else ("NS" if _is_number(sample) else "BS")
+    return "?"
+
+def _operand_value(operand: Any, item: Dict[str, Any]) -> Any:
+    if isinstance(operand, Size):
+        value = get_path(item, split_path(operand.name))
+        if isinstance(value, (str, bytes, Binary, list, dict, set)):
+            return Decimal(len(value))
+        return _MISSING
+    if isinstance(operand, AttributeBase):
+        return get_path(item, split_path(operand.name))
+    return operand
+
+def evaluate(condition: ConditionBase, item: Dict[str, Any]) -> bool:
+    """Evaluates a boto3 condition builder against an item with DynamoDB's typing rules."""
+    expression = condition.get_expression()
+    operator, operands = expression["operator"], expression["values"]
+    if operator == "AND":
+        return evaluate(operands[0], item) and evaluate(operands[1], item)
+    if operator == "OR":
+        return evaluate(operands[0], item) or evaluate(operands[1], item)
+    if operator == "NOT":
+        return not evaluate(operands[0], item)
+    if operator == "attribute_exists":
+        return _operand_value(operands[0], item) is not _MISSING
+    if operator == "attribute_not_exists":
+        return _operand_value(operands[0], item) is _MISSING
+
+    left = _operand_value(operands[0], item)
+    if left is _MISSING:
+        return operator == "<>"
+    if operator == "IN":
+        options = [_operand_value(option, item) for option in operands[1]]
+        return any(_equal(left, option) for option in options)
+    right = _operand_value(operands[1], item)
+    if operator == "attribute_type":
+        return _type_code(left) == right
+    if operator == "contains":
+        if isinstance(left, str):
+            return isinstance(right, str) and right in left
+        if isinstance(left, (set, list)):
+            return right in left
+        return False
+    if operator == "begins_with":
+        return isinstance(left, (str, bytes)) and type(left) is type(right) and left.startswith(right)
+    if operator == "=":
+        return _equal(left, right)
+    if operator == "<>":
+        return not _equal(left, right)
+    if operator == "BETWEEN":
+        upper = _operand_value(operands[2], item)
+        return _comparable(left, right) and _comparable(left, upper) and right <= left <= upper
+    if not _comparable(left, right):
+        return False
+    return {"<": left < right, "<=": left <= right, ">": left > right, ">=": left >= right}[operator]
+
+# --- Updates and projections ---
+def _set_path(item: Dict[str, Any], path: Path, value: Any) -> None:
+    parent = get_path(item, path[:-1]) if len(path) > 1 else item
+    if parent is _MISSING:
+        raise ExpressionError(f"The document path {_path_name(path)} does not exist")
+    last = path[-1]
+    if isinstance(last, int):
+        if not isinstance(parent, list):
+            raise ExpressionError(f"{_path_name(path[:-1])} is not a list")
+        if last >= len(parent):
+            parent.append(value)
+        else:
+            parent[last] = value
+    else:
+        if not isinstance(parent, dict):
+            raise ExpressionError(f"{_path_name(path[:-1])} is not a map")
+        parent[last] = value
+
+def _remove_path(item: Dict[str, Any], path: Path) -> None:
+    parent = get_path(item, path[:-1]) if len(path) > 1 else item
+    last = path[-1]
+    if isinstance(last, int) and isinstance(parent, list) and last < len(parent):
+        del parent[last]
+    elif isinstance(parent, dict):
+        parent.pop(last, None)
+
+def _resolve_set_value(operand: tuple, item: Dict[str, Any]) -> Any:
+    kind = operand[0]
+    if kind == "value":
+        return operand[1]
+    if kind == "path":
+        value = get_path(item, operand[1])
+        if value is _MISSING:
+            raise ExpressionError(f"The attribute {_path_name(operand[1])} in the update expression does not exist")
+        return value
+    if kind == "if_not_exists":
+        value = get_path(item, operand[1][1])
+        return _resolve_set_value(operand[2], item) if value is _MISSING else value
+    if kind == "list_append":
+        first, second = _resolve_set_value(operand[1], item), _resolve_set_value(operand[2], item)
+        if not isinstance(first, list) or not isinstance(second, list):
+            raise ExpressionError("list_append requires two lists")
+        return first + second
+    left, right = _resolve_set_value(operand[1], item), _resolve_set_value(operand[2], item)
+    if not _is_number(left) or not _is_number(right):
+        raise ExpressionError("Arithmetic in an update expression requires numbers")
+    return Decimal(left) + Decimal(right) if kind == "+" else Decimal(left) - Decimal(right)
+
+def apply_update(item: Dict[str, Any], actions: List[tuple]) -> List[str]:
+    """Applies parsed update actions in place. Returns the top-level attribute names touched."""
+    # All SET operands read the item as it was before the update, as in DynamoDB
+    original = {key: value for key, value in item.items()}
+    touched = []
+    for action, path, operand in actions:
+        touched.append(path[0])
+        if action == "SET":
+            _set_path(item, path, _resolve_set_value(operand, original))
+        elif action == "REMOVE":
+            _remove_path(item, path)
+        elif action == "ADD":
+            current = get_path(item, path)
+            if current is _MISSING:
+                _set_path(item, path, operand)
+            elif _is_number(current) and _is_number(operand):
+                _set_path(item, path, Decimal(current) + Decimal(operand))
+            elif isinstance(current, set) and isinstance(operand, set):
+                _set_path(item, path, current | operand)
+            else:
+                raise ExpressionError("ADD requires a number or a set")
+        elif action == "DELETE":
+            current = get_path(item, path)
+            if isinstance(current, set) and isinstance(operand, set):
+                remaining = current - operand
+                if remaining:
+                    _set_path(item, path, remaining)
+                else:
+                    _remove_path(item, path)
+    return list(dict.fromkeys(touched))
+
+def project(item: Dict[str, Any], paths: Optional[List[Path]]) -> Dict[str, Any]:
+    """Keeps only the attributes named by a parsed projection expression."""
+    if paths is None:
+        return item
+    result: Dict[str, Any] = {}
+    for path in paths:
+        value = get_path(item, path)
+        if value is _MISSING:
+            continue
+        if len(path) == 1:
+            result[path[0]] = value
+            continue
+        # Nested paths keep the enclosing maps; list elements are collected in order
+        target = result
+        for part, following in zip(path[:-1], path[1:]):
+            default = [] if isinstance(following, int) else {}
+            if isinstance(target, dict):
+                target = target.setdefault(part, default)
+            else:
+                target.append(default)
+                target = target[-1]
+        if isinstance(target, dict):
+            target[path[-1]] = value
+        else:
+            target.append(value)
+    return result
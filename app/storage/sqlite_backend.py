@@ -0,0 +1,692 @@
+# app/storage/sqlite_backend.py
+"""
+Embedded storage backend: a SQLite-backed stand-in for the subset of the boto3
+DynamoDB resource API the repositories use (Table, batch_get_item,
+batch_write_item and the table-management calls on meta.client).
+
+Items keep DynamoDB semantics: hash/range primary keys, sparse GSIs maintained on
+every write, Query ordering by range key, Limit/ExclusiveStartKey pagination,
+parallel scan segments, filter/condition/update expressions, and ClientError
+codes such as ConditionalCheckFailedException. Use ':memory:' for tests or a
+file path for small single-host deployments.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+from app.storage.expressions import (
+    ExpressionError, apply_update, evaluate, parse_condition, parse_projection, parse_update, project
+)
+
+MAX_PAGE_BYTES = 1024 * 1024  # DynamoDB stops a Query/Scan page at 1 MB of data read
+TTL_PURGE_INTERVAL_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dynamo_tables (name TEXT PRIMARY KEY, definition TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS items (
+    table_name TEXT NOT NULL,
+    hash_key TEXT NOT NULL,
+    range_key NOT NULL,
+    hash32 INTEGER NOT NULL,
+    expires_at REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (table_name, hash_key, range_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS items_scan ON items (table_name, hash32, hash_key, range_key);
+CREATE TABLE IF NOT EXISTS index_entries (
+    table_name TEXT NOT NULL,
+    index_name TEXT NOT NULL,
+    hash_key TEXT NOT NULL,
+    range_key NOT NULL,
+    base_hash TEXT NOT NULL,
+    base_range NOT NULL,
+    hash32 INTEGER NOT NULL,
+    PRIMARY KEY (table_name, index_name, hash_key, range_key, base_hash, base_range)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS index_entries_base ON index_entries (table_name, base_hash, base_range);
+CREATE INDEX IF NOT EXISTS index_entries_scan ON index_entries (table_name, index_name, hash32, hash_key, range_key, base_hash, base_range);
+"""
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+def _dump(item: Dict[str, Any]) -> str:
+    return json.dumps(_serializer.serialize(item)["M"], separators=(",", ":"))
+
+def _load(data: str) -> Dict[str, Any]:
+    return _deserializer.deserialize({"M": json.loads(data)})
+
+def _encode_hash(value: Any) -> str:
+    # Hash keys only need equality; numbers are normalized so 10 and 1E+1 match
+    return value if isinstance(value, str) else str(Decimal(value).normalize())
+
+def _encode_range(value: Any) -> Any:
+    # Stored untyped: text compares by UTF-8 bytes and numbers numerically, as in DynamoDB
+    if value is None:
+        return ""
+    if isinstance(value, (int, Decimal)):
+        return float(value)
+    return value
+
+def _hash32(encoded_hash: str) -> int:
+    return zlib.crc32(encoded_hash.encode("utf-8"))
+
+class _KeySchema:
+    """Hash/range attribute names of the table or one of its GSIs."""
+    def __init__(self, key_schema: List[Dict[str, str]]):
+        self.hash_name = next(k["AttributeName"] for k in key_schema if k["KeyType"] == "HASH")
+        self.range_name = next((k["AttributeName"] for k in key_schema if k["KeyType"] == "RANGE"), None)
+
+    def names(self) -> List[str]:
+        return [self.hash_name] + ([self.range_name] if self.range_name else [])
+
+    def covers(self, item: Dict[str, Any]) -> bool:
+        # Writes reject NULL/"" index keys (_validate_key); the check here only keeps a backfill
+        # over older items from indexing such values, as DynamoDB skips them when building an index
+        return all(item.get(name) not in (None, "") for name in self.names())
+
+    def encode(self, item: Dict[str, Any]) -> Tuple[str, Any]:
+        return _encode_hash(item[self.hash_name]), _encode_range(item.get(self.range_name) if self.range_name else None)
+
+class _TableDefinition:
+    def __init__(self, definition: Dict[str, Any]):
+        self.raw = definition
+        self.name = definition["TableName"]
+        self.key = _KeySchema(definition["KeySchema"])
+        self.indexes = {index["IndexName"]: index for index in definition.get("GlobalSecondaryIndexes", [])}
+        self.index_keys = {name: _KeySchema(index["KeySchema"]) for name, index in self.indexes.items()}
+        self.attribute_types = {a["AttributeName"]: a["AttributeType"] for a in definition.get("AttributeDefinitions", [])}
+        self.ttl_attribute = definition.get("TimeToLiveAttribute")
+
+    def index_projection(self, index_name: str) -> Optional[set]:
+        projection = self.indexes[index_name].get("Projection", {})
+        if projection.get("ProjectionType", "ALL") == "ALL":
+            return None
+        attributes = set(self.key.names()) | set(self.index_keys[index_name].names())
+        attributes.update(projection.get("NonKeyAttributes", []))
+        return attributes
+
+class SQLiteResource:
+    """Drop-in for boto3.resource('dynamodb') backed by a single SQLite database."""
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        # One connection per process, serialized by a lock; cross-process writers are
+        # serialized by SQLite itself (BEGIN IMMEDIATE).
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._lock = threading.RLock()
+        self._definitions: Dict[str, Tuple[str, _TableDefinition]] = {}
+        self._last_purge: Dict[str, float] = {}
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.meta = SimpleNamespace(client=SQLiteClient(self))
+
+    def Table(self, name: str) -> "SQLiteTable":
+        return SQLiteTable(self, name)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _definition(self, table_name: str, operation: str) -> _TableDefinition:
+        with self._lock:
+            row = self._conn.execute("SELECT definition FROM dynamo_tables WHERE name = ?", (table_name,)).fetchone()
+        if row is None:
+            self._definitions.pop(table_name, None)
+            raise _client_error("ResourceNotFoundException", f"Requested resource not found: Table: {table_name} not found", operation)
+        cached = self._definitions.get(table_name)
+        if cached is None or cached[0] != row[0]:
+            cached = self._definitions[table_name] = (row[0], _TableDefinition(json.loads(row[0])))
+        return cached[1]
+
+    # --- Item storage ---
+    def _validate_key(self, definition: _TableDefinition, item: Dict[str, Any], operation: str) -> None:
+        for name in definition.key.names():
+            if item.get(name) in (None, ""):
+                raise _client_error("ValidationException", f"Missing the key {name} in the item", operation)
+        for index_name, index_key in definition.index_keys.items():
+            # GSIs are sparse on absent attributes only; NULL or "" key values are rejected, as in DynamoDB
+            for name in index_key.names():
+                if name in item and item[name] is None:
+                    raise _client_error(
+                        "ValidationException",
+                        f"One or more parameter values were invalid: Type mismatch for Index Key {name} "
+                        f"Expected: {definition.attribute_types.get(name, 'S')} Actual: NULL IndexName: {index_name}",
+                        operation
+                    )
+                if item.get(name) == "":
+                    raise _client_error(
+                        "ValidationException",
+                        f"One or more parameter values are not valid. A value specified for a secondary index key "
+                        f"is not supported. The AttributeValue for a key attribute cannot contain an empty string "
+                        f"value. IndexName: {index_name}, IndexKey: {name}",
+                        operation
+                    )
+        for key in [definition.key] + list(definition.index_keys.values()):
+            for name in key.names():
+                expected, value = definition.attribute_types.get(name), item.get(name)
+                if value is None or expected is None:
+                    continue
+                actual = "S" if isinstance(value, str) else ("N" if isinstance(value, (int, Decimal)) and not isinstance(value, bool) else "B")
+                if actual != expected:
+                    raise _client_error("ValidationException", f"Type mismatch for key attribute {name}: expected {expected}", operation)
+
+    def _read_item(self, conn, definition: _TableDefinition, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        hash_key, range_key = definition.key.encode(key)
+        row = conn.execute(
+            "SELECT data FROM items WHERE table_name = ? AND hash_key = ? AND range_key = ?",
+            (definition.name, hash_key, range_key)
+        ).fetchone()
+        return _load(row[0]) if row else None
+
+    def _write_item(self, conn, definition: _TableDefinition, item: Dict[str, Any]) -> None:
+        hash_key, range_key = definition.key.encode(item)
+        self._delete_index_entries(conn, definition, hash_key, range_key)
+        expires_at = item.get(definition.ttl_attribute) if definition.ttl_attribute else None
+        expires_at = float(expires_at) if isinstance(expires_at, (int, Decimal)) and not isinstance(expires_at, bool) else None
+        conn.execute(
+            "INSERT OR REPLACE INTO items (table_name, hash_key, range_key, hash32, expires_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (definition.name, hash_key, range_key, _hash32(hash_key), expires_at, _dump(item))
+        )
+        for index_name, index_key in definition.index_keys.items():
+            # GSIs are sparse: items without the index key attributes are not indexed
+            if index_key.covers(item):
+                index_hash, index_range = index_key.encode(item)
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (definition.name, index_name, index_hash, index_range, hash_key, range_key, _hash32(index_hash))
+                )
+        self._maybe_purge_expired(conn, definition)
+
+    def _delete_item(self, conn, definition: _TableDefinition, key: Dict[str, Any]) -> None:
+        hash_key, range_key = definition.key.encode(key)
+        self._delete_index_entries(conn, definition, hash_key, range_key)
+        conn.execute(
+            "DELETE FROM items WHERE table_name = ? AND hash_key = ? AND range_key = ?",
+            (definition.name, hash_key, range_key)
+        )
+
+    def _delete_index_entries(self, conn, definition: _TableDefinition, hash_key: str, range_key: Any) -> None:
+        if definition.index_keys:
+            conn.execute(
+                "DELETE FROM index_entries WHERE table_name = ? AND base_hash = ? AND base_range = ?",
+                (definition.name, hash_key, range_key)
+            )
+
+    def _maybe_purge_expired(self, conn, definition: _TableDefinition) -> None:
+        """Deletes TTL-expired items now and then, like DynamoDB's background TTL sweeper."""
+        if not definition.ttl_attribute:
+            return
+        now = time.time()
+        if now - self._last_purge.get(definition.name, 0) < TTL_PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge[definition.name] = now
+        conn.execute(
+            "DELETE FROM index_entries WHERE table_name = ? AND (base_hash, base_range) IN "
+            "(SELECT hash_key, range_key FROM items WHERE table_name = ? AND expires_at < ?)",
+            (definition.name, definition.name, now)
+        )
+        conn.execute("DELETE FROM items WHERE table_name = ? AND expires_at < ?", (definition.name, now))
+
+    def _reindex(self, conn, definition: _TableDefinition, index_name: str) -> None:
+        """Backfills a newly created GSI from the base items."""
+        index_key = definition.index_keys[index_name]
+        rows = conn.execute("SELECT hash_key, range_key, data FROM items WHERE table_name = ?", (definition.name,)).fetchall()
+        for hash_key, range_key, data in rows:
+            item = _load(data)
+            if index_key.covers(item):
+                index_hash, index_range = index_key.encode(item)
+                conn.execute(
+                    "INSERT OR REPLACE INTO index_entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (definition.name, index_name, index_hash, index_range, hash_key, range_key, _hash32(index_hash))
+                )
+
+    # --- Batch operations ---
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **_) -> Dict[str, Any]:
+        responses = {}
+        for table_name, request in RequestItems.items():
+            definition = self._definition(table_name, "BatchGetItem")
+            paths = parse_projection(request.get("ProjectionExpression"), request.get("ExpressionAttributeNames"))
+            if len(request["Keys"]) > 100:
+                raise _client_error("ValidationException", "Too many items requested for the BatchGetItem call", "BatchGetItem")
+            found = []
+            with self._lock:
+                for key in request["Keys"]:
+                    item = self._read_item(self._conn, definition, key)
+                    if item is not None:
+                        found.append(project(item, paths))
+            responses[table_name] = found
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **_) -> Dict[str, Any]:
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise _client_error("ValidationException", "Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+        definitions = {name: self._definition(name, "BatchWriteItem") for name in RequestItems}
+        with self._transaction() as conn:
+            for table_name, requests in RequestItems.items():
+                definition = definitions[table_name]
+                for request in requests:
+                    if "PutRequest" in request:
+                        item = request["PutRequest"]["Item"]
+                        self._validate_key(definition, item, "BatchWriteItem")
+                        self._write_item(conn, definition, item)
+                    else:
+                        self._delete_item(conn, definition, request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": {}}
+
+class SQLiteTable:
+    """Drop-in for a boto3 dynamodb.Table resource."""
+    def __init__(self, resource: SQLiteResource, name: str):
+        self._resource = resource
+        self.name = name
+        self.table_name = name
+
+    def _definition(self, operation: str) -> _TableDefinition:
+        return self._resource._definition(self.name, operation)
+
+    # --- Metadata (same attribute names as the boto3 Table resource) ---
+    def load(self) -> None:
+        self._definition("DescribeTable")
+
+    def reload(self) -> None:
+        self.load()
+
+    @property
+    def key_schema(self) -> List[Dict[str, str]]:
+        return self._definition("DescribeTable").raw["KeySchema"]
+
+    @property
+    def attribute_definitions(self) -> List[Dict[str, str]]:
+        return self._definition("DescribeTable").raw.get("AttributeDefinitions", [])
+
+    @property
+    def global_secondary_indexes(self) -> Optional[List[Dict[str, Any]]]:
+        indexes = self._definition("DescribeTable").raw.get("GlobalSecondaryIndexes")
+        return [dict(index, IndexStatus="ACTIVE") for index in indexes] if indexes else None
+
+    @property
+    def latest_stream_arn(self) -> Optional[str]:
+        return None  # No change streams; use a version index instead
+
+    @property
+    def table_status(self) -> str:
+        self.load()
+        return "ACTIVE"
+
+    @property
+    def item_count(self) -> int:
+        with self._resource._lock:
+            return self._resource._conn.execute("SELECT COUNT(*) FROM items WHERE table_name = ?", (self.name,)).fetchone()[0]
+
+    # --- Single-item operations ---
+    def get_item(self, Key: Dict[str, Any], ProjectionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict[str, str]] = None, **_) -> Dict[str, Any]:
+        definition = self._definition("GetItem")
+        with self._resource._lock:
+            item = self._resource._read_item(self._resource._conn, definition, Key)
+        if item is None:
+            return {}
+        return {"Item": project(item, parse_projection(ProjectionExpression, ExpressionAttributeNames))}
+
+    def _check_condition(self, condition, existing: Optional[Dict[str, Any]], names, values, operation: str) -> None:
+        try:
+            parsed = parse_condition(condition, names, values)
+            passed = parsed is None or evaluate(parsed, existing or {})
+        except ExpressionError as e:
+            raise _client_error("ValidationException", str(e), operation)
+        if not passed:
+            raise _client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    def put_item(self, Item: Dict[str, Any], ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValues: str = "NONE", **_) -> Dict[str, Any]:
+        definition = self._definition("PutItem")
+        self._resource._validate_key(definition, Item, "PutItem")
+        with self._resource._transaction() as conn:
+            existing = self._resource._read_item(conn, definition, Item)
+            self._check_condition(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+            self._resource._write_item(conn, definition, Item)
+        return {"Attributes": existing} if ReturnValues == "ALL_OLD" and existing else {}
+
+    def update_item(self, Key: Dict[str, Any], UpdateExpression: Optional[str] = None, ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None, ReturnValues: str = "NONE", **_) -> Dict[str, Any]:
+        definition = self._definition("UpdateItem")
+        try:
+            actions = parse_update(UpdateExpression or "", ExpressionAttributeNames, ExpressionAttributeValues)
+        except ExpressionError as e:
+            raise _client_error("ValidationException", str(e), "UpdateItem")
+        if any(path[0] in definition.key.names() for _, path, _ in actions):
+            raise _client_error("ValidationException", "Cannot update attribute that is part of the key", "UpdateItem")
+        with self._resource._transaction() as conn:
+            existing = self._resource._read_item(conn, definition, Key)
+            self._check_condition(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "UpdateItem")
+            # Like DynamoDB, updating a missing item creates it (unless a condition prevents it)
+            updated = _load(_dump(existing)) if existing else {}
+            updated.update({name: Key[name] for name in definition.key.names()})
+            try:
+                touched = apply_update(updated, actions)
+                updated = _load(_dump(updated))  # Numbers come back as Decimal, as from DynamoDB
+            except (ExpressionError, TypeError) as e:
+                raise _client_error("ValidationException", str(e), "UpdateItem")
+            self._resource._validate_key(definition, updated, "UpdateItem")
+            self._resource._write_item(conn, definition, updated)
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": updated}
+        if ReturnValues == "ALL_OLD":
+            return {"Attributes": existing} if existing else {}
+        if ReturnValues in ("UPDATED_NEW", "UPDATED_OLD"):
+            source = updated if ReturnValues == "UPDATED_NEW" else (existing or {})
+            attributes = {name: source[name] for name in touched if name in source}
+            return {"Attributes": attributes} if attributes else {}
+        return {}
+
+    def delete_item(self, Key: Dict[str, Any], ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ReturnValues: str = "NONE", **_) -> Dict[str, Any]:
+        definition = self._definition("DeleteItem")
+        with self._resource._transaction() as conn:
+            existing = self._resource._read_item(conn, definition, Key)
+            self._check_condition(ConditionExpression, existing, ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+            if existing is not None:
+                self._resource._delete_item(conn, definition, Key)
+        return {"Attributes": existing} if ReturnValues == "ALL_OLD" and existing else {}
+
+    @contextmanager
+    def batch_writer(self, overwrite_by_pkeys: Optional[List[str]] = None):
+        yield _BatchWriter(self)
+
+    # --- Query and Scan ---
+    def query(self, **kwargs) -> Dict[str, Any]:
+        return self._read("Query", kwargs)
+
+    def scan(self, **kwargs) -> Dict[str, Any]:
+        return self._read("Scan", kwargs)
+
+    def _read(self, operation: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        definition = self._definition(operation)
+        index_name = kwargs.get("IndexName")
+        if index_name and index_name not in definition.indexes:
+            raise _client_error("ValidationException", f"The table does not have the specified index: {index_name}", operation)
+        names, values = kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues")
+        try:
+            filter_condition = parse_condition(kwargs.get("FilterExpression"), names, values)
+            paths = parse_projection(kwargs.get("ProjectionExpression"), names)
+            if operation == "Query":
+                sql, params, order = self._query_sql(definition, index_name, kwargs, names, values)
+            else:
+                sql, params, order = self._scan_sql(definition, index_name, kwargs)
+        except ExpressionError as e:
+            raise _client_error("ValidationException", str(e), operation)
+
+        start_key = kwargs.get("ExclusiveStartKey")
+        if start_key:
+            position = self._position(definition, index_name, start_key, operation)
+            comparison = "<" if order == "DESC" else ">"
+            columns = self._order_columns(index_name, operation)
+            sql += f" AND ({', '.join(columns)}) {comparison} ({', '.join('?' * len(columns))})"
+            params.extend(position)
+        columns = self._order_columns(index_name, operation)
+        sql += " ORDER BY " + ", ".join(f"{column} {order}" for column in columns)
+        limit = kwargs.get("Limit")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)  # One extra row tells whether another page exists
+
+        projected_attributes = definition.index_projection(index_name) if index_name else None
+        items, scanned, size, last_item, more = [], 0, 0, None, False
+        with self._resource._lock:
+            for (data,) in self._resource._conn.execute(sql, params):
+                if (limit is not None and scanned >= limit) or size >= MAX_PAGE_BYTES:
+                    more = True
+                    break
+                item = _load(data)
+                scanned += 1
+                size += len(data)
+                last_item = item
+                if projected_attributes is not None:
+                    item = {k: v for k, v in item.items() if k in projected_attributes}
+                if filter_condition is not None and not evaluate(filter_condition, item):
+                    continue
+                items.append(item)
+
+        response: Dict[str, Any] = {"Count": len(items), "ScannedCount": scanned}
+        if kwargs.get("Select") != "COUNT":
+            response["Items"] = [project(item, paths) for item in items]
+        if more and last_item is not None:
+            key_names = definition.key.names() + (definition.index_keys[index_name].names() if index_name else [])
+            response["LastEvaluatedKey"] = {name: last_item[name] for name in dict.fromkeys(key_names)}
+        return response
+
+    @staticmethod
+    def _order_columns(index_name: Optional[str], operation: str) -> List[str]:
+        if index_name:
+            columns = ["e.range_key", "e.base_hash", "e.base_range"]
+            return (["e.hash32", "e.hash_key"] + columns) if operation == "Scan" else columns
+        return ["i.hash32", "i.hash_key", "i.range_key"] if operation == "Scan" else ["i.range_key"]
+
+    def _position(self, definition: _TableDefinition, index_name: Optional[str], start_key: Dict[str, Any], operation: str) -> list:
+        try:
+            base_hash, base_range = definition.key.encode(start_key)
+            if not index_name:
+                return [_hash32(base_hash), base_hash, base_range] if operation == "Scan" else [base_range]
+            index_hash, index_range = definition.index_keys[index_name].encode(start_key)
+        except KeyError:
+            raise _client_error("ValidationException", "The provided starting key is invalid", operation)
+        position = [index_range, base_hash, base_range]
+        return ([_hash32(index_hash), index_hash] + position) if operation == "Scan" else position
+
+    def _source_sql(self, definition: _TableDefinition, index_name: Optional[str]) -> Tuple[str, list]:
+        if index_name:
+            return (
+                "SELECT i.data FROM index_entries e JOIN items i ON i.table_name = e.table_name "
+                "AND i.hash_key = e.base_hash AND i.range_key = e.base_range "
+                "WHERE e.table_name = ? AND e.index_name = ?"
+            ), [definition.name, index_name]
+        return "SELECT i.data FROM items i WHERE i.table_name = ?", [definition.name]
+
+    def _query_sql(self, definition: _TableDefinition, index_name: Optional[str], kwargs: Dict[str, Any], names, values) -> tuple:
+        condition = parse_condition(kwargs.get("KeyConditionExpression"), names, values)
+        if condition is None:
+            raise ExpressionError("Query requires a KeyConditionExpression")
+        key = definition.index_keys[index_name] if index_name else definition.key
+        alias = "e" if index_name else "i"
+        terms = _and_terms(condition)
+        hash_terms = [t for t in terms if _term_attribute(t) == key.hash_name]
+        range_terms = [t for t in terms if key.range_name and _term_attribute(t) == key.range_name]
+        if len(hash_terms) != 1 or hash_terms[0].get_expression()["operator"] != "=" or len(terms) != 1 + len(range_terms) or len(range_terms) > 1:
+            raise ExpressionError("Query key condition not supported")
+        sql, params = self._source_sql(definition, index_name)
+        sql += f" AND {alias}.hash_key = ?"
+        params.append(_encode_hash(hash_terms[0].get_expression()["values"][1]))
+        if range_terms:
+            expression = range_terms[0].get_expression()
+            operator, operands = expression["operator"], expression["values"]
+            column = f"{alias}.range_key"
+            if operator == "BETWEEN":
+                sql += f" AND {column} BETWEEN ? AND ?"
+                params.extend([_encode_range(operands[1]), _encode_range(operands[2])])
+            elif operator == "begins_with":
+                sql += f" AND {column} >= ? AND substr({column}, 1, ?) = ?"
+                params.extend([operands[1], len(operands[1]), operands[1]])
+            elif operator in ("=", "<", "<=", ">", ">="):
+                sql += f" AND {column} {operator} ?"
+                params.append(_encode_range(operands[1]))
+            else:
+                raise ExpressionError(f"Unsupported operator on range key: {operator}")
+        return sql, params, "ASC" if kwargs.get("ScanIndexForward", True) else "DESC"
+
+    def _scan_sql(self, definition: _TableDefinition, index_name: Optional[str], kwargs: Dict[str, Any]) -> tuple:
+        sql, params = self._source_sql(definition, index_name)
+        total_segments = kwargs.get("TotalSegments")
+        if total_segments:
+            alias = "e" if index_name else "i"
+            sql += f" AND {alias}.hash32 % ? = ?"
+            params.extend([total_segments, kwargs.get("Segment", 0)])
+        return sql, params, "ASC"
+
+def _and_terms(condition) -> list:
+    expression = condition.get_expression()
+    if expression["operator"] == "AND":
+        return _and_terms(expression["values"][0]) + _and_terms(expression["values"][1])
+    return [condition]
+
+def _term_attribute(term) -> Optional[str]:
+    operand = term.get_expression()["values"][0]
+    return getattr(operand, "name", None)
+
+class _BatchWriter:
+    """Minimal Table.batch_writer(): writes are applied immediately."""
+    def __init__(self, table: SQLiteTable):
+        self._table = table
+
+    def put_item(self, Item: Dict[str, Any]) -> None:
+        self._table.put_item(Item=Item)
+
+    def delete_item(self, Key: Dict[str, Any]) -> None:
+        self._table.delete_item(Key=Key)
+
+class _Waiter:
+    def __init__(self, client: "SQLiteClient", exists: bool):
+        self._client = client
+        self._exists = exists
+
+    def wait(self, TableName: str, **_) -> None:
+        # Table changes are synchronous, so there is nothing to wait for
+        if (TableName in self._client.list_tables()["TableNames"]) != self._exists:
+            raise _client_error("ResourceNotFoundException" if self._exists else "ResourceInUseException",
+                                f"Waiter failed for table {TableName}", "DescribeTable")
+
+class SQLiteClient:
+    """Table-management subset of the DynamoDB client used by db_setup and the jobs."""
+    def __init__(self, resource: SQLiteResource):
+        self._resource = resource
+
+    def create_table(self, TableName: str, KeySchema: list, AttributeDefinitions: list,
+                     GlobalSecondaryIndexes: Optional[list] = None, StreamSpecification: Optional[dict] = None,
+                     **_) -> Dict[str, Any]:
+        definition = {"TableName": TableName, "KeySchema": KeySchema, "AttributeDefinitions": AttributeDefinitions}
+        if StreamSpecification and StreamSpecification.get("StreamEnabled"):
+            # Recorded so describe_table reports it; no stream records are produced (there is no LatestStreamArn)
+            definition["StreamSpecification"] = StreamSpecification
+        if GlobalSecondaryIndexes:
+            definition["GlobalSecondaryIndexes"] = [
+                {k: v for k, v in index.items() if k in ("IndexName", "KeySchema", "Projection")}
+                for index in GlobalSecondaryIndexes
+            ]
+        with self._resource._transaction() as conn:
+            if conn.execute("SELECT 1 FROM dynamo_tables WHERE name = ?", (TableName,)).fetchone():
+                raise _client_error("ResourceInUseException", f"Table already exists: {TableName}", "CreateTable")
+            conn.execute("INSERT INTO dynamo_tables VALUES (?, ?)", (TableName, json.dumps(definition)))
+        return {"TableDescription": self.describe_table(TableName)["Table"]}
+
+    def delete_table(self, TableName: str, **_) -> Dict[str, Any]:
+        description = self.describe_table(TableName)["Table"]
+        with self._resource._transaction() as conn:
+            conn.execute("DELETE FROM index_entries WHERE table_name = ?", (TableName,))
+            conn.execute("DELETE FROM items WHERE table_name = ?", (TableName,))
+            conn.execute("DELETE FROM dynamo_tables WHERE name = ?", (TableName,))
+        return {"TableDescription": description}
+
+    def list_tables(self, **_) -> Dict[str, Any]:
+        with self._resource._lock:
+            rows = self._resource._conn.execute("SELECT name FROM dynamo_tables ORDER BY name").fetchall()
+        return {"TableNames": [row[0] for row in rows]}
+
+    def describe_table(self, TableName: str, **_) -> Dict[str, Any]:
+        table = SQLiteTable(self._resource, TableName)
+        definition = self._resource._definition(TableName, "DescribeTable").raw
+        description = {k: v for k, v in definition.items() if k != "TimeToLiveAttribute"}
+        if table.global_secondary_indexes:
+            description["GlobalSecondaryIndexes"] = table.global_secondary_indexes
+        description.update(TableStatus="ACTIVE", ItemCount=table.item_count)
+        return {"Table": description}
+
+    def update_table(self, TableName: str, AttributeDefinitions: Optional[list] = None,
+                     GlobalSecondaryIndexUpdates: Optional[list] = None, StreamSpecification: Optional[dict] = None,
+                     **_) -> Dict[str, Any]:
+        """Supports creating and deleting GSIs (new indexes are backfilled synchronously) and stream settings."""
+        with self._resource._transaction() as conn:
+            definition = dict(self._resource._definition(TableName, "UpdateTable").raw)
+            if StreamSpecification is not None:
+                enabled = definition.get("StreamSpecification", {}).get("StreamEnabled", False)
+                if enabled == StreamSpecification.get("StreamEnabled", False):
+                    raise _client_error("ValidationException", "Table already has an enabled stream" if enabled
+                                        else "Table has no stream to disable", "UpdateTable")
+                if StreamSpecification.get("StreamEnabled"):
+                    definition["StreamSpecification"] = StreamSpecification
+                else:
+                    definition.pop("StreamSpecification", None)
+            attributes = {a["AttributeName"]: a for a in definition.get("AttributeDefinitions", [])}
+            attributes.update({a["AttributeName"]: a for a in AttributeDefinitions or []})
+            definition["AttributeDefinitions"] = list(attributes.values())
+            indexes = {index["IndexName"]: index for index in definition.get("GlobalSecondaryIndexes", [])}
+            created = []
+            for update in GlobalSecondaryIndexUpdates or []:
+                if "Create" in update:
+                    index = update["Create"]
+                    if index["IndexName"] in indexes:
+                        raise _client_error("ValidationException", f"Index already exists: {index['IndexName']}", "UpdateTable")
+                    indexes[index["IndexName"]] = {k: v for k, v in index.items() if k in ("IndexName", "KeySchema", "Projection")}
+                    created.append(index["IndexName"])
+                elif "Delete" in update:
+                    name = update["Delete"]["IndexName"]
+                    indexes.pop(name, None)
+                    conn.execute("DELETE FROM index_entries WHERE table_name = ? AND index_name = ?", (TableName, name))
+            definition["GlobalSecondaryIndexes"] = list(indexes.values())
+            conn.execute("UPDATE dynamo_tables SET definition = ? WHERE name = ?", (json.dumps(definition), TableName))
+            updated = _TableDefinition(definition)
+            for index_name in created:
+                self._resource._reindex(conn, updated, index_name)
+        return {"TableDescription": self.describe_table(TableName)["Table"]}
+
+    def update_time_to_live(self, TableName: str, TimeToLiveSpecification: Dict[str, Any], **_) -> Dict[str, Any]:
+        with self._resource._transaction() as conn:
+            definition = dict(self._resource._definition(TableName, "UpdateTimeToLive").raw)
+            if TimeToLiveSpecification.get("Enabled"):
+                if definition.get("TimeToLiveAttribute"):
+                    raise _client_error("ValidationException", "TimeToLive is already enabled", "UpdateTimeToLive")
+                definition["TimeToLiveAttribute"] = TimeToLiveSpecification["AttributeName"]
+            else:
+                definition.pop("TimeToLiveAttribute", None)
+            conn.execute("UPDATE dynamo_tables SET definition = ? WHERE name = ?", (json.dumps(definition), TableName))
+            attribute = definition.get("TimeToLiveAttribute")
+            if attribute:
+                # Existing items get their expiry column filled in
+                for hash_key, range_key, data in conn.execute(
+                        "SELECT hash_key, range_key, data FROM items WHERE table_name = ?", (TableName,)).fetchall():
+                    value = _load(data).get(attribute)
+                    if isinstance(value, Decimal):
+                        conn.execute(
+                            "UPDATE items SET expires_at = ? WHERE table_name = ? AND hash_key = ? AND range_key = ?",
+                            (float(value), TableName, hash_key, range_key)
+                        )
+        return {"TimeToLiveSpecification": TimeToLiveSpecification}
+
+    def describe_time_to_live(self, TableName: str, **_) -> Dict[str, Any]:
+        attribute = self._resource._definition(TableName, "DescribeTimeToLive").raw.get("TimeToLiveAttribute")
+        if not attribute:
+            return {"TimeToLiveDescription": {"TimeToLiveStatus": "DISABLED"}}
+        return {"TimeToLiveDescription": {"TimeToLiveStatus": "ENABLED", "AttributeName": attribute}}
+
+    def get_waiter(self, name: str) -> _Waiter:
+        if name not in ("table_exists", "table_not_exists"):
+            raise ValueError(f"Waiter {name} is not supported by the SQLite backend")
+        return _Waiter(self, name == "table_exists")
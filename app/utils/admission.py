@@ -0,0 +1,233 @@
+# app/utils/admission.py
+import asyncio
+import bisect
+import itertools
+import math
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.responses import JSONResponse
+
+# (route, method, path pattern, class, route concurrency cap); the first match wins, unmatched
+# requests are 'interactive' for GET and 'write' otherwise, capped by their class only. Bulk
+# requests scan tables or fan out to many recipients; each route gets only part of the bulk
+# cap, so a burst on one of them cannot hold every bulk slot.
+ROUTES: List[Tuple[str, str, str, str, int]] = [
+    ("POST /users/send_email", "POST", r"^/users/send_email/?$", "bulk", 1),
+    ("POST /users/", "POST", r"^/users/?$", "bulk", 3),  # filter (Query/Scan)
+    ("GET /users/?ids=", "GET", r"^/users/?$", "bulk", 3),  # batch read, unbounded
+    ("POST /users/count", "POST", r"^/users/count/?$", "bulk", 2),
+    ("GET /users/events_and_role", "GET", r"^/users/events_and_role/?$", "bulk", 2),
+    ("POST /campaigns/", "POST", r"^/campaigns/?$", "bulk", 1),
+    ("GET /events/?ids=", "GET", r"^/events/?$", "bulk", 3),  # batch read, unbounded
+    ("POST /events/{event_id}/roster", "POST", r"^/events/[^/]+/roster/?$", "bulk", 2),
+]
+# Never queued or shed, so operators can still see what the worker is doing under load
+EXEMPT_PATHS = re.compile(r"^/(metrics(/.*)?|docs.*|redoc.*|openapi\.json)?$")
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class PriorityClass:
+    """A class of requests with its own priority (lower is served first), concurrency cap and wait queue."""
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int,
+                 queue_timeout_seconds: float, adaptive: bool = True):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.adaptive = adaptive  # Whether its latencies drive the shared limit
+        self.in_flight = 0
+        self.queued = 0
+        self.stats = {"admitted": 0, "waited": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+class Route:
+    """A route listed in ROUTES, with its own concurrency cap inside its class's."""
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.queued = 0
+
+class AdmissionController:
+    """
+    Per-worker admission control. Requests share one concurrency limit, adapted
+    from observed latency (additive increase while the limit is in use and
+    latency is under target, multiplicative decrease when it is over), each
+    priority class has its own cap, and each route listed in ROUTES has a cap
+    within its class's. Requests that cannot start wait in a
+    bounded queue, served in priority order; a full queue or a wait longer than
+    the class's timeout is rejected at once with 503 and Retry-After, so clients
+    back off instead of timing out together. Runs on the event loop only.
+    """
+    def __init__(self, classes: List[PriorityClass], initial_limit: int, min_limit: int, max_limit: int,
+                 target_latency_seconds: float, window: int = 20):
+        self.classes = {cls.name: cls for cls in classes}
+        self.routes = [(method, re.compile(pattern), self.classes[class_name], Route(name, max_concurrency))
+                       for name, method, pattern, class_name, max_concurrency in ROUTES]
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency_seconds = target_latency_seconds
+        self.window = window
+        self.in_flight = 0
+        self._waiters: List[tuple] = []  # sorted (priority, seq, future, class, route)
+        self._seq = itertools.count()
+        self._samples: List[float] = []
+        self._saturated = False
+        self._last_latency: Optional[float] = None
+        self.stats = {"limit_increases": 0, "limit_decreases": 0}
+
+    def classify(self, method: str, path: str) -> Tuple[Optional[PriorityClass], Optional[Route]]:
+        """The request's class and listed route (None for unlisted routes); (None, None) when exempt."""
+        if EXEMPT_PATHS.match(path):
+            return None, None
+        for rule_method, pattern, cls, route in self.routes:
+            if method == rule_method and pattern.match(path):
+                return cls, route
+        return self.classes["interactive" if method in ("GET", "HEAD") else "write"], None
+
+    @staticmethod
+    def _capped(cls: PriorityClass, route: Optional[Route]) -> bool:
+        return cls.in_flight >= cls.max_concurrency or (route is not None and route.in_flight >= route.max_concurrency)
+
+    def _has_room(self, cls: PriorityClass, route: Optional[Route]) -> bool:
+        return self.in_flight < int(self.limit) and not self._capped(cls, route)
+
+    def _admit(self, cls: PriorityClass, route: Optional[Route]) -> None:
+        self.in_flight += 1
+        cls.in_flight += 1
+        cls.stats["admitted"] += 1
+        if route is not None:
+            route.in_flight += 1
+        if self.in_flight >= int(self.limit):
+            self._saturated = True
+
+    def _retry_after(self) -> int:
+        # Rough time to drain the queue at the current limit and latency
+        latency = self._last_latency or self.target_latency_seconds
+        return max(1, math.ceil((len(self._waiters) + 1) * latency / max(int(self.limit), 1)))
+
+    async def acquire(self, cls: PriorityClass, route: Optional[Route] = None) -> None:
+        # Queued requests of the same or higher priority go first, unless their own class or route is capped
+        waiting_ahead = any(priority <= cls.priority and not self._capped(waiter_cls, waiter_route)
+                            for priority, _, _, waiter_cls, waiter_route in self._waiters)
+        if not waiting_ahead and self._has_room(cls, route):
+            self._admit(cls, route)
+            return
+        self._saturated = True
+        if cls.queued >= cls.max_queue:
+            cls.stats["rejected_queue_full"] += 1
+            raise Overloaded(f"Too many queued '{cls.name}' requests.", self._retry_after())
+        future = asyncio.get_running_loop().create_future()
+        waiter = (cls.priority, next(self._seq), future, cls, route)
+        bisect.insort(self._waiters, waiter)
+        cls.queued += 1
+        if route is not None:
+            route.queued += 1
+        cls.stats["waited"] += 1
+        try:
+            await asyncio.wait({future}, timeout=cls.queue_timeout_seconds)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(cls, route=route)  # Admitted just as the client went away
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+                self._waiters.remove(waiter)
+                cls.queued -= 1
+                if route is not None:
+                    route.queued -= 1
+        if future.cancelled():
+            cls.stats["rejected_timeout"] += 1
+            raise Overloaded(f"Timed out waiting to start a '{cls.name}' request.", self._retry_after())
+
+    def release(self, cls: PriorityClass, latency_seconds: Optional[float] = None, route: Optional[Route] = None) -> None:
+        self.in_flight -= 1
+        cls.in_flight -= 1
+        if route is not None:
+            route.in_flight -= 1
+        if cls.adaptive and latency_seconds is not None:
+            self._record(latency_seconds)
+        self._wake()
+
+    def _record(self, latency_seconds: float) -> None:
+        self._samples.append(latency_seconds)
+        if len(self._samples) < self.window:
+            return
+        average = sum(self._samples) / len(self._samples)
+        self._samples = []
+        self._last_latency = average
+        if average > self.target_latency_seconds:
+            if self.limit > self.min_limit:
+                self.limit = max(float(self.min_limit), self.limit * 0.9)
+                self.stats["limit_decreases"] += 1
+        elif self._saturated and self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1)
+            self.stats["limit_increases"] += 1
+        self._saturated = False
+
+    def _wake(self) -> None:
+        """Starts queued requests in priority order while there is room; a capped class or route does not block others."""
+        i = 0
+        while i < len(self._waiters) and self.in_flight < int(self.limit):
+            _, _, future, cls, route = self._waiters[i]
+            if self._capped(cls, route):
+                i += 1
+                continue
+            del self._waiters[i]
+            cls.queued -= 1
+            if route is not None:
+                route.queued -= 1
+            self._admit(cls, route)
+            future.set_result(None)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "recent_latency_ms": round(self._last_latency * 1000, 1) if self._last_latency is not None else None,
+            **self.stats,
+            "classes": {
+                name: {"priority": cls.priority, "max_concurrency": cls.max_concurrency, "in_flight": cls.in_flight,
+                       "queued": cls.queued, **cls.stats}
+                for name, cls in self.classes.items()
+            },
+            "routes": {
+                route.name: {"max_concurrency": route.max_concurrency, "in_flight": route.in_flight, "queued": route.queued}
+                for _, _, _, route in self.routes
+            },
+        }
+
+class AdmissionMiddleware:
+    """ASGI middleware that holds each request's admission slot until its response (and background tasks) finish."""
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cls, route = self.controller.classify(scope["method"], scope["path"])
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.controller.acquire(cls, route)
+        except Overloaded as e:
+            response = JSONResponse({"detail": f"Service overloaded: {e.reason}"}, status_code=503,
+                                    headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls, time.monotonic() - started, route)
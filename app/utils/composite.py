@@ -0,0 +1,46 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from app.core.config import COMPOSITE_MAX_WORKERS
+
+# Shared by every composite request so a slow backend cannot spawn unbounded threads
+_executor = ThreadPoolExecutor(max_workers=COMPOSITE_MAX_WORKERS, thread_name_prefix="composite")
+
+async def gather_parts(parts: Dict[str, Callable[[], Any]], timeout_seconds: float) -> Tuple[Dict[str, Any], Dict[str, BaseException]]:
+    """
+    Runs blocking repository calls concurrently, each with its own deadline.
+    Returns (results, errors) keyed by part name; a part that timed out or raised
+    appears only in `errors`. A timed-out call keeps its worker thread until
+    DynamoDB answers, but the response no longer waits for it.
+    """
+    loop = asyncio.get_running_loop()
+    names = list(parts)
+    # Each part runs in a copy of the request's context, as run_in_threadpool does
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(loop.run_in_executor(_executor, contextvars.copy_context().run, parts[name]), timeout_seconds)
+          for name in names),
+        return_exceptions=True
+    )
+    results, errors = {}, {}
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[name] = outcome
+        else:
+            results[name] = outcome
+    return results, errors
+
+def describe_part_error(error: BaseException) -> str:
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, ClientError):
+        return f"Database error: {error.response['Error']['Message']}"
+    return str(error) or type(error).__name__
+
+def raise_for_part(name: str, error: BaseException) -> None:
+    """Fails the request when a part the response cannot do without is missing."""
+    if isinstance(error, asyncio.TimeoutError):
+        raise HTTPException(status_code=504, detail=f"Timed out reading {name}.")
+    raise HTTPException(status_code=500, detail=describe_part_error(error))
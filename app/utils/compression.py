@@ -0,0 +1,106 @@
+# app/utils/compression.py
+import zlib
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from app.utils.etag import coding_etag
+
+try:
+    import brotli
+except ImportError:  # Optional; without it responses are gzip-compressed only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Picks 'br' or 'gzip' from an Accept-Encoding header (q-values honoured, br preferred on ties)."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding.strip().lower()] = weight
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(available, key=lambda coding: weights.get(coding, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+class _Compressor:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self.compress, self.flush = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+            self.compress, self.flush = self._compressor.compress, self._compressor.flush
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses JSON and text responses of at least
+    `minimum_size` bytes with the coding the client prefers (brotli when
+    installed, else gzip). A compressed response gets its own strong ETag
+    (`"abc"` -> `"abc-gzip"`), since its bytes differ from the uncompressed one;
+    If-None-Match accepts either. Streamed responses are compressed chunk by chunk.
+    """
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        coding = negotiate(request_headers.get("accept-encoding", ""))
+        start_message = None
+        compressor: Optional[_Compressor] = None
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None:  # Body already started passing through
+                if compressor is not None:
+                    message = dict(message, body=compressor.compress(message.get("body", b"")))
+                    if not message.get("more_body", False):
+                        message["body"] += compressor.flush()
+                await send(message)
+                return
+            initial, start_message = start_message, None
+            headers = MutableHeaders(raw=list(initial["headers"]))
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            compressible = headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if initial["status"] == 304 and coding and "etag" in headers:
+                # Echo the validator the client holds for the encoded representation
+                encoded = coding_etag(headers["etag"], coding)
+                if encoded in request_headers.get("if-none-match", ""):
+                    headers["etag"] = encoded
+            if (not compressible or coding is None or "content-encoding" in headers
+                    or initial["status"] < 200 or initial["status"] in (204, 304)
+                    or (not more_body and len(body) < self.minimum_size)):
+                await send(dict(initial, headers=headers.raw))
+                await send(message)
+                return
+            compressor = _Compressor(coding, self.gzip_level, self.brotli_quality)
+            body = compressor.compress(body)
+            if more_body:
+                del headers["content-length"]
+            else:
+                body += compressor.flush()
+                headers["content-length"] = str(len(body))
+            headers["content-encoding"] = "br" if coding == "br" else "gzip"
+            if "etag" in headers:
+                headers["etag"] = coding_etag(headers["etag"], coding)
+            await send(dict(initial, headers=headers.raw))
+            await send(dict(message, body=body))
+
+        await self.app(scope, receive, send_compressed)
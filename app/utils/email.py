@@ -6,24 +6,58 @@ from email.mime.multipart import MIMEMultipart
 from app.core.config import GMAIL_SMTP_SERVER, GMAIL_SMTP_PORT, GMAIL_USERNAME, GMAIL_PASSWORD
 from app.repositories.email_logs_repository import EmailLogsRepository
 
-# Gmail SMTP sender using credentials from .env
-def send_email(to_email: str, subject: str, body: str, from_email: str = None):
-    if not from_email:
-        from_email = GMAIL_USERNAME
-    msg = MIMEMultipart()
-    msg['From'] = from_email
-    msg['To'] = to_email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-
-    email_logs_repo = EmailLogsRepository()
-    email_id = str(uuid.uuid4())
-    try:
-        with smtplib.SMTP(GMAIL_SMTP_SERVER, GMAIL_SMTP_PORT) as server:
+class EmailSender:
+    """
+    Gmail SMTP sender that keeps one authenticated session open across messages.
+    The session is (re)opened lazily, so a dropped connection only costs the
+    message that hit it. Use as a context manager to close the session.
+    """
+    def __init__(self, email_logs_repo: EmailLogsRepository = None):
+        self.email_logs_repo = email_logs_repo or EmailLogsRepository()
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._server is None:
+            server = smtplib.SMTP(GMAIL_SMTP_SERVER, GMAIL_SMTP_PORT)
             server.starttls()
             server.login(GMAIL_USERNAME, GMAIL_PASSWORD)
-            server.sendmail(from_email, to_email, msg.as_string())
-        email_logs_repo.log_email_status(email_id, to_email, "sent")
-    except Exception as e:
-        email_logs_repo.log_email_status(email_id, to_email, f"failed: {e}")
-        raise RuntimeError(f"Failed to send email: {e}")
+            self._server = server
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def send(self, to_email: str, subject: str, body: str, from_email: str = None):
+        if not from_email:
+            from_email = GMAIL_USERNAME
+        msg = MIMEMultipart()
+        msg['From'] = from_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        email_id = str(uuid.uuid4())
+        try:
+            self._connect().sendmail(from_email, to_email, msg.as_string())
+            self.email_logs_repo.log_email_status(email_id, to_email, "sent")
+        except Exception as e:
+            # Drop the session so the next message starts from a fresh connection
+            self.close()
+            self.email_logs_repo.log_email_status(email_id, to_email, "failed", error=str(e))
+            raise RuntimeError(f"Failed to send email: {e}")
+
+# Gmail SMTP sender using credentials from .env
+def send_email(to_email: str, subject: str, body: str, from_email: str = None):
+    with EmailSender() as sender:
+        sender.send(to_email, subject, body, from_email)
\ No newline at end of file
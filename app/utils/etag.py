@@ -0,0 +1,49 @@
+import hashlib
+import json
+from typing import Any
+from fastapi import Request, Response
+from app.core.config import API_VERSION
+
+# Content-codings whose representations get their own ETag (see app/utils/compression.py)
+CODING_SUFFIXES = ("-gzip", "-br")
+
+def make_etag(*parts: Any) -> str:
+    """
+    Strong ETag from a hash of the data a response is built from: an item's id and
+    version, or the raw items of a list, plus anything else that shapes the body
+    (such as `fields`). Hashing the items is much cheaper than validating and
+    rendering them, so a 304 skips both. API_VERSION is included so a release that
+    changes the output does not revalidate stale bodies.
+    """
+    payload = json.dumps([API_VERSION, parts], sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()}"'
+
+def coding_etag(etag: str, coding: str) -> str:
+    """The ETag of the `coding`-encoded representation: `"abc"` -> `"abc-gzip"`."""
+    return f'{etag[:-1]}-{coding}"' if etag.endswith('"') else etag
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in CODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return f'{tag[:-len(suffix) - 1]}"'
+    return tag
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names this representation (any content-coding of it)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_opaque_tag(tag) == etag for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+def with_etag(result: Any, response: Response, etag: str) -> Any:
+    """Sets the ETag on a returned Response, or on the injected `response` for models FastAPI serializes."""
+    (result if isinstance(result, Response) else response).headers["ETag"] = etag
+    return result
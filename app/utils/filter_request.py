@@ -1,12 +1,27 @@
-from typing import Optional, Dict
-from pydantic import BaseModel
+from typing import Optional, Dict, List, Union, Literal
+from pydantic import BaseModel, root_validator
 
 class FilterQueryRequest(BaseModel):
     class Filter(BaseModel):
         field: str
-        value: str
+        value: Union[str, List[str]]
+        # 'contains' keeps the historical substring behaviour; 'in' takes a list, 'between' takes [low, high]
+        op: Literal["eq", "begins_with", "contains", "in", "between", "gt", "gte", "lt", "lte"] = "contains"
+
+        @root_validator(skip_on_failure=True)
+        def check_value_shape(cls, values):
+            op, value = values.get("op"), values.get("value")
+            if op == "in" and not (isinstance(value, list) and value):
+                raise ValueError("'in' filters need a non-empty list of values")
+            if op == "between" and not (isinstance(value, list) and len(value) == 2):
+                raise ValueError("'between' filters need a [low, high] pair")
+            if op not in ("in", "between") and not isinstance(value, str):
+                raise ValueError(f"'{op}' filters need a single string value")
+            return values
     filter: list[Filter]
     limit: int = 10
     exclusive_start_key: Optional[Dict] = None
     sort_by: Optional[str] = None  # Field to sort by, e.g. 'first_name', 'email'
-    sort_order: Optional[str] = "asc"  # 'asc' or 'desc' (default: ascending)
\ No newline at end of file
+    sort_order: Optional[str] = "asc"  # 'asc' or 'desc' (default: ascending)
+    fields: Optional[List[str]] = None  # Attributes to return, e.g. ['user_id', 'email'] (default: all)
+    explain: bool = False  # Return the chosen query plan and its estimated cost instead of running it
@@ -1,16 +1,40 @@
-def paginate_dynamodb_response(response: dict, model_class, limit: int) -> dict:
+import base64
+import json
+from typing import Optional
+from app.utils.projection import project_item
+
+def paginate_dynamodb_response(response: dict, model_class, limit: int, fields: list = None) -> dict:
     """
     Converts DynamoDB scan/query response to paginated API response.
     Args:
         response: DynamoDB response dict
         model_class: Pydantic model class to parse items
         limit: page size
+        fields: projected attributes; items are returned as partial dicts when given
     Returns:
         dict with items, last_evaluated_key, and limit
     """
-    items = [model_class(**item) for item in response['items']]
+    if fields:
+        items = [project_item(item, fields) for item in response['items']]
+    else:
+        items = [model_class(**item) for item in response['items']]
     return {
         "items": items,
         "last_evaluated_key": response['last_evaluated_key'],
         "limit": limit
-    }
\ No newline at end of file
+    }
+
+def encode_cursor(cursor: Optional[dict]) -> Optional[str]:
+    """Encodes a repository pagination cursor as an opaque URL-safe string."""
+    if not cursor:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursor, default=str).encode()).decode()
+
+def decode_cursor(token: Optional[str]) -> Optional[dict]:
+    """Decodes a cursor produced by `encode_cursor`; raises ValueError if it is malformed."""
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor.")
\ No newline at end of file
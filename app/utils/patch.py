@@ -0,0 +1,20 @@
+from typing import Any, Dict
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+def patch_changes(patch: BaseModel, model_class) -> Dict[str, Any]:
+    """
+    The attributes a PATCH body actually sent (null meaning remove). Raises a 400
+    for an empty body or for nulls on attributes `model_class` requires.
+    """
+    changes = patch.dict(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No attributes to update.")
+    required_nulls = [name for name, value in changes.items() if value is None and model_class.__fields__[name].required]
+    if required_nulls:
+        raise HTTPException(status_code=400, detail=f"Required attributes cannot be removed: {required_nulls}")
+    return changes
+
+def patch_result(attributes: Dict[str, Any], result_class) -> Dict[str, Any]:
+    """Keeps the returned attributes the PATCH result model exposes (e.g. drops updated_day)."""
+    return {name: value for name, value in attributes.items() if name in result_class.__fields__}
@@ -0,0 +1,318 @@
+# app/utils/profiling.py
+"""
+On-demand profiling of single requests. Nothing here is installed unless
+PROFILING_ENABLED is set (and PROFILING_TOKEN is not empty), so a normal worker
+pays nothing for it.
+
+A request carrying `X-Profile-Token: <PROFILING_TOKEN>` is run under a profiler:
+
+  - sampling (default): a background thread records the stack of the request's
+    threads every PROFILING_SAMPLE_INTERVAL_MS and writes them as folded stacks
+    (`*.folded`), the input of flamegraph.pl, speedscope and inferno;
+  - deterministic (`X-Profile-Mode: deterministic`): cProfile on the event loop
+    thread, written as a pstats file (`*.prof`) for snakeviz or flameprof.
+
+Each profiled request also gets a breakdown of its wall time into repository
+calls (DynamoDB/SQLite round trips, including waits on coalesced reads),
+serialization (response validation and JSON rendering) and everything else
+(request parsing, sorting, counting in Python), returned in a `Server-Timing`
+header and written with the per-operation call counts to `*.json`.
+
+One request is profiled at a time per worker; concurrent requests on the same
+worker can appear in its samples.
+"""
+import asyncio
+import cProfile
+import functools
+import hmac
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger('uvicorn.error')
+
+TOKEN_HEADER = b"x-profile-token"
+MODE_HEADER = b"x-profile-mode"
+MODES = ("sampling", "deterministic")
+BUCKETS = ("repository", "serialization")
+MAX_STACK_DEPTH = 128
+
+# Timings of the request being profiled; None everywhere else
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar("profiling_timings", default=None)
+_instrumented = False
+
+class RequestTimings:
+    """
+    Wall time per bucket for one request. Overlapping calls in a bucket (nested
+    repository methods, parallel composite parts) count once: a bucket's time is
+    the union of the intervals in which at least one of its calls was running.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = {bucket: 0.0 for bucket in BUCKETS}
+        self.calls: Counter = Counter()
+        self.threads = {threading.get_ident()}  # Threads the sampler looks at
+        self._active = {bucket: 0 for bucket in BUCKETS}
+        self._since = {bucket: 0.0 for bucket in BUCKETS}
+        self._lock = threading.Lock()
+
+    def enter(self, bucket: str, name: Optional[str]) -> None:
+        with self._lock:
+            if name:
+                self.calls[name] += 1
+            self.threads.add(threading.get_ident())
+            if self._active[bucket] == 0:
+                self._since[bucket] = time.perf_counter()
+            self._active[bucket] += 1
+
+    def exit(self, bucket: str) -> None:
+        with self._lock:
+            self._active[bucket] -= 1
+            if self._active[bucket] == 0:
+                self.seconds[bucket] += time.perf_counter() - self._since[bucket]
+
+    def thread_ids(self) -> List[int]:
+        with self._lock:
+            return list(self.threads)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Milliseconds per bucket so far, plus 'other' and 'total'."""
+        with self._lock:
+            now = time.perf_counter()
+            ms = {bucket: (self.seconds[bucket] + (now - self._since[bucket] if self._active[bucket] else 0)) * 1000
+                  for bucket in BUCKETS}
+        total = (now - self.started) * 1000
+        ms["other"] = max(0.0, total - sum(ms.values()))
+        ms["total"] = total
+        return {name: round(value, 3) for name, value in ms.items()}
+
+def _timed(fn: Callable, bucket: str, name: str) -> Callable:
+    """Wraps a sync function, coroutine function or generator function to add its time to `bucket`."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return await fn(*args, **kwargs)
+            timings.enter(bucket, name)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                timings.exit(bucket)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(fn):
+        # Only the time spent producing items counts, not the consumer's time between them
+        @functools.wraps(fn)
+        def generator_wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                yield from fn(*args, **kwargs)
+                return
+            generator, step_name = fn(*args, **kwargs), name
+            while True:
+                timings.enter(bucket, step_name)
+                step_name = None
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    timings.exit(bucket)
+                yield item
+        return generator_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return fn(*args, **kwargs)
+        timings.enter(bucket, name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings.exit(bucket)
+    return wrapper
+
+def _subclasses(cls: type):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+def instrument() -> None:
+    """
+    Wraps the public repository methods, the coalesced-read entry points and
+    FastAPI's response serialization with timers. Called once, at app creation,
+    only when profiling is enabled.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+    import fastapi.routing
+    from app.repositories.base_repository import BaseRepository
+    from app.utils.single_flight import SingleFlight
+
+    for cls in [BaseRepository, *_subclasses(BaseRepository)]:
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.isfunction(attr):
+                setattr(cls, name, _timed(attr, "repository", f"{cls.__name__}.{name}"))
+    SingleFlight.run = _timed(SingleFlight.run, "repository", "SingleFlight.run")
+    SingleFlight.call = _timed(SingleFlight.call, "repository", "SingleFlight.call")
+    fastapi.routing.serialize_response = _timed(fastapi.routing.serialize_response, "serialization", None)
+    JSONResponse.render = _timed(JSONResponse.render, "serialization", None)
+    _instrumented = True
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    else:
+        filename = "/".join(filename.split(os.sep)[-2:])
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Records the stacks of the request's threads at a fixed interval as folded-stack counts."""
+    def __init__(self, timings: RequestTimings, interval_seconds: float):
+        self.timings = timings
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        names = {}
+        while not self._stop.wait(self.interval_seconds):
+            frames = sys._current_frames()
+            self.samples += 1
+            for thread_id in self.timings.thread_ids():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                if thread_id not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                labels = []
+                while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame).replace(";", ":"))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def _profile_name(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug[:60]}-{uuid.uuid4().hex[:8]}"
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests presenting the profiling token; others pass straight through."""
+    def __init__(self, app, token: str, directory: str, default_mode: str = "sampling",
+                 sample_interval_seconds: float = 0.005):
+        self.app = app
+        self.token = token.encode()
+        self.directory = directory
+        self.default_mode = default_mode if default_mode in MODES else "sampling"
+        self.sample_interval_seconds = sample_interval_seconds
+        self._busy = False  # Event loop only
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        token = headers.get(TOKEN_HEADER)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+        if not hmac.compare_digest(token, self.token):
+            await JSONResponse({"detail": "Invalid profiling token."}, status_code=403)(scope, receive, send)
+            return
+        mode = headers.get(MODE_HEADER, self.default_mode.encode()).decode().lower()
+        if mode not in MODES:
+            await JSONResponse({"detail": f"X-Profile-Mode must be one of {', '.join(MODES)}."},
+                               status_code=400)(scope, receive, send)
+            return
+        if self._busy:
+            await JSONResponse({"detail": "Another request is being profiled on this worker."},
+                               status_code=409)(scope, receive, send)
+            return
+        self._busy = True
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy = False
+
+    async def _profile(self, scope, receive, send, mode: str) -> None:
+        name = _profile_name(scope["method"], scope["path"])
+        timings = RequestTimings()
+        summary: Dict[str, Any] = {"method": scope["method"], "path": scope["path"], "mode": mode, "id": name}
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                # The body has been rendered by now; later chunks only stream it out
+                breakdown = timings.breakdown()
+                summary.update(status_code=message["status"], breakdown_ms=breakdown)
+                server_timing = ", ".join(f"{bucket};dur={ms}" for bucket, ms in breakdown.items())
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing.encode()), (b"x-profile-id", name.encode())
+                ])
+            await send(message)
+
+        reset = _current.set(timings)
+        profiler = cProfile.Profile() if mode == "deterministic" else StackSampler(timings, self.sample_interval_seconds)
+        if mode == "deterministic":
+            profiler.enable()
+        else:
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            if mode == "deterministic":
+                profiler.disable()
+            else:
+                profiler.stop()
+            _current.reset(reset)
+            summary.update(
+                total_ms=timings.breakdown()["total"],
+                repository_calls=dict(timings.calls.most_common()),
+                samples=getattr(profiler, "samples", None),
+            )
+            await asyncio.get_running_loop().run_in_executor(None, self._write, name, profiler, summary)
+
+    def _write(self, name: str, profiler, summary: Dict[str, Any]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, name)
+            if isinstance(profiler, StackSampler):
+                summary["profile"] = f"{name}.folded"
+                profiler.write(f"{base}.folded")
+            else:
+                summary["profile"] = f"{name}.prof"
+                profiler.dump_stats(f"{base}.prof")
+            with open(f"{base}.json", "w") as f:
+                json.dump(summary, f, indent=2)
+            logger.info(f"Profiled {summary['method']} {summary['path']}: {summary.get('breakdown_ms')} -> {base}")
+        except OSError as e:
+            logger.error(f"Could not write profile {name}: {e}")
@@ -0,0 +1,35 @@
+from typing import Any, List, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+def parse_fields(fields: Optional[Any], model_class) -> Optional[List[str]]:
+    """
+    Normalizes a `fields=` selection (comma-separated string or list) against the
+    attributes of `model_class`. Returns None when no projection was requested.
+    Raises a 400 for attributes the model does not expose.
+    """
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    names = [name.strip() for name in fields if name and name.strip()]
+    unknown = [name for name in names if name not in model_class.__fields__]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields requested: {unknown}")
+    return list(dict.fromkeys(names)) or None
+
+def parse_ids(ids: str) -> List[str]:
+    """Splits a comma-separated `ids=` parameter, dropping blanks and duplicates."""
+    return list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+
+def project_item(item: dict, fields: List[str]) -> dict:
+    """Keeps only the requested fields of a DynamoDB item."""
+    return {name: item[name] for name in fields if name in item}
+
+def projected_response(content: Any) -> JSONResponse:
+    """
+    Returns partial items as-is. Projected items do not satisfy the full response
+    model, so they bypass response_model validation.
+    """
+    return JSONResponse(content=jsonable_encoder(content))
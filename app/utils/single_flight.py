@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads. While a call for a key is in flight,
+    other callers with the same key wait for its result instead of issuing their
+    own request; nothing is cached once the call returns. Async handlers await
+    the shared call on a worker thread, so the event loop keeps serving other
+    requests, and thread callers (e.g. composite endpoint parts) join the same
+    calls. Results are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, max_workers: int, enabled: bool = True):
+        self.enabled = enabled
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="single-flight")
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def key(operation: str, *args) -> tuple:
+        """Builds a hashable key; list arguments such as `fields` become tuples."""
+        return (operation,) + tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args)
+
+    def _join(self, key: tuple) -> Tuple[Future, bool]:
+        with self._lock:
+            stats = self._stats.setdefault(key[0], {"calls": 0, "coalesced": 0})
+            stats["calls"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                stats["coalesced"] += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def _execute(self, key: tuple, future: Future, fn: Callable[[], Any]) -> None:
+        try:
+            result, error = fn(), None
+        except BaseException as e:
+            result, error = None, e
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def call(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        """Blocking variant for code already running on a worker thread."""
+        if not self.enabled:
+            return fn()
+        future, leader = self._join(key)
+        if leader:
+            self._execute(key, future, fn)
+        return future.result()
+
+    async def run(self, key: tuple, fn: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return await asyncio.wrap_future(self._executor.submit(fn))
+        future, leader = self._join(key)
+        if leader:
+            self._executor.submit(self._execute, key, future, fn)
+        # Shielded so a disconnecting client cannot cancel the call other callers are waiting on
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            by_operation = {name: dict(stats) for name, stats in self._stats.items()}
+            in_flight = len(self._in_flight)
+        calls = sum(stats["calls"] for stats in by_operation.values())
+        coalesced = sum(stats["coalesced"] for stats in by_operation.values())
+        return {
+            "enabled": self.enabled,
+            "in_flight": in_flight,
+            "calls": calls,
+            "coalesced": coalesced,
+            "coalesced_ratio": round(coalesced / calls, 4) if calls else 0.0,
+            "by_operation": by_operation,
+        }
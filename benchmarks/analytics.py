@@ -0,0 +1,90 @@
+# benchmarks/analytics.py
+"""
+Benchmark for the analytics aggregation job (app.jobs.analytics).
+
+    python -m benchmarks.analytics [--relations 100000] [--users 10000] [--events 1000] [--segments 1,4,8]
+
+Seeds --users users, --events events and --relations user-event relations into
+an in-memory SQLite store (STORAGE_BACKEND=sqlite), then times `compute()` once
+per scan segment count. It prints the users and relations phases separately,
+relations aggregated per second, and the process' peak RSS.
+
+The request behind the job asked for 10M relation rows. That needs several GB of
+memory as an in-memory store, so point SQLITE_PATH at a file for such runs:
+
+    SQLITE_PATH=/tmp/analytics.sqlite3 python -m benchmarks.analytics --relations 10000000 --users 1000000
+
+Each user holds relations/users relations, to distinct events with a random role,
+so --relations must not exceed --users * --events.
+"""
+import argparse
+import os
+import random
+import resource
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import db_setup
+from app.core.config import USERS_TABLE_NAME, EVENTS_TABLE_NAME, USER_EVENT_RELATIONS_TABLE_NAME
+from app.core.db_connection import db_connection
+from app.jobs.analytics import ROLES, compute
+from app.repositories.user_event_repository import build_relation
+
+def seed(relations: int, users: int, events: int) -> float:
+    """Writes the synthetic tables with batch writers; returns the seconds taken."""
+    started = time.monotonic()
+    rng = random.Random(42)
+    dynamodb = db_connection.dynamodb_resource
+    user_items = [
+        {'user_id': f'u{n}', 'first_name': f'User{n}', 'last_name': f'Last{n}', 'email': f'user{n}@example.com',
+         'job_title': f'Title {n % 40}', 'company': f'Company {n % 500}', 'city': f'City {n % 60}'}
+        for n in range(users)
+    ]
+    event_items = [
+        {'event_id': f'e{n}', 'slug': f'event-{n}', 'title': f'Event Title {n}', 'max_capacity': 1000 + n % 5000}
+        for n in range(events)
+    ]
+    with dynamodb.Table(USERS_TABLE_NAME).batch_writer() as batch:
+        for user in user_items:
+            batch.put_item(Item=user)
+    with dynamodb.Table(EVENTS_TABLE_NAME).batch_writer() as batch:
+        for event in event_items:
+            batch.put_item(Item=event)
+    per_user, extra = divmod(relations, users)
+    with dynamodb.Table(USER_EVENT_RELATIONS_TABLE_NAME).batch_writer() as batch:
+        for n, user in enumerate(user_items):
+            count = per_user + (1 if n < extra else 0)
+            first = rng.randrange(events)
+            for k in range(count):
+                event = event_items[(first + k) % events]
+                batch.put_item(Item=build_relation(user, event, rng.choice(ROLES)))
+    return time.monotonic() - started
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the analytics aggregation on synthetic data.")
+    parser.add_argument("--relations", type=int, default=100000, help="UserEventRelations rows to seed (e.g. 10000000)")
+    parser.add_argument("--users", type=int, default=10000, help="Users to seed")
+    parser.add_argument("--events", type=int, default=1000, help="Events to seed")
+    parser.add_argument("--segments", default="1,4,8", help="Comma-separated scan segment counts to time")
+    args = parser.parse_args()
+    if args.users <= 0 or args.events <= 0 or args.relations > args.users * args.events:
+        parser.error("--relations must not exceed --users * --events (relations to one event are unique per user)")
+
+    db_setup.create_all_tables()
+    seconds = seed(args.relations, args.users, args.events)
+    print(f"Seeded {args.users} users, {args.events} events and {args.relations} relations in {seconds:.1f}s.")
+    print(f"{'segments':>8} {'users s':>9} {'relations s':>12} {'relations/s':>12} {'total s':>9} {'peak RSS MB':>12}")
+    for segments in [int(count) for count in args.segments.split(",")]:
+        started = time.monotonic()
+        stats = compute(segments)
+        total = time.monotonic() - started
+        assert stats["events"]["relations"] == args.relations, stats["events"]["relations"]
+        timings = stats["timings"]
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+        print(f"{segments:>8} {timings['users_seconds']:>9.2f} {timings['relations_seconds']:>12.2f} "
+              f"{timings['relations_per_second'] or 0:>12} {total:>9.2f} {peak_mb:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/conditional_get.py
+"""
+Repeat-poll benchmark for conditional GETs and response compression.
+
+    python -m benchmarks.conditional_get [--attendees 1000] [--events 200] [--polls 50]
+
+Runs the app in-process against an in-memory SQLite store (STORAGE_BACKEND=sqlite),
+seeds one event with --attendees users and one user with --events events, and
+polls GET /events/{id}, GET /events/{id}/users and GET /users/{id}/events:
+
+  full        plain GET, uncompressed (what polling clients do today)
+  compressed  Accept-Encoding: br, gzip
+  revalidate  compressed, with If-None-Match set to the previous ETag (304 while unchanged)
+
+It prints the response body bytes and latency per poll for each. Brotli is used
+when the optional `brotli` package is installed, gzip otherwise.
+"""
+import argparse
+import os
+import statistics
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import db_setup
+from app.core.config import USERS_TABLE_NAME, EVENTS_TABLE_NAME
+from app.core.db_connection import db_connection
+from app.main import create_app
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from starlette.testclient import TestClient
+
+MODES = {
+    "full": {"Accept-Encoding": "identity"},
+    "compressed": {"Accept-Encoding": "br, gzip"},
+    "revalidate": {"Accept-Encoding": "br, gzip"},
+}
+
+def seed(attendees: int, events: int) -> None:
+    """Event e1 gets users u1..u{attendees}; user u1 gets events e1..e{events}."""
+    users_table = db_connection.dynamodb_resource.Table(USERS_TABLE_NAME)
+    events_table = db_connection.dynamodb_resource.Table(EVENTS_TABLE_NAME)
+    users = [
+        {'user_id': f'u{n}', 'first_name': f'User{n}', 'last_name': f'Last{n}', 'email': f'user{n}@example.com',
+         'phone_number': f'+84900{n:06d}', 'job_title': 'Engineer', 'company': f'Company {n % 7}',
+         'city': f'City {n % 5}', 'state': f'State {n % 3}'}
+        for n in range(1, attendees + 1)
+    ]
+    event_items = [
+        {'event_id': f'e{n}', 'slug': f'event-{n}', 'title': f'Event Title {n}', 'description': f'Description for event {n}',
+         'start_at': '2025-10-01T10:00:00Z', 'end_at': '2025-10-01T12:00:00Z', 'venue': f'Venue {n}', 'max_capacity': 5000}
+        for n in range(1, events + 1)
+    ]
+    for user in users:
+        users_table.put_item(Item=user)
+    for event in event_items:
+        events_table.put_item(Item=event)
+    relations = [build_relation(user, event_items[0], "attendee") for user in users]
+    relations += [build_relation(users[0], event, "attendee") for event in event_items[1:]]
+    UserEventRelationsRepository().put_relations(relations)
+
+def poll(client: TestClient, url: str, mode: str, polls: int) -> dict:
+    sizes, seconds, etag, encoding = [], [], None, None
+    for _ in range(polls):
+        headers = dict(MODES[mode])
+        if mode == "revalidate" and etag:
+            headers["If-None-Match"] = etag
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        seconds.append(time.perf_counter() - started)
+        etag = response.headers.get("etag", etag)
+        encoding = encoding or response.headers.get("content-encoding", "identity")  # Of the first, full response
+        sizes.append(int(response.headers.get("content-length", len(response.content))))
+    seconds.sort()
+    return {
+        "bytes": statistics.mean(sizes),
+        "p50_ms": seconds[len(seconds) // 2] * 1000,
+        "p95_ms": seconds[int(len(seconds) * 0.95) - 1] * 1000,
+        "encoding": encoding,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark repeat polls with and without ETags and compression.")
+    parser.add_argument("--attendees", type=int, default=1000, help="Users related to the polled event")
+    parser.add_argument("--events", type=int, default=200, help="Events related to the polled user")
+    parser.add_argument("--polls", type=int, default=50, help="Requests per endpoint and mode")
+    args = parser.parse_args()
+
+    db_setup.create_all_tables()
+    seed(args.attendees, args.events)
+    client = TestClient(create_app())
+    urls = ["/events/e1", "/events/e1/users", "/users/u1/events"]
+    print(f"{'endpoint':<20} {'mode':<11} {'encoding':<9} {'bytes/poll':>11} {'saved':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for url in urls:
+        baseline = None
+        for mode in MODES:
+            result = poll(client, url, mode, args.polls)
+            baseline = baseline or result
+            saved = 1 - result["bytes"] / baseline["bytes"] if baseline["bytes"] else 0.0
+            print(f"{url:<20} {mode:<11} {result['encoding']:<9} {result['bytes']:>11.0f} {saved:>7.1%} "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
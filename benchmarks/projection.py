@@ -0,0 +1,131 @@
+# benchmarks/projection.py
+"""
+Field projection benchmark.
+
+    python -m benchmarks.projection [--attendees 1000] [--events 200] [--polls 50]
+
+Runs the app in-process against an in-memory SQLite store (STORAGE_BACKEND=sqlite),
+seeds one event with --attendees users and one user with --events events, and
+reads each endpoint below with and without `fields`:
+
+  GET  /users/u1                    fields=user_id,email
+  GET  /users/u1/events             fields=event_id,role
+  GET  /events/e1/users             fields=user_id,role
+  POST /users/ (company filter)     fields ["user_id", "email"]
+
+For each it prints the bytes read from the store (the items the repository call
+returns: whole items without `fields`, projected ones with it), the response body
+bytes, and latency per request. Responses are requested uncompressed.
+
+DynamoDB bills a base-table read on the size of the whole item, whatever the
+ProjectionExpression, so the store bytes show what is transferred and
+deserialized, not consumed capacity. Capacity drops where a projected read is
+answered by a GSI with a narrower projection.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import db_setup
+from app.core.config import USERS_TABLE_NAME, EVENTS_TABLE_NAME
+from app.core.db_connection import db_connection
+from app.main import create_app
+from app.repositories.users_repository import UserRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.utils.filter_request import FilterQueryRequest
+from starlette.testclient import TestClient
+
+COMPANY_FILTER = [{"field": "company", "value": "Company 1", "op": "eq"}]
+FILTER_LIMIT = 100
+
+def seed(attendees: int, events: int) -> None:
+    """Event e1 gets users u1..u{attendees}; user u1 gets events e1..e{events}."""
+    users_table = db_connection.dynamodb_resource.Table(USERS_TABLE_NAME)
+    events_table = db_connection.dynamodb_resource.Table(EVENTS_TABLE_NAME)
+    users = [
+        {'user_id': f'u{n}', 'first_name': f'User{n}', 'last_name': f'Last{n}', 'email': f'user{n}@example.com',
+         'phone_number': f'+84900{n:06d}', 'job_title': 'Engineer', 'company': f'Company {n % 7}',
+         'city': f'City {n % 5}', 'state': f'State {n % 3}'}
+        for n in range(1, attendees + 1)
+    ]
+    event_items = [
+        {'event_id': f'e{n}', 'slug': f'event-{n}', 'title': f'Event Title {n}', 'description': f'Description for event {n}',
+         'start_at': '2025-10-01T10:00:00Z', 'end_at': '2025-10-01T12:00:00Z', 'venue': f'Venue {n}', 'max_capacity': 5000}
+        for n in range(1, events + 1)
+    ]
+    for user in users:
+        users_table.put_item(Item=user)
+    for event in event_items:
+        events_table.put_item(Item=event)
+    relations = [build_relation(user, event_items[0], "attendee") for user in users]
+    relations += [build_relation(users[0], event, "attendee") for event in event_items[1:]]
+    UserEventRelationsRepository().put_relations(relations)
+
+def cases():
+    """(label, request(fields) -> (method, url, json body), repository read(fields) -> items, fields)"""
+    users, relations = UserRepository(), UserEventRelationsRepository()
+    return [
+        ("GET /users/u1",
+         lambda f: ("GET", "/users/u1" + (f"?fields={','.join(f)}" if f else ""), None),
+         lambda f: [users.get_user_by_id("u1", fields=f)],
+         ["user_id", "email"]),
+        ("GET /users/u1/events",
+         lambda f: ("GET", "/users/u1/events" + (f"?fields={','.join(f)}" if f else ""), None),
+         lambda f: relations.get_events_for_user("u1", fields=f),
+         ["event_id", "role"]),
+        ("GET /events/e1/users",
+         lambda f: ("GET", "/events/e1/users" + (f"?fields={','.join(f)}" if f else ""), None),
+         lambda f: relations.get_users_for_event("e1", fields=f),
+         ["user_id", "role"]),
+        ("POST /users/",
+         lambda f: ("POST", "/users/", dict({"filter": COMPANY_FILTER, "limit": FILTER_LIMIT}, **({"fields": f} if f else {}))),
+         lambda f: users.get_users_by_filter(
+             [FilterQueryRequest.Filter(**condition) for condition in COMPANY_FILTER], limit=FILTER_LIMIT, fields=f
+         )["items"],
+         ["user_id", "email"]),
+    ]
+
+def measure(client: TestClient, request, read, fields, polls: int) -> dict:
+    method, url, body = request(fields)
+    store_bytes = len(json.dumps(read(fields), default=str))
+    sizes, seconds = [], []
+    for _ in range(polls):
+        started = time.perf_counter()
+        response = client.request(method, url, json=body, headers={"Accept-Encoding": "identity"})
+        seconds.append(time.perf_counter() - started)
+        response.raise_for_status()
+        sizes.append(len(response.content))
+    seconds.sort()
+    return {
+        "store_bytes": store_bytes,
+        "bytes": statistics.mean(sizes),
+        "p50_ms": seconds[len(seconds) // 2] * 1000,
+        "p95_ms": seconds[int(len(seconds) * 0.95) - 1] * 1000,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark payload sizes with and without field projections.")
+    parser.add_argument("--attendees", type=int, default=1000, help="Users related to the read event")
+    parser.add_argument("--events", type=int, default=200, help="Events related to the read user")
+    parser.add_argument("--polls", type=int, default=50, help="Requests per endpoint and mode")
+    args = parser.parse_args()
+
+    db_setup.create_all_tables()
+    seed(args.attendees, args.events)
+    client = TestClient(create_app())
+    print(f"{'endpoint':<22} {'mode':<7} {'store bytes':>12} {'saved':>7} {'body bytes':>11} {'saved':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, request, read, fields in cases():
+        full = measure(client, request, read, None, args.polls)
+        for mode, result in (("full", full), ("fields", measure(client, request, read, fields, args.polls))):
+            store_saved = 1 - result["store_bytes"] / full["store_bytes"] if full["store_bytes"] else 0.0
+            body_saved = 1 - result["bytes"] / full["bytes"] if full["bytes"] else 0.0
+            print(f"{label:<22} {mode:<7} {result['store_bytes']:>12} {store_saved:>7.1%} {result['bytes']:>11.0f} "
+                  f"{body_saved:>7.1%} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
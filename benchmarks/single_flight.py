@@ -0,0 +1,124 @@
+# benchmarks/single_flight.py
+"""
+Hot-key benchmark for single-flight read coalescing.
+
+    python -m benchmarks.single_flight [--concurrency 200] [--bursts 10] [--read-latency-ms 10] [--attendees 500]
+
+Runs the app in-process against an in-memory SQLite store (STORAGE_BACKEND=sqlite)
+and fires --bursts bursts of --concurrency simultaneous requests for the same
+event at GET /events/e1 and at GET /events/e1/users, first with single-flight
+disabled and then enabled. It prints the repository reads issued per request,
+the coalesced share, latency and wall time per burst.
+
+In-memory SQLite reads take well under a millisecond, so concurrent requests
+rarely overlap. Each repository read is therefore padded with --read-latency-ms
+of sleep to stand in for a DynamoDB round trip. Pass 0 to measure the bare store.
+Admission control is disabled so no request is shed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import threading
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+
+import httpx
+
+import db_setup
+from app.core.config import USERS_TABLE_NAME, EVENTS_TABLE_NAME
+from app.core.db_connection import db_connection
+from app.dependencies import get_event_repo, get_user_event_relations_repo, get_single_flight
+from app.main import create_app
+from app.repositories.user_event_repository import build_relation
+
+URLS = ["/events/e1", "/events/e1/users"]
+
+def seed(attendees: int) -> None:
+    """Event e1 with users u1..u{attendees} as attendees."""
+    users_table = db_connection.dynamodb_resource.Table(USERS_TABLE_NAME)
+    event = {'event_id': 'e1', 'slug': 'event-1', 'title': 'Event Title 1', 'description': 'Description for event 1',
+             'start_at': '2025-10-01T10:00:00Z', 'end_at': '2025-10-01T12:00:00Z', 'venue': 'Venue 1', 'max_capacity': 5000}
+    db_connection.dynamodb_resource.Table(EVENTS_TABLE_NAME).put_item(Item=event)
+    users = [
+        {'user_id': f'u{n}', 'first_name': f'User{n}', 'last_name': f'Last{n}', 'email': f'user{n}@example.com',
+         'company': f'Company {n % 7}', 'city': f'City {n % 5}'}
+        for n in range(1, attendees + 1)
+    ]
+    for user in users:
+        users_table.put_item(Item=user)
+    get_user_event_relations_repo().put_relations([build_relation(user, event, "attendee") for user in users])
+
+class ReadCounter:
+    """Wraps repository read methods on the shared instances: counts calls and adds a fixed latency."""
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, repo, name: str) -> None:
+        read = getattr(repo, name)
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.reads += 1
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds)
+            return read(*args, **kwargs)
+        setattr(repo, name, counted)
+
+async def burst(client: httpx.AsyncClient, url: str, concurrency: int) -> list:
+    async def one() -> float:
+        started = time.perf_counter()
+        response = await client.get(url)
+        response.raise_for_status()
+        return time.perf_counter() - started
+    return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+async def run(url: str, enabled: bool, counter: ReadCounter, args) -> dict:
+    single_flight = get_single_flight()
+    single_flight.enabled = enabled
+    before_metrics, before_reads = single_flight.metrics(), counter.reads
+    seconds, walls = [], []
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for _ in range(args.bursts):
+            started = time.perf_counter()
+            seconds += await burst(client, url, args.concurrency)
+            walls.append(time.perf_counter() - started)
+    after_metrics = single_flight.metrics()
+    requests = args.bursts * args.concurrency
+    seconds.sort()
+    return {
+        "reads_per_request": (counter.reads - before_reads) / requests,
+        "coalesced": (after_metrics["coalesced"] - before_metrics["coalesced"]) / requests,
+        "p50_ms": seconds[len(seconds) // 2] * 1000,
+        "p95_ms": seconds[int(len(seconds) * 0.95) - 1] * 1000,
+        "burst_ms": statistics.mean(walls) * 1000,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent identical reads with and without single-flight.")
+    parser.add_argument("--concurrency", type=int, default=200, help="Simultaneous requests per burst")
+    parser.add_argument("--bursts", type=int, default=10, help="Bursts per endpoint and mode")
+    parser.add_argument("--read-latency-ms", type=float, default=10, help="Emulated DynamoDB latency per repository read")
+    parser.add_argument("--attendees", type=int, default=500, help="Users related to the event")
+    args = parser.parse_args()
+
+    db_setup.create_all_tables()
+    seed(args.attendees)
+    counter = ReadCounter(args.read_latency_ms / 1000)
+    counter.wrap(get_event_repo(), "get_event_by_id")
+    counter.wrap(get_user_event_relations_repo(), "get_users_for_event")
+    print(f"{'endpoint':<18} {'single-flight':<14} {'reads/req':>10} {'coalesced':>10} {'p50 ms':>8} {'p95 ms':>8} {'burst ms':>9}")
+    for url in URLS:
+        for enabled in (False, True):
+            result = asyncio.run(run(url, enabled, counter, args))
+            print(f"{url:<18} {'on' if enabled else 'off':<14} {result['reads_per_request']:>10.3f} "
+                  f"{result['coalesced']:>10.1%} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['burst_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/throughput.py
+"""
+Throughput scaling benchmark for the production server.
+
+    python -m benchmarks.throughput [--workers 1,2,4] [--duration 10] [--connections 64]
+                                    [--client-processes 2] [--users 1000] [--events 200]
+
+Seeds a file-backed SQLite store (STORAGE_BACKEND=sqlite, shared by all workers)
+in a temporary directory, then for each worker count starts
+`gunicorn "app.main:create_app()"` with WEB_CONCURRENCY set accordingly and
+drives it for --duration seconds with --connections keep-alive HTTP/1.1
+connections, spread over --client-processes load generator processes. Each
+connection cycles through GET /users/{id}, GET /events/{id} and
+GET /users/{id}/events for random seeded ids.
+
+It prints requests per second, the speedup over the first worker count, and
+p50/p95 latency. The load generator runs on the same host and competes with the
+workers for CPU, so leave cores free for it (the default worker counts stop at
+cpu_count - client processes) or point --url at a server on another machine.
+Admission control is disabled so requests are never shed.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+def seed(path: str, users: int, events: int) -> None:
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = path
+    import db_setup
+    from app.core.config import USERS_TABLE_NAME, EVENTS_TABLE_NAME
+    from app.core.db_connection import db_connection
+    from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+
+    db_setup.create_all_tables()
+    users_table = db_connection.dynamodb_resource.Table(USERS_TABLE_NAME)
+    events_table = db_connection.dynamodb_resource.Table(EVENTS_TABLE_NAME)
+    user_items = [
+        {'user_id': f'u{n}', 'first_name': f'User{n}', 'last_name': f'Last{n}', 'email': f'user{n}@example.com',
+         'phone_number': f'+84900{n:06d}', 'job_title': 'Engineer', 'company': f'Company {n % 7}',
+         'city': f'City {n % 5}', 'state': f'State {n % 3}'}
+        for n in range(1, users + 1)
+    ]
+    event_items = [
+        {'event_id': f'e{n}', 'slug': f'event-{n}', 'title': f'Event Title {n}', 'description': f'Description for event {n}',
+         'start_at': '2025-10-01T10:00:00Z', 'end_at': '2025-10-01T12:00:00Z', 'venue': f'Venue {n}', 'max_capacity': 5000}
+        for n in range(1, events + 1)
+    ]
+    for user in user_items:
+        users_table.put_item(Item=user)
+    for event in event_items:
+        events_table.put_item(Item=event)
+    # Every user attends 5 events
+    UserEventRelationsRepository().put_relations([
+        build_relation(user, event_items[(n * 5 + k) % events], "attendee")
+        for n, user in enumerate(user_items) for k in range(5)
+    ])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workers: int, port: int, sqlite_path: str) -> subprocess.Popen:
+    env = dict(
+        os.environ, STORAGE_BACKEND="sqlite", SQLITE_PATH=sqlite_path, WEB_CONCURRENCY=str(workers),
+        HOST="127.0.0.1", PORT=str(port), ADMISSION_CONTROL_ENABLED="false",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:create_app()", "--access-logfile", os.devnull, "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/")
+            if connection.getresponse().status == 200:
+                connection.close()
+                time.sleep(1)  # Let every worker finish its startup warmup
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start within 60s")
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+def drive(args) -> tuple:
+    """One load generator process: `connections` threads, each with one keep-alive connection."""
+    import threading
+    base_url, connections, duration, users, events, seed_value = args
+    target = urlsplit(base_url)
+    deadline = time.monotonic() + duration
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def loop(n: int) -> None:
+        rng = random.Random(seed_value * 1000 + n)
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            kind = rng.randrange(3)
+            if kind == 0:
+                path = f"/users/u{rng.randint(1, users)}"
+            elif kind == 1:
+                path = f"/events/e{rng.randint(1, events)}"
+            else:
+                path = f"/users/u{rng.randint(1, users)}/events"
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                response.read()
+                if response.status == 200:
+                    local.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=loop, args=(n,)) for n in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+def measure(base_url: str, args) -> dict:
+    per_process = max(1, args.connections // args.client_processes)
+    jobs = [(base_url, per_process, args.duration, args.users, args.events, n) for n in range(args.client_processes)]
+    started = time.monotonic()
+    with multiprocessing.Pool(args.client_processes) as pool:
+        results = pool.map(drive, jobs)
+    elapsed = time.monotonic() - started
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        "errors": sum(result[1] for result in results),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark request throughput against the number of server workers.")
+    parser.add_argument("--workers", default="", help="Comma-separated worker counts (default: 1, 2, 4, ... up to the free cores)")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per worker count")
+    parser.add_argument("--connections", type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument("--client-processes", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--users", type=int, default=1000, help="Seeded users")
+    parser.add_argument("--events", type=int, default=200, help="Seeded events")
+    parser.add_argument("--url", default="", help="Drive an already running server instead (seed it with the same sizes)")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(count) for count in args.workers.split(",")]
+    else:
+        free_cores = max(1, multiprocessing.cpu_count() - args.client_processes)
+        worker_counts = [count for count in (1, 2, 4, 8, 16, 32, 64) if count <= free_cores]
+
+    print(f"{'workers':>7} {'req/s':>10} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    if args.url:
+        result = measure(args.url, args)
+        print(f"{'-':>7} {result['rps']:>10.0f} {'-':>8} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['errors']:>7}")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_path = os.path.join(directory, "crm.sqlite3")
+        seed(sqlite_path, args.users, args.events)
+        baseline = None
+        for workers in worker_counts:
+            port = free_port()
+            server = start_server(workers, port, sqlite_path)
+            try:
+                result = measure(f"http://127.0.0.1:{port}", args)
+            finally:
+                stop_server(server)
+            baseline = baseline or result["rps"]
+            speedup = result["rps"] / baseline if baseline else 0.0
+            print(f"{workers:>7} {result['rps']:>10.0f} {speedup:>7.2f}x "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
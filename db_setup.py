@@ -1,9 +1,13 @@
 # db_setup.py
+import argparse
 import boto3
-from botocore.exceptions import ClientError
+import logging
 import os
 import random
 from dotenv import load_dotenv
+from app.core.schema import TABLES, MIGRATIONS_TABLE, SINGLE_TABLE, CAMPAIGNS_TABLE
+from app.jobs.migrate import migrate
+from app.repositories.user_event_repository import ROLE_SHARD_ATTRIBUTE, role_shard
 
 # --- Configuration ---
 load_dotenv() # Load env vars here too for setup script
@@ -17,89 +21,40 @@ USERS_TABLE_NAME = os.getenv('USERS_TABLE_NAME', 'Users')
 EVENTS_TABLE_NAME = os.getenv('EVENTS_TABLE_NAME', 'Events')
 USER_EVENT_RELATIONS_TABLE_NAME = os.getenv('USER_EVENT_RELATIONS_TABLE_NAME', 'UserEventRelations')
 EMAIL_LOGS_TABLE_NAME = os.getenv('EMAIL_LOGS_TABLE_NAME', 'EmailLogs')
+SUGGESTIONS_TABLE_NAME = os.getenv('SUGGESTIONS_TABLE_NAME', 'UserSuggestions')
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'dynamodb').lower()
 # --- Boto3 Clients and Resources ---
-dynamodb_client = boto3.client(
-    'dynamodb',
-    region_name=AWS_REGION,
-    endpoint_url=DYNAMODB_ENDPOINT_URL,
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-dynamodb_resource = boto3.resource(
-    'dynamodb',
-    region_name=AWS_REGION,
-    endpoint_url=DYNAMODB_ENDPOINT_URL,
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
-
-# --- Generic Table Creation Function ---
-def create_dynamodb_table(table_name, key_schema, attribute_definitions, global_secondary_indexes=None):
-    try:
-        print(f"Attempting to create table: {table_name}")
-        params = {
-            'TableName': table_name,
-            'KeySchema': key_schema,
-            'AttributeDefinitions': attribute_definitions,
-            'BillingMode': 'PAY_PER_REQUEST'
-        }
-        if global_secondary_indexes:
-            params['GlobalSecondaryIndexes'] = global_secondary_indexes
-
-        response = dynamodb_client.create_table(**params)
-        print(f"Table '{table_name}' creation initiated. Waiting for table to become active...")
-        waiter = dynamodb_client.get_waiter('table_exists')
-        waiter.wait(TableName=table_name)
-        print(f"Table '{table_name}' created successfully and is active.")
-        return response
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceInUseException':
-            print(f"Table '{table_name}' already exists.")
-        else:
-            print(f"Error creating table '{table_name}': {e}")
-            raise
-    except Exception as e:
-        print(f"An unexpected error occurred during table creation: {e}")
-        raise
+if STORAGE_BACKEND == 'sqlite':
+    # Same client/resource calls against the embedded backend (SQLITE_PATH)
+    from app.core.db_connection import db_connection
+    db_connection.initialize()
+    dynamodb_resource = db_connection.dynamodb_resource
+    dynamodb_client = dynamodb_resource.meta.client
+else:
+    dynamodb_client = boto3.client(
+        'dynamodb',
+        region_name=AWS_REGION,
+        endpoint_url=DYNAMODB_ENDPOINT_URL,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    )
+    dynamodb_resource = boto3.resource(
+        'dynamodb',
+        region_name=AWS_REGION,
+        endpoint_url=DYNAMODB_ENDPOINT_URL,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    )
 
-# --- Specific Table Creation Function ---
+# --- Schema ---
 def create_all_tables():
-    print("\n--- Creating All DynamoDB Tables ---")
-    create_dynamodb_table(USERS_TABLE_NAME, [{'AttributeName': 'user_id', 'KeyType': 'HASH'}], [{'AttributeName': 'user_id', 'AttributeType': 'S'}])
-    create_dynamodb_table(EVENTS_TABLE_NAME, [{'AttributeName': 'event_id', 'KeyType': 'HASH'}], [{'AttributeName': 'event_id', 'AttributeType': 'S'}])
-    create_dynamodb_table(EMAIL_LOGS_TABLE_NAME, [{'AttributeName': 'email_id', 'KeyType': 'HASH'}], [{'AttributeName': 'email_id', 'AttributeType': 'S'}])
-    create_dynamodb_table(
-        USER_EVENT_RELATIONS_TABLE_NAME,
-        [{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
-        [
-            {'AttributeName': 'PK', 'AttributeType': 'S'},
-            {'AttributeName': 'SK', 'AttributeType': 'S'},
-            {'AttributeName': 'GSI1_PK', 'AttributeType': 'S'},
-            {'AttributeName': 'GSI1_SK', 'AttributeType': 'S'},
-            {'AttributeName': 'role', 'AttributeType': 'S'},
-            {'AttributeName': 'user_event_id', 'AttributeType': 'S'}
-        ],
-        global_secondary_indexes=[
-            {
-                'IndexName': 'GSI1_PK-GSI1_SK-index',
-                'KeySchema': [
-                    {'AttributeName': 'GSI1_PK', 'KeyType': 'HASH'},
-                    {'AttributeName': 'GSI1_SK', 'KeyType': 'RANGE'}
-                ],
-                'Projection': {'ProjectionType': 'ALL'},
-                'ProvisionedThroughput': {'ReadCapacityUnits': 1, 'WriteCapacityUnits': 1}
-            },
-            {
-                'IndexName': 'role-user_event-index',
-                'KeySchema': [
-                    {'AttributeName': 'role', 'KeyType': 'HASH'},
-                    {'AttributeName': 'user_event_id', 'KeyType': 'RANGE'}
-                ],
-                'Projection': {'ProjectionType': 'ALL'},
-                'ProvisionedThroughput': {'ReadCapacityUnits': 1, 'WriteCapacityUnits': 1}
-            }
-        ]
-    )
+    """Applies pending schema migrations (app.jobs.migrate); a no-op when the schema is current."""
+    print("\n--- Applying Schema Migrations ---")
+    version = migrate()
+    print(f"Schema is at version {version}.")
+
+def is_empty(table_name):
+    return not dynamodb_resource.Table(table_name).scan(Limit=1).get('Items')
 
 # --- Data Insertion Function ---
 def put_sample_data():
@@ -166,6 +121,7 @@ def put_sample_data():
             'user_id': user['user_id'],
             'role': role,
             'user_event_id': f"{user['user_id']}#{event['event_id']}",
+            ROLE_SHARD_ATTRIBUTE: role_shard(role, f"{user['user_id']}#{event['event_id']}"),
             'first_name': user['first_name'],
             'last_name': user['last_name'],
             'phone_number': user['phone_number'],
@@ -198,10 +154,15 @@ def delete_table_if_exists(table_name):
         print(f"Error deleting table {table_name}: {e}")
 
 if __name__ == '__main__':
-    # Drop all tables before creating new ones
-    delete_table_if_exists(USERS_TABLE_NAME)
-    delete_table_if_exists(EVENTS_TABLE_NAME)
-    delete_table_if_exists(USER_EVENT_RELATIONS_TABLE_NAME)
+    parser = argparse.ArgumentParser(description="Apply schema migrations; seed sample data into an empty database.")
+    parser.add_argument("--reset", action="store_true", help="Drop every table first (destroys all data)")
+    parser.add_argument("--no-sample-data", action="store_true", help="Never insert the sample data")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.reset:
+        for table in TABLES + [SINGLE_TABLE, CAMPAIGNS_TABLE, MIGRATIONS_TABLE]:
+            delete_table_if_exists(table.name)
     create_all_tables()
-    put_sample_data()
-    print("\nDynamoDB table setup and data insertion complete.")
\ No newline at end of file
+    if not args.no_sample_data and is_empty(USERS_TABLE_NAME):
+        put_sample_data()
+    print("\nDynamoDB setup complete.")
@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# Production server: gunicorn as process manager, uvicorn workers running the app factory.
+#   gunicorn "app.main:create_app()"
+import multiprocessing
+from app.core.config import SERVER_HOST, SERVER_PORT, WEB_CONCURRENCY, PRELOAD_APP, GRACEFUL_TIMEOUT, STORAGE_BACKEND, SQLITE_PATH
+
+bind = f"{SERVER_HOST}:{SERVER_PORT}"
+# All state that must agree between workers (data, campaign progress and cancel requests) is in the
+# store. Workers keep their own event search index, event catalog, count cache and analytics stats,
+# each refreshed from the store within a bounded time, and apply admission limits to their own requests.
+workers = WEB_CONCURRENCY or multiprocessing.cpu_count()
+if STORAGE_BACKEND == "sqlite" and SQLITE_PATH == ":memory:":
+    workers = 1  # Each process would get its own, separate in-memory store
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# With preload the app is imported once in the master and shared copy-on-write;
+# repositories are still created per worker by the startup warmup.
+preload_app = PRELOAD_APP
+
+# On SIGTERM workers stop accepting connections and get this long to finish in-flight requests
+graceful_timeout = GRACEFUL_TIMEOUT
+timeout = max(60, GRACEFUL_TIMEOUT * 2)
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} started; warming up DynamoDB connection and repositories.")
+
+def worker_int(worker):
+    worker.log.info(f"Worker {worker.pid} interrupted; draining in-flight requests.")
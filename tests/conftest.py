@@ -0,0 +1,45 @@
+# tests/conftest.py
+"""
+Tests of the app's repositories, jobs and routes run against the embedded SQLite
+backend, in memory. The settings below must be in place before anything imports
+app.core.config.
+"""
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+import pytest
+
+@pytest.fixture(scope="session")
+def store():
+    """The app's schema, created once per test run."""
+    import db_setup
+    from app.core.db_connection import db_connection
+    db_setup.create_all_tables()
+    return db_connection.dynamodb_resource
+
+@pytest.fixture
+def app_tables(store):
+    """The app's tables, emptied before each test."""
+    from app.core.schema import TABLES, CAMPAIGNS_TABLE, SINGLE_TABLE
+    for spec in TABLES + [CAMPAIGNS_TABLE, SINGLE_TABLE]:
+        table = store.Table(spec.name)
+        key_names = [key['AttributeName'] for key in spec.key_schema]
+        kwargs = {}
+        while True:
+            response = table.scan(**kwargs)
+            with table.batch_writer() as batch:
+                for item in response.get('Items', []):
+                    batch.delete_item(Key={name: item[name] for name in key_names})
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return store
+
+@pytest.fixture
+def client(app_tables):
+    """The API on empty tables. Startup hooks are not run, so no background index refresh."""
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+    return TestClient(create_app())
@@ -0,0 +1,97 @@
+# tests/test_admission.py
+"""
+Admission control: per-route and per-class caps, priority order of the wait
+queue, and 503 + Retry-After when a queue is full or a wait times out.
+"""
+import asyncio
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.testclient import TestClient
+
+from app.utils.admission import AdmissionController, AdmissionMiddleware, Overloaded, PriorityClass
+
+def controller(limit=8, bulk_max=4, queue=4, timeout=1.0):
+    return AdmissionController(
+        [
+            PriorityClass("interactive", 0, limit, queue, timeout),
+            PriorityClass("write", 1, limit, queue, timeout),
+            PriorityClass("bulk", 2, bulk_max, queue, timeout, adaptive=False),
+        ],
+        initial_limit=limit, min_limit=1, max_limit=limit, target_latency_seconds=0.25
+    )
+
+def test_classify():
+    admission = controller()
+    cls, route = admission.classify("POST", "/users/send_email")
+    assert (cls.name, route.name) == ("bulk", "POST /users/send_email")
+    cls, route = admission.classify("POST", "/events/e1/roster")
+    assert (cls.name, route.name) == ("bulk", "POST /events/{event_id}/roster")
+    assert [(cls.name, route) for cls, route in [admission.classify("GET", "/users/u1"), admission.classify("PATCH", "/users/u1")]] == \
+        [("interactive", None), ("write", None)]
+    assert admission.classify("GET", "/metrics/") == (None, None)
+
+def test_a_capped_route_waits_without_blocking_other_bulk_routes():
+    async def scenario():
+        admission = controller()
+        send_email = admission.classify("POST", "/users/send_email")
+        count = admission.classify("POST", "/users/count")
+        await admission.acquire(*send_email)
+        second = asyncio.ensure_future(admission.acquire(*send_email))
+        await asyncio.sleep(0)
+        assert not second.done()
+        await asyncio.wait_for(admission.acquire(*count), 0.1)  # Another bulk route still starts
+        assert admission.metrics()["routes"]["POST /users/send_email"] == {"max_concurrency": 1, "in_flight": 1, "queued": 1}
+
+        admission.release(send_email[0], 0.01, send_email[1])
+        await asyncio.wait_for(second, 0.1)
+        assert send_email[1].in_flight == 1 and send_email[1].queued == 0
+    asyncio.run(scenario())
+
+def test_queued_requests_start_in_priority_order():
+    async def scenario():
+        admission = controller(limit=1)
+        interactive, bulk = admission.classify("GET", "/users/u1"), admission.classify("POST", "/users/")
+        await admission.acquire(*interactive)
+        started = []
+
+        async def request(name, classified):
+            await admission.acquire(*classified)
+            started.append(name)
+        waiting = [asyncio.ensure_future(request("bulk", bulk)), asyncio.ensure_future(request("interactive", interactive))]
+        await asyncio.sleep(0)
+        admission.release(interactive[0], 0.01)
+        await asyncio.sleep(0.01)
+        assert started == ["interactive"]
+        admission.release(interactive[0], 0.01)
+        await asyncio.gather(*waiting)
+        assert started == ["interactive", "bulk"]
+    asyncio.run(scenario())
+
+def test_full_queues_and_long_waits_are_shed():
+    async def scenario():
+        admission = controller(limit=1, queue=1, timeout=0.05)
+        interactive = admission.classify("GET", "/users/u1")
+        await admission.acquire(*interactive)
+        waiting = asyncio.ensure_future(admission.acquire(*interactive))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await admission.acquire(*interactive)
+        assert full.value.retry_after >= 1
+        with pytest.raises(Overloaded, match="Timed out"):
+            await waiting
+        stats = admission.metrics()["classes"]["interactive"]
+        assert (stats["rejected_queue_full"], stats["rejected_timeout"], stats["queued"]) == (1, 1, 0)
+    asyncio.run(scenario())
+
+def test_middleware_answers_503_with_retry_after():
+    admission = controller(limit=1, queue=0, timeout=0.05)
+    app = Starlette()
+    app.add_route("/users/{user_id}", lambda request: PlainTextResponse("ok"))
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+    client = TestClient(app)
+    assert client.get("/users/u1").status_code == 200
+    admission.in_flight = 1  # Saturated by a request still running
+    response = client.get("/users/u1")
+    assert response.status_code == 503 and int(response.headers["Retry-After"]) >= 1
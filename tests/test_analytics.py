@@ -0,0 +1,86 @@
+# tests/test_analytics.py
+"""
+Analytics: parallel-segment aggregation of users and attendance, per-event
+recounts, and `GET /stats/` served from the reloaded statistics file.
+"""
+import os
+
+from app.dependencies import get_stats_store
+from app.jobs import analytics
+from app.jobs.analytics import StatsStore, ValueCounts
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+
+def add_event(event_id, max_capacity):
+    event = {"event_id": event_id, "title": f"Event {event_id}", "slug": event_id, "venue": "Hall A",
+             "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z", "max_capacity": max_capacity}
+    EventRepository().create_event(event)
+    return event
+
+def seed():
+    users = UserRepository()
+    for n in range(12):
+        users.create_user({"user_id": f"u{n:02d}", "first_name": "First", "last_name": f"Last{n:02d}",
+                           "company": "Acme" if n < 8 else "Globex", "city": f"City {n % 2}", "job_title": "Engineer"})
+    e1, e2 = add_event("e1", 10), add_event("e2", 4)
+    relations = [build_relation({"user_id": "u00"}, e1, "host")]
+    relations += [build_relation({"user_id": f"u{n:02d}"}, e1, "attendee") for n in range(1, 6)]
+    relations += [build_relation({"user_id": f"u{n:02d}"}, e2, "attendee") for n in range(6, 8)]
+    UserEventRelationsRepository().put_relations(relations)
+
+def test_value_counts_merge_and_rank():
+    left, right = ValueCounts(), ValueCounts()
+    for value in ["b", "a", "b"]:
+        left.add(value)
+    right.add("a", 3)
+    right.add("c")
+    left.merge(right)
+    assert left.top() == [{"value": "a", "count": 4}, {"value": "b", "count": 2}, {"value": "c", "count": 1}]
+    assert left.top(1) == [{"value": "a", "count": 4}]
+
+def test_compute_merges_every_segment(app_tables):
+    seed()
+    stats = analytics.compute(total_segments=4)
+    assert stats["users"]["total"] == 12
+    assert stats["users"]["by_company"] == [{"value": "Acme", "count": 8}, {"value": "Globex", "count": 4}]
+    assert stats["events"]["total"] == 2 and stats["events"]["relations"] == 8
+    e1, e2 = stats["events"]["attendance"]
+    assert (e1["event_id"], e1["hosts"], e1["attendees"], e1["attendance_rate"]) == ("e1", 1, 5, 0.5)
+    assert (e2["event_id"], e2["attendees"], e2["attendance_rate"]) == ("e2", 2, 0.5)
+
+def test_refresh_events_recounts_only_the_given_events(app_tables):
+    seed()
+    stats = analytics.compute(total_segments=2)
+    e2 = EventRepository().get_event_by_id("e2")
+    UserEventRelationsRepository().put_relations([build_relation({"user_id": f"u{n:02d}"}, e2, "attendee") for n in range(8, 12)])
+    refreshed = analytics.refresh_events(stats, ["e2"])
+    assert [(row["event_id"], row["attendees"]) for row in refreshed["events"]["attendance"]] == [("e2", 6), ("e1", 5)]
+    assert refreshed["events"]["relations"] == 12 and refreshed["updated_at"] is not None
+
+    EventRepository().delete_event("e2")
+    assert [row["event_id"] for row in analytics.refresh_events(refreshed, ["e2"])["events"]["attendance"]] == ["e1"]
+
+def test_store_reloads_only_a_replaced_file(tmp_path):
+    path = str(tmp_path / "stats.json.gz")
+    store = StatsStore(path, check_seconds=0)
+    assert store.get() is None
+    analytics.save({"generated_at": "first"}, path)
+    assert store.get() == {"generated_at": "first"}
+    analytics.save({"generated_at": "second, longer"}, path)
+    os.utime(path, ns=(1, 1))
+    assert store.get()["generated_at"] == "second, longer"
+
+def test_stats_route_truncates_lists(client, tmp_path):
+    store = StatsStore(str(tmp_path / "stats.json.gz"), check_seconds=0)
+    client.app.dependency_overrides[get_stats_store] = lambda: store
+    assert client.get("/stats/").status_code == 404
+
+    analytics.save({
+        "generated_at": "now", "updated_at": None,
+        "users": {"total": 3, "by_city": [{"value": f"City {n}", "count": 1} for n in range(3)]},
+        "events": {"total": 3, "relations": 0, "attendance": [{"event_id": f"e{n}"} for n in range(3)]},
+    }, store.path)
+    body = client.get("/stats/", params={"limit": 2}).json()
+    assert body["users"]["total"] == 3 and len(body["users"]["by_city"]) == 2
+    assert [row["event_id"] for row in body["events"]["attendance"]] == ["e0", "e1"]
@@ -0,0 +1,55 @@
+# tests/test_batch_reads.py
+"""
+Batched reads: multi-id GETs and `expand=event`, answered with BatchGetItem
+in request order, off the event loop.
+"""
+import threading
+
+from app.dependencies import get_event_repo
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+
+def add_user(user_id):
+    UserRepository().create_user({"user_id": user_id, "first_name": "First", "last_name": user_id,
+                                  "phone_number": "+100", "email": f"{user_id}@example.com"})
+
+def add_event(event_id):
+    event = {"event_id": event_id, "title": f"Event {event_id}", "slug": event_id, "venue": "Hall A",
+             "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"}
+    EventRepository().create_event(event)
+    return event
+
+def test_users_by_ids_keep_request_order_across_chunks(client):
+    for n in range(130):
+        add_user(f"u{n:03d}")
+    ids = [f"u{n:03d}" for n in reversed(range(130))]
+    response = client.get("/users/", params={"ids": ",".join(ids[:60] + ["missing"] + ids[60:] + [ids[0]])})
+    assert response.status_code == 200
+    assert [user["user_id"] for user in response.json()] == ids
+
+    projected = client.get("/users/", params={"ids": "u001,u000", "fields": "user_id,email"}).json()
+    assert projected == [{"user_id": "u001", "email": "u001@example.com"}, {"user_id": "u000", "email": "u000@example.com"}]
+
+def test_events_by_ids_and_expand(client):
+    events = [add_event(event_id) for event_id in ("e1", "e2")]
+    assert [event["event_id"] for event in client.get("/events/", params={"ids": "e2,e3,e1"}).json()] == ["e2", "e1"]
+
+    UserEventRelationsRepository().put_relations([build_relation({"user_id": "u1"}, event, "host") for event in events])
+    expanded = client.get("/users/u1/events", params={"expand": "event"}).json()
+    assert [(item["event_id"], item["event"]["title"]) for item in expanded] == [("e1", "Event e1"), ("e2", "Event e2")]
+    assert client.get("/users/u1/events", params={"expand": "venue"}).status_code == 400
+
+def test_batch_gets_run_off_the_event_loop(client):
+    add_event("e1")
+    threads = []
+    repo = EventRepository()
+    get_events_by_ids = repo.get_events_by_ids
+
+    def recording(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return get_events_by_ids(*args, **kwargs)
+    repo.get_events_by_ids = recording
+    client.app.dependency_overrides[get_event_repo] = lambda: repo
+    assert client.get("/events/", params={"ids": "e1"}).status_code == 200
+    assert threads and threads[0].startswith("AnyIO worker thread")
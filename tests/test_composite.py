@@ -0,0 +1,71 @@
+# tests/test_composite.py
+"""
+Composite profile/detail responses: parts read concurrently, each with its own
+timeout; a missing optional part gives a partial response, a missing main part
+fails the request.
+"""
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from app.dependencies import get_user_event_relations_repo, get_user_repo
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+
+USER = {"user_id": "u1", "first_name": "Alice", "last_name": "Smith", "phone_number": "+100", "email": "alice@example.com"}
+EVENT = {"event_id": "e1", "title": "Meetup"}
+
+class SlowRelations:
+    """Relations repository whose reads stall until released, or fail."""
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+
+    def get_events_for_user(self, user_id, fields=None):
+        if self.error:
+            raise self.error
+        self.release.wait(5)
+        return []
+
+def test_parts_are_read_concurrently(client):
+    UserRepository().create_user(dict(USER))
+    UserEventRelationsRepository().put_relations([build_relation(USER, EVENT, "host")])
+    profile = client.get("/users/u1/profile").json()
+    assert profile["partial"] is False and profile["errors"] == {}
+    assert [item["event_id"] for item in profile["events"]] == ["e1"]
+    assert client.get("/users/missing/profile").status_code == 404
+
+def test_slow_events_give_a_partial_profile(client):
+    UserRepository().create_user(dict(USER))
+    slow = SlowRelations()
+    client.app.dependency_overrides[get_user_event_relations_repo] = lambda: slow
+    started = time.monotonic()
+    try:
+        profile = client.get("/users/u1/profile", params={"timeout_ms": 100}).json()
+    finally:
+        slow.release.set()
+    assert time.monotonic() - started < 2
+    assert (profile["user"]["user_id"], profile["events"], profile["partial"]) == ("u1", None, True)
+    assert profile["errors"] == {"events": "timeout"}
+
+def test_failed_events_are_reported_per_part(client):
+    UserRepository().create_user(dict(USER))
+    error = ClientError({"Error": {"Code": "InternalServerError", "Message": "boom"}}, "Query")
+    client.app.dependency_overrides[get_user_event_relations_repo] = lambda: SlowRelations(error)
+    profile = client.get("/users/u1/profile").json()
+    assert profile["partial"] is True and profile["errors"] == {"events": "Database error: boom"}
+
+def test_a_slow_main_part_fails_the_request(client):
+    release = threading.Event()
+
+    class SlowUsers:
+        def get_user_by_id(self, user_id, fields=None):
+            release.wait(5)
+            return dict(USER)
+    client.app.dependency_overrides[get_user_repo] = lambda: SlowUsers()
+    try:
+        response = client.get("/users/u1/profile", params={"timeout_ms": 100})
+    finally:
+        release.set()
+    assert response.status_code == 504
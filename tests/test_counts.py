@@ -0,0 +1,40 @@
+# tests/test_counts.py
+"""
+Count endpoints: Select=COUNT across every page, role filters, and the
+per-worker count cache.
+"""
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+from app.storage import sqlite_backend
+
+def relate(user_ids, event_id, role):
+    event = {"event_id": event_id, "title": event_id}
+    UserEventRelationsRepository().put_relations([build_relation({"user_id": user_id}, event, role) for user_id in user_ids])
+
+def test_relation_counts_span_pages_and_filter_by_role(client, monkeypatch):
+    relate([f"u{n}" for n in range(7)], "count-e1", "attendee")
+    relate(["u0", "u1"], "count-e1", "host")
+    relate(["u0"], "count-e2", "owner")
+    monkeypatch.setattr(sqlite_backend, "MAX_PAGE_BYTES", 1)  # One relation per Query page
+    assert client.get("/events/count-e1/users/count").json() == {"event_id": "count-e1", "role": None, "count": 9}
+    assert client.get("/events/count-e1/users/count", params={"role": "host"}).json()["count"] == 2
+    assert client.get("/users/u0/events/count").json()["count"] == 3
+    assert client.get("/users/u0/events/count", params={"role": "owner"}).json()["count"] == 1
+
+def test_counts_are_cached_until_bypassed(app_tables):
+    repo = UserEventRelationsRepository()
+    relate(["u0"], "count-e3", "attendee")
+    assert repo.count_users_for_event("count-e3") == 1
+    relate(["u1"], "count-e3", "attendee")
+    assert repo.count_users_for_event("count-e3") == 1
+    assert repo.count_users_for_event("count-e3", use_cache=False) == 2
+
+def test_filter_counts_match_the_filtered_items(client):
+    repo = UserRepository()
+    for n in range(12):
+        repo.create_user({"user_id": f"u{n:02d}", "first_name": f"First{n}", "last_name": f"Last{n}",
+                         "city": f"City {n % 4}", "company": "Acme"})
+    body = {"filter": [{"field": "city", "op": "in", "value": ["City 1", "City 2"]}]}
+    assert client.post("/users/count", params={"use_cache": False}, json=body).json() == {"count": 6}
+    body = {"filter": [{"field": "first_name", "op": "contains", "value": "First1"}]}
+    assert client.post("/users/count", params={"use_cache": False}, json=body).json() == {"count": 3}
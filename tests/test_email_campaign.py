@@ -0,0 +1,95 @@
+# tests/test_email_campaign.py
+"""
+Email campaigns: recipient de-duplication, and progress and cancellation shared
+by workers through the Campaigns table.
+"""
+import threading
+import time
+
+from app.jobs import email_campaign
+from app.jobs.email_campaign import Campaign, CampaignRegistry
+from app.models.campaigns import CampaignRequest
+from app.repositories.campaigns_repository import CampaignsRepository
+from app.repositories.users_repository import UserRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository
+
+class RecordingSender:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, to, subject, body):
+        time.sleep(self.delay)
+        self.sent.append((to, subject))
+
+def request(**kwargs):
+    return CampaignRequest(**dict({"event_id": "e1", "subject": "Hi $first_name", "body": "...", "rate_per_second": 100}, **kwargs))
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_each_person_is_sent_to_once(app_tables):
+    store = CampaignsRepository()
+    campaign = Campaign("c1", request(), store)
+    store.create_campaign(campaign.item())
+    sender = RecordingSender()
+    recipients = [
+        {"user_id": "u1", "email": "a@example.com", "first_name": "A", "role": "host"},
+        {"user_id": "u1", "email": "a@example.com", "first_name": "A", "role": "attendee"},
+        {"user_id": "u2", "email": " A@Example.com ", "first_name": "B"},
+        {"user_id": "u3", "email": None},
+        {"user_id": "u4", "email": "d@example.com", "first_name": "D"},
+    ]
+    campaign.run(iter(recipients), lambda: sender)
+    assert sender.sent == [("a@example.com", "Hi A"), ("d@example.com", "Hi D")]
+    stored = store.get_campaign("c1")
+    assert (stored["state"], stored["matched"], stored["sent"], stored["skipped"]) == ("completed", 5, 2, 3)
+
+def test_any_worker_can_poll_and_cancel(app_tables, monkeypatch):
+    monkeypatch.setattr(email_campaign, "CAMPAIGN_CHECK_EVERY", 5)
+    users = [{"user_id": f"u{n}", "email": f"user{n}@example.com", "first_name": f"U{n}"} for n in range(1000)]
+    monkeypatch.setattr(email_campaign, "stream_recipients", lambda *args: iter(users))
+    sender = RecordingSender(delay=0.002)
+    sending, other = CampaignRegistry(CampaignsRepository()), CampaignRegistry(CampaignsRepository())
+
+    started = sending.start(request(), UserRepository(), UserEventRelationsRepository(), lambda: sender)
+    campaign_id = started["campaign_id"]
+    assert wait_for(lambda: (other.get(campaign_id) or {}).get("sent", 0) >= 5)
+    assert other.get(campaign_id)["state"] == "running"
+    assert [status["campaign_id"] for status in other.list()] == [campaign_id]
+
+    cancelled = other.cancel(campaign_id)
+    assert cancelled["cancel_requested"] is True
+    assert wait_for(lambda: other.get(campaign_id)["state"] == "cancelled")
+    final = other.get(campaign_id)
+    assert final["sent"] == len(sender.sent) < len(users)
+    assert final["finished_at"] is not None
+    assert other.get("missing") is None and other.cancel("missing") is None
+
+def test_cancel_on_the_sending_worker_stops_at_once(app_tables, monkeypatch):
+    release = threading.Event()
+
+    def recipients(*args):
+        yield {"user_id": "u1", "email": "a@example.com"}
+        release.wait(5)
+        yield {"user_id": "u2", "email": "b@example.com"}
+    monkeypatch.setattr(email_campaign, "stream_recipients", recipients)
+    registry = CampaignRegistry(CampaignsRepository())
+    sender = RecordingSender()
+    campaign_id = registry.start(request(), None, None, lambda: sender)["campaign_id"]
+    assert wait_for(lambda: len(sender.sent) == 1)
+    registry.cancel(campaign_id)
+    release.set()
+    assert wait_for(lambda: registry.get(campaign_id)["state"] == "cancelled")
+    assert len(sender.sent) == 1
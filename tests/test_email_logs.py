@@ -0,0 +1,71 @@
+# tests/test_email_logs.py
+"""
+Email logs: time-ordered pages that walk the per-day partitions with a cursor,
+status/recipient listings, and the daily archive files.
+"""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.jobs import archive_email_logs
+from app.repositories.email_logs_repository import EmailLogsRepository
+
+def add_logs(days=3, per_day=4):
+    """Logs on the last `days` UTC days, `per_day` each; returns their ids, oldest first."""
+    table = EmailLogsRepository().table
+    today = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    ids = []
+    for day in range(days - 1, -1, -1):
+        for n in range(per_day):
+            sent = today - timedelta(days=day) + timedelta(minutes=n)
+            email_id = f"m{len(ids):02d}"
+            table.put_item(Item={
+                "email_id": email_id, "recipient_email": f"r{n % 2}@example.com", "status": "failed" if n == 0 else "sent",
+                "sent_at": sent.isoformat(timespec="milliseconds").replace("+00:00", "Z"), "log_day": sent.strftime("%Y-%m-%d"),
+            })
+            ids.append(email_id)
+    return ids
+
+def read_pages(client, limit, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        body = client.get("/email_logs/", params=dict(params, limit=limit, **({"cursor": cursor} if cursor else {}))).json()
+        assert len(body["items"]) <= limit
+        seen += [item["email_id"] for item in body["items"]]
+        pages += 1
+        cursor = body.get("next_cursor")
+        if not cursor:
+            return seen, pages
+
+def test_day_walk_pages_cover_every_log_once(client):
+    ids = add_logs()
+    newest_first, pages = read_pages(client, 5)
+    assert newest_first == list(reversed(ids))
+    assert pages == 3
+    oldest_first, _ = read_pages(client, 3, order="asc")
+    assert oldest_first == ids
+
+def test_status_and_recipient_listings(client):
+    ids = add_logs()
+    failed, _ = read_pages(client, 2, status="failed")
+    assert failed == [ids[8], ids[4], ids[0]]
+    sent_to_r1, _ = read_pages(client, 2, recipient_email="r1@example.com", status="sent")
+    assert sent_to_r1 == [ids[11], ids[9], ids[7], ids[5], ids[3], ids[1]]
+
+def test_since_and_until_bound_the_walk(client):
+    ids = add_logs()
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    only_yesterday, _ = read_pages(client, 10, since=f"{yesterday}T00:00:00Z", until=yesterday)
+    assert only_yesterday == list(reversed(ids[4:8]))
+
+def test_bad_cursor_is_a_400(client):
+    assert client.get("/email_logs/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_archive_writes_each_complete_day_once(app_tables, tmp_path):
+    ids = add_logs()
+    archived = archive_email_logs.run(archive_dir=str(tmp_path))
+    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+    with gzip.open(archive_email_logs.archive_path(yesterday, str(tmp_path)), "rt") as f:
+        assert [json.loads(line)["email_id"] for line in f] == ids[4:8]
+    assert yesterday in archived
+    assert archive_email_logs.run(archive_dir=str(tmp_path)) == []
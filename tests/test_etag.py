@@ -0,0 +1,47 @@
+# tests/test_etag.py
+"""
+ETags and conditional GETs: 304 for any content-coding of the current
+representation, and list ETags that cover every page of relations.
+"""
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.storage import sqlite_backend
+
+def add_attendees(event_id, count):
+    event = {"event_id": event_id, "title": "Meetup", "start_at": "2025-01-01T10:00:00Z"}
+    users = [{"user_id": f"u{n:03d}", "first_name": f"First{n}", "email": f"user{n}@example.com"} for n in range(count)]
+    UserEventRelationsRepository().put_relations([build_relation(user, event, "attendee") for user in users])
+
+def test_if_none_match_accepts_compressed_etags(client):
+    add_attendees("e1", 40)
+    plain = client.get("/events/e1/users", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/events/e1/users", headers={"Accept-Encoding": "gzip"})
+    assert plain.status_code == compressed.status_code == 200
+    etag = plain.headers["ETag"]
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == etag[:-1] + '-gzip"'
+
+    for tag in (etag, compressed.headers["ETag"], f'W/{compressed.headers["ETag"]}', f'"other", {etag}'):
+        response = client.get("/events/e1/users", headers={"If-None-Match": tag, "Accept-Encoding": "gzip"})
+        assert response.status_code == 304, tag
+        assert response.content == b""
+    assert client.get("/events/e1/users", headers={"If-None-Match": '"other-gzip"'}).status_code == 200
+
+def test_etag_changes_with_the_relations_and_fields(client):
+    add_attendees("e1", 2)
+    etag = client.get("/events/e1/users").headers["ETag"]
+    assert client.get("/events/e1/users", params={"fields": "user_id"}).headers["ETag"] != etag
+    add_attendees("e1", 3)
+    response = client.get("/events/e1/users", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+def test_relation_lists_cover_every_query_page(client, monkeypatch):
+    add_attendees("e1", 12)
+    monkeypatch.setattr(sqlite_backend, "MAX_PAGE_BYTES", 1)  # One relation per Query page
+    users = client.get("/events/e1/users").json()
+    assert [user["user_id"] for user in users] == [f"u{n:03d}" for n in range(12)]
+    assert len(client.get("/users/u000/events").json()) == 1
+    EventRepository().create_event({"event_id": "e1", "title": "Meetup", "slug": "meetup", "venue": "Hall A",
+                                    "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"})
+    detail = client.get("/events/e1/detail").json()
+    assert len(detail["users"]) == 12 and not detail.get("partial")
@@ -0,0 +1,59 @@
+# tests/test_event_catalog.py
+"""
+Event catalog: a per-worker replica kept current from the version index,
+bounded staleness, and change records applied in version order.
+"""
+import time
+
+from boto3.dynamodb.types import TypeSerializer
+
+from app.repositories.event_catalog import EventCatalog
+from app.repositories.events_repository import EventRepository
+
+def event(event_id, title):
+    return {"event_id": event_id, "title": title, "slug": event_id, "venue": "Hall A",
+            "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"}
+
+def catalog(repo, **kwargs):
+    return EventCatalog(repo, **dict({"refresh_seconds": 1, "max_staleness_seconds": 30, "resync_seconds": 10}, **kwargs))
+
+def test_version_index_feed_replicates_other_workers_writes(app_tables):
+    repo = EventRepository()
+    repo.create_event(event("e1", "Old title"))
+    replica = catalog(repo)
+    assert replica.change_feed == "version_index"  # The SQLite backend has no streams
+    replica.load()
+    assert replica.get("e1")["title"] == "Old title"
+
+    repo.update_event("e1", {"title": "New title"})
+    repo.create_event(event("e2", "Added"))
+    replica.refresh()
+    assert replica.get("e1")["title"] == "New title"
+    assert sorted(item["event_id"] for item in replica.snapshot()) == ["e1", "e2"]
+    assert replica.metrics()["changes_applied"] >= 2
+
+def test_a_stale_replica_is_not_served(app_tables):
+    repo = EventRepository()
+    repo.create_event(event("e1", "Meetup"))
+    replica = catalog(repo, max_staleness_seconds=0.05, resync_seconds=0.05)
+    assert replica.get("e1") is None  # Never loaded
+    replica.load()
+    assert replica.get("e1") is not None
+    time.sleep(0.1)
+    assert replica.get("e1") is None and replica.snapshot() is None
+    assert replica.metrics()["stale_reads"] == 3
+
+def test_older_versions_and_stream_records(app_tables):
+    repo = EventRepository()
+    replica = catalog(repo)
+    replica.load()
+    replica.apply_put(dict(event("e1", "Newer"), updated_at="2025-01-01T00:00:02.000Z"))
+    replica.apply_put(dict(event("e1", "Older"), updated_at="2025-01-01T00:00:01.000Z"))
+    assert replica.get("e1")["title"] == "Newer"
+
+    serialize = lambda item: {name: TypeSerializer().serialize(value) for name, value in item.items()}
+    updated = dict(event("e1", "From stream"), updated_at="2025-01-01T00:00:03.000Z")
+    replica._apply_record({"eventName": "MODIFY", "dynamodb": {"Keys": serialize({"event_id": "e1"}), "NewImage": serialize(updated)}})
+    assert replica.get("e1")["title"] == "From stream"
+    replica._apply_record({"eventName": "REMOVE", "dynamodb": {"Keys": serialize({"event_id": "e1"})}})
+    assert replica.get("e1") is None
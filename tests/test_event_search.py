@@ -0,0 +1,94 @@
+# tests/test_event_search.py
+"""
+BM25 event search: ranking, the MaxScore cut-off, rebuild/journal handling, and
+two workers' indexes kept in step through the Events version index.
+"""
+import time
+
+from app.repositories.events_repository import EventRepository
+from app.search.event_index import EventSearchIndex, EventSearchRefresher
+
+def event(event_id, title, description="", venue="", updated_at=None):
+    item = {"event_id": event_id, "title": title, "slug": event_id, "description": description, "venue": venue}
+    if updated_at:
+        item["updated_at"] = updated_at
+    return item
+
+def ids(results):
+    return [event_id for event_id, _, _ in results]
+
+def test_title_hits_rank_above_description_hits():
+    index = EventSearchIndex()
+    index.add(event("e1", "Evening meetup", description="A python workshop"))
+    index.add(event("e2", "Python workshop"))
+    index.add(event("e3", "Design review"))
+    assert ids(index.search("python workshop")) == ["e2", "e1"]
+    assert ids(index.search("the of and")) == []
+
+def test_max_score_cut_off_returns_the_exact_top_results():
+    index = EventSearchIndex()
+    for n in range(200):
+        index.add(event(f"e{n:03d}", "Community event" + (" kubernetes" if n % 50 == 0 else "")))
+    top = index.search("kubernetes community", limit=3)
+    assert ids(top) == ["e000", "e050", "e100"]
+    exhaustive = EventSearchIndex(max_candidates=10 ** 6)
+    exhaustive.rebuild(event(f"e{n:03d}", "Community event" + (" kubernetes" if n % 50 == 0 else "")) for n in range(200))
+    assert [score for _, score, _ in top] == [score for _, score, _ in exhaustive.search("kubernetes community", limit=3)]
+
+def test_rebuild_keeps_writes_made_while_it_reads():
+    index = EventSearchIndex()
+    index.add(event("e1", "Old title"))
+
+    def events():
+        yield event("e1", "Old title")
+        index.add(event("e2", "Added during rebuild"))
+        index.remove("e1")
+        yield event("e3", "Scanned event")
+    index.rebuild(events())
+    assert sorted(index._doc_terms) == ["e2", "e3"]
+
+def test_older_versions_do_not_replace_newer_ones():
+    index = EventSearchIndex()
+    index.add(event("e1", "Renamed", updated_at="2025-01-01T00:00:02.000Z"))
+    index.add(event("e1", "Original", updated_at="2025-01-01T00:00:01.000Z"))
+    assert ids(index.search("renamed")) == ["e1"]
+    index.remove("e1")
+    index.add(event("e1", "Renamed", updated_at="2025-01-01T00:00:02.000Z"))
+    assert len(index) == 0
+
+def test_snapshot_round_trip(tmp_path):
+    index = EventSearchIndex()
+    index.add(event("e1", "Python workshop", venue="Hanoi", updated_at="2025-01-01T00:00:00.000Z"))
+    path = str(tmp_path / "index.json.gz")
+    index.save(path)
+    restored = EventSearchIndex()
+    restored.restore(path)
+    assert restored.search("hanoi") == index.search("hanoi")
+    assert restored._versions == {"e1": "2025-01-01T00:00:00.000Z"}
+
+def test_second_worker_sees_writes_made_through_the_first(app_tables):
+    repo = EventRepository()
+    workers = [EventSearchRefresher(EventSearchIndex(), repo, refresh_seconds=1, resync_seconds=300) for _ in range(2)]
+    for worker in workers:
+        worker.warm()
+    first, second = workers
+
+    # What the routes do on the first worker
+    created = event("e1", "Serverless summit")
+    repo.create_event(created)
+    first.index.add(created)
+    time.sleep(0.01)
+    updated = repo.update_event("e1", {"title": "Serverless conference"})
+    first.index.add(updated)
+
+    second.refresh()
+    assert ids(second.index.search("conference")) == ["e1"]
+    assert ids(second.index.search("summit")) == []
+
+    # Deletes leave no trace in the version index; the periodic rebuild drops them
+    repo.delete_event("e1")
+    first.index.remove("e1")
+    second.refresh()
+    assert ids(first.index.search("conference")) == []
+    second.rebuild()
+    assert ids(second.index.search("conference")) == []
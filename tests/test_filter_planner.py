@@ -0,0 +1,88 @@
+# tests/test_filter_planner.py
+"""
+Filtered user reads: the planner's choice of access path, and cursors that page
+through several scan segments or query partitions without skipping, repeating
+or over-reading items.
+"""
+from app.repositories.users_repository import UserRepository
+from app.utils.filter_request import FilterQueryRequest
+
+class CountingTable:
+    """Wraps a table to count the items each Query/Scan returns."""
+    def __init__(self, table):
+        self._table = table
+        self.items_read = 0
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def _counted(self, operation, kwargs):
+        response = getattr(self._table, operation)(**kwargs)
+        self.items_read += len(response.get('Items', []))
+        return response
+
+    def scan(self, **kwargs):
+        return self._counted("scan", kwargs)
+
+    def query(self, **kwargs):
+        return self._counted("query", kwargs)
+
+def filters(*specs):
+    return [FilterQueryRequest.Filter(field=field, op=op, value=value) for field, op, value in specs]
+
+def add_users(repo, count):
+    for n in range(count):
+        repo.create_user({"user_id": f"u{n:03d}", "first_name": f"First{n}", "last_name": f"Last{n:03d}",
+                          "city": f"City {n % 3}", "state": "CA", "company": "Acme", "job_title": "Engineer"})
+
+def read_all(repo, filter_list, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = repo.get_users_by_filter(filter_list, limit=limit, exclusive_start_key=cursor)
+        assert len(page["items"]) <= limit
+        seen += [item["user_id"] for item in page["items"]]
+        pages += 1
+        cursor = page["last_evaluated_key"]
+        if not cursor:
+            return seen, pages
+
+def test_scan_segments_are_paged_without_gaps_or_over_reads(app_tables):
+    repo = UserRepository()
+    add_users(repo, 45)
+    plan = repo.plan_filter(filters(("first_name", "contains", "First")))
+    assert plan.is_scan and plan.total_segments > 1
+    repo.table = CountingTable(repo.table)
+    seen, pages = read_all(repo, filters(("first_name", "contains", "First")), limit=10)
+    assert sorted(seen) == [f"u{n:03d}" for n in range(45)]
+    assert repo.table.items_read == 45
+    assert pages <= 6
+
+def test_in_filter_pages_through_each_partition(app_tables):
+    repo = UserRepository()
+    add_users(repo, 30)
+    filter_list = filters(("city", "in", ["City 0", "City 2"]))
+    plan = repo.plan_filter(filter_list)
+    assert (plan.index_name, len(plan.key_conditions)) == ("city-last_name-index", 2)
+    repo.table = CountingTable(repo.table)
+    seen, _ = read_all(repo, filter_list, limit=4)
+    assert sorted(seen) == [f"u{n:03d}" for n in range(30) if n % 3 != 1]
+    assert repo.table.items_read == 20
+
+def test_plain_key_cursor_resumes_a_single_stream_plan(app_tables):
+    repo = UserRepository()
+    add_users(repo, 9)
+    filter_list = filters(("city", "eq", "City 1"))
+    first = repo.get_users_by_filter(filter_list, limit=2)
+    (position,) = first["last_evaluated_key"]["positions"]
+    rest = repo.get_users_by_filter(filter_list, limit=10, exclusive_start_key=position)
+    assert [item["user_id"] for item in first["items"] + rest["items"]] == ["u001", "u004", "u007"]
+    assert rest["last_evaluated_key"] is None
+
+def test_explain_on_a_new_table_still_prefers_the_index(app_tables):
+    repo = UserRepository()
+    plan = repo.plan_filter(filters(("city", "in", ["City 0", "City 1", "City 2"])))
+    explained = plan.explain()
+    assert (explained["operation"], explained["index"]) == ("Query", "city-last_name-index")
+    assert explained["estimated_items_read"] is None and explained["table_item_count"] is None
+    add_users(repo, 3)
+    assert repo.plan_filter(filters(("city", "eq", "City 0"))).explain()["table_item_count"] == 3
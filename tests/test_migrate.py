@@ -0,0 +1,73 @@
+# tests/test_migrate.py
+"""
+Schema migrations: streams and TTL applied to existing tables only when
+missing, and backfills that resume from their checkpoints.
+"""
+import pytest
+
+from app.core.schema import TableSpec
+from app.jobs.migrate import MIGRATIONS, MigrationRunner, SchemaNotApplied
+from app.storage import sqlite_backend
+
+@pytest.fixture
+def runner(store):
+    runner = MigrationRunner(MIGRATIONS, total_segments=2)
+    runner._acquire()
+    created = []
+    yield runner, created
+    runner._release()
+    for name in created:
+        runner.client.delete_table(TableName=name)
+
+def test_current_schema_is_not_migrated_again(store):
+    runner = MigrationRunner(MIGRATIONS)
+    assert runner.run() == runner.latest_version == MIGRATIONS[-1].version
+    assert runner.status()["pending"] == []
+
+def test_stream_and_ttl_are_added_to_an_existing_table(runner):
+    runner, created = runner
+    spec = TableSpec("MigrateStreamTest", "id", stream_view_type="NEW_IMAGE", ttl_attribute="expires_at")
+    runner.client.create_table(**TableSpec("MigrateStreamTest", "id").create_params([]))
+    created.append(spec.name)
+
+    runner.ensure_tables([spec])
+    description = runner.client.describe_table(TableName=spec.name)["Table"]
+    assert description["StreamSpecification"] == {"StreamEnabled": True, "StreamViewType": "NEW_IMAGE"}
+    ttl = runner.client.describe_time_to_live(TableName=spec.name)["TimeToLiveDescription"]
+    assert (ttl["TimeToLiveStatus"], ttl["AttributeName"]) == ("ENABLED", "expires_at")
+    runner.ensure_tables([spec])  # Nothing left to change
+
+def test_ttl_on_another_attribute_is_not_taken_as_enabled(runner):
+    runner, created = runner
+    spec = TableSpec("MigrateTTLTest", "id", ttl_attribute="expires_at")
+    runner.client.create_table(**spec.create_params([]))
+    created.append(spec.name)
+    runner.client.update_time_to_live(TableName=spec.name, TimeToLiveSpecification={"Enabled": True, "AttributeName": "purge_at"})
+    with pytest.raises(SchemaNotApplied):
+        runner.ensure_ttl(spec)
+
+def test_interrupted_backfill_resumes_from_its_checkpoints(runner, monkeypatch):
+    runner, created = runner
+    spec = TableSpec("MigrateBackfillTest", "id")
+    runner.client.create_table(**spec.create_params([]))
+    created.append(spec.name)
+    table = runner.resource.Table(spec.name)
+    for n in range(20):
+        table.put_item(Item={"id": f"i{n:02d}"})
+    monkeypatch.setattr(sqlite_backend, "MAX_PAGE_BYTES", 1)  # One item per Scan page
+
+    handled = []
+
+    def failing(items):
+        if len(handled) == 7:
+            raise RuntimeError("interrupted")
+        handled.extend(item["id"] for item in items)
+    with pytest.raises(RuntimeError):
+        runner.backfill("test-resume", spec.name, failing)
+    first_run = list(handled)
+    assert 0 < len(first_run) < 20
+
+    resumed = runner.backfill("test-resume", spec.name, lambda items: handled.extend(item["id"] for item in items))
+    assert sorted(set(handled)) == [f"i{n:02d}" for n in range(20)]
+    assert resumed <= 20 - len(first_run) + 1  # At most the page that failed is read again
+    assert runner.backfill("test-resume", spec.name, lambda items: handled.extend(items)) == 0
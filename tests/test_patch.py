@@ -0,0 +1,51 @@
+# tests/test_patch.py
+"""
+PATCH semantics: partial updates that bump `version`, 404 instead of an upsert,
+and 409 when `expected_version` is stale.
+"""
+from app.repositories.events_repository import EventRepository
+from app.repositories.users_repository import UserRepository
+
+def add_user(user_id):
+    UserRepository().create_user({"user_id": user_id, "first_name": "First", "last_name": "Last",
+                                  "phone_number": "+100", "email": f"{user_id}@example.com", "city": "Hanoi"})
+
+def test_patch_changes_only_the_sent_attributes(client):
+    add_user("p1")
+    response = client.patch("/users/p1", json={"job_title": "Engineer", "city": None})
+    assert response.status_code == 200
+    assert response.json() == {"user_id": "p1", "job_title": "Engineer", "version": 2}
+    user = UserRepository().get_user_by_id("p1")
+    assert (user["first_name"], user["job_title"], user.get("city"), user["version"]) == ("First", "Engineer", None, 2)
+
+def test_patch_rejects_empty_bodies_and_required_nulls(client):
+    add_user("p2")
+    assert client.patch("/users/p2", json={}).status_code == 400
+    assert client.patch("/users/p2", json={"first_name": None}).status_code == 400
+    assert client.patch("/users/p2", json={"unknown": "x"}).status_code == 422
+
+def test_patch_of_a_missing_item_is_404_and_creates_nothing(client):
+    assert client.patch("/users/nobody", json={"city": "Hue"}).status_code == 404
+    assert UserRepository().get_user_by_id("nobody") is None
+    assert client.patch("/events/nothing", json={"venue": "Hall B"}).status_code == 404
+
+def test_stale_expected_version_is_409(client):
+    add_user("p3")
+    assert client.patch("/users/p3", params={"expected_version": 1}, json={"city": "Hue"}).status_code == 200
+    # A second writer that also read version 1 loses instead of overwriting
+    conflict = client.patch("/users/p3", params={"expected_version": 1}, json={"city": "Hanoi"})
+    assert conflict.status_code == 409 and "version 2, not 1" in conflict.json()["detail"]
+    response = client.patch("/users/p3", params={"expected_version": 2, "return_values": "none"}, json={"city": "Da Nang"})
+    assert response.status_code == 204
+    assert UserRepository().get_user_by_id("p3")["city"] == "Da Nang"
+
+def test_event_patch_reindexes_searchable_changes(client):
+    EventRepository().create_event({"event_id": "pe1", "title": "Old title", "slug": "pe1", "venue": "Hall A",
+                                    "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"})
+    response = client.patch("/events/pe1", params={"expected_version": 1}, json={"title": "Kubernetes night"})
+    assert response.status_code == 200
+    assert (response.json()["title"], response.json()["version"]) == ("Kubernetes night", 2)
+    assert "venue" not in response.json()  # Only the changes come back, although the full image was read
+    assert client.patch("/events/pe1", params={"expected_version": 1}, json={"venue": "Hall B"}).status_code == 409
+    hits = client.get("/events/search", params={"q": "kubernetes"}).json()
+    assert [(hit["event_id"], hit["title"]) for hit in hits] == [("pe1", "Kubernetes night")]
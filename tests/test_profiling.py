@@ -0,0 +1,89 @@
+# tests/test_profiling.py
+"""
+Request profiling: only requests with the right X-Profile-Token are profiled,
+each mode writes its profile and breakdown, and the timers count overlapping
+calls once.
+"""
+import json
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.testclient import TestClient
+
+from app.utils import profiling
+from app.utils.profiling import ProfilingMiddleware, RequestTimings
+
+def slow_lookup():
+    time.sleep(0.02)
+    return "ok"
+
+def profiled_app(directory, **kwargs):
+    lookup = profiling._timed(slow_lookup, "repository", "Repository.lookup")
+    app = Starlette()
+    app.add_route("/users/{user_id}", lambda request: JSONResponse({"value": lookup()}))
+    app.add_route("/plain", lambda request: PlainTextResponse("plain"))
+    middleware = ProfilingMiddleware(app, token="secret", directory=str(directory), sample_interval_seconds=0.001, **kwargs)
+    return middleware, TestClient(middleware)
+
+def server_timing(response):
+    return dict(part.split(";dur=") for part in response.headers["Server-Timing"].split(", "))
+
+def test_requests_without_the_token_are_not_profiled(tmp_path):
+    _, client = profiled_app(tmp_path)
+    response = client.get("/plain")
+    assert response.text == "plain" and "Server-Timing" not in response.headers
+    assert client.get("/plain", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    assert client.get("/plain", headers={"X-Profile-Token": "secret", "X-Profile-Mode": "tracing"}).status_code == 400
+    assert not tmp_path.exists() or list(tmp_path.iterdir()) == []
+
+def test_sampling_writes_folded_stacks_and_a_breakdown(tmp_path):
+    _, client = profiled_app(tmp_path)
+    response = client.get("/users/u1", headers={"X-Profile-Token": "secret"})
+    assert response.json() == {"value": "ok"}
+    timing = server_timing(response)
+    assert set(timing) == {"repository", "serialization", "other", "total"}
+    assert float(timing["repository"]) >= 20
+
+    profile_id = response.headers["X-Profile-Id"]
+    summary = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert (summary["mode"], summary["status_code"], summary["profile"]) == ("sampling", 200, f"{profile_id}.folded")
+    assert summary["repository_calls"] == {"Repository.lookup": 1}
+    assert "slow_lookup" in (tmp_path / f"{profile_id}.folded").read_text()
+
+def test_deterministic_mode_writes_pstats(tmp_path):
+    _, client = profiled_app(tmp_path)
+    response = client.get("/users/u1", headers={"X-Profile-Token": "secret", "X-Profile-Mode": "deterministic"})
+    assert (tmp_path / f"{response.headers['X-Profile-Id']}.prof").stat().st_size > 0
+
+def test_one_request_is_profiled_at_a_time(tmp_path):
+    middleware, client = profiled_app(tmp_path)
+    middleware._busy = True
+    assert client.get("/plain", headers={"X-Profile-Token": "secret"}).status_code == 409
+    assert client.get("/plain").status_code == 200  # Unprofiled requests still pass
+
+def test_overlapping_calls_count_once():
+    timings = RequestTimings()
+    timings.enter("repository", "outer")
+    timings.enter("repository", "inner")
+    time.sleep(0.01)
+    timings.exit("repository")
+    timings.exit("repository")
+    breakdown = timings.breakdown()
+    assert 10 <= breakdown["repository"] <= breakdown["total"]
+    assert timings.calls == {"outer": 1, "inner": 1}
+
+def test_generators_count_only_the_time_producing_items():
+    def produce():
+        yield 1
+        yield 2
+    timed = profiling._timed(produce, "repository", "Repository.produce")
+    timings = RequestTimings()
+    reset = profiling._current.set(timings)
+    try:
+        for _ in timed():
+            time.sleep(0.01)  # The consumer's time
+    finally:
+        profiling._current.reset(reset)
+    assert timings.breakdown()["repository"] < 10
+    assert timings.calls == {"Repository.produce": 1}
@@ -0,0 +1,35 @@
+# tests/test_projection.py
+"""
+Field projection: `fields=` is validated against the response model and pushed
+down to DynamoDB as a ProjectionExpression, reserved words included.
+"""
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+
+USER = {"user_id": "u1", "first_name": "Alice", "last_name": "Smith", "phone_number": "+100",
+        "email": "alice@example.com", "city": "Hanoi", "state": "HN"}
+EVENT = {"event_id": "e1", "title": "Meetup", "slug": "meetup", "venue": "Hall A",
+         "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"}
+
+def test_user_fields_are_read_and_returned_alone(client):
+    UserRepository().create_user(dict(USER))
+    assert client.get("/users/u1", params={"fields": "email,state"}).json() == {"email": "alice@example.com", "state": "HN"}
+    assert UserRepository().get_user_by_id("u1", fields=["state", "city"]) == {"state": "HN", "city": "Hanoi"}
+    assert client.get("/users/u1").json()["first_name"] == "Alice"
+
+def test_unknown_fields_are_rejected(client):
+    UserRepository().create_user(dict(USER))
+    response = client.get("/users/u1", params={"fields": "email,password"})
+    assert response.status_code == 400 and "password" in response.json()["detail"]
+
+def test_event_projection_keeps_the_version_out_of_the_body(client):
+    EventRepository().create_event(dict(EVENT))
+    response = client.get("/events/e1", params={"fields": "title"})
+    assert response.json() == {"title": "Meetup"}
+    assert response.headers["ETag"]
+
+def test_relation_lists_read_only_the_requested_fields(client):
+    UserEventRelationsRepository().put_relations([build_relation(USER, EVENT, "host")])
+    assert client.get("/users/u1/events", params={"fields": "event_id,role"}).json() == [{"event_id": "e1", "role": "host"}]
+    assert client.get("/events/e1/users", params={"fields": "user_id,email"}).json() == [{"user_id": "u1", "email": "alice@example.com"}]
@@ -0,0 +1,111 @@
+# tests/test_role_index.py
+"""
+Write-sharded role index: shard queries merged in user_event_id order across
+every page, the backfill of `role_shard`, and the fallback to the legacy index
+while the sharded one is not ACTIVE (or was just swapped in).
+"""
+import pytest
+
+from app.core.db_connection import db_connection
+from app.jobs import shard_role_index
+from app.repositories import user_event_repository
+from app.repositories.user_event_repository import (
+    UserEventRelationsRepository, ROLE_INDEX_NAME, LEGACY_ROLE_INDEX_NAME, ROLE_SHARD_ATTRIBUTE, build_relation, role_shard
+)
+from app.storage import sqlite_backend
+
+class CachedDescriptionTable:
+    """Keeps the index list of the last reload(), as boto3's Table resource does."""
+    def __init__(self, table):
+        self._table = table
+        self.reloads = 0
+        self.global_secondary_indexes = table.global_secondary_indexes
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def reload(self):
+        self.reloads += 1
+        self.global_secondary_indexes = self._table.global_secondary_indexes
+
+def add_relations(role, user_ids, event_ids):
+    relations = [build_relation({"user_id": user_id}, {"event_id": event_id, "title": event_id}, role)
+                 for user_id in user_ids for event_id in event_ids]
+    UserEventRelationsRepository().put_relations(relations)
+    return relations
+
+@pytest.fixture
+def legacy_index(app_tables):
+    """Puts the relations table back before migration 2: only the legacy role index."""
+    client = db_connection.dynamodb_resource.meta.client
+    table_name = UserEventRelationsRepository().table_name
+    client.update_table(TableName=table_name, GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': ROLE_INDEX_NAME}}])
+    client.update_table(
+        TableName=table_name,
+        AttributeDefinitions=[{'AttributeName': 'role', 'AttributeType': 'S'}],
+        GlobalSecondaryIndexUpdates=[{'Create': {
+            'IndexName': LEGACY_ROLE_INDEX_NAME,
+            'KeySchema': [{'AttributeName': 'role', 'KeyType': 'HASH'}, {'AttributeName': 'user_event_id', 'KeyType': 'RANGE'}],
+            'Projection': {'ProjectionType': 'ALL'}
+        }}]
+    )
+    yield client
+    indexes = {index['IndexName'] for index in client.describe_table(TableName=table_name)['Table'].get('GlobalSecondaryIndexes', [])}
+    if ROLE_INDEX_NAME not in indexes:
+        shard_role_index.create_index()
+    if LEGACY_ROLE_INDEX_NAME in indexes:
+        client.update_table(TableName=table_name, GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': LEGACY_ROLE_INDEX_NAME}}])
+
+def test_shards_are_merged_in_order_across_pages(app_tables, monkeypatch):
+    relations = add_relations("host", [f"h{n:02d}" for n in range(12)], ["ev1", "ev2"])
+    add_relations("attendee", ["a1"], ["ev1"])
+    assert len({relation[ROLE_SHARD_ATTRIBUTE] for relation in relations}) > 1
+    monkeypatch.setattr(sqlite_backend, "MAX_PAGE_BYTES", 1)  # One relation per Query page
+
+    found = UserEventRelationsRepository().get_relations_by_role("host", fields=["user_id"])
+    assert [item["user_event_id"] for item in found] == sorted(relation["user_event_id"] for relation in relations)
+
+def test_users_by_role_and_min_events(app_tables):
+    add_relations("owner", ["o1", "o2"], ["ev1", "ev2", "ev3"])
+    add_relations("owner", ["o3"], ["ev1"])
+    users = UserEventRelationsRepository().get_event_users_by_role_and_min_events("owner", 2)
+    assert [user["user_id"] for user in users] == ["o1", "o2"]
+    assert UserEventRelationsRepository().get_event_users_by_role_and_min_events("owner", 4) == []
+
+def test_backfill_writes_only_missing_or_stale_shards(app_tables):
+    relations = add_relations("host", ["b1", "b2", "b3"], ["ev1"])
+    repo = UserEventRelationsRepository()
+    keys = [{"PK": relation["PK"], "SK": relation["SK"]} for relation in relations]
+    repo.table.update_item(Key=keys[0], UpdateExpression="REMOVE #shard", ExpressionAttributeNames={"#shard": ROLE_SHARD_ATTRIBUTE})
+    repo.table.update_item(Key=keys[1], UpdateExpression="SET #shard = :shard",
+                           ExpressionAttributeNames={"#shard": ROLE_SHARD_ATTRIBUTE}, ExpressionAttributeValues={":shard": "host#99"})
+
+    report = shard_role_index.backfill(total_segments=2)
+    assert (report["written"], report["up_to_date"], report["scanned"]) == (2, 1, 3)
+    for key, relation in zip(keys, relations):
+        assert repo.table.get_item(Key=key)["Item"][ROLE_SHARD_ATTRIBUTE] == role_shard("host", relation["user_event_id"])
+    assert shard_role_index.backfill(total_segments=2)["written"] == 0
+
+def test_legacy_index_is_read_until_the_sharded_one_replaces_it(legacy_index):
+    relations = add_relations("host", ["l1", "l2"], ["ev1"])
+    repo = UserEventRelationsRepository()
+    repo.table = CachedDescriptionTable(repo.table)
+    assert repo._active_role_index() == LEGACY_ROLE_INDEX_NAME
+    assert [item["user_id"] for item in repo.get_relations_by_role("host")] == ["l1", "l2"]
+
+    # Migration 2 finishes: the sharded index is built and the legacy one dropped, but
+    # the repository's table description is still the old one (the re-check is throttled)
+    shard_role_index.create_index()
+    shard_role_index.drop_legacy_index()
+    assert repo.table.reloads == 0
+    found = repo.get_relations_by_role("host")
+    assert [item["user_event_id"] for item in found] == [relation["user_event_id"] for relation in relations]
+    assert repo.table.reloads == 1 and repo._active_role_index() == ROLE_INDEX_NAME
+
+def test_recheck_picks_up_the_sharded_index_without_a_failed_query(legacy_index, monkeypatch):
+    repo = UserEventRelationsRepository()
+    repo.table = CachedDescriptionTable(repo.table)
+    shard_role_index.create_index()
+    assert repo._active_role_index() == LEGACY_ROLE_INDEX_NAME  # Within ROLE_INDEX_RECHECK_SECONDS
+    monkeypatch.setattr(user_event_repository, "ROLE_INDEX_RECHECK_SECONDS", 0)
+    assert repo._active_role_index() == ROLE_INDEX_NAME
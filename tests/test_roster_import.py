@@ -0,0 +1,76 @@
+# tests/test_roster_import.py
+"""
+Roster import: NDJSON and CSV bodies, email resolution, per-row statuses for
+existing, repeated, unknown and invalid rows, and failed writes.
+"""
+import json
+
+from app.jobs.roster_import import RosterParser, import_roster
+from app.repositories.events_repository import EventRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+from app.routers import event_router
+
+def seed(event_id):
+    users = UserRepository()
+    for n in range(4):
+        users.create_user({"user_id": f"r{n}", "first_name": "First", "last_name": f"Last{n}",
+                           "phone_number": "+100", "email": f"r{n}@example.com"})
+    event = {"event_id": event_id, "title": "Roster night", "slug": event_id, "venue": "Hall A",
+             "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"}
+    EventRepository().create_event(event)
+    UserEventRelationsRepository().put_relations([build_relation({"user_id": "r0"}, event, "owner")])
+    return event
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+
+def test_ndjson_rows_get_a_status_each(client):
+    seed("re1")
+    body = ndjson(
+        {"user_id": "r1", "role": "host"},
+        {"user_id": "r0", "role": "attendee"},
+        {"user_id": "r1", "role": "attendee"},
+        {"user_id": "nobody", "role": "attendee"},
+        {"user_id": "r2", "role": "speaker"},
+        "not json",
+        "",
+        {"email": "R3@Example.com", "role": "Attendee"},
+    )
+    response = client.post("/events/re1/roster", data=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    report = response.json()
+    assert [row["status"] for row in report["rows"]] == \
+        ["created", "exists", "duplicate", "user_not_found", "invalid", "invalid", "created"]
+    assert report["rows"][2]["detail"] == "Same user as row 1."
+    assert (report["summary"]["rows"], report["summary"]["created"], report["summary"]["invalid"]) == (7, 2, 2)
+    roles = {item["user_id"]: item["role"] for item in UserEventRelationsRepository().iter_users_for_event("re1")}
+    assert roles == {"r0": "owner", "r1": "host", "r3": "attendee"}
+
+def test_csv_rows_resolve_emails(client):
+    seed("re2")
+    body = "email,role\nr1@example.com,host\nR2@EXAMPLE.COM,attendee\nghost@example.com,attendee\n"
+    report = client.post("/events/re2/roster", data=body, headers={"Content-Type": "text/csv; charset=utf-8"}).json()
+    assert [(row["user_id"], row["status"]) for row in report["rows"]] == \
+        [("r1", "created"), ("r2", "created"), (None, "user_not_found")]
+
+def test_unreadable_bodies_and_unknown_events(client, monkeypatch):
+    seed("re3")
+    assert client.post("/events/re3/roster", data="name,role\nx,host\n", headers={"Content-Type": "text/csv"}).status_code == 400
+    assert client.post("/events/missing/roster", data=ndjson({"user_id": "r1", "role": "host"})).status_code == 404
+    monkeypatch.setattr(event_router, "ROSTER_MAX_ROWS", 2)
+    body = ndjson(*[{"user_id": f"r{n}", "role": "attendee"} for n in range(3)])
+    assert client.post("/events/re3/roster", data=body).status_code == 413
+
+def test_unprocessed_writes_are_reported_as_failed(app_tables):
+    event = seed("re4")
+
+    class FailingRelations(UserEventRelationsRepository):
+        def put_relations(self, items):
+            return [(item, "Unprocessed after retries.") for item in items if item["user_id"] == "r2"]
+    parser = RosterParser(None)
+    for line in ndjson({"user_id": "r1", "role": "host"}, {"user_id": "r2", "role": "host"}).splitlines():
+        parser.feed(line)
+    report = import_roster(event, parser.rows, UserRepository(), FailingRelations())
+    assert [(row["user_id"], row["status"]) for row in report["rows"]] == [("r1", "created"), ("r2", "failed")]
+    assert (report["summary"]["created"], report["summary"]["failed"]) == (1, 1)
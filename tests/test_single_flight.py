@@ -0,0 +1,71 @@
+# tests/test_single_flight.py
+"""
+Single-flight: concurrent identical reads share one call, its result or its
+error; nothing is cached afterwards.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.single_flight import SingleFlight
+
+class Backend:
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.threads = []
+
+    def read(self, result="item", error=None):
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        self.release.wait(5)
+        if error:
+            raise error
+        return {"value": result}
+
+def test_concurrent_thread_callers_share_one_call():
+    flight, backend = SingleFlight(max_workers=2), Backend()
+    key = SingleFlight.key("get_user_by_id", "u1", ["email"])
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.call, key, backend.read) for _ in range(5)]
+        deadline = time.monotonic() + 5
+        while flight.metrics()["calls"] < 5 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        backend.release.set()
+        results = [future.result() for future in futures]
+    assert backend.calls == 1 and all(result is results[0] for result in results)
+    assert flight.metrics()["coalesced"] == 4 and flight.metrics()["in_flight"] == 0
+
+    flight.call(key, backend.read)  # Nothing is cached once the call returns
+    assert backend.calls == 2
+
+def test_async_callers_share_the_call_and_its_error():
+    flight, backend = SingleFlight(max_workers=2), Backend()
+
+    async def scenario():
+        key = SingleFlight.key("get_event_by_id", "e1", None)
+        calls = [flight.run(key, lambda: backend.read(error=RuntimeError("down"))) for _ in range(3)]
+        gathered = asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        backend.release.set()
+        return await gathered
+    results = asyncio.run(scenario())
+    assert backend.calls == 1 and [str(result) for result in results] == ["down"] * 3
+    assert backend.threads[0].startswith("single-flight")
+
+def test_different_keys_are_not_coalesced():
+    flight, backend = SingleFlight(max_workers=2), Backend()
+    backend.release.set()
+    flight.call(SingleFlight.key("get_user_by_id", "u1", None), backend.read)
+    flight.call(SingleFlight.key("get_user_by_id", "u1", ["email"]), backend.read)
+    assert backend.calls == 2
+
+def test_disabled_calls_still_run_off_the_event_loop():
+    flight, backend = SingleFlight(max_workers=2, enabled=False), Backend()
+    backend.release.set()
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run(("op",), backend.read) for _ in range(2)))
+    assert asyncio.run(scenario()) == [{"value": "item"}] * 2
+    assert backend.calls == 2 and all(name.startswith("single-flight") for name in backend.threads)
@@ -0,0 +1,77 @@
+# tests/test_single_table.py
+"""
+Single-table layout: dual writes into the mirror, counting of failed mirror
+writes, one-Query profile reads, and the backfill/verify migration.
+"""
+from botocore.exceptions import ClientError
+
+from app.core.config import SINGLE_TABLE_NAME
+from app.jobs import migrate_single_table
+from app.repositories.events_repository import EventRepository
+from app.repositories.single_table_repository import SingleTableRepository, USER_PROFILE_SK
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.repositories.users_repository import UserRepository
+from app.routers import user_router
+
+USER = {"user_id": "u1", "first_name": "Alice", "last_name": "Smith", "phone_number": "+100", "email": "alice@example.com"}
+EVENT = {"event_id": "e1", "title": "Meetup", "slug": "meetup", "venue": "Hall A",
+         "start_at": "2025-01-01T10:00:00Z", "end_at": "2025-01-01T12:00:00Z"}
+
+def mirrored(*factories):
+    mirror = SingleTableRepository()
+    repos = [factory() for factory in factories]
+    for repo in repos:
+        repo.mirror = mirror
+    return mirror, repos
+
+def test_dual_writes_serve_a_profile_from_one_query(app_tables):
+    mirror, (users, events, relations) = mirrored(UserRepository, EventRepository, UserEventRelationsRepository)
+    users.create_user(dict(USER))
+    events.create_event(dict(EVENT))
+    relations.put_relations([build_relation(USER, EVENT, "host"), build_relation(USER, EVENT, "attendee")])
+
+    profile, user_events = mirror.get_user_with_events("u1")
+    assert profile["email"] == "alice@example.com" and "PK" not in profile
+    assert sorted(item["role"] for item in user_events) == ["attendee", "host"]
+    event, event_users = mirror.get_event_with_users("e1")
+    assert event["title"] == "Meetup" and len(event_users) == 2
+
+    users.delete_user("u1")
+    assert mirror.get_user_with_events("u1")[0] is None
+    assert mirror.failure_metrics()["failures"] == 0
+
+def test_failed_mirror_writes_are_counted_not_raised(app_tables, monkeypatch):
+    mirror, (users,) = mirrored(UserRepository)
+
+    def failing_put(**kwargs):
+        raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}}, "PutItem")
+    monkeypatch.setattr(mirror.table, "put_item", failing_put)
+    users.create_user(dict(USER))
+    users.create_user(dict(USER, user_id="u2"))
+    assert users.get_user_by_id("u2")["email"] == "alice@example.com"
+    metrics = mirror.failure_metrics()
+    assert (metrics["failures"], metrics["by_operation"], metrics["sample_keys"]) == (2, {"put_user": 2}, ["u1", "u2"])
+
+def test_backfill_then_verify(app_tables):
+    UserRepository().create_user(dict(USER))
+    EventRepository().create_event(dict(EVENT))
+    UserEventRelationsRepository().put_relations([build_relation(USER, EVENT, "host")])
+
+    report = migrate_single_table.backfill(total_segments=2)
+    assert {name: counts.get("written") for name, counts in report.items()} == {"Users": 1, "Events": 1, "UserEventRelations": 1}
+    assert migrate_single_table.backfill(total_segments=2)["Users"] == {"already_present": 1, "scanned": 1}
+
+    verified = migrate_single_table.verify(total_segments=2)
+    assert all(verified[name].get("matched") == 1 for name in ("Users", "Events", "UserEventRelations"))
+    UserRepository().delete_user("u1")  # Not mirrored: the single-table row is left behind
+    orphans = migrate_single_table.verify(total_segments=2)[SINGLE_TABLE_NAME]
+    assert (orphans["orphaned"], orphans["checked"], orphans["sample_keys"]) == (1, 2, [("USER#u1", USER_PROFILE_SK)])
+
+def test_profile_route_reads_the_single_table_when_on(client, monkeypatch):
+    mirror, (users, relations) = mirrored(UserRepository, UserEventRelationsRepository)
+    users.create_user(dict(USER))
+    relations.put_relations([build_relation(USER, EVENT, "host")])
+    monkeypatch.setattr(user_router, "SINGLE_TABLE_MODE", "on")
+    monkeypatch.setattr(user_router, "get_single_table_repo", lambda: mirror)
+    profile = client.get("/users/u1/profile").json()
+    assert profile["user"]["user_id"] == "u1" and [item["event_id"] for item in profile["events"]] == ["e1"]
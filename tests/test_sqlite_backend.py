@@ -0,0 +1,184 @@
+# tests/test_sqlite_backend.py
+"""
+Runs the same calls against moto's DynamoDB and the embedded SQLite backend and
+compares the results, so the backend's semantics stay those of DynamoDB. Where
+moto itself departs from DynamoDB (GSI result order across base partitions,
+scan segments, GSI key types) the SQLite side is checked against DynamoDB's
+documented behaviour instead.
+"""
+import os
+
+import boto3
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app.storage.sqlite_backend import SQLiteResource
+
+moto = pytest.importorskip("moto")
+
+TABLE = "Items"
+INDEX = "g-sk-index"
+
+def create_table(resource) -> None:
+    resource.meta.client.create_table(
+        TableName=TABLE,
+        KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+        AttributeDefinitions=[
+            {"AttributeName": "pk", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+            {"AttributeName": "g", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[{
+            "IndexName": INDEX,
+            "KeySchema": [{"AttributeName": "g", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+            "Projection": {"ProjectionType": "ALL"},
+        }],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+def seed(table) -> None:
+    for n in range(40):
+        item = {"pk": f"p{n % 4}", "sk": f"s{n:03d}", "n": n, "tag": "odd" if n % 2 else "even"}
+        if n % 5:
+            item["g"] = f"g{n % 2}"  # Every fifth item stays out of the sparse index
+        table.put_item(Item=item)
+
+@pytest.fixture(scope="module")
+def tables():
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_dynamodb():
+        dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+        sqlite = SQLiteResource(":memory:")
+        pair = []
+        for resource in (dynamodb, sqlite):
+            create_table(resource)
+            table = resource.Table(TABLE)
+            seed(table)
+            pair.append(table)
+        yield pair
+
+def both(tables, call):
+    return [call(table) for table in tables]
+
+def error_code(call) -> str:
+    with pytest.raises(ClientError) as info:
+        call()
+    return info.value.response["Error"]["Code"]
+
+def pages(table, **kwargs):
+    result = []
+    while True:
+        response = table.query(**kwargs)
+        result.append((response["Items"], response.get("LastEvaluatedKey")))
+        if "LastEvaluatedKey" not in response:
+            return result
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+def assert_same_pages(expected, actual, descending=False):
+    """Same page sizes and items; SQLite must also return them in GSI range-key order, as DynamoDB does."""
+    assert [len(items) for items, _ in actual] == [len(items) for items, _ in expected]
+    assert [last is None for _, last in actual] == [last is None for _, last in expected]
+    flat = [item for items, _ in actual for item in items]
+    assert flat == sorted(flat, key=lambda item: item["sk"], reverse=descending)
+    assert sorted(flat, key=lambda item: item["sk"]) == sorted(
+        (item for items, _ in expected for item in items), key=lambda item: item["sk"]
+    )
+    for (items, last) in actual:
+        if last is not None:
+            assert last == {name: items[-1][name] for name in ("pk", "sk", "g")}
+
+def test_gsi_query_pagination(tables):
+    expected, actual = both(tables, lambda t: pages(t, IndexName=INDEX, KeyConditionExpression=Key("g").eq("g1"), Limit=7))
+    assert_same_pages(expected, actual)
+
+def test_gsi_query_descending_with_range_condition(tables):
+    expected, actual = both(tables, lambda t: pages(
+        t, IndexName=INDEX, KeyConditionExpression=Key("g").eq("g0") & Key("sk").between("s005", "s030"),
+        ScanIndexForward=False, Limit=4
+    ))
+    assert_same_pages(expected, actual, descending=True)
+
+def test_base_table_query_pagination(tables):
+    expected, actual = both(tables, lambda t: pages(t, KeyConditionExpression=Key("pk").eq("p2"), Limit=3))
+    assert actual == expected
+
+def test_limit_applies_before_filter(tables):
+    def call(table):
+        response = table.query(
+            KeyConditionExpression=Key("pk").eq("p1"), FilterExpression=Attr("n").gt(20), Limit=6
+        )
+        return response["Items"], response["Count"], response["ScannedCount"], response.get("LastEvaluatedKey")
+    expected, actual = both(tables, call)
+    assert actual == expected
+
+def test_scan_segments_partition_the_table(tables):
+    dynamodb, sqlite = tables
+    segments = []
+    for segment in range(3):
+        keys, kwargs = [], {"Segment": segment, "TotalSegments": 3, "Limit": 5}
+        while True:
+            response = sqlite.scan(**kwargs)
+            keys += [(item["pk"], item["sk"]) for item in response["Items"]]
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        segments.append(keys)
+    flat = [key for keys in segments for key in keys]
+    # moto ignores Segment, so only the union is compared with it
+    assert len(flat) == len(set(flat))
+    assert set(flat) == {(item["pk"], item["sk"]) for item in dynamodb.scan()["Items"]}
+
+def test_scan_filter_and_projection(tables):
+    def call(table):
+        response = table.scan(FilterExpression=Attr("tag").eq("odd") & Attr("g").exists(), ProjectionExpression="pk, sk, n")
+        return sorted(response["Items"], key=lambda item: item["sk"]), response["Count"]
+    expected, actual = both(tables, call)
+    assert actual == expected
+
+def test_update_returns_updated_new(tables):
+    def call(table):
+        return table.update_item(
+            Key={"pk": "p0", "sk": "s000"},
+            UpdateExpression="SET #t = :t, visits = if_not_exists(visits, :zero) + :one REMOVE g",
+            ExpressionAttributeNames={"#t": "tag"},
+            ExpressionAttributeValues={":t": "updated", ":zero": 0, ":one": 1},
+            ReturnValues="UPDATED_NEW",
+        )["Attributes"]
+    expected, actual = both(tables, call)
+    assert actual == expected == {"tag": "updated", "visits": 1}
+
+def test_condition_failure(tables):
+    codes = both(tables, lambda t: error_code(lambda: t.put_item(
+        Item={"pk": "p0", "sk": "s004", "n": 4}, ConditionExpression=Attr("pk").not_exists()
+    )))
+    assert codes == ["ConditionalCheckFailedException"] * 2
+    codes = both(tables, lambda t: error_code(lambda: t.update_item(
+        Key={"pk": "p0", "sk": "missing"}, UpdateExpression="SET n = :n",
+        ConditionExpression=Attr("pk").exists(), ExpressionAttributeValues={":n": 1}
+    )))
+    assert codes == ["ConditionalCheckFailedException"] * 2
+    expected, actual = both(tables, lambda t: t.get_item(Key={"pk": "p0", "sk": "missing"}).get("Item"))
+    assert actual == expected is None
+
+@pytest.mark.parametrize("item", [
+    {"pk": "p9", "sk": "s900", "g": None},   # NULL index key
+    {"pk": "p9", "sk": "s901", "g": ""},     # Empty index key
+    {"pk": "p9", "sk": ""},                  # Empty primary key
+    {"pk": "p9"},                            # Missing range key
+])
+def test_invalid_keys_are_rejected(tables, item):
+    codes = both(tables, lambda t: error_code(lambda: t.put_item(Item=item)))
+    assert codes == ["ValidationException"] * 2
+
+def test_update_to_null_index_key_is_rejected(tables):
+    codes = both(tables, lambda t: error_code(lambda: t.update_item(
+        Key={"pk": "p1", "sk": "s001"}, UpdateExpression="SET g = :g", ExpressionAttributeValues={":g": ""}
+    )))
+    assert codes == ["ValidationException"] * 2
+
+def test_index_key_type_mismatch_is_rejected(tables):
+    # DynamoDB rejects an index key of the wrong type; moto 4 does not check it
+    _, sqlite = tables
+    assert error_code(lambda: sqlite.put_item(Item={"pk": "p9", "sk": "s902", "g": 5})) == "ValidationException"
@@ -0,0 +1,49 @@
+# tests/test_suggestions.py
+"""
+Contact suggestions: top-K neighbours from the CSR incidence matrix, and
+incremental runs that re-read only the changed events, page by page.
+"""
+from app.jobs import suggestions
+from app.jobs.suggestions import IncidenceMatrix
+from app.repositories.suggestions_repository import SuggestionsRepository
+from app.repositories.user_event_repository import UserEventRelationsRepository, build_relation
+from app.storage import sqlite_backend
+
+def neighbours(matrix, user_id, k=10, max_event_size=100):
+    code = matrix.user_codes[user_id]
+    ((_, found),) = matrix.top_neighbours(k, max_event_size, [code])
+    return [(matrix.user_ids[other], shared) for other, shared in found]
+
+def test_top_neighbours_rank_by_shared_events():
+    matrix = IncidenceMatrix.from_pairs([
+        ("a", "e1"), ("b", "e1"), ("c", "e1"),
+        ("a", "e2"), ("b", "e2"),
+        ("a", "e3"), ("d", "e3"), ("d", "e3"),
+    ])
+    assert neighbours(matrix, "a") == [("b", 2), ("c", 1), ("d", 1)]
+    assert neighbours(matrix, "a", k=2) == [("b", 2), ("c", 1)]
+    assert neighbours(matrix, "d") == [("a", 1)]
+    # Events above the size cap are ignored
+    assert neighbours(matrix, "c", max_event_size=2) == []
+
+def test_save_and_load_keep_the_matrix(tmp_path):
+    matrix = IncidenceMatrix.from_pairs([("a", "e1"), ("b", "e1"), ("b", "e2")])
+    path = str(tmp_path / "graph.pickle.gz")
+    matrix.save(path)
+    loaded = IncidenceMatrix.load(path)
+    assert sorted(loaded.pairs()) == sorted(matrix.pairs())
+    assert loaded.members("e1") == ["a", "b"]
+
+def test_incremental_run_reads_every_page_of_a_changed_event(app_tables, tmp_path, monkeypatch):
+    relations, store = UserEventRelationsRepository(), SuggestionsRepository()
+    path = str(tmp_path / "graph.pickle.gz")
+    event = {"event_id": "e1", "title": "Meetup"}
+    relations.put_relations([build_relation({"user_id": user_id}, event, "attendee") for user_id in ("u0", "u1")])
+    suggestions.run_full(total_segments=2, path=path, relations_repo=relations, suggestions_repo=store)
+    assert store.get_suggestions("u0")["suggestions"] == [{"user_id": "u1", "shared_events": 1}]
+
+    relations.put_relations([build_relation({"user_id": f"u{n}"}, event, "attendee") for n in range(2, 6)])
+    monkeypatch.setattr(sqlite_backend, "MAX_PAGE_BYTES", 1)  # One relation per Query page
+    written = suggestions.run_incremental(["e1"], path=path, relations_repo=relations, suggestions_repo=store)
+    assert written == 6
+    assert [s["user_id"] for s in store.get_suggestions("u0")["suggestions"]] == ["u1", "u2", "u3", "u4", "u5"]